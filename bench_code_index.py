@@ -0,0 +1,107 @@
+"""Benchmark the trigram code index on a synthetic git repository.
+
+Builds a tree of N small Python-like files (committed to git so
+``git ls-files`` sees them), then measures:
+
+- the first (cold) index build
+- a no-change refresh, and a refresh after touching 100 files
+- literal, regex and glob-filtered queries against the warm index, with and
+  without a change scan being due (on a tree this size the scan runs in the
+  background, so the query does not wait for it)
+- the same queries through ``grep -r``, which rescans the tree every time
+
+Run: python bench_code_index.py [N]
+"""
+
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from deepagents_cli import code_index
+from deepagents_cli.code_index import CodeIndex
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+WORDS = [
+    f"{prefix}_{suffix}"
+    for prefix in ("load", "save", "parse", "render", "fetch", "build")
+    for suffix in ("user", "order", "item", "config", "session", "token", "cache", "event")
+]
+QUERIES = [
+    ("literal", "frobnicate_widget", {"literal": True}),
+    ("regex", r"(frobnicate|defrobnicate)_\w+ = True", {}),
+    ("glob", "render_cache", {"literal": True, "glob": "pkg_1*/**/*.py"}),
+]
+
+
+def _make_tree(root: Path) -> None:
+    rng = random.Random(0)
+    for i in range(N):
+        directory = root / f"pkg_{i % 100}" / f"mod_{i // 100 % 100}"
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = [f"import {rng.choice(WORDS)}"]
+        for j in range(20):
+            word = rng.choice(WORDS)
+            lines.append(f"def {word}_{i * 20 + j}(arg):\n    return {rng.choice(WORDS)}(arg)")
+        if i % 10_000 == 1234:
+            lines.append("frobnicate_widget = True")
+        (directory / f"file_{i}.py").write_text("\n".join(lines) + "\n")
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=root, check=True)
+
+
+def _time(fn, repeat: int = 1) -> tuple[float, object]:
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        start = time.perf_counter()
+        _make_tree(root)
+        print(f"{N} files generated in {time.perf_counter() - start:.1f} s")
+
+        index = CodeIndex(root)
+        elapsed, stats = _time(index.refresh)
+        size_mb = index.db_path.stat().st_size / 1024 / 1024
+        print(
+            f"cold build:         {elapsed * 1000:8.1f} ms "
+            f"({stats.indexed} files, {size_mb:.0f} MiB)"
+        )
+        elapsed, _ = _time(index.refresh, repeat=3)
+        print(f"no-change refresh:  {elapsed * 1000:8.1f} ms")
+        for path in list(root.glob("pkg_7/mod_*/file_*.py"))[:100]:
+            path.write_text(path.read_text() + "# touched\n")
+        elapsed, stats = _time(index.refresh)
+        print(f"refresh, 100 edits: {elapsed * 1000:8.1f} ms ({stats.indexed} re-indexed)")
+
+        for name, pattern, kwargs in QUERIES:
+            elapsed, matches = _time(lambda: index.search(pattern, **kwargs), repeat=5)
+            print(f"{name:>7} query:      {elapsed * 1000:8.1f} ms ({len(matches)} matches)")
+            code_index.REFRESH_INTERVAL_S = 0.0
+            elapsed, _ = _time(lambda: index.search(pattern, **kwargs), repeat=5)
+            code_index.REFRESH_INTERVAL_S = 2.0
+            print(f"{name:>7} scan due:   {elapsed * 1000:8.1f} ms")
+            if shutil.which("grep"):
+                cmd = ["grep", "-rn", "-F" if kwargs.get("literal") else "-E", pattern, "."]
+                if "glob" in kwargs:
+                    cmd[2:2] = ["--include", "*.py"]
+                elapsed, _ = _time(
+                    lambda: subprocess.run(cmd, cwd=root, capture_output=True, check=False)
+                )
+                print(f"{name:>7} grep -r:     {elapsed * 1000:8.1f} ms")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
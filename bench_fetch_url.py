@@ -0,0 +1,97 @@
+"""Benchmark fetch_url's HTML-to-markdown conversion on saved HTML pages.
+
+For each fixture, measures:
+
+- full: ``markdownify`` over the whole document (the old fetch_url)
+- extracted: main-content extraction, then conversion of all of it
+- first chunk: what fetch_url does now: the first ``DEFAULT_MAX_BYTES`` of
+  the document, extracted and converted only as far as the first chunk
+
+with the markdown produced, in characters, and the estimated tokens of what
+the tool hands to the model (the first chunk).
+
+Fixtures are the ``*.html`` files in DIR (save real pages with
+``curl -o DIR/name.html URL``). Without DIR, documentation-style pages of a
+few sizes are generated: navigation, a sidebar of links, inline scripts and
+a long main article with code blocks and tables.
+
+Run: python bench_fetch_url.py [DIR]
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from markdownify import markdownify
+
+from deepagents_cli.prompt_cache import estimate_tokens
+from deepagents_cli.web_content import DEFAULT_MAX_BYTES, decode, html_document, html_to_markdown
+
+GENERATED_SECTIONS = (20, 200, 1000)
+
+
+def _generated_page(sections: int) -> str:
+    nav = "".join(f'<li><a href="/docs/page-{i}">Page {i}</a></li>' for i in range(300))
+    sidebar = "".join(f'<li><a href="#s{i}">Section {i}</a></li>' for i in range(sections))
+    script = "<script>" + "var config = {a: 1, b: [1, 2, 3]};\n" * 2000 + "</script>"
+    body = []
+    for i in range(sections):
+        body.append(f'<h2 id="s{i}">Section {i}</h2>')
+        body.append(f"<p>{'The widget API accepts a configuration object. ' * 8}</p>")
+        if i % 3 == 0:
+            code = f"widget.configure(size={i}, retries=3)\n" * 5
+            body.append(f"<pre><code>{code}</code></pre>")
+        if i % 5 == 0:
+            rows = "".join(
+                f"<tr><td>opt_{j}</td><td>int</td><td>Option {j}</td></tr>" for j in range(10)
+            )
+            header = "<tr><th>Name</th><th>Type</th><th>Description</th></tr>"
+            body.append(f"<table>{header}{rows}</table>")
+    return (
+        f"<!doctype html><html><head><title>Widgets ({sections})</title>{script}</head><body>"
+        f'<header class="site-header"><nav><ul>{nav}</ul></nav></header>'
+        f'<aside class="sidebar"><ul>{sidebar}</ul></aside>'
+        f"<main><h1>Widgets</h1>{''.join(body)}</main>"
+        f"<footer>{'Links and legal text. ' * 50}</footer></body></html>"
+    )
+
+
+def _fixtures() -> list[tuple[str, bytes]]:
+    if len(sys.argv) > 1:
+        paths = sorted(Path(sys.argv[1]).glob("*.html"))
+        return [(path.name, path.read_bytes()) for path in paths]
+    return [(f"generated-{n}", _generated_page(n).encode()) for n in GENERATED_SECTIONS]
+
+
+def _time(fn, repeat: int = 3) -> tuple[float, object]:
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main() -> None:
+    print(
+        f"{'fixture':<24} {'KiB':>7} {'mode':<12} {'ms':>9} {'chars':>9} {'tokens':>9}"
+    )
+    for name, body in _fixtures():
+        modes = {
+            "full": lambda body=body: markdownify(decode(body, None)),
+            "extracted": lambda body=body: html_to_markdown(decode(body, None))[1],
+            "first chunk": lambda body=body: html_document(
+                decode(body[:DEFAULT_MAX_BYTES], None)
+            ).read()[0],
+        }
+        for mode, convert in modes.items():
+            elapsed, markdown = _time(convert)
+            print(
+                f"{name:<24} {len(body) / 1024:7.0f} {mode:<12} {elapsed * 1000:9.1f} "
+                f"{len(markdown):9} {estimate_tokens(markdown):9}"
+            )
+
+if __name__ == "__main__":
+    main()
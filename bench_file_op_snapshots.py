@@ -0,0 +1,108 @@
+"""Benchmark how long file-edit snapshots stall the UI event loop.
+
+Simulates TURNS model turns that each edit EDITS files in parallel against a
+remote backend whose ``download_files`` takes LATENCY_MS per call, and measures
+event-loop stalls with a heartbeat task (the time a Textual app would be
+unable to repaint or handle input):
+
+- blocking: one synchronous ``download_files`` per file before and after each
+  edit, on the event loop (the old FileOpTracker behavior)
+- batched: FileOpTracker snapshots, read in a worker thread with the parallel
+  calls of a turn batched into one request
+
+Run: python bench_file_op_snapshots.py [TURNS] [EDITS] [LATENCY_MS]
+"""
+
+import asyncio
+import sys
+import time
+from dataclasses import dataclass
+
+from langchain_core.messages import ToolMessage
+
+from deepagents_cli.file_ops import FileOpTracker
+
+TURNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+EDITS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+LATENCY_MS = float(sys.argv[3]) if len(sys.argv) > 3 else 200.0
+HEARTBEAT_S = 0.005
+
+
+@dataclass
+class _Response:
+    content: bytes | None
+    error: str | None = None
+
+
+class _SlowBackend:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.version = 0
+
+    def download_files(self, paths: list[str]) -> list[_Response]:
+        self.calls += 1
+        time.sleep(LATENCY_MS / 1000)
+        return [_Response(f"{p}\nversion {self.version}\n".encode()) for p in paths]
+
+
+async def _heartbeat(stalls: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_S)
+        stalls.append(max(0.0, time.perf_counter() - start - HEARTBEAT_S))
+
+
+async def _blocking_turn(backend: _SlowBackend, paths: list[str]) -> None:
+    for path in paths:
+        backend.download_files([path])
+        await asyncio.sleep(0)
+    await asyncio.sleep(LATENCY_MS / 1000)
+    backend.version += 1
+    for path in paths:
+        backend.download_files([path])
+        await asyncio.sleep(0)
+
+
+async def _batched_turn(backend: _SlowBackend, paths: list[str]) -> None:
+    tracker = FileOpTracker(assistant_id=None, backend=backend)
+    for i, path in enumerate(paths):
+        tracker.start_operation("edit_file", {"file_path": path}, str(i))
+    # The tools run while the before-snapshots are read.
+    await asyncio.sleep(LATENCY_MS / 1000)
+    backend.version += 1
+    records = [
+        tracker.complete_with_message(ToolMessage(content="ok", tool_call_id=str(i)))
+        for i in range(len(paths))
+    ]
+    for record in records:
+        await tracker.finalize_diff(record)
+
+
+async def _run(turn) -> tuple[float, float, float, int]:
+    backend = _SlowBackend()
+    stalls: list[float] = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stalls, stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for t in range(TURNS):
+        await turn(backend, [f"/src/module_{t}_{i}.py" for i in range(EDITS)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await heartbeat
+    return elapsed, max(stalls, default=0.0), sum(stalls), backend.calls
+
+
+def main() -> None:
+    print(f"{TURNS} turns x {EDITS} parallel edits, download_files latency {LATENCY_MS:.0f} ms")
+    for name, turn in (("blocking", _blocking_turn), ("batched", _batched_turn)):
+        elapsed, worst, total, calls = asyncio.run(_run(turn))
+        per_edit = total / (TURNS * EDITS) * 1000
+        print(
+            f"{name:>9}: {elapsed:6.2f} s total  worst stall {worst * 1000:7.1f} ms  "
+            f"stall/edit {per_edit:7.1f} ms  {calls:3d} download_files calls"
+        )
+
+
+if __name__ == "__main__":
+    main()
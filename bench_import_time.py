@@ -0,0 +1,96 @@
+"""Benchmark startup cost of the lightweight deepagents subcommands.
+
+Runs ``--version``, ``help`` and ``threads list`` in fresh interpreters with
+``-X importtime``, reports wall time and total import time, and asserts that
+each stays within a startup budget and never imports the agent framework,
+provider SDKs or Textual.
+
+Run: python bench_import_time.py
+Set DEEPAGENTS_STARTUP_BUDGET_MS to change the per-command budget.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BUDGET_MS = float(os.environ.get("DEEPAGENTS_STARTUP_BUDGET_MS", "800"))
+RUNS = 5
+
+COMMANDS: dict[str, list[str]] = {
+    "--version": ["--version"],
+    "help": ["help"],
+    "threads list": ["threads", "list"],
+}
+
+# Top-level packages none of the lightweight subcommands should load.
+FORBIDDEN = {
+    "deepagents",
+    "langchain",
+    "langchain_anthropic",
+    "langchain_openai",
+    "langgraph",
+    "mcp",
+    "tavily",
+    "textual",
+}
+
+_DRIVER = (
+    "import sys; sys.argv = ['deepagents', *sys.argv[1:]]\n"
+    "from deepagents_cli.main import cli_main\n"
+    "try:\n"
+    "    cli_main()\n"
+    "except SystemExit:\n"
+    "    pass\n"
+)
+
+
+def _run(argv: list[str], home: str) -> tuple[float, float, set[str]]:
+    env = {**os.environ, "HOME": home}
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _DRIVER, *argv],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    import_us = 0
+    imported: set[str] = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # Format: "import time: <self us> | <cumulative us> | <module>"
+        self_us, _cumulative, name = line.removeprefix("import time:").split("|", 2)
+        if not self_us.strip().isdigit():
+            continue
+        import_us += int(self_us)
+        imported.add(name.strip().split(".")[0])
+    return wall_ms, import_us / 1000, imported
+
+
+def main() -> None:
+    failures: list[str] = []
+    with tempfile.TemporaryDirectory() as home:
+        for label, argv in COMMANDS.items():
+            samples = [_run(argv, home) for _ in range(RUNS)]
+            wall_ms = min(sample[0] for sample in samples)
+            import_ms = min(sample[1] for sample in samples)
+            leaked = sorted(samples[0][2] & FORBIDDEN)
+            print(
+                f"{label:>13}: {wall_ms:7.1f} ms wall  {import_ms:7.1f} ms imports  "
+                f"heavy imports: {', '.join(leaked) or 'none'}"
+            )
+            if wall_ms > BUDGET_MS:
+                failures.append(f"{label} took {wall_ms:.0f} ms (budget {BUDGET_MS:.0f} ms)")
+            if leaked:
+                failures.append(f"{label} imported {', '.join(leaked)}")
+
+    assert not failures, "; ".join(failures)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark computing the local context for a new thread.
+
+Builds a synthetic repository with BRANCHES local branches and a few hundred
+directories, then times LocalContextMiddleware on the first thread (probes
+run, fingerprint written) and on later threads (fingerprint reused).
+
+Run: python bench_local_context.py [BRANCHES]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from deepagents_cli.local_context import LocalContextMiddleware
+
+BRANCHES = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+RUNS = 5
+
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def _build_repo(root: Path) -> Path:
+    repo = root / "repo"
+    for pkg in range(30):
+        for sub in range(10):
+            directory = repo / "packages" / f"pkg{pkg}" / f"mod{sub}"
+            directory.mkdir(parents=True)
+            (directory / "index.ts").write_text("export {}\n")
+    (repo / "package.json").write_text('{"scripts": {"test": "jest"}}')
+    (repo / "pnpm-workspace.yaml").write_text("packages: ['packages/*']\n")
+    _git(repo, "init", "-q", "-b", "main")
+    identity = ("-c", "user.name=bench", "-c", "user.email=bench@example.com")
+    _git(repo, *identity, "commit", "-q", "--allow-empty", "-m", "init")
+    head = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=repo, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    refs = "".join(f"create refs/heads/topic/{i} {head}\n" for i in range(BRANCHES))
+    subprocess.run(
+        ["git", "update-ref", "--stdin"], cwd=repo, input=refs, text=True, check=True
+    )
+    return repo
+
+
+def _time_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        repo = _build_repo(root)
+        os.environ["HOME"] = str(root / "home")
+        os.chdir(repo)
+        middleware = LocalContextMiddleware()
+
+        git_branch = _time_ms(lambda: _git(repo, "branch"))
+        cold = [_time_ms(lambda: middleware.build_fingerprint(repo)) for _ in range(RUNS)]
+        middleware.get_local_context()
+        warm = [_time_ms(middleware.get_local_context) for _ in range(RUNS)]
+
+    print(f"Repository with {BRANCHES} branches and 300 directories")
+    print(f"{'git branch':>14}: {git_branch:7.1f} ms (old main/master check alone)")
+    print(f"{'first thread':>14}: {min(cold):7.1f} ms (all probes)")
+    print(f"{'later threads':>14}: {min(warm):7.1f} ms (fingerprint reused)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark paging through a large log with read_file.
+
+Writes a synthetic log of SIZE_MB megabytes (default 2048) to a temporary
+directory, then reads 2000-line pages at the start, middle and end of it
+with:
+
+- base: ``FilesystemBackend.read`` (reads and splits the whole file per page)
+- indexed: ``IndexedFilesystemBackend.read``, cold (the first read builds
+  the line index) and then with the index cached
+
+The base backend holds the decoded file and all its lines in memory, several
+times SIZE_MB, so it is skipped above ``BASE_MAX_MB``.
+
+Run: python bench_read_file.py [SIZE_MB]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from deepagents.backends.filesystem import FilesystemBackend
+
+from deepagents_cli.file_backend import IndexedFilesystemBackend
+
+PAGE_LINES = 2000
+BASE_MAX_MB = 512
+
+
+def _write_log(path: Path, size_mb: int) -> int:
+    """Write about ``size_mb`` MB of log lines; return the line count."""
+    chunk_lines = [
+        f"2024-05-01T12:{i // 60 % 60:02}:{i % 60:02}Z INFO worker-{i % 16} "
+        f"processed request id={i:08} status=200 duration_ms={i % 997}\n"
+        for i in range(10_000)
+    ]
+    chunk = "".join(chunk_lines).encode()
+    repeats = max(1, size_mb * 1024 * 1024 // len(chunk))
+    with path.open("wb") as f:
+        for _ in range(repeats):
+            f.write(chunk)
+    return repeats * len(chunk_lines)
+
+
+def _time(fn) -> tuple[float, str]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "synthetic.log"
+        lines = _write_log(path, size_mb)
+        print(f"{path.stat().st_size / 2**20:.0f} MiB, {lines} lines, {PAGE_LINES}-line pages")
+        offsets = {"start": 0, "middle": lines // 2, "end": lines - PAGE_LINES}
+
+        print(f"{'backend':<22} {'page':<8} {'ms':>10}")
+        base = FilesystemBackend()
+        for name, offset in offsets.items():
+            if size_mb > BASE_MAX_MB:
+                print(f"{'base':<22} {name:<8} {'skipped':>10}")
+                continue
+            elapsed, page = _time(lambda offset=offset: base.read(str(path), offset, PAGE_LINES))
+            print(f"{'base':<22} {name:<8} {elapsed * 1000:10.1f}")
+            del page
+
+        indexed = IndexedFilesystemBackend()
+        elapsed, _ = _time(lambda: indexed.read(str(path), 0, PAGE_LINES))
+        print(f"{'indexed (cold)':<22} {'start':<8} {elapsed * 1000:10.1f}")
+        for name, offset in offsets.items():
+            elapsed, _ = _time(lambda offset=offset: indexed.read(str(path), offset, PAGE_LINES))
+            print(f"{'indexed':<22} {name:<8} {elapsed * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark coalesced rendering of streamed assistant text.
+
+Drives a fake agent stream (many tiny text chunks) through the render
+scheduler with a sink that simulates the blocking cost of a markdown
+re-parse, and reports chunks/sec, frames rendered and frame time for
+per-chunk rendering versus frame-rate-limited rendering.
+
+Run: python bench_render_scheduler.py
+"""
+
+import asyncio
+import statistics
+import time
+
+from deepagents_cli.render_scheduler import RenderScheduler
+
+CHUNKS = 3000
+CHUNK_TEXT = "tok "
+# Interval between chunks from the fake model (~2000 chunks/sec).
+CHUNK_INTERVAL = 0.0005
+# Simulated markdown cost: fixed overhead per write plus per-character work.
+RENDER_OVERHEAD = 0.0015
+RENDER_PER_CHAR = 2e-7
+
+
+async def _fake_agent_stream():
+    for _ in range(CHUNKS):
+        await asyncio.sleep(CHUNK_INTERVAL)
+        yield CHUNK_TEXT
+
+
+async def _run(fps: float) -> dict[str, float]:
+    frame_times: list[float] = []
+    rendered: list[str] = []
+
+    async def sink(_key: tuple, text: str) -> None:
+        start = time.perf_counter()
+        # Blocks the event loop, like MarkdownStream parsing does.
+        time.sleep(RENDER_OVERHEAD + len(text) * RENDER_PER_CHAR)
+        rendered.append(text)
+        frame_times.append(time.perf_counter() - start)
+
+    scheduler = RenderScheduler(sink, fps=fps)
+    start = time.perf_counter()
+    async for text in _fake_agent_stream():
+        await scheduler.write((), text)
+    await scheduler.flush_all()
+    elapsed = time.perf_counter() - start
+
+    assert "".join(rendered) == CHUNK_TEXT * CHUNKS
+    return {
+        "chunks_per_sec": CHUNKS / elapsed,
+        "frames": len(frame_times),
+        "frame_ms_mean": statistics.mean(frame_times) * 1000,
+        "render_ms_total": sum(frame_times) * 1000,
+        "elapsed_s": elapsed,
+    }
+
+
+def main() -> None:
+    print(f"{CHUNKS} chunks, target {1 / CHUNK_INTERVAL:.0f} chunks/sec from the fake model")
+    for label, fps in (("per-chunk", 0.0), ("30 fps", 30.0), ("60 fps", 60.0)):
+        stats = asyncio.run(_run(fps))
+        print(
+            f"{label:>10}: {stats['chunks_per_sec']:7.0f} chunks/s  "
+            f"{stats['frames']:5d} frames  "
+            f"{stats['frame_ms_mean']:.2f} ms/frame  "
+            f"{stats['render_ms_total']:7.0f} ms rendering  "
+            f"{stats['elapsed_s']:.2f} s wall"
+        )
+
+
+if __name__ == "__main__":
+    main()
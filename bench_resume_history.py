@@ -0,0 +1,117 @@
+"""Benchmark resuming a long thread into the chat transcript.
+
+Builds a 5,000-message history (user turns, assistant text, tool calls and
+tool results) and renders it in a headless Textual app two ways:
+
+- eager: one widget per message, each mounted and awaited in turn (the old
+  ``_load_thread_history`` behavior)
+- virtual: lightweight records plus ``VirtualTranscript``, which mounts only
+  the newest page(s) needed to fill the screen
+
+Reports time until the transcript is ready and the number of widgets mounted.
+Eager mounting slows down as the transcript grows (hundreds of messages
+already take tens of seconds), so it is only timed on the newest
+EAGER_MESSAGES messages; the full eager resume is slower still.
+
+Run: python bench_resume_history.py [MESSAGES] [EAGER_MESSAGES]
+"""
+
+import asyncio
+import sys
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from textual.app import App, ComposeResult
+from textual.containers import Container, VerticalScroll
+
+from deepagents_cli.widgets.messages import AssistantMessage, ToolCallMessage, UserMessage
+from deepagents_cli.widgets.transcript import VirtualTranscript, records_from_messages
+
+MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+EAGER_MESSAGES = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+
+def _history(count: int) -> list:
+    messages: list = []
+    turn = 0
+    while len(messages) < count:
+        call_id = f"call_{turn}"
+        messages.extend(
+            [
+                HumanMessage(content=f"Please check file {turn}"),
+                AIMessage(
+                    content=f"Reading **file {turn}** now.",
+                    tool_calls=[
+                        {"id": call_id, "name": "read_file", "args": {"file_path": f"/f{turn}.py"}}
+                    ],
+                ),
+                ToolMessage(content="def main():\n    pass\n" * 5, tool_call_id=call_id),
+                AIMessage(content=f"File {turn} defines `main`.\n\n- looks fine\n- no changes"),
+            ]
+        )
+        turn += 1
+    return messages[:count]
+
+
+class _ResumeApp(App[None]):
+    CSS_PATH = "src/deepagents_cli/app.tcss"
+
+    def __init__(self, messages: list, *, virtual: bool) -> None:
+        super().__init__()
+        self._messages = messages
+        self._virtual = virtual
+        self.ready_s = 0.0
+
+    def compose(self) -> ComposeResult:
+        with VerticalScroll(id="chat"):
+            yield Container(id="messages")
+
+    async def load(self) -> None:
+        start = time.perf_counter()
+        container = self.query_one("#messages", Container)
+        records = records_from_messages(self._messages)
+        if self._virtual:
+            transcript = VirtualTranscript(records)
+            await container.mount(transcript)
+            await transcript.load_older()
+            transcript.follow_scroll(self.query_one("#chat", VerticalScroll))
+        else:
+            for record in records:
+                if record.kind == "user":
+                    await container.mount(UserMessage(record.content))
+                elif record.kind == "assistant":
+                    widget = AssistantMessage(record.content)
+                    await container.mount(widget)
+                    await widget.write_initial_content()
+                else:
+                    widget = ToolCallMessage(record.tool_name, record.tool_args)
+                    await container.mount(widget)
+                    widget.set_success(record.content)
+        self.query_one("#chat", VerticalScroll).scroll_end(animate=False)
+        self.ready_s = time.perf_counter() - start
+
+
+async def _run(messages: list, *, virtual: bool) -> tuple[float, int]:
+    app = _ResumeApp(messages, virtual=virtual)
+    async with app.run_test(size=(120, 40)) as pilot:
+        await app.load()
+        await pilot.pause(0.2)
+        return app.ready_s, len(app.query("*"))
+
+
+def main() -> None:
+    messages = _history(MESSAGES)
+    print(f"Resuming a {len(messages)}-message thread")
+    ready_s, widgets = asyncio.run(_run(messages, virtual=True))
+    print(f"{'virtual':>8}: {ready_s:8.2f} s to ready  {widgets:7d} widgets mounted")
+
+    eager_messages = messages[-EAGER_MESSAGES:]
+    ready_s, widgets = asyncio.run(_run(eager_messages, virtual=False))
+    print(
+        f"{'eager':>8}: {ready_s:8.2f} s to ready  {widgets:7d} widgets mounted "
+        f"(newest {len(eager_messages)} messages only)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark peak memory of the shell tool on a command with huge output.
+
+Runs ``yes | head -c SIZE_MB MiB`` once per mode, each in a fresh
+interpreter so peak RSS is measured independently:
+
+- buffered: ``subprocess.run(capture_output=True, text=True)``, then truncate
+  (the old ShellMiddleware behavior)
+- streaming: ShellMiddleware, which keeps only the head and tail of the output
+
+Run: python bench_shell_output.py [SIZE_MB]
+"""
+
+import asyncio
+import resource
+import subprocess
+import sys
+import time
+
+SIZE_MB = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+MAX_OUTPUT_BYTES = 100_000
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_mode(mode: str, size_mb: int) -> None:
+    command = f"yes | head -c {size_mb * 1024 * 1024}"
+    start = time.perf_counter()
+    if mode == "buffered":
+        result = subprocess.run(command, check=False, shell=True, capture_output=True, text=True)
+        output = result.stdout[:MAX_OUTPUT_BYTES]
+    else:
+        from deepagents_cli.shell import ShellMiddleware
+
+        middleware = ShellMiddleware(workspace_root=".", max_output_bytes=MAX_OUTPUT_BYTES)
+        output = asyncio.run(middleware._run_shell_command(command, tool_call_id="bench")).content
+    elapsed = time.perf_counter() - start
+    print(
+        f"{mode:>10}: peak RSS {_peak_rss_mb():7.1f} MiB, {elapsed:5.2f} s, "
+        f"kept {len(output)} chars"
+    )
+
+
+def main() -> None:
+    if len(sys.argv) > 2:
+        _run_mode(sys.argv[2], SIZE_MB)
+        return
+    print(f"yes | head -c {SIZE_MB} MiB")
+    for mode in ("buffered", "streaming"):
+        subprocess.run([sys.executable, __file__, str(SIZE_MB), mode], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Benchmark sequential short shell commands: persistent session vs fresh shell.
+
+Runs N short commands (``echo``) through ShellMiddleware in one event loop,
+once with a fresh ``/bin/sh`` per command and once with a persistent bash
+session for the thread.
+
+Run: python bench_shell_session.py [N]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+
+from deepagents_cli.shell import ShellMiddleware
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+
+async def _run_mode(persistent: bool, workspace: str) -> float:
+    middleware = ShellMiddleware(workspace_root=workspace, persistent=persistent)
+    start = time.perf_counter()
+    for i in range(N):
+        result = await middleware._run_shell_command(
+            f"echo {i}", tool_call_id=f"call_{i}", thread_id="bench"
+        )
+        assert result.content == f"{i}\n", result.content
+    elapsed = time.perf_counter() - start
+    await middleware.aclose_sessions()
+    return elapsed
+
+
+async def main() -> None:
+    print(f"{N} sequential `echo` commands")
+    with tempfile.TemporaryDirectory() as workspace:
+        for persistent in (False, True):
+            elapsed = await _run_mode(persistent, workspace)
+            mode = "persistent" if persistent else "fresh"
+            print(
+                f"{mode:>10}: {elapsed:6.3f} s total, "
+                f"{elapsed / N * 1000:6.2f} ms/command"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
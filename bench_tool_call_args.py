@@ -0,0 +1,71 @@
+"""Micro-benchmark for streamed tool-call argument assembly.
+
+Streams a ~500 KB ``write_file`` payload in 20-byte chunks through the
+incremental assembler and through the previous join-and-reparse approach.
+
+Run: python bench_tool_call_args.py
+"""
+
+import json
+import time
+
+from deepagents_cli.tool_call_args import ToolCallBuffers
+
+PAYLOAD_BYTES = 500 * 1024
+CHUNK_BYTES = 20
+
+
+def _build_chunks() -> list[str]:
+    line = 'print("hello, world")  # {braces} [brackets] \\ "quotes"\n'
+    content = (line * (PAYLOAD_BYTES // len(line) + 1))[:PAYLOAD_BYTES]
+    payload = json.dumps({"file_path": "/tmp/big.py", "content": content})
+    return [payload[i : i + CHUNK_BYTES] for i in range(0, len(payload), CHUNK_BYTES)]
+
+
+def _run_legacy(chunks: list[str]) -> dict:
+    parts: list[str] = []
+    for chunk in chunks:
+        if not parts or chunk != parts[-1]:
+            parts.append(chunk)
+        args = "".join(parts)
+        try:
+            return json.loads(args)
+        except json.JSONDecodeError:
+            continue
+    raise AssertionError("payload never parsed")
+
+
+def _run_incremental(chunks: list[str]) -> dict:
+    buffers = ToolCallBuffers()
+    first = {"type": "tool_call_chunk", "name": "write_file", "id": "call_1", "index": 0}
+    buffers.feed((), {**first, "args": ""})
+    for chunk in chunks:
+        result = buffers.feed((), {"type": "tool_call_chunk", "index": 0, "args": chunk})
+        if result is not None:
+            return result.args
+    raise AssertionError("payload never parsed")
+
+
+def _time(fn, chunks: list[str]) -> tuple[float, dict]:
+    start = time.perf_counter()
+    result = fn(chunks)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    chunks = _build_chunks()
+    total = sum(len(c) for c in chunks)
+    print(f"payload: {total / 1024:.0f} KB in {len(chunks)} chunks of {CHUNK_BYTES} bytes")
+
+    incremental_s, incremental = _time(_run_incremental, chunks)
+    print(f"incremental: {incremental_s * 1000:8.1f} ms")
+
+    legacy_s, legacy = _time(_run_legacy, chunks)
+    print(f"join+loads:  {legacy_s * 1000:8.1f} ms")
+
+    assert incremental == legacy
+    print(f"speedup: {legacy_s / incremental_s:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,9 +35,18 @@ from deepagents_cli.background_tasks import (
 )
 from deepagents_cli.config import COLORS, config, console, get_default_coding_instructions, settings
 from deepagents_cli.extensions import load_extensions
+from deepagents_cli.file_backend import IndexedFilesystemBackend
+from deepagents_cli.file_ops import FileSnapshotMiddleware
 from deepagents_cli.integrations.sandbox_factory import get_default_working_dir
 from deepagents_cli.local_context import LocalContextMiddleware
-from deepagents_cli.shell import ShellMiddleware
+from deepagents_cli.multi_edit import MultiEditMiddleware
+from deepagents_cli.prompt_cache import (
+    PromptCacheMiddleware,
+    PromptSegment,
+    build_system_message,
+    order_segments,
+)
+from deepagents_cli.shell import ShellLimits, ShellMiddleware
 
 
 @dataclass(frozen=True)
@@ -47,6 +56,12 @@ class _StoreRuntime:
     state: None = None
 
 
+def _persistent_shell_enabled() -> bool:
+    """Whether the shell tool keeps one shell per thread (``DEEPAGENTS_PERSISTENT_SHELL``)."""
+    value = os.environ.get("DEEPAGENTS_PERSISTENT_SHELL", "").strip().lower()
+    return value in {"1", "true", "yes", "on"}
+
+
 def _build_store_backend(*, store: BaseStore, assistant_id: str) -> StoreBackend:
     runtime = _StoreRuntime(
         store=store,
@@ -620,6 +635,26 @@ def get_system_prompt(assistant_id: str, sandbox_type: str | None = None) -> str
     Returns:
         The system prompt string (without AGENTS.md content)
     """
+    working_dir, instructions, coding = get_system_prompt_segments(assistant_id, sandbox_type)
+    return working_dir.text + instructions.text + "\n\n" + coding.text
+
+
+def get_system_prompt_segments(
+    assistant_id: str, sandbox_type: str | None = None
+) -> list[PromptSegment]:
+    """Get the base system prompt split into cacheable segments.
+
+    The working directory differs between projects, so it is scoped to the
+    session; the rest is the same for every thread of the agent.
+
+    Args:
+        assistant_id: The agent identifier for path references
+        sandbox_type: Type of sandbox provider ("modal", "runloop", "daytona").
+                     If None, agent is operating in local mode.
+
+    Returns:
+        Working directory, instructions and coding instructions segments
+    """
     agent_dir_path = f"~/.deepagents/{assistant_id}"
     default_skills_dir = "~/.agents/skills"
 
@@ -662,9 +697,8 @@ Example: `/memories/project_notes.md`
 
 """
 
-    return (
-        working_dir_section
-        + memory_store_section
+    instructions = (
+        memory_store_section
         + f"""### Skills Directories
 
 Skills can be loaded from these locations:
@@ -713,9 +747,12 @@ When using the write_todos tool:
 6. Update todo status promptly as you complete each item
 
 The todo list is a planning tool - use it judiciously to avoid overwhelming the user with excessive task tracking."""
-        + "\n\n"
-        + get_coding_instructions(assistant_id)
     )
+    return [
+        PromptSegment("working_directory", working_dir_section, "session"),
+        PromptSegment("instructions", instructions),
+        PromptSegment("coding_instructions", get_coding_instructions(assistant_id)),
+    ]
 
 
 def _format_write_file_description(
@@ -746,6 +783,17 @@ def _format_edit_file_description(
     )
 
 
+def _format_multi_edit_description(
+    tool_call: ToolCall, _state: AgentState, _runtime: Runtime
+) -> str:
+    """Format multi_edit tool call for approval prompt."""
+    args = tool_call["args"]
+    file_path = args.get("file_path", "unknown")
+    edits = args.get("edits") or []
+
+    return f"File: {file_path}\nAction: Replace text ({len(edits)} edits in one write)"
+
+
 def _format_web_search_description(
     tool_call: ToolCall, _state: AgentState, _runtime: Runtime
 ) -> str:
@@ -771,6 +819,20 @@ def _format_warp_grep_description(
     return "\n".join(details)
 
 
+def _format_warp_grep_many_description(
+    tool_call: ToolCall, _state: AgentState, _runtime: Runtime
+) -> str:
+    """Format warp_grep_many tool call for approval prompt."""
+    args = tool_call["args"]
+    queries = args.get("queries") or []
+    repo_root = args.get("repo_root")
+    details = [f"Queries ({len(queries)}):", *(f"  - {query}" for query in queries)]
+    if repo_root:
+        details.append(f"Repo Root: {repo_root}")
+    details.append("\n⚠️  This will use Morph API credits for each query")
+    return "\n".join(details)
+
+
 def _format_fetch_url_description(
     tool_call: ToolCall, _state: AgentState, _runtime: Runtime
 ) -> str:
@@ -778,8 +840,12 @@ def _format_fetch_url_description(
     args = tool_call["args"]
     url = args.get("url", "unknown")
     timeout = args.get("timeout", 30)
+    cursor = args.get("cursor") or 0
 
-    return f"URL: {url}\nTimeout: {timeout}s\n\n⚠️  Will fetch and convert web content to markdown"
+    details = f"URL: {url}\nTimeout: {timeout}s"
+    if cursor:
+        details += f"\nContinuing from character {cursor}"
+    return f"{details}\n\n⚠️  Will fetch and convert web content to markdown"
 
 
 def _format_fast_apply_description(
@@ -799,7 +865,8 @@ def _format_fast_apply_description(
         f"File: {file_path}\n"
         f"Model: {model}\n"
         f"Instruction: {instruction_preview}\n\n"
-        "⚠️  This will call Morph Fast Apply and overwrite the file"
+        "⚠️  This will overwrite the file (calling Morph Fast Apply only if the edit "
+        "cannot be merged locally)"
     )
 
 
@@ -864,6 +931,11 @@ def _add_interrupt_on() -> dict[str, InterruptOnConfig]:
         "description": _format_edit_file_description,
     }
 
+    multi_edit_interrupt_config: InterruptOnConfig = {
+        "allowed_decisions": ["approve", "reject"],
+        "description": _format_multi_edit_description,
+    }
+
     web_search_interrupt_config: InterruptOnConfig = {
         "allowed_decisions": ["approve", "reject"],
         "description": _format_web_search_description,
@@ -879,6 +951,11 @@ def _add_interrupt_on() -> dict[str, InterruptOnConfig]:
         "description": _format_warp_grep_description,
     }
 
+    warp_grep_many_interrupt_config: InterruptOnConfig = {
+        "allowed_decisions": ["approve", "reject"],
+        "description": _format_warp_grep_many_description,
+    }
+
     fast_apply_interrupt_config: InterruptOnConfig = {
         "allowed_decisions": ["approve", "reject"],
         "description": _format_fast_apply_description,
@@ -893,9 +970,11 @@ def _add_interrupt_on() -> dict[str, InterruptOnConfig]:
         "execute": execute_interrupt_config,
         "write_file": write_file_interrupt_config,
         "edit_file": edit_file_interrupt_config,
+        "multi_edit": multi_edit_interrupt_config,
         "web_search": web_search_interrupt_config,
         "fetch_url": fetch_url_interrupt_config,
         "warp_grep": warp_grep_interrupt_config,
+        "warp_grep_many": warp_grep_many_interrupt_config,
         "fast_apply": fast_apply_interrupt_config,
         "task": task_interrupt_config,
     }
@@ -1027,7 +1106,8 @@ def create_cli_agent(
     # CONDITIONAL SETUP: Local vs Remote Sandbox
     if sandbox is None:
         # ========== LOCAL MODE ==========
-        backend = FilesystemBackend()
+        # Pages through large files by line index instead of reading them whole
+        backend = IndexedFilesystemBackend()
 
         # Local context middleware (git info, directory tree, etc.)
         agent_middleware.append(LocalContextMiddleware())
@@ -1044,6 +1124,8 @@ def create_cli_agent(
                 ShellMiddleware(
                     workspace_root=str(Path.cwd()),
                     env=shell_env,
+                    persistent=_persistent_shell_enabled(),
+                    limits=ShellLimits.from_environment(),
                 )
             )
     else:
@@ -1054,7 +1136,11 @@ def create_cli_agent(
 
     # Get or use custom system prompt
     if system_prompt is None:
-        system_prompt = get_system_prompt(assistant_id=assistant_id, sandbox_type=sandbox_type)
+        prompt_segments = get_system_prompt_segments(
+            assistant_id=assistant_id, sandbox_type=sandbox_type
+        )
+    else:
+        prompt_segments = [PromptSegment("system_prompt", system_prompt)]
 
     # Configure interrupt_on based on auto_approve setting
     if auto_approve:
@@ -1099,6 +1185,11 @@ def create_cli_agent(
             routes=routes,
         )
 
+    # Batched string replacements, through the same backend as edit_file
+    agent_middleware.append(MultiEditMiddleware(backend=composite_backend))
+    # Snapshot files before write tools run, for the diffs the UI shows
+    agent_middleware.append(FileSnapshotMiddleware(backend=composite_backend))
+
     # Load extensions once backend routing is configured
     extension_manager = load_extensions(
         assistant_id=assistant_id,
@@ -1112,10 +1203,7 @@ def create_cli_agent(
 
     if extension_manager.prompt_additions:
         prompt_additions = "\n\n".join(extension_manager.prompt_additions)
-        if system_prompt.endswith("\n"):
-            system_prompt = f"{system_prompt}\n{prompt_additions}"
-        else:
-            system_prompt = f"{system_prompt}\n\n{prompt_additions}"
+        prompt_segments.append(PromptSegment("extensions", prompt_additions))
 
     if extension_manager.tools:
         tools.extend(extension_manager.tools)
@@ -1151,10 +1239,23 @@ def create_cli_agent(
             "name": "code-search",
             "description": "Deep codebase search using Morph WarpGrep.",
             "system_prompt": (
-                "You are a code-search specialist. Use the warp_grep tool to find relevant code. "
+                "You are a code-search specialist. Use the warp_grep tool to find relevant code, "
+                "or warp_grep_many to run several independent searches at once. "
+                "When available, use find_definition, find_references and outline_file "
+                "for exact lookups of Python symbols. "
                 "Return concise findings with file paths and line references."
             ),
-            "tools": [warp_grep_tool],
+            "tools": [
+                tool_by_name[name]
+                for name in (
+                    "warp_grep",
+                    "warp_grep_many",
+                    "find_definition",
+                    "find_references",
+                    "outline_file",
+                )
+                if name in tool_by_name
+            ],
         }
         subagent_skills = _resolve_subagent_skills_sources(
             assistant_id=assistant_id,
@@ -1220,12 +1321,17 @@ def create_cli_agent(
     agent_middleware.append(bg_middleware)
 
     # Inject background task instructions into system prompt
-    if system_prompt:
-        system_prompt += BACKGROUND_TASKS_PROMPT
+    if any(segment.text for segment in prompt_segments):
+        prompt_segments.append(PromptSegment("background_tasks", BACKGROUND_TASKS_PROMPT))
+
+    # Innermost of the middleware that append to the system prompt: orders
+    # every segment for prefix caching and marks cache breakpoints
+    prompt_cache = PromptCacheMiddleware(prompt_segments)
+    agent_middleware.append(prompt_cache)
 
     agent = create_deep_agent(
         model=model,
-        system_prompt=system_prompt,
+        system_prompt=build_system_message(order_segments(prompt_segments)),
         tools=tools,
         subagents=subagents if subagents else None,
         backend=composite_backend,
@@ -1235,4 +1341,5 @@ def create_cli_agent(
         checkpointer=final_checkpointer,
     ).with_config(config)
     setattr(agent, "available_tool_names", available_tool_names)
+    setattr(agent, "prompt_cache", prompt_cache)
     return agent, composite_backend, task_manager
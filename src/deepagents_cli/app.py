@@ -4,12 +4,10 @@
 from __future__ import annotations
 
 import asyncio
-import subprocess
 import uuid
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, ClassVar
 
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from textual.app import App
 from textual.binding import Binding, BindingType
 from textual.containers import Container, VerticalScroll
@@ -23,6 +21,8 @@ from deepagents_cli.commands.types import CommandContext
 from deepagents_cli.config import settings
 from deepagents_cli.model_registry import ModelEntry
 from deepagents_cli.model_controller import ModelController
+from deepagents_cli.prompt_cache import format_segment_report
+from deepagents_cli.shell import close_thread_sessions
 from deepagents_cli.widgets.model_selector import ModelSelectorScreen
 from deepagents_cli.textual_adapter import TextualUIAdapter, execute_task_textual
 from deepagents_cli.widgets.approval import ApprovalMenu
@@ -38,6 +38,7 @@ from deepagents_cli.widgets.messages import (
 from deepagents_cli.widgets.agents_pill import AgentsPill
 from deepagents_cli.widgets.status import StatusBar
 from deepagents_cli.widgets.subagent_panel import SubagentPanel
+from deepagents_cli.widgets.transcript import VirtualTranscript, records_from_messages
 from deepagents_cli.widgets.welcome import WelcomeBanner
 
 if TYPE_CHECKING:
@@ -45,6 +46,10 @@ if TYPE_CHECKING:
     from textual.app import ComposeResult
     from textual.worker import Worker
 
+# Limits for `!` shell commands typed by the user.
+_BASH_TIMEOUT_S = 60.0
+_BASH_OUTPUT_BYTES = 100_000
+
 
 class TextualTokenTracker:
     """Token tracker that updates the status bar."""
@@ -193,6 +198,7 @@ class DeepAgentsApp(App):
         self._background_agent_tasks: set[str] = set()
         self._stream_agent_namespaces: set[tuple] = set()
         self._subagent_panels: dict[tuple, SubagentPanel] = {}
+        self._scroll_scheduled = False
         self._token_tracker: TextualTokenTracker | None = None
         self._model_controller = ModelController(project_root=settings.project_root)
         self._command_registry = build_default_registry()
@@ -299,6 +305,21 @@ class DeepAgentsApp(App):
         if chat.virtual_size.height > chat.size.height:
             chat.scroll_end(animate=False)
 
+    def _request_scroll_to_bottom(self) -> None:
+        """Scroll to the bottom once the pending layout refresh settles.
+
+        Multiple requests before the next refresh collapse into one scroll.
+        """
+        if self._scroll_scheduled:
+            return
+        self._scroll_scheduled = True
+
+        def _do() -> None:
+            self._scroll_scheduled = False
+            self._scroll_chat_to_bottom()
+
+        self.call_after_refresh(_do)
+
     async def _show_thinking(self) -> None:
         """Show or reposition the thinking spinner at the bottom of messages."""
         if self._loading_widget:
@@ -429,7 +450,7 @@ class DeepAgentsApp(App):
         if panel is None:
             return
         await panel.append_text(text)
-        self._scroll_chat_to_bottom()
+        self._request_scroll_to_bottom()
 
     async def _on_subagent_stream_tool_call(
         self, namespace: tuple, tool_name: str, args: dict[str, Any]
@@ -439,7 +460,7 @@ class DeepAgentsApp(App):
         if panel is None:
             return
         panel.append_tool_call(tool_name, args)
-        self._scroll_chat_to_bottom()
+        self._request_scroll_to_bottom()
 
     async def _on_subagent_stream_update(self, namespace: tuple, status_line: str) -> None:
         """Append compact update events for a subagent panel."""
@@ -447,7 +468,7 @@ class DeepAgentsApp(App):
         if panel is None:
             return
         panel.append_event(status_line)
-        self._scroll_chat_to_bottom()
+        self._request_scroll_to_bottom()
 
     async def _request_approval(
         self,
@@ -558,39 +579,44 @@ class DeepAgentsApp(App):
         # Mount user message showing the bash command
         await self._mount_message(UserMessage(f"!{command}"))
 
+        from deepagents_cli.shell import ShellLimits, run_shell_command
+
         # Execute the bash command (shell=True is intentional for user-requested bash)
         try:
-            result = await asyncio.to_thread(  # noqa: S604
-                subprocess.run,
+            result = await run_shell_command(
                 command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                cwd=self._cwd,
-                timeout=60,
+                cwd=str(self._cwd),
+                timeout=_BASH_TIMEOUT_S,
+                max_output_bytes=_BASH_OUTPUT_BYTES,
+                limits=ShellLimits.from_environment(),
             )
-            output = result.stdout.strip()
-            if result.stderr:
-                output += f"\n[stderr]\n{result.stderr.strip()}"
-
-            if output:
-                # Display output as assistant message (uses markdown for code blocks)
-                msg = AssistantMessage(f"```\n{output}\n```")
-                await self._mount_message(msg)
-                await msg.write_initial_content()
-            else:
-                await self._mount_message(SystemMessage("Command completed (no output)"))
+        except OSError as e:
+            await self._mount_message(ErrorMessage(str(e)))
+            return
 
-            if result.returncode != 0:
-                await self._mount_message(ErrorMessage(f"Exit code: {result.returncode}"))
+        if result.timed_out:
+            await self._mount_message(
+                ErrorMessage(f"Command timed out ({_BASH_TIMEOUT_S:.0f}s limit)")
+            )
+            return
 
-            # Scroll to show the output
-            self._scroll_chat_to_bottom()
+        output = result.stdout.text().strip()
+        if result.stderr.total:
+            output += f"\n[stderr]\n{result.stderr.text().strip()}"
 
-        except subprocess.TimeoutExpired:
-            await self._mount_message(ErrorMessage("Command timed out (60s limit)"))
-        except OSError as e:
-            await self._mount_message(ErrorMessage(str(e)))
+        if output:
+            # Display output as assistant message (uses markdown for code blocks)
+            msg = AssistantMessage(f"```\n{output}\n```")
+            await self._mount_message(msg)
+            await msg.write_initial_content()
+        else:
+            await self._mount_message(SystemMessage("Command completed (no output)"))
+
+        if result.returncode != 0:
+            await self._mount_message(ErrorMessage(f"Exit code: {result.returncode}"))
+
+        # Scroll to show the output
+        self._scroll_chat_to_bottom()
 
     @staticmethod
     def _strip_model_prefix(model_name: str) -> str:
@@ -619,6 +645,14 @@ class DeepAgentsApp(App):
                 names.update(str(item) for item in tool_names if isinstance(item, str))
         return names
 
+    def _system_prompt_report(self) -> str | None:
+        """Per-segment sizes of the system prompt sent on the last model call."""
+        prompt_cache = getattr(self._agent, "prompt_cache", None)
+        segments = getattr(prompt_cache, "last_segments", None)
+        if not segments:
+            return None
+        return format_segment_report(segments)
+
     def _build_model_catalog(self) -> list[ModelEntry]:
         return self._model_controller.build_model_catalog()
 
@@ -739,6 +773,8 @@ class DeepAgentsApp(App):
     def _reset_thread(self) -> str | None:
         if not self._session_state:
             return None
+        # The old thread's persistent shell is not coming back into use
+        close_thread_sessions(self._session_state.thread_id)
         return self._session_state.reset_thread()
 
     def _current_thread_id(self) -> str | None:
@@ -775,6 +811,7 @@ class DeepAgentsApp(App):
             switch_model=self._switch_model,
             model_controller=self._model_controller,
             available_tool_names=self._available_tool_names,
+            system_prompt_report=self._system_prompt_report,
         )
         handled = await self._command_registry.dispatch(context)
         if not handled:
@@ -854,7 +891,7 @@ class DeepAgentsApp(App):
         """Load and render message history when resuming a thread.
 
         This retrieves the checkpoint state from the agent and converts
-        stored messages into UI widgets.
+        stored messages into lightweight records for the virtual transcript.
         """
         if not self._agent or not self._lc_thread_id:
             return
@@ -871,64 +908,15 @@ class DeepAgentsApp(App):
             if not messages:
                 return
 
-            # Track tool calls from AIMessages to match with ToolMessages
-            pending_tool_calls: dict[str, dict] = {}
-
-            for msg in messages:
-                if isinstance(msg, HumanMessage):
-                    # Skip system messages that were auto-injected
-                    content = msg.content if isinstance(msg.content, str) else str(msg.content)
-                    if content.startswith("[SYSTEM]"):
-                        continue
-                    await self._mount_message(UserMessage(content))
-
-                elif isinstance(msg, AIMessage):
-                    # Render text content if present
-                    content = msg.content
-                    if isinstance(content, str) and content.strip():
-                        widget = AssistantMessage(content)
-                        await self._mount_message(widget)
-                        await widget.write_initial_content()
-
-                    # Track tool calls for later matching with ToolMessages
-                    tool_calls = getattr(msg, "tool_calls", [])
-                    for tc in tool_calls:
-                        tc_id = tc.get("id")
-                        if tc_id:
-                            pending_tool_calls[tc_id] = {
-                                "name": tc.get("name", "unknown"),
-                                "args": tc.get("args", {}),
-                            }
-                            # Mount tool call widget
-                            tool_widget = ToolCallMessage(
-                                tc.get("name", "unknown"),
-                                tc.get("args", {}),
-                            )
-                            await self._mount_message(tool_widget)
-                            # Store widget reference for result matching
-                            pending_tool_calls[tc_id]["widget"] = tool_widget
-
-                elif isinstance(msg, ToolMessage):
-                    # Match with pending tool call and show result
-                    tc_id = getattr(msg, "tool_call_id", None)
-                    if tc_id and tc_id in pending_tool_calls:
-                        tool_info = pending_tool_calls.pop(tc_id)
-                        widget = tool_info.get("widget")
-                        if widget:
-                            status = getattr(msg, "status", "success")
-                            content = (
-                                msg.content if isinstance(msg.content, str) else str(msg.content)
-                            )
-                            if status == "success":
-                                widget.set_success(content)
-                            else:
-                                widget.set_error(content)
-
-            # Mark any unmatched tool calls as interrupted (no ToolMessage result)
-            for tool_info in pending_tool_calls.values():
-                widget = tool_info.get("widget")
-                if widget:
-                    widget.set_rejected()  # Shows as interrupted/rejected in UI
+            # Only the newest page of history is mounted; the transcript pages
+            # older messages in as the user scrolls up.
+            records = records_from_messages(messages)
+            if records:
+                transcript = VirtualTranscript(records, id="transcript")
+                messages_container = self.query_one("#messages", Container)
+                await messages_container.mount(transcript, before=0)
+                await transcript.load_older()
+                transcript.follow_scroll(self.query_one("#chat", VerticalScroll))
 
             # Show system message indicating this is a resumed session
             await self._mount_message(SystemMessage(f"Resumed session: {self._lc_thread_id}"))
@@ -953,7 +941,7 @@ class DeepAgentsApp(App):
         messages = self.query_one("#messages", Container)
         await messages.mount(widget)
         # Keep latest message visible after layout settles.
-        self.call_after_refresh(self._scroll_chat_to_bottom)
+        self._request_scroll_to_bottom()
 
     async def _clear_messages(self) -> None:
         """Clear the messages area and cancel background tasks."""
@@ -9,8 +9,6 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import requests
-
 from deepagents_cli.model_types import AuthRef
 
 AUTH_PATH = Path.home() / ".deepagents" / "auth.json"
@@ -176,6 +174,9 @@ class AuthStore:
         token_url = entry.token_url or _KNOWN_TOKEN_URLS.get(provider_lower)
         if not token_url:
             raise AuthError("OAuth access token expired; set token_url to enable refresh")
+        # Imported lazily: only token refresh needs an HTTP client.
+        from deepagents_cli import http_client
+
         client_id = entry.client_id or _KNOWN_CLIENT_IDS.get(provider_lower)
         payload: dict[str, str] = {
             "grant_type": "refresh_token",
@@ -190,13 +191,17 @@ class AuthStore:
         if entry.extra:
             payload.update(entry.extra)
         if provider_lower in _JSON_TOKEN_PROVIDERS:
-            response = requests.post(
-                token_url, headers={"Content-Type": "application/json"}, json=payload, timeout=30
+            response = http_client.request(
+                "POST",
+                token_url,
+                headers={"Content-Type": "application/json"},
+                json=payload,
+                timeout=30,
             )
         else:
-            response = requests.post(token_url, data=payload, timeout=30)
+            response = http_client.request("POST", token_url, data=payload, timeout=30)
         if response.status_code >= 400:
-            reason = response.reason or "request failed"
+            reason = response.reason_phrase or "request failed"
             raise AuthError(f"OAuth refresh failed: {response.status_code} {reason}")
         data = response.json()
         access = data.get("access_token")
@@ -0,0 +1,245 @@
+"""Parallel multi-prompt batch execution on a single agent graph."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
+
+from deepagents_cli.headless import HeadlessResult, execute_task_headless
+from deepagents_cli.sessions import generate_thread_id
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+_PROMPT_KEYS = ("prompt", "message", "input")
+
+
+class BatchInputError(ValueError):
+    """Raised when a batch prompts file cannot be parsed."""
+
+
+@dataclass(frozen=True)
+class BatchPrompt:
+    """A single prompt from a batch file."""
+
+    id: str
+    prompt: str
+
+
+@dataclass
+class BatchItemResult:
+    """Result of one batch prompt."""
+
+    id: str
+    result: HeadlessResult
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the record written to the output file."""
+        data = self.result.to_dict()
+        latency = data.pop("elapsed_s")
+        return {"type": "result", "id": self.id, "latency_s": latency, **data}
+
+
+def load_batch_prompts(path: Path) -> list[BatchPrompt]:
+    """Load prompts from a JSONL file.
+
+    Each non-empty line is either a JSON string or an object with a ``prompt``
+    (or ``message``/``input``) field and an optional ``id``. Lines without an
+    id are numbered by their position in the file.
+
+    Raises:
+        BatchInputError: If a line is not valid JSON or has no prompt.
+    """
+    prompts: list[BatchPrompt] = []
+    with path.open(encoding="utf-8") as handle:
+        for line_no, raw_line in enumerate(handle, start=1):
+            line = raw_line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                msg = f"{path}:{line_no}: invalid JSON ({exc.msg})"
+                raise BatchInputError(msg) from exc
+            if isinstance(record, str):
+                record = {"prompt": record}
+            if not isinstance(record, dict):
+                msg = f"{path}:{line_no}: expected an object or string"
+                raise BatchInputError(msg)
+            prompt = next((record[key] for key in _PROMPT_KEYS if record.get(key)), None)
+            if not isinstance(prompt, str) or not prompt.strip():
+                msg = f"{path}:{line_no}: missing prompt"
+                raise BatchInputError(msg)
+            prompt_id = record.get("id")
+            prompts.append(
+                BatchPrompt(id=str(prompt_id if prompt_id is not None else line_no), prompt=prompt)
+            )
+    return prompts
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the ``pct`` percentile of ``values`` using linear interpolation."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize_batch(results: list[BatchItemResult], wall_s: float) -> dict[str, Any]:
+    """Aggregate status counts, token usage and latency percentiles."""
+    latencies = [item.result.elapsed_s for item in results]
+    statuses: dict[str, int] = {}
+    for item in results:
+        statuses[item.result.status] = statuses.get(item.result.status, 0) + 1
+    return {
+        "type": "summary",
+        "prompts": len(results),
+        "statuses": statuses,
+        "input_tokens": sum(item.result.input_tokens for item in results),
+        "output_tokens": sum(item.result.output_tokens for item in results),
+        "total_tokens": sum(item.result.total_tokens for item in results),
+        "tool_calls": sum(item.result.tool_calls for item in results),
+        "wall_s": round(wall_s, 3),
+        "latency_s": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(max(latencies, default=0.0), 3),
+        },
+    }
+
+
+async def execute_batch(
+    prompts: list[BatchPrompt],
+    agent: Any,
+    assistant_id: str | None,
+    *,
+    concurrency: int = 4,
+    auto_approve: bool = True,
+    on_result: Callable[[BatchItemResult], None] | None = None,
+) -> list[BatchItemResult]:
+    """Run prompts concurrently against one agent graph.
+
+    Each prompt gets its own thread so runs do not share conversation state.
+    At most ``concurrency`` runs are in flight at once.
+
+    Args:
+        prompts: Prompts to run
+        agent: The LangGraph agent, built once and shared by every run
+        assistant_id: The agent identifier
+        concurrency: Maximum number of concurrent runs
+        auto_approve: Whether to approve tool interrupts
+        on_result: Called as each prompt finishes, in completion order
+
+    Returns:
+        Results in input order.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _run_one(item: BatchPrompt) -> BatchItemResult:
+        async with semaphore:
+            result = await execute_task_headless(
+                item.prompt,
+                agent,
+                assistant_id,
+                generate_thread_id(),
+                auto_approve=auto_approve,
+            )
+        batch_result = BatchItemResult(id=item.id, result=result)
+        if on_result is not None:
+            on_result(batch_result)
+        return batch_result
+
+    return list(await asyncio.gather(*(_run_one(item) for item in prompts)))
+
+
+def _write_record(output: TextIO, record: dict[str, Any]) -> None:
+    output.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+    output.flush()
+
+
+async def run_batch_async(
+    prompts_path: Path,
+    output_path: Path,
+    *,
+    assistant_id: str,
+    concurrency: int = 4,
+    auto_approve: bool = True,
+    sandbox_type: str = "none",
+    sandbox_id: str | None = None,
+    model_name: str | None = None,
+    reasoning_effort: str | None = None,
+    service_tier: str | None = None,
+    extensions: list[str] | None = None,
+    extensions_only: bool = False,
+    extensions_disabled: bool = False,
+) -> dict[str, Any]:
+    """Build the agent once and run every prompt in a batch file.
+
+    Results are appended to ``output_path`` as JSONL as prompts finish,
+    followed by a summary record with token usage and latency percentiles.
+    The model, middleware, MCP sessions, checkpointer and store are shared by
+    every prompt in the batch.
+
+    Returns:
+        The summary record.
+
+    Raises:
+        BatchInputError: If the prompts file cannot be parsed.
+        NoModelSelectedError: If no model is configured.
+        ModelConfigurationError: If the model cannot be created.
+    """
+    from deepagents_cli.runtime import open_agent_runtime
+
+    prompts = load_batch_prompts(prompts_path)
+    async with open_agent_runtime(
+        assistant_id,
+        sandbox_type=sandbox_type,
+        sandbox_id=sandbox_id,
+        reasoning_effort=reasoning_effort,
+        service_tier=service_tier,
+        extensions=extensions,
+        extensions_only=extensions_only,
+        extensions_disabled=extensions_disabled,
+    ) as runtime:
+        agent, _backend, task_manager = runtime.build_agent(model_name, auto_approve=auto_approve)
+        started = time.perf_counter()
+        try:
+            with output_path.open("w", encoding="utf-8") as output:
+                results = await execute_batch(
+                    prompts,
+                    agent,
+                    assistant_id,
+                    concurrency=concurrency,
+                    auto_approve=auto_approve,
+                    on_result=lambda item: _write_record(output, item.to_dict()),
+                )
+                summary = summarize_batch(results, time.perf_counter() - started)
+                _write_record(output, summary)
+        finally:
+            if task_manager is not None:
+                task_manager.cleanup()
+    return summary
+
+
+__all__ = [
+    "BatchInputError",
+    "BatchItemResult",
+    "BatchPrompt",
+    "execute_batch",
+    "load_batch_prompts",
+    "percentile",
+    "run_batch_async",
+    "summarize_batch",
+]
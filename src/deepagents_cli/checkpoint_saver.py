@@ -0,0 +1,81 @@
+"""SQLite checkpointer that keeps the thread index current."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from deepagents_cli.sessions import ensure_thread_index
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import RunnableConfig
+    from langgraph.checkpoint.base import Checkpoint, CheckpointMetadata, ChannelVersions
+
+
+class IndexedAsyncSqliteSaver(AsyncSqliteSaver):
+    """AsyncSqliteSaver that maintains the ``thread_index`` table.
+
+    The index rows themselves are written by triggers on ``checkpoints``. This
+    saver creates them during setup and records the thread's message count in
+    checkpoint metadata, which is the only value the triggers cannot derive
+    from SQL.
+    """
+
+    async def setup(self) -> None:
+        """Create the checkpoint tables, then the thread index and its triggers."""
+        if self.is_setup:
+            return
+        await super().setup()
+        async with self.lock:
+            if await ensure_thread_index(self.conn):
+                await self._backfill_message_counts()
+
+    async def _backfill_message_counts(self) -> None:
+        """Fill in message counts for threads checkpointed before the index existed.
+
+        Only threads with an unknown count are decoded, so after the first run
+        this is a single indexed query.
+        """
+        query = """
+            SELECT c.thread_id, c.type, c.checkpoint
+            FROM thread_index AS t
+            JOIN checkpoints AS c
+              ON c.thread_id = t.thread_id
+             AND c.checkpoint_ns = ''
+             AND c.checkpoint_id = (
+                 SELECT MAX(checkpoint_id) FROM checkpoints
+                 WHERE thread_id = t.thread_id AND checkpoint_ns = ''
+             )
+            WHERE t.message_count IS NULL
+        """
+        async with self.conn.execute(query) as cursor:
+            rows = await cursor.fetchall()
+        if not rows:
+            return
+
+        counts = []
+        for thread_id, type_, blob in rows:
+            checkpoint = self.serde.loads_typed((type_, blob))
+            messages = checkpoint.get("channel_values", {}).get("messages")
+            counts.append((len(messages) if isinstance(messages, list) else 0, thread_id))
+        await self.conn.executemany(
+            "UPDATE thread_index SET message_count = ? WHERE thread_id = ?", counts
+        )
+        await self.conn.commit()
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint, adding ``message_count`` to its metadata."""
+        messages = checkpoint.get("channel_values", {}).get("messages")
+        if isinstance(messages, list):
+            metadata = {**metadata, "message_count": len(messages)}
+        return await super().aput(config, checkpoint, metadata, new_versions)
+
+
+__all__ = ["IndexedAsyncSqliteSaver"]
@@ -0,0 +1,531 @@
+"""Persistent trigram index for fast local code search.
+
+Each project root gets a SQLite database under ``.deepagents/index/``. Files
+come from ``git ls-files`` (tracked plus untracked, non-ignored files) and
+are re-indexed only when their mtime or size changes. File contents go into
+a contentless FTS5 table with the ``trigram`` tokenizer. A search first uses
+the trigrams every match must contain to pick candidate files, then runs the
+regex over just those files, read fresh from disk.
+
+Files the agent writes (through the local file backend or ``fast_apply``)
+are re-indexed as soon as they are written. Other changes, from an editor or
+``git checkout``, are found by a change scan, run at most every
+``REFRESH_INTERVAL_S`` seconds before a search. Checking a large tree for
+changes costs more than a search (every file is stat'ed), so on such trees
+searches trigger the scan in the background and use the index as it is.
+Matched lines are always read fresh, but text added outside the agent in the
+last few seconds may be missed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fnmatch
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+try:  # Python 3.11+
+    from re import _parser as _sre_parse  # type: ignore[attr-defined]
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+INDEX_DIR = Path(".deepagents") / "index"
+# Bump when the schema or tokenization changes; older indexes are rebuilt.
+SCHEMA_VERSION = 1
+# Files larger than this are not indexed (generated or vendored blobs).
+MAX_FILE_BYTES = 1024 * 1024
+# Bytes inspected for NUL when deciding whether a file is binary.
+BINARY_SNIFF_BYTES = 8192
+# Minimum seconds between change scans triggered by searches; files written
+# by the agent are re-indexed right away instead (see notify_files_changed).
+REFRESH_INTERVAL_S = 2.0
+# Searches wait for a change scan only if the last one took at most this long;
+# on larger trees the scan runs in the background while the search proceeds.
+SYNC_REFRESH_BUDGET_S = 0.05
+# Files read and written per transaction while indexing.
+INDEX_BATCH_FILES = 1000
+# Rebuild from scratch once stale FTS rows outnumber live files (and this floor).
+MIN_STALE_FOR_REBUILD = 1000
+# Directories skipped when the root is not a git repository.
+_WALK_EXCLUDES = frozenset(
+    {".git", ".deepagents", "node_modules", "__pycache__", ".venv", "venv", "dist", "build"}
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        path TEXT NOT NULL UNIQUE,
+        mtime_ns INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        indexed INTEGER NOT NULL
+    )""",
+    # Contentless: only trigram postings are stored, not the file text. File
+    # ids are never reused, so stale postings cannot attach to a new file.
+    """CREATE VIRTUAL TABLE IF NOT EXISTS trigrams USING fts5(
+        body, tokenize='trigram', content='', detail='none'
+    )""",
+)
+
+
+@dataclass(frozen=True)
+class RefreshStats:
+    """What one change scan did."""
+
+    files: int
+    indexed: int
+    removed: int
+    seconds: float
+
+
+@dataclass(frozen=True)
+class SearchMatch:
+    """One matching line."""
+
+    path: str
+    line_number: int
+    line: str
+
+
+class CodeIndex:
+    """Trigram index of one project root.
+
+    Thread-safe: refreshes and searches are serialized on one connection.
+    """
+
+    def __init__(self, root: Path, db_path: Path | None = None) -> None:
+        """Open (creating if needed) the index for ``root``.
+
+        Args:
+            root: Project root to index.
+            db_path: Index database; defaults to ``root/.deepagents/index/code.db``.
+        """
+        self.root = root.resolve()
+        if db_path is None:
+            db_path = ensure_index_dir(self.root) / "code.db"
+        self.db_path = db_path
+        # Guards the connection; scans hold _scan_lock and take _lock only to write
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._refreshed_at = float("-inf")
+        self._background: threading.Thread | None = None
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            if self._meta("schema_version") != str(SCHEMA_VERSION):
+                self._reset()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def refresh(self) -> RefreshStats:
+        """Index new and changed files and drop deleted ones."""
+        with self._scan_lock:
+            stats = self._refresh()
+            self._refreshed_at = time.monotonic()
+            return stats
+
+    def update_files(self, paths: Iterable[str]) -> None:
+        """Re-index ``paths`` (relative to the root) now, without a change scan.
+
+        Missing files are dropped from the index.
+        """
+        root = str(self.root)
+        batch = []
+        for path in paths:
+            try:
+                stat = os.stat(os.path.join(root, path))
+            except OSError:
+                batch.append((path, None))
+                continue
+            body = _read_indexable(os.path.join(root, path), stat.st_size)
+            batch.append((path, (stat.st_mtime_ns, stat.st_size, body)))
+        with self._lock, self._conn:
+            self._store(batch)
+
+    def _store(self, batch: list[tuple[str, tuple[int, int, str | None] | None]]) -> None:
+        """Replace the rows of ``batch``'s paths; call holding ``_lock`` in a transaction."""
+        stale = 0
+        for path, entry in batch:
+            stale += self._conn.execute("DELETE FROM files WHERE path = ?", (path,)).rowcount
+            if entry is None:
+                continue
+            mtime_ns, size, body = entry
+            cursor = self._conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, indexed) VALUES (?, ?, ?, ?)",
+                (path, mtime_ns, size, int(body is not None)),
+            )
+            if body is not None:
+                self._conn.execute(
+                    "INSERT INTO trigrams (rowid, body) VALUES (?, ?)", (cursor.lastrowid, body)
+                )
+        self._add_stale(stale)
+
+    def _add_stale(self, count: int) -> None:
+        if count:
+            self._set_meta("stale_rows", int(self._meta("stale_rows") or 0) + count)
+
+    def _ensure_fresh(self) -> None:
+        """Scan for changes before a search, in the background on large trees."""
+        if time.monotonic() - self._refreshed_at < REFRESH_INTERVAL_S:
+            return
+        with self._lock:
+            has_files = self._conn.execute("SELECT 1 FROM files LIMIT 1").fetchone()
+            last_scan = float(self._meta("last_scan_seconds") or "inf")
+        if not has_files or last_scan <= SYNC_REFRESH_BUDGET_S:
+            self.refresh()
+            return
+        with self._lock:
+            if self._background is not None and self._background.is_alive():
+                return
+            self._background = threading.Thread(
+                target=self._refresh_quietly, name="code-index-refresh", daemon=True
+            )
+            self._background.start()
+
+    def _refresh_quietly(self) -> None:
+        # The index may be closed while a background scan runs
+        with contextlib.suppress(sqlite3.Error):
+            self.refresh()
+
+    def search(
+        self,
+        pattern: str,
+        *,
+        literal: bool = False,
+        ignore_case: bool = False,
+        glob: str | None = None,
+        max_results: int = 200,
+    ) -> list[SearchMatch]:
+        """Find lines matching ``pattern``.
+
+        Args:
+            pattern: Regular expression, or a plain string when ``literal``.
+            literal: Match ``pattern`` as a plain substring.
+            ignore_case: Case-insensitive matching.
+            glob: Only search paths matching this glob (e.g. ``*.py``,
+                ``src/**/*.ts``, ``*.{ts,tsx}``). Globs without ``/`` match
+                the file name.
+            max_results: Stop after this many matching lines.
+
+        Raises:
+            re.error: If ``pattern`` is not a valid regular expression.
+        """
+        flags = re.IGNORECASE if ignore_case else 0
+        regex = re.compile(re.escape(pattern) if literal else pattern, flags)
+        query = _fts_query([pattern] if literal else _required_literals(regex))
+        self._ensure_fresh()
+
+        globs = _expand_braces(glob) if glob else None
+        matches: list[SearchMatch] = []
+        # Candidates stream in file id order (git's sorted order on a fresh
+        # build), so unselective queries stop early instead of sorting every row.
+        # Scans wait for the lock between their write batches.
+        with self._lock:
+            if query is None:
+                cursor = self._conn.execute("SELECT path FROM files WHERE indexed = 1 ORDER BY id")
+            else:
+                cursor = self._conn.execute(
+                    "SELECT files.path FROM trigrams JOIN files ON files.id = trigrams.rowid "
+                    "WHERE trigrams MATCH ?",
+                    (query,),
+                )
+            for (path,) in cursor:
+                if globs is not None and not _glob_match(path, globs):
+                    continue
+                try:
+                    text = (self.root / path).read_text(errors="replace")
+                except OSError:
+                    continue
+                for number, line in enumerate(text.splitlines(), start=1):
+                    if regex.search(line):
+                        matches.append(SearchMatch(path, number, line))
+                if len(matches) >= max_results:
+                    break
+            cursor.close()
+        matches.sort(key=lambda match: (match.path, match.line_number))
+        return matches[:max_results]
+
+    def _meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: object) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def _reset(self) -> None:
+        self._conn.execute("DELETE FROM files")
+        self._conn.execute("INSERT INTO trigrams (trigrams) VALUES ('delete-all')")
+        self._set_meta("schema_version", SCHEMA_VERSION)
+        self._set_meta("stale_rows", 0)
+
+    def _refresh(self) -> RefreshStats:
+        start = time.perf_counter()
+        with self._lock:
+            stale = int(self._meta("stale_rows") or 0)
+            live = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            if stale > max(MIN_STALE_FOR_REBUILD, live):
+                # Contentless FTS rows cannot be deleted without the old text, so
+                # changed files leave orphaned postings until the next rebuild.
+                with self._conn:
+                    self._reset()
+            known = {
+                path: (file_id, mtime_ns, size)
+                for path, file_id, mtime_ns, size in self._conn.execute(
+                    "SELECT path, id, mtime_ns, size FROM files"
+                )
+            }
+
+        # Stat outside the lock so searches can run meanwhile; plain string
+        # paths are several times faster to stat than Path objects.
+        root = str(self.root)
+        seen: set[str] = set()
+        changed: list[tuple[str, int, int]] = []
+        for path in list_project_files(self.root):
+            try:
+                stat = os.stat(os.path.join(root, path))
+            except OSError:
+                continue
+            seen.add(path)
+            previous = known.get(path)
+            if previous is None or previous[1:] != (stat.st_mtime_ns, stat.st_size):
+                changed.append((path, stat.st_mtime_ns, stat.st_size))
+        removed = [known[path][0] for path in known if path not in seen]
+
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "DELETE FROM files WHERE id = ?", ((i,) for i in removed)
+            )
+            self._add_stale(cursor.rowcount)
+
+        # Rows are replaced by path: update_files may have re-indexed a file
+        # since ``known`` was read.
+        for offset in range(0, len(changed), INDEX_BATCH_FILES):
+            batch = [
+                (path, (mtime_ns, size, _read_indexable(os.path.join(root, path), size)))
+                for path, mtime_ns, size in changed[offset : offset + INDEX_BATCH_FILES]
+            ]
+            with self._lock, self._conn:
+                self._store(batch)
+
+        seconds = time.perf_counter() - start
+        with self._lock, self._conn:
+            self._set_meta("last_scan_seconds", round(seconds, 4))
+        return RefreshStats(
+            files=len(seen), indexed=len(changed), removed=len(removed), seconds=seconds
+        )
+
+
+def ensure_index_dir(root: Path) -> Path:
+    """Create ``root/.deepagents/index/`` (ignored by git) and return it."""
+    index_dir = root / INDEX_DIR
+    index_dir.mkdir(parents=True, exist_ok=True)
+    ignore = index_dir / ".gitignore"
+    if not ignore.exists():
+        ignore.write_text("*\n")
+    return index_dir
+
+
+def list_project_files(root: Path) -> list[str]:
+    """Tracked and untracked, non-ignored files, relative to ``root``."""
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            capture_output=True,
+            cwd=str(root),
+            timeout=60,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return _walk_files(root)
+    paths = result.stdout.decode(errors="surrogateescape").split("\0")
+    # ls-files repeats paths with merge conflicts
+    return list(dict.fromkeys(path for path in paths if path))
+
+
+def _walk_files(root: Path) -> list[str]:
+    files: list[str] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in _WALK_EXCLUDES]
+        rel_dir = os.path.relpath(dirpath, root)
+        for name in filenames:
+            files.append(name if rel_dir == "." else f"{rel_dir}/{name}".replace(os.sep, "/"))
+    return sorted(files)
+
+
+def _read_indexable(path: str, size: int) -> str | None:
+    """File text to index, or None for large, binary or unreadable files."""
+    if size > MAX_FILE_BYTES:
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:BINARY_SNIFF_BYTES]:
+        return None
+    return data.decode(errors="replace")
+
+
+def _required_literals(regex: re.Pattern[str]) -> Any:  # noqa: ANN401
+    """Literal strings any match must contain, as an AND/OR tree.
+
+    Returns nested ``("and", [...])`` / ``("or", [...])`` nodes with string
+    leaves, or None when nothing is required (e.g. ``.*``).
+    """
+    try:
+        parsed = _sre_parse.parse(regex.pattern, regex.flags)
+    except re.error:
+        return None
+    return _literals_of(list(parsed))
+
+
+def _literals_of(items: list[tuple[Any, Any]]) -> Any:  # noqa: ANN401, C901, PLR0912
+    parts: list[Any] = []
+    run: list[str] = []
+
+    def _end_run() -> None:
+        if run:
+            parts.append("".join(run))
+            run.clear()
+
+    for op, av in items:
+        name = str(op)
+        if name == "LITERAL":
+            run.append(chr(av))
+            continue
+        _end_run()
+        if name == "SUBPATTERN":
+            parts.append(_literals_of(list(av[-1])))
+        elif name in {"MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"}:
+            low, _high, body = av
+            if low >= 1:
+                parts.append(_literals_of(list(body)))
+        elif name == "ATOMIC_GROUP":
+            parts.append(_literals_of(list(av)))
+        elif name == "BRANCH":
+            alternatives = [_literals_of(list(branch)) for branch in av[1]]
+            if all(alt is not None for alt in alternatives):
+                parts.append(("or", alternatives))
+    _end_run()
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+
+def _fts_query(node: Any) -> str | None:  # noqa: ANN401
+    """Build an FTS5 MATCH expression from a literal tree (or a list of strings)."""
+    if isinstance(node, list):
+        node = ("and", node) if node else None
+    if node is None:
+        return None
+    if isinstance(node, str):
+        grams = dict.fromkeys(node[i : i + 3] for i in range(len(node) - 2))
+        if not grams:
+            return None
+        return " AND ".join('"' + gram.replace('"', '""') + '"' for gram in grams)
+    kind, children = node
+    queries = [_fts_query(child) for child in children]
+    if kind == "or":
+        # One unconstrained alternative means any file can match
+        if any(query is None for query in queries):
+            return None
+        return " OR ".join(f"({query})" for query in queries)
+    queries = [query for query in queries if query is not None]
+    if not queries:
+        return None
+    return " AND ".join(f"({query})" for query in queries)
+
+
+def _expand_braces(glob: str) -> list[str]:
+    """Expand one level of ``{a,b}`` alternatives, as ripgrep globs allow."""
+    match = re.search(r"\{([^{}]*)\}", glob)
+    if match is None:
+        return [glob]
+    head, tail = glob[: match.start()], glob[match.end() :]
+    return [
+        expanded
+        for option in match.group(1).split(",")
+        for expanded in _expand_braces(f"{head}{option}{tail}")
+    ]
+
+
+def _glob_match(path: str, globs: list[str]) -> bool:
+    name = path.rsplit("/", 1)[-1]
+    for glob in globs:
+        if "/" in glob:
+            # fnmatch's * already crosses directories; **/ may also match none
+            if fnmatch.fnmatchcase(path, glob) or fnmatch.fnmatchcase(
+                path, glob.replace("**/", "")
+            ):
+                return True
+        elif fnmatch.fnmatchcase(name, glob):
+            return True
+    return False
+
+
+_indexes: dict[Path, CodeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(root: Path) -> CodeIndex:
+    """Shared index for ``root``, opened on first use."""
+    root = root.resolve()
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = CodeIndex(root)
+        return index
+
+
+def notify_files_changed(paths: Iterable[str | Path]) -> None:
+    """Re-index just-written files in the open indexes whose root holds them.
+
+    Does nothing for indexes not opened yet; they scan on first use anyway.
+    """
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    if not indexes:
+        return
+    resolved = [Path(path).resolve() for path in paths]
+    for index in indexes:
+        relative = [
+            path.relative_to(index.root).as_posix()
+            for path in resolved
+            if path.is_relative_to(index.root)
+        ]
+        if relative:
+            # The index may be closed concurrently
+            with contextlib.suppress(sqlite3.Error):
+                index.update_files(relative)
+
+
+__all__ = [
+    "CodeIndex",
+    "RefreshStats",
+    "SearchMatch",
+    "ensure_index_dir",
+    "get_code_index",
+    "list_project_files",
+    "notify_files_changed",
+]
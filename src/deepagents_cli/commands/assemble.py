@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import asyncio
 import uuid
 from dataclasses import dataclass
 
@@ -195,8 +194,7 @@ async def handle_assemble_command(context: CommandContext) -> CommandOutcome:
     try:
         from deepagents_cli.ext import linear as linear_ext
 
-        data = await asyncio.to_thread(
-            linear_ext.linear_assemble,
+        data = await linear_ext.linear_assemble(
             parsed.issue_id,
             include_comments=parsed.include_comments,
             max_comments=parsed.max_comments,
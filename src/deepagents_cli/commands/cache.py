@@ -0,0 +1,32 @@
+"""`/cache` slash-command handler."""
+
+from __future__ import annotations
+
+import asyncio
+
+from deepagents_cli import http_cache
+from deepagents_cli.commands.types import CommandContext, CommandOutcome, HANDLED, NOT_HANDLED
+
+
+def matches_cache_command(command_lower: str) -> bool:
+    """Match `/cache` commands."""
+    return command_lower == "/cache" or command_lower.startswith("/cache ")
+
+
+async def handle_cache_command(context: CommandContext) -> CommandOutcome:
+    """Report HTTP cache hit rates (`/cache`) or empty the cache (`/cache clear`)."""
+    parts = context.normalized.split()
+    if len(parts) > 2 or (len(parts) == 2 and parts[1] != "clear"):
+        return NOT_HANDLED
+
+    await context.mount_user(context.command)
+    cache = http_cache.get_http_cache()
+    if cache is None:
+        await context.mount_system("HTTP cache is disabled (DEEPAGENTS_HTTP_CACHE_MB=0)")
+        return HANDLED
+    if len(parts) == 2:
+        await asyncio.to_thread(cache.clear)
+        await context.mount_system("HTTP cache cleared")
+        return HANDLED
+    await context.mount_system(await asyncio.to_thread(http_cache.format_report, cache))
+    return HANDLED
@@ -138,7 +138,8 @@ async def handle_core_command(context: CommandContext) -> CommandOutcome:
     if cmd == "/help":
         await context.mount_user(command)
         await context.mount_system(
-            "Commands: /assemble, /model, /debug, /quit, /clear, /remember, /tokens, /threads, /help"
+            "Commands: /assemble, /model, /debug, /quit, /clear, /remember, /tokens, /cache, "
+            "/threads, /help"
         )
         return HANDLED
 
@@ -178,6 +179,9 @@ async def handle_core_command(context: CommandContext) -> CommandOutcome:
             await context.mount_system(f"Current context: {formatted} tokens")
         else:
             await context.mount_system("No token usage yet")
+        report = context.system_prompt_report()
+        if report:
+            await context.mount_system(report)
         return HANDLED
 
     if cmd == "/remember" or cmd.startswith("/remember "):
@@ -6,6 +6,7 @@ from dataclasses import dataclass
 from typing import Callable
 
 from deepagents_cli.commands.assemble import handle_assemble_command, matches_assemble_command
+from deepagents_cli.commands.cache import handle_cache_command, matches_cache_command
 from deepagents_cli.commands.core import handle_core_command, matches_core_command
 from deepagents_cli.commands.model import (
     handle_model_or_debug_command,
@@ -45,6 +46,7 @@ def build_default_registry() -> CommandRegistry:
         handlers=[
             RegisteredCommand(matches=matches_core_command, handler=handle_core_command),
             RegisteredCommand(matches=matches_assemble_command, handler=handle_assemble_command),
+            RegisteredCommand(matches=matches_cache_command, handler=handle_cache_command),
             RegisteredCommand(
                 matches=matches_model_or_debug_command,
                 handler=handle_model_or_debug_command,
@@ -36,6 +36,7 @@ class CommandContext:
     switch_model: SwitchModelFn
     model_controller: ModelController
     available_tool_names: Callable[[], set[str]]
+    system_prompt_report: Callable[[], str | None]
 
 
 @dataclass(frozen=True)
@@ -1,12 +1,14 @@
 """Configuration, constants, and model creation for the CLI."""
 
+from __future__ import annotations
+
 import os
 import re
 import sys
 import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import dotenv
 from rich.console import Console
@@ -32,8 +34,11 @@ if _deepagents_project:
     # Override LANGSMITH_PROJECT for agent traces
     os.environ["LANGSMITH_PROJECT"] = _deepagents_project
 
-# Now safe to import LangChain modules
-from langchain_core.language_models import BaseChatModel  # noqa: E402
+# LangChain modules are safe to import from here on. The chat model classes
+# themselves are only imported by provider_adapters.create_chat_model, so
+# lightweight subcommands never load them.
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
 
 # Color scheme
 COLORS = {
@@ -2,14 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import requests
-
+from deepagents_cli import http_client
 from deepagents_cli.linear_ids import is_linear_identifier
 
 LINEAR_API_URL = os.environ.get("LINEAR_API_URL", "https://api.linear.app/graphql")
@@ -74,9 +74,10 @@ def _require_api_key() -> str:
     return api_key
 
 
-def _graphql_request(query: str, variables: dict[str, Any]) -> dict[str, Any]:
+async def _graphql_request(query: str, variables: dict[str, Any]) -> dict[str, Any]:
     api_key = _require_api_key()
-    response = requests.post(
+    response = await http_client.arequest(
+        "POST",
         LINEAR_API_URL,
         headers={
             "Content-Type": "application/json",
@@ -85,10 +86,10 @@ def _graphql_request(query: str, variables: dict[str, Any]) -> dict[str, Any]:
         json={"query": query, "variables": variables},
         timeout=LINEAR_TIMEOUT,
     )
-    if not response.ok:
+    if not response.is_success:
         body = response.text[:200]
         raise LinearAPIError(
-            f"Linear API error: {response.status_code} {response.reason}"
+            f"Linear API error: {response.status_code} {response.reason_phrase}"
             + (f" — {body}" if body else "")
         )
     try:
@@ -124,24 +125,24 @@ def _issue_fields() -> str:
     """
 
 
-def _query_issue_by_identifier(identifier: str) -> dict[str, Any] | None:
+async def _query_issue_by_identifier(identifier: str) -> dict[str, Any] | None:
     team_key, number = _parse_identifier(identifier)
     query = f"""query($teamKey: String!, $number: Float!) {{
         issues(filter: {{ team: {{ key: {{ eq: $teamKey }} }}, number: {{ eq: $number }} }}) {{
             nodes {{ {_issue_fields()} }}
         }}
     }}"""
-    data = _graphql_request(query, {"teamKey": team_key, "number": float(number)})
+    data = await _graphql_request(query, {"teamKey": team_key, "number": float(number)})
     issues = data.get("issues", {}).get("nodes", [])
     return issues[0] if issues else None
 
 
-def _query_issue_by_id(issue_id: str) -> dict[str, Any] | None:
+async def _query_issue_by_id(issue_id: str) -> dict[str, Any] | None:
     query_direct = f"""query($id: ID!) {{
         issue(id: $id) {{ {_issue_fields()} }}
     }}"""
     try:
-        data = _graphql_request(query_direct, {"id": issue_id})
+        data = await _graphql_request(query_direct, {"id": issue_id})
         issue = data.get("issue")
         if issue:
             return issue
@@ -153,24 +154,24 @@ def _query_issue_by_id(issue_id: str) -> dict[str, Any] | None:
             nodes {{ {_issue_fields()} }}
         }}
     }}"""
-    data = _graphql_request(query_filter, {"id": issue_id})
+    data = await _graphql_request(query_filter, {"id": issue_id})
     issues = data.get("issues", {}).get("nodes", [])
     return issues[0] if issues else None
 
 
-def _resolve_issue(issue_id_or_identifier: str) -> dict[str, Any]:
+async def _resolve_issue(issue_id_or_identifier: str) -> dict[str, Any]:
     issue = None
     if is_linear_identifier(issue_id_or_identifier):
-        issue = _query_issue_by_identifier(issue_id_or_identifier)
+        issue = await _query_issue_by_identifier(issue_id_or_identifier)
     if issue is None:
-        issue = _query_issue_by_id(issue_id_or_identifier)
+        issue = await _query_issue_by_id(issue_id_or_identifier)
     if issue is None:
         raise LinearAPIError(f"Issue not found: {issue_id_or_identifier}")
     return issue
 
 
-def _resolve_issue_id(issue_id_or_identifier: str) -> str:
-    issue = _resolve_issue(issue_id_or_identifier)
+async def _resolve_issue_id(issue_id_or_identifier: str) -> str:
+    issue = await _resolve_issue(issue_id_or_identifier)
     issue_id = issue.get("id")
     if not issue_id:
         raise LinearAPIError(f"Unable to resolve issue id for {issue_id_or_identifier}")
@@ -183,7 +184,7 @@ def _truncate_comment(body: str, max_chars: int = 12000) -> str:
     return body[: max_chars - 100] + "\n\n... (truncated)"
 
 
-def _list_comments_by_identifier(identifier: str, limit: int) -> list[dict[str, Any]]:
+async def _list_comments_by_identifier(identifier: str, limit: int) -> list[dict[str, Any]]:
     team_key, number = _parse_identifier(identifier)
     query = """query($teamKey: String!, $number: Float!, $limit: Float!) {
         issues(filter: { team: { key: { eq: $teamKey } }, number: { eq: $number } }) {
@@ -194,7 +195,7 @@ def _list_comments_by_identifier(identifier: str, limit: int) -> list[dict[str,
             }
         }
     }"""
-    data = _graphql_request(
+    data = await _graphql_request(
         query, {"teamKey": team_key, "number": float(number), "limit": float(limit)}
     )
     comments = (
@@ -213,14 +214,14 @@ def _list_comments_by_identifier(identifier: str, limit: int) -> list[dict[str,
     ]
 
 
-def _list_comments_by_id(issue_id: str, limit: int) -> list[dict[str, Any]]:
+async def _list_comments_by_id(issue_id: str, limit: int) -> list[dict[str, Any]]:
     query_direct = """query($id: ID!, $limit: Float!) {
         issue(id: $id) {
             comments(first: $limit) { nodes { body createdAt user { name } } }
         }
     }"""
     try:
-        data = _graphql_request(query_direct, {"id": issue_id, "limit": float(limit)})
+        data = await _graphql_request(query_direct, {"id": issue_id, "limit": float(limit)})
         comments = (data.get("issue") or {}).get("comments", {}).get("nodes", [])
     except LinearAPIError:
         query_filter = """query($id: ID!, $limit: Float!) {
@@ -230,7 +231,7 @@ def _list_comments_by_id(issue_id: str, limit: int) -> list[dict[str, Any]]:
                 }
             }
         }"""
-        data = _graphql_request(query_filter, {"id": issue_id, "limit": float(limit)})
+        data = await _graphql_request(query_filter, {"id": issue_id, "limit": float(limit)})
         comments = (
             data.get("issues", {})
             .get("nodes", [{}])[0]
@@ -248,16 +249,16 @@ def _list_comments_by_id(issue_id: str, limit: int) -> list[dict[str, Any]]:
     ]
 
 
-def _list_workflow_states() -> list[dict[str, Any]]:
+async def _list_workflow_states() -> list[dict[str, Any]]:
     query = """query { workflowStates { nodes { id name type } } }"""
-    data = _graphql_request(query, {})
+    data = await _graphql_request(query, {})
     return data.get("workflowStates", {}).get("nodes", [])
 
 
-def _resolve_state_id(state_value: str) -> str:
+async def _resolve_state_id(state_value: str) -> str:
     if "-" in state_value and len(state_value) >= 30:
         return state_value
-    states = _list_workflow_states()
+    states = await _list_workflow_states()
     for state in states:
         name = state.get("name")
         if name and name.lower() == state_value.lower():
@@ -282,9 +283,9 @@ def _normalize_issue(issue: dict[str, Any]) -> LinearIssue:
     )
 
 
-def linear_get_issue(issue_id_or_identifier: str) -> dict[str, Any]:
+async def linear_get_issue(issue_id_or_identifier: str) -> dict[str, Any]:
     """Get a Linear issue by identifier (TEAM-123) or UUID."""
-    issue = _resolve_issue(issue_id_or_identifier)
+    issue = await _resolve_issue(issue_id_or_identifier)
     normalized = _normalize_issue(issue)
     return {
         "id": normalized.id,
@@ -299,32 +300,32 @@ def linear_get_issue(issue_id_or_identifier: str) -> dict[str, Any]:
     }
 
 
-def linear_list_comments(issue_id_or_identifier: str, limit: int = 50) -> list[dict[str, Any]]:
+async def linear_list_comments(issue_id_or_identifier: str, limit: int = 50) -> list[dict[str, Any]]:
     """List comments for a Linear issue."""
     limit = max(1, min(int(limit), 100))
     if is_linear_identifier(issue_id_or_identifier):
-        return _list_comments_by_identifier(issue_id_or_identifier, limit)
-    return _list_comments_by_id(issue_id_or_identifier, limit)
+        return await _list_comments_by_identifier(issue_id_or_identifier, limit)
+    return await _list_comments_by_id(issue_id_or_identifier, limit)
 
 
-def linear_add_comment(issue_id_or_identifier: str, body: str) -> dict[str, Any]:
+async def linear_add_comment(issue_id_or_identifier: str, body: str) -> dict[str, Any]:
     """Add a comment to a Linear issue."""
-    issue_id = _resolve_issue_id(issue_id_or_identifier)
+    issue_id = await _resolve_issue_id(issue_id_or_identifier)
     body = _truncate_comment(body)
     mutation = """mutation($issueId: ID!, $body: String!) {
         commentCreate(input: { issueId: $issueId, body: $body }) { success }
     }"""
-    data = _graphql_request(mutation, {"issueId": issue_id, "body": body})
+    data = await _graphql_request(mutation, {"issueId": issue_id, "body": body})
     success = (data.get("commentCreate") or {}).get("success") is True
     return {"success": success, "issueId": issue_id}
 
 
-def linear_comment(issue_id_or_identifier: str, body: str) -> dict[str, Any]:
+async def linear_comment(issue_id_or_identifier: str, body: str) -> dict[str, Any]:
     """Alias for linear_add_comment."""
-    return linear_add_comment(issue_id_or_identifier, body)
+    return await linear_add_comment(issue_id_or_identifier, body)
 
 
-def linear_update_issue(
+async def linear_update_issue(
     issue_id_or_identifier: str,
     *,
     title: str | None = None,
@@ -334,7 +335,7 @@ def linear_update_issue(
     assignee_id: str | None = None,
 ) -> dict[str, Any]:
     """Update a Linear issue. Supports title, description, state, priority, assignee_id."""
-    issue_id = _resolve_issue_id(issue_id_or_identifier)
+    issue_id = await _resolve_issue_id(issue_id_or_identifier)
     input_payload: dict[str, Any] = {}
     if title is not None:
         input_payload["title"] = title
@@ -345,28 +346,28 @@ def linear_update_issue(
     if assignee_id is not None:
         input_payload["assigneeId"] = assignee_id
     if state is not None:
-        input_payload["stateId"] = _resolve_state_id(state)
+        input_payload["stateId"] = await _resolve_state_id(state)
     if not input_payload:
         raise LinearAPIError("No fields provided to update.")
 
     mutation = """mutation($issueId: ID!, $input: IssueUpdateInput!) {
         issueUpdate(id: $issueId, input: $input) { success issue { id } }
     }"""
-    data = _graphql_request(mutation, {"issueId": issue_id, "input": input_payload})
+    data = await _graphql_request(mutation, {"issueId": issue_id, "input": input_payload})
     result = data.get("issueUpdate") or {}
     return {"success": result.get("success") is True, "issueId": issue_id}
 
 
-def linear_list_statuses() -> list[dict[str, Any]]:
+async def linear_list_statuses() -> list[dict[str, Any]]:
     """List workflow states in Linear."""
-    states = _list_workflow_states()
+    states = await _list_workflow_states()
     return [
         {"id": state.get("id"), "name": state.get("name"), "type": state.get("type")}
         for state in states
     ]
 
 
-def linear_assemble(
+async def linear_assemble(
     issue_id_or_identifier: str,
     *,
     include_comments: bool = True,
@@ -374,10 +375,14 @@ def linear_assemble(
     post_started_comment: bool = False,
 ) -> dict[str, Any]:
     """Fetch issue context and return an assembly prompt for a multi-step workflow."""
-    issue = linear_get_issue(issue_id_or_identifier)
     comments: list[dict[str, Any]] = []
     if include_comments:
-        comments = linear_list_comments(issue_id_or_identifier, limit=max_comments)
+        issue, comments = await asyncio.gather(
+            linear_get_issue(issue_id_or_identifier),
+            linear_list_comments(issue_id_or_identifier, limit=max_comments),
+        )
+    else:
+        issue = await linear_get_issue(issue_id_or_identifier)
 
     if post_started_comment:
         identifier = issue.get("identifier") or issue_id_or_identifier
@@ -404,7 +409,7 @@ def linear_assemble(
                 "_assembled via deepagents_",
             ]
         )
-        linear_add_comment(issue_id_or_identifier, "\n".join(lines))
+        await linear_add_comment(issue_id_or_identifier, "\n".join(lines))
 
     identifier = issue.get("identifier") or issue_id_or_identifier
     prompt = (
@@ -0,0 +1,192 @@
+"""Local filesystem backend whose ``read`` pages through large files by line index.
+
+``FilesystemBackend.read`` reads and splits the whole file for every page, so
+paging through a multi-GB log costs the size of the file per call. Here, files
+of at least ``INDEXED_READ_MIN_BYTES`` are memory-mapped and get a sparse line
+index: the number of newlines before each ``INDEX_BLOCK_BYTES`` block. A page
+read finds its first line by scanning at most one block, then decodes only the
+lines it returns. Indexes are cached by path and invalidated when the file's
+inode, mtime or size changes.
+
+Writes and edits also re-index the file in the code search index, so a
+search right after a write sees it.
+
+Smaller files go through the base class unchanged. In indexed files lines end
+at ``\\n`` (with any ``\\r`` before it dropped); the other separators
+``str.splitlines`` knows are kept as part of the line.
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from deepagents.backends.filesystem import FilesystemBackend
+from deepagents.backends.utils import EMPTY_CONTENT_WARNING, format_content_with_line_numbers
+
+from deepagents_cli.code_index import notify_files_changed
+
+if TYPE_CHECKING:
+    from deepagents.backends.protocol import EditResult, FileUploadResponse, WriteResult
+
+# Files smaller than this are read whole, by the base class
+INDEXED_READ_MIN_BYTES = 1024 * 1024
+# Bytes per line-index block; a page read scans at most one block to find its start
+INDEX_BLOCK_BYTES = 256 * 1024
+# Leading bytes checked for NUL to tell binary files apart before reading them
+BINARY_SNIFF_BYTES = 8192
+# Line indexes kept in memory, least recently used dropped first
+MAX_CACHED_INDEXES = 32
+
+
+@dataclass(frozen=True)
+class LineIndex:
+    """Sparse newline index of one version of a file."""
+
+    # (inode, mtime_ns, size) of the indexed file
+    identity: tuple[int, int, int]
+    # newlines[i]: number of newlines before byte i * INDEX_BLOCK_BYTES
+    newlines: list[int]
+    line_count: int
+    blank: bool
+
+
+def build_line_index(data: mmap.mmap, identity: tuple[int, int, int]) -> LineIndex:
+    """Count newlines block by block over ``data``."""
+    size = len(data)
+    newlines = [0]
+    blank = True
+    for start in range(0, size, INDEX_BLOCK_BYTES):
+        block = data[start : start + INDEX_BLOCK_BYTES]
+        newlines.append(newlines[-1] + block.count(b"\n"))
+        blank = blank and not block.strip()
+    line_count = newlines[-1] + (size > 0 and data[size - 1 : size] != b"\n")
+    return LineIndex(identity, newlines, line_count, blank)
+
+
+def _line_start(data: mmap.mmap, index: LineIndex, line: int) -> int:
+    """Byte offset where 0-based ``line`` starts (it follows the line-th newline)."""
+    if line == 0:
+        return 0
+    # First block whose end has at least ``line`` newlines before it
+    block = bisect.bisect_left(index.newlines, line) - 1
+    position = block * INDEX_BLOCK_BYTES - 1
+    for _ in range(line - index.newlines[block]):
+        position = data.find(b"\n", position + 1)
+    return position + 1
+
+
+def _page_end(data: mmap.mmap, start: int, lines: int) -> int:
+    """Byte offset just past ``lines`` lines from ``start`` (or the end of the file)."""
+    position = start - 1
+    for _ in range(lines):
+        position = data.find(b"\n", position + 1)
+        if position < 0:
+            return len(data)
+    return position + 1
+
+
+class IndexedFilesystemBackend(FilesystemBackend):
+    """``FilesystemBackend`` with indexed page reads of large files."""
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        """Initialize the backend; arguments are those of ``FilesystemBackend``."""
+        super().__init__(*args, **kwargs)
+        self._indexes: OrderedDict[str, LineIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, file_path: str, offset: int = 0, limit: int = 2000) -> str:
+        """Read file content with line numbers, as ``FilesystemBackend.read``.
+
+        Binary files (a NUL byte near the start) are refused up front, without
+        reading the rest of the file.
+        """
+        resolved_path = self._resolve_path(file_path)
+        if not resolved_path.exists() or not resolved_path.is_file():
+            return f"Error: File '{file_path}' not found"
+
+        try:
+            # Open with O_NOFOLLOW where available to avoid symlink traversal
+            fd = os.open(resolved_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+            with os.fdopen(fd, "rb") as f:
+                if b"\0" in f.read(BINARY_SNIFF_BYTES):
+                    return f"Error reading file '{file_path}': binary file"
+                stat = os.fstat(f.fileno())
+                if not stat.st_size or stat.st_size < INDEXED_READ_MIN_BYTES:
+                    return super().read(file_path, offset, limit)
+                identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return self._read_page(str(resolved_path), data, identity, offset, limit)
+        except (OSError, ValueError) as e:
+            return f"Error reading file '{file_path}': {e}"
+
+    def write(self, file_path: str, content: str) -> WriteResult:
+        """Create a file, as ``FilesystemBackend.write``."""
+        result = super().write(file_path, content)
+        if result.error is None:
+            notify_files_changed([self._resolve_path(file_path)])
+        return result
+
+    def edit(
+        self, file_path: str, old_string: str, new_string: str, replace_all: bool = False
+    ) -> EditResult:
+        """Replace a string in a file, as ``FilesystemBackend.edit``."""
+        result = super().edit(file_path, old_string, new_string, replace_all)
+        if result.error is None:
+            notify_files_changed([self._resolve_path(file_path)])
+        return result
+
+    def upload_files(self, files: list[tuple[str, bytes]]) -> list[FileUploadResponse]:
+        """Write files, as ``FilesystemBackend.upload_files``."""
+        responses = super().upload_files(files)
+        notify_files_changed(
+            self._resolve_path(response.path) for response in responses if response.error is None
+        )
+        return responses
+
+    def _read_page(
+        self,
+        key: str,
+        data: mmap.mmap,
+        identity: tuple[int, int, int],
+        offset: int,
+        limit: int,
+    ) -> str:
+        index = self._line_index(key, data, identity)
+        if index.blank:
+            return EMPTY_CONTENT_WARNING
+        if offset >= index.line_count:
+            return f"Error: Line offset {offset} exceeds file length ({index.line_count} lines)"
+
+        start = _line_start(data, index, offset)
+        end = _page_end(data, start, min(limit, index.line_count - offset))
+        lines = data[start:end].decode("utf-8").split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        lines = [line.removesuffix("\r") for line in lines]
+        return format_content_with_line_numbers(lines, start_line=offset + 1)
+
+    def _line_index(
+        self, key: str, data: mmap.mmap, identity: tuple[int, int, int]
+    ) -> LineIndex:
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None and index.identity == identity:
+                self._indexes.move_to_end(key)
+                return index
+        # Built outside the lock; concurrent first reads of one file may both build it
+        index = build_line_index(data, identity)
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > MAX_CACHED_INDEXES:
+                self._indexes.popitem(last=False)
+        return index
+
+
+__all__ = ["IndexedFilesystemBackend", "LineIndex", "build_line_index"]
@@ -2,20 +2,34 @@
 
 from __future__ import annotations
 
+import asyncio
 import difflib
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Literal
 
 from deepagents.backends.utils import perform_string_replacement
+from langchain.agents.middleware.types import AgentMiddleware, AgentState
 
 from deepagents_cli.config import settings
+from deepagents_cli.multi_edit import apply_edits
 
 if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
     from deepagents.backends.protocol import BACKEND_TYPES
+    from langchain.agents.middleware.types import ToolCallRequest
+    from langchain_core.messages import ToolMessage
+    from langgraph.types import Command
 
 FileOpStatus = Literal["pending", "success", "error"]
 
+_WRITE_TOOLS = frozenset({"write_file", "edit_file", "multi_edit", "fast_apply"})
+# Captured before-snapshots kept for trackers to collect, oldest dropped first
+MAX_HELD_SNAPSHOTS = 256
+
 
 @dataclass
 class ApprovalPreview:
@@ -36,6 +50,20 @@ def _safe_read(path: Path) -> str | None:
         return None
 
 
+def _read_many(backend: BACKEND_TYPES, paths: list[str]) -> list[str | None]:
+    """Read ``paths`` through ``backend`` in one call; None for unreadable files."""
+    contents: list[str | None] = []
+    for response in backend.download_files(paths):
+        if response.content is None or response.error is not None:
+            contents.append(None)
+            continue
+        try:
+            contents.append(response.content.decode("utf-8"))
+        except UnicodeDecodeError:
+            contents.append(None)
+    return contents
+
+
 def _count_lines(text: str) -> int:
     """Count lines in text, treating empty strings as zero lines."""
     if not text:
@@ -181,7 +209,15 @@ def build_approval_preview(
             diff_title=f"Diff {display_path}",
         )
 
-    if tool_name == "edit_file":
+    if tool_name in {"edit_file", "multi_edit"}:
+        if tool_name == "multi_edit":
+            edits = list(args.get("edits") or [])
+            action = f"Replace text ({len(edits)} edits in one write)"
+        else:
+            replace_all = bool(args.get("replace_all", False))
+            action = (
+                f"Replace text ({'all occurrences' if replace_all else 'single occurrence'})"
+            )
         if physical_path is None:
             return ApprovalPreview(
                 title=f"Update {display_path}",
@@ -195,10 +231,12 @@ def build_approval_preview(
                 details=[f"File: {path_str}", "Action: Replace text"],
                 error="Unable to read current file contents.",
             )
-        old_string = str(args.get("old_string", ""))
-        new_string = str(args.get("new_string", ""))
-        replace_all = bool(args.get("replace_all", False))
-        replacement = perform_string_replacement(before, old_string, new_string, replace_all)
+        if tool_name == "multi_edit":
+            replacement = apply_edits(before, edits)
+        else:
+            old_string = str(args.get("old_string", ""))
+            new_string = str(args.get("new_string", ""))
+            replacement = perform_string_replacement(before, old_string, new_string, replace_all)
         if isinstance(replacement, str):
             return ApprovalPreview(
                 title=f"Update {display_path}",
@@ -222,7 +260,7 @@ def build_approval_preview(
             )
         details = [
             f"File: {path_str}",
-            f"Action: Replace text ({'all occurrences' if replace_all else 'single occurrence'})",
+            f"Action: {action}",
             f"Occurrences matched: {occurrences}",
             f"Lines changed: +{additions} / -{deletions}",
         ]
@@ -236,20 +274,234 @@ def build_approval_preview(
     return None
 
 
+class SnapshotBatcher:
+    """Read file snapshots off the event loop, batching concurrent requests.
+
+    Paths requested in the same event-loop iteration (e.g. the parallel tool
+    calls of one model turn) are read with a single ``read_many`` call in a
+    worker thread, so a remote sandbox costs one round-trip per batch and the
+    UI never blocks on it.
+    """
+
+    def __init__(self, read_many: Callable[[list[str]], list[str | None]]) -> None:
+        """Initialize the batcher.
+
+        Args:
+            read_many: Blocking function returning the content of each path
+                (None if it could not be read), in order
+        """
+        self._read_many = read_many
+        self._pending: dict[str, list[asyncio.Future[str | None]]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.batches = 0
+
+    def fetch(self, path: str) -> asyncio.Future[str | None]:
+        """Request a snapshot of ``path``; resolves to its content or None."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[str | None] = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+        self._pending.setdefault(path, []).append(future)
+        return future
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._read(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, pending: dict[str, list[asyncio.Future[str | None]]]) -> None:
+        paths = list(pending)
+        self.batches += 1
+        try:
+            contents = await asyncio.to_thread(self._read_many, paths)
+        except Exception:
+            contents = []
+        for index, path in enumerate(paths):
+            content = contents[index] if index < len(contents) else None
+            for future in pending[path]:
+                if not future.done():
+                    future.set_result(content)
+
+
+class BeforeSnapshots:
+    """Before-write file contents taken by ``FileSnapshotMiddleware``, by tool call id.
+
+    A tracker sees a tool call only when the stream consumer reaches it, which
+    can be after the tool has already run, so a snapshot it requests itself may
+    read the written file. The middleware reads the file before calling the
+    tool instead, and only while a tracker that wants the snapshots is open.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry with no listeners."""
+        self._contents: OrderedDict[str, str | None] = OrderedDict()
+        self._listeners = 0
+        self._lock = threading.Lock()
+
+    @property
+    def listening(self) -> bool:
+        """Whether any open tracker collects snapshots."""
+        return self._listeners > 0
+
+    def listen(self) -> None:
+        """Register a tracker that collects snapshots."""
+        with self._lock:
+            self._listeners += 1
+
+    def unlisten(self) -> None:
+        """Unregister a tracker; the last one out drops uncollected snapshots."""
+        with self._lock:
+            self._listeners = max(self._listeners - 1, 0)
+            if not self._listeners:
+                self._contents.clear()
+
+    def put(self, tool_call_id: str, content: str | None) -> None:
+        """Hold the content a file had before ``tool_call_id`` wrote it."""
+        with self._lock:
+            self._contents[tool_call_id] = content
+            while len(self._contents) > MAX_HELD_SNAPSHOTS:
+                self._contents.popitem(last=False)
+
+    def take(self, tool_call_id: str | None) -> tuple[bool, str | None]:
+        """Remove and return ``(found, content)`` for ``tool_call_id``."""
+        with self._lock:
+            if tool_call_id not in self._contents:
+                return False, None
+            return True, self._contents.pop(tool_call_id)
+
+
+before_snapshots = BeforeSnapshots()
+
+
+class FileSnapshotMiddleware(AgentMiddleware[AgentState, Any]):
+    """Snapshot the target of each file write before the tool runs.
+
+    Concurrent writes (the parallel tool calls of one model turn) share one
+    ``download_files`` call. Nothing is read unless a ``FileOpTracker`` created
+    with ``tool_snapshots=True`` is open, so runs that show no diffs pay nothing.
+    """
+
+    def __init__(self, *, backend: BACKEND_TYPES) -> None:
+        """Initialize the middleware.
+
+        Args:
+            backend: Backend the file tools write through (the agent's composite backend).
+        """
+        super().__init__()
+        self._backend = backend
+        self.snapshots = SnapshotBatcher(self._read_many)
+
+    def _read_many(self, paths: list[str]) -> list[str | None]:
+        return _read_many(self._backend, paths)
+
+    @staticmethod
+    def _target(request: ToolCallRequest) -> tuple[str, str] | None:
+        """Tool call id and path to snapshot, if the call writes a file."""
+        tool_call = request.tool_call
+        if not before_snapshots.listening or tool_call.get("name") not in _WRITE_TOOLS:
+            return None
+        args = tool_call.get("args") or {}
+        path = args.get("file_path") or args.get("path")
+        tool_call_id = tool_call.get("id")
+        if not path or not tool_call_id:
+            return None
+        return tool_call_id, str(path)
+
+    def wrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], ToolMessage | Command],
+    ) -> ToolMessage | Command:
+        """Snapshot the file a write tool targets, then run the tool."""
+        target = self._target(request)
+        if target is not None:
+            tool_call_id, path = target
+            before_snapshots.put(tool_call_id, self._read_many([path])[0])
+        return handler(request)
+
+    async def awrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]],
+    ) -> ToolMessage | Command:
+        """Snapshot the file a write tool targets, then run the tool."""
+        target = self._target(request)
+        if target is not None:
+            tool_call_id, path = target
+            before_snapshots.put(tool_call_id, await self.snapshots.fetch(path))
+        return await handler(request)
+
+
 class FileOpTracker:
     """Collect file operation metrics during a CLI interaction."""
 
-    def __init__(self, *, assistant_id: str | None, backend: BACKEND_TYPES | None = None) -> None:
-        """Initialize the tracker."""
+    def __init__(
+        self,
+        *,
+        assistant_id: str | None,
+        backend: BACKEND_TYPES | None = None,
+        capture_diffs: bool = True,
+        tool_snapshots: bool = False,
+    ) -> None:
+        """Initialize the tracker.
+
+        Args:
+            assistant_id: Agent identifier, used to resolve ``/memories/`` paths
+            backend: Backend to read snapshots from (local filesystem if None)
+            capture_diffs: Snapshot files before and after writes to compute
+                diffs. When False, no file content is read at all.
+            tool_snapshots: Take before-snapshots from the agent's
+                ``FileSnapshotMiddleware`` instead of reading them here, which
+                can race the write. Call ``close`` when the run ends.
+        """
         self.assistant_id = assistant_id
         self.backend = backend
+        self.capture_diffs = capture_diffs
+        self.tool_snapshots = tool_snapshots and capture_diffs
+        if self.tool_snapshots:
+            before_snapshots.listen()
         self.active: dict[str | None, FileOperationRecord] = {}
         self.completed: list[FileOperationRecord] = []
+        self.snapshots = SnapshotBatcher(self._read_many)
+        self._before: dict[str | None, asyncio.Future[str | None]] = {}
+        self._after: dict[str | None, asyncio.Future[str | None]] = {}
+
+    def _read_many(self, paths: list[str]) -> list[str | None]:
+        """Blocking batch read used by the snapshot batcher (runs in a thread)."""
+        if self.backend is None:
+            return [_safe_read(Path(path)) for path in paths]
+        return _read_many(self.backend, paths)
+
+    def _snapshot_key(self, record: FileOperationRecord) -> str | None:
+        """Path to read for a record: the tool path for backends, else the local path."""
+        if self.backend is not None:
+            path_str = record.args.get("file_path") or record.args.get("path")
+            return str(path_str) if path_str else None
+        return str(record.physical_path) if record.physical_path else None
+
+    def close(self) -> None:
+        """Stop collecting before-snapshots from ``FileSnapshotMiddleware``."""
+        if self.tool_snapshots:
+            self.tool_snapshots = False
+            before_snapshots.unlisten()
+
+    def _request_before(self, record: FileOperationRecord) -> None:
+        if not self.capture_diffs or self.tool_snapshots or record.tool_call_id in self._before:
+            return
+        key = self._snapshot_key(record)
+        if key:
+            self._before[record.tool_call_id] = self.snapshots.fetch(key)
 
     def start_operation(
         self, tool_name: str, args: dict[str, Any], tool_call_id: str | None
     ) -> None:
-        if tool_name not in {"read_file", "write_file", "edit_file", "fast_apply"}:
+        """Start tracking a file tool call and request its before-snapshot.
+
+        Must be called from the event loop; the snapshot is read in the
+        background and awaited by ``finalize_diff``.
+        """
+        if tool_name not in {"read_file", *_WRITE_TOOLS}:
             return
         path_str = str(args.get("file_path") or args.get("path") or "")
         display_path = format_display_path(path_str)
@@ -260,23 +512,9 @@ class FileOpTracker:
             tool_call_id=tool_call_id,
             args=args,
         )
-        if tool_name in {"write_file", "edit_file", "fast_apply"}:
-            if self.backend and path_str:
-                try:
-                    responses = self.backend.download_files([path_str])
-                    if (
-                        responses
-                        and responses[0].content is not None
-                        and responses[0].error is None
-                    ):
-                        record.before_content = responses[0].content.decode("utf-8")
-                    else:
-                        record.before_content = ""
-                except Exception:
-                    record.before_content = ""
-            elif record.physical_path:
-                record.before_content = _safe_read(record.physical_path) or ""
         self.active[tool_call_id] = record
+        if tool_name in _WRITE_TOOLS:
+            self._request_before(record)
 
     def update_args(self, tool_call_id: str, args: dict[str, Any]) -> None:
         """Update arguments for an active operation and retry capturing before_content."""
@@ -286,29 +524,21 @@ class FileOpTracker:
 
         record.args.update(args)
 
-        # If we haven't captured before_content yet, try again now that we might have the path
-        if record.before_content is None and record.tool_name in {"write_file", "edit_file", "fast_apply"}:
+        # If we haven't requested before_content yet, try again now that we might have the path
+        if record.tool_name in _WRITE_TOOLS and tool_call_id not in self._before:
             path_str = str(record.args.get("file_path") or record.args.get("path") or "")
             if path_str:
                 record.display_path = format_display_path(path_str)
                 record.physical_path = resolve_physical_path(path_str, self.assistant_id)
-                if self.backend:
-                    try:
-                        responses = self.backend.download_files([path_str])
-                        if (
-                            responses
-                            and responses[0].content is not None
-                            and responses[0].error is None
-                        ):
-                            record.before_content = responses[0].content.decode("utf-8")
-                        else:
-                            record.before_content = ""
-                    except Exception:
-                        record.before_content = ""
-                elif record.physical_path:
-                    record.before_content = _safe_read(record.physical_path) or ""
+                self._request_before(record)
 
     def complete_with_message(self, tool_message: Any) -> FileOperationRecord | None:
+        """Record a tool result.
+
+        Read results are final immediately. For writes, the after-snapshot is
+        requested here and the diff is computed by ``finalize_diff``, so
+        results for several tool calls can share one snapshot read.
+        """
         tool_call_id = getattr(tool_message, "tool_call_id", None)
         record = self.active.get(tool_call_id)
         if record is None:
@@ -354,48 +584,67 @@ class FileOpTracker:
                 record.metrics.end_line = lines
             if isinstance(limit, int) and lines > limit:
                 record.metrics.end_line = (record.metrics.start_line or 1) + limit - 1
+            self._finalize(record)
+        elif not self.capture_diffs:
+            self._finalize(record)
         else:
             # For write/edit operations, read back from backend (or local filesystem)
-            self._populate_after_content(record)
-            if record.after_content is None:
-                record.status = "error"
-                record.error = "Could not read updated file content."
-                self._finalize(record)
-                return record
-            record.metrics.lines_written = _count_lines(record.after_content)
-            before_lines = _count_lines(record.before_content or "")
-            diff = compute_unified_diff(
+            key = self._snapshot_key(record)
+            if key:
+                self._after[tool_call_id] = self.snapshots.fetch(key)
+        return record
+
+    async def finalize_diff(self, record: FileOperationRecord) -> FileOperationRecord:
+        """Wait for a write's snapshots and compute its diff and line metrics."""
+        if record.tool_call_id not in self.active:
+            return record
+        before_future = self._before.pop(record.tool_call_id, None)
+        after_future = self._after.pop(record.tool_call_id, None)
+        found, before = before_snapshots.take(record.tool_call_id)
+        if not found and before_future:
+            before = await before_future
+        record.before_content = before or ""
+        record.after_content = await after_future if after_future else None
+
+        if record.after_content is None:
+            record.status = "error"
+            record.error = "Could not read updated file content."
+            self._finalize(record)
+            return record
+        record.metrics.lines_written = _count_lines(record.after_content)
+        before_lines = _count_lines(record.before_content or "")
+        diff = compute_unified_diff(
+            record.before_content or "",
+            record.after_content,
+            record.display_path,
+            max_lines=100,
+        )
+        record.diff = diff
+        if diff:
+            additions = sum(
+                1
+                for line in diff.splitlines()
+                if line.startswith("+") and not line.startswith("+++")
+            )
+            deletions = sum(
+                1
+                for line in diff.splitlines()
+                if line.startswith("-") and not line.startswith("---")
+            )
+            record.metrics.lines_added = additions
+            record.metrics.lines_removed = deletions
+        elif record.tool_name == "write_file" and (record.before_content or "") == "":
+            record.metrics.lines_added = record.metrics.lines_written
+        record.metrics.bytes_written = len(record.after_content.encode("utf-8"))
+        if record.diff is None and (record.before_content or "") != record.after_content:
+            record.diff = compute_unified_diff(
                 record.before_content or "",
                 record.after_content,
                 record.display_path,
                 max_lines=100,
             )
-            record.diff = diff
-            if diff:
-                additions = sum(
-                    1
-                    for line in diff.splitlines()
-                    if line.startswith("+") and not line.startswith("+++")
-                )
-                deletions = sum(
-                    1
-                    for line in diff.splitlines()
-                    if line.startswith("-") and not line.startswith("---")
-                )
-                record.metrics.lines_added = additions
-                record.metrics.lines_removed = deletions
-            elif record.tool_name == "write_file" and (record.before_content or "") == "":
-                record.metrics.lines_added = record.metrics.lines_written
-            record.metrics.bytes_written = len(record.after_content.encode("utf-8"))
-            if record.diff is None and (record.before_content or "") != record.after_content:
-                record.diff = compute_unified_diff(
-                    record.before_content or "",
-                    record.after_content,
-                    record.display_path,
-                    max_lines=100,
-                )
-            if record.diff is None and before_lines != record.metrics.lines_written:
-                record.metrics.lines_added = max(record.metrics.lines_written - before_lines, 0)
+        if record.diff is None and before_lines != record.metrics.lines_written:
+            record.metrics.lines_added = max(record.metrics.lines_written - before_lines, 0)
 
         self._finalize(record)
         return record
@@ -413,32 +662,8 @@ class FileOpTracker:
                 if record_path == file_path:
                     record.hitl_approved = True
 
-    def _populate_after_content(self, record: FileOperationRecord) -> None:
-        # Use backend if available (works for any BackendProtocol implementation)
-        if self.backend:
-            try:
-                file_path = record.args.get("file_path") or record.args.get("path")
-                if file_path:
-                    responses = self.backend.download_files([file_path])
-                    if (
-                        responses
-                        and responses[0].content is not None
-                        and responses[0].error is None
-                    ):
-                        record.after_content = responses[0].content.decode("utf-8")
-                    else:
-                        record.after_content = None
-                else:
-                    record.after_content = None
-            except Exception:
-                record.after_content = None
-        else:
-            # Fallback: direct filesystem read when no backend provided
-            if record.physical_path is None:
-                record.after_content = None
-                return
-            record.after_content = _safe_read(record.physical_path)
-
     def _finalize(self, record: FileOperationRecord) -> None:
         self.completed.append(record)
         self.active.pop(record.tool_call_id, None)
+        self._before.pop(record.tool_call_id, None)
+        self._after.pop(record.tool_call_id, None)
@@ -0,0 +1,410 @@
+"""Headless agent execution with JSONL event output.
+
+This is the non-interactive counterpart of ``execute_task_textual``: it drives
+the same ``agent.astream`` loop and chunk parsing, but reports text, tool calls,
+tool results, interrupts, token usage and subagent activity as JSON events
+instead of mounting widgets. Nothing here imports Textual, so scripted and CI
+runs skip the TUI startup and rendering cost.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, TextIO
+
+from langchain_core.messages import HumanMessage, ToolMessage
+from langgraph.types import Command
+
+from deepagents_cli.config import ModelConfigurationError, NoModelSelectedError
+from deepagents_cli.input import expand_file_mentions
+from deepagents_cli.stream_parsing import (
+    STREAM_MODES,
+    build_run_config,
+    extract_todos,
+    is_summarization_chunk,
+    parse_interrupts,
+    split_stream_chunk,
+    usage_total_tokens,
+)
+from deepagents_cli.tool_call_args import ToolCallBuffers
+from deepagents_cli.ui import format_tool_message_content
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from langchain.agents.middleware.human_in_the_loop import HITLRequest, HITLResponse
+
+
+@dataclass
+class HeadlessResult:
+    """Outcome of a single headless run."""
+
+    thread_id: str
+    status: str  # "completed" | "rejected" | "interrupted" | "error"
+    text: str
+    # Summed over every model call of the run, subagents included
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    tool_calls: int
+    elapsed_s: float
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the result as a JSON-serializable dict."""
+        return asdict(self)
+
+
+class JsonlEventWriter:
+    """Write events as one JSON object per line."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+
+    def __call__(self, event: dict[str, Any]) -> None:
+        self._stream.write(json.dumps(event, default=str, ensure_ascii=False) + "\n")
+        self._stream.flush()
+
+
+async def execute_task_headless(
+    user_input: str,
+    agent: Any,
+    assistant_id: str | None,
+    thread_id: str,
+    *,
+    emit: Callable[[dict[str, Any]], None] | None = None,
+    auto_approve: bool = True,
+) -> HeadlessResult:
+    """Run one prompt to completion and report progress as events.
+
+    Args:
+        user_input: The user's prompt (``@file`` mentions are expanded)
+        agent: The LangGraph agent to execute
+        assistant_id: The agent identifier
+        thread_id: Thread to run on
+        emit: Callable receiving each event dict. Events are dropped if None.
+        auto_approve: Approve human-in-the-loop interrupts. When False, the
+            first interrupt is rejected and the run stops.
+
+    Returns:
+        The run result with the final assistant text and token usage.
+    """
+
+    def _emit(event_type: str, ns_key: tuple = (), **fields: Any) -> None:
+        if emit is None:
+            return
+        event: dict[str, Any] = {"type": event_type, "ts": time.time()}
+        if ns_key:
+            event["namespace"] = list(ns_key)
+        event.update(fields)
+        emit(event)
+
+    started = time.perf_counter()
+    config = build_run_config(thread_id, assistant_id)
+    tool_call_buffers = ToolCallBuffers()
+    emitted_tool_ids: set[str] = set()
+    text_by_namespace: dict[tuple, list[str]] = {}
+    active_subagent_namespaces: set[tuple] = set()
+    final_text = ""
+    input_tokens = 0
+    output_tokens = 0
+    total_tokens = 0
+    tool_call_count = 0
+    status = "completed"
+    error: str | None = None
+
+    def _flush_text(ns_key: tuple) -> None:
+        nonlocal final_text
+        parts = text_by_namespace.pop(ns_key, None)
+        if not parts:
+            return
+        text = "".join(parts)
+        if not text.strip():
+            return
+        if ns_key == ():
+            final_text = text
+        _emit("text", ns_key, text=text)
+
+    def _subagent_start(ns_key: tuple) -> None:
+        if ns_key == () or ns_key in active_subagent_namespaces:
+            return
+        active_subagent_namespaces.add(ns_key)
+        _emit("subagent_start", ns_key)
+
+    def _subagent_end(ns_key: tuple) -> None:
+        if ns_key == () or ns_key not in active_subagent_namespaces:
+            return
+        _flush_text(ns_key)
+        active_subagent_namespaces.discard(ns_key)
+        _emit("subagent_end", ns_key)
+
+    _emit("run_start", thread_id=thread_id, assistant_id=assistant_id, prompt=user_input)
+    stream_input: dict | Command = {
+        "messages": [{"role": "user", "content": expand_file_mentions(user_input)}]
+    }
+
+    try:
+        while True:
+            pending_interrupts: dict[str, HITLRequest] = {}
+
+            async for chunk in agent.astream(
+                stream_input,
+                stream_mode=STREAM_MODES,
+                subgraphs=True,
+                config=config,
+                durability="exit",
+            ):
+                parsed_chunk = split_stream_chunk(chunk)
+                if parsed_chunk is None:
+                    continue
+                ns_key, current_stream_mode, data = parsed_chunk
+                _subagent_start(ns_key)
+
+                if current_stream_mode == "updates":
+                    if not isinstance(data, dict):
+                        continue
+                    if "__interrupt__" in data:
+                        pending_interrupts.update(parse_interrupts(data))
+                    todos = extract_todos(data)
+                    if todos is not None:
+                        _emit("todos", ns_key, todos=todos)
+                    continue
+
+                if current_stream_mode != "messages":
+                    continue
+                if not isinstance(data, tuple) or len(data) != 2:
+                    continue
+                message, metadata = data
+                if is_summarization_chunk(metadata):
+                    continue
+
+                if isinstance(message, HumanMessage):
+                    _flush_text(ns_key)
+                    continue
+
+                if isinstance(message, ToolMessage):
+                    _flush_text(ns_key)
+                    _emit(
+                        "tool_result",
+                        ns_key,
+                        id=getattr(message, "tool_call_id", None),
+                        name=getattr(message, "name", ""),
+                        status=getattr(message, "status", "success"),
+                        content=format_tool_message_content(message.content),
+                    )
+                    if ns_key != () and getattr(message, "chunk_position", None) == "last":
+                        _subagent_end(ns_key)
+                    continue
+
+                # Streamed usage comes in per-chunk increments, so summing them
+                # adds up every model call
+                usage = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+                total_tokens += usage_total_tokens(message)
+
+                if hasattr(message, "content_blocks"):
+                    for block in message.content_blocks:
+                        block_type = block.get("type")
+                        if block_type == "text":
+                            text = block.get("text", "")
+                            if text:
+                                text_by_namespace.setdefault(ns_key, []).append(text)
+                            continue
+                        if block_type not in ("tool_call_chunk", "tool_call"):
+                            continue
+
+                        tool_call = tool_call_buffers.feed(ns_key, block)
+                        if tool_call is None:
+                            continue
+                        if tool_call.id is not None:
+                            if tool_call.id in emitted_tool_ids:
+                                continue
+                            emitted_tool_ids.add(tool_call.id)
+                        _flush_text(ns_key)
+                        tool_call_count += 1
+                        _emit(
+                            "tool_call",
+                            ns_key,
+                            id=tool_call.id,
+                            name=tool_call.name,
+                            args=tool_call.args,
+                        )
+
+                if getattr(message, "chunk_position", None) == "last":
+                    _flush_text(ns_key)
+                    if ns_key != ():
+                        _subagent_end(ns_key)
+
+            for ns_key in list(text_by_namespace):
+                _flush_text(ns_key)
+
+            if not pending_interrupts:
+                break
+
+            hitl_response: dict[str, HITLResponse] = {}
+            decision_type = "approve" if auto_approve else "reject"
+            for interrupt_id, hitl_request in pending_interrupts.items():
+                actions = hitl_request["action_requests"]
+                _emit(
+                    "interrupt",
+                    id=interrupt_id,
+                    actions=[
+                        {"name": action.get("name"), "args": action.get("args")}
+                        for action in actions
+                    ],
+                    decision=decision_type,
+                )
+                hitl_response[interrupt_id] = {
+                    "decisions": [{"type": decision_type} for _ in actions]
+                }
+
+            if not auto_approve:
+                status = "rejected"
+                break
+            stream_input = Command(resume=hitl_response)
+
+    except asyncio.CancelledError:
+        for ns_key in list(text_by_namespace):
+            _flush_text(ns_key)
+        _emit("run_end", thread_id=thread_id, status="interrupted")
+        raise
+    except KeyboardInterrupt:
+        status = "interrupted"
+        for ns_key in list(text_by_namespace):
+            _flush_text(ns_key)
+    except Exception as exc:
+        status = "error"
+        error = str(exc)
+        _emit("error", error=error, error_type=type(exc).__name__)
+
+    for ns_key in list(active_subagent_namespaces):
+        _subagent_end(ns_key)
+
+    result = HeadlessResult(
+        thread_id=thread_id,
+        status=status,
+        text=final_text,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        total_tokens=total_tokens,
+        tool_calls=tool_call_count,
+        elapsed_s=round(time.perf_counter() - started, 3),
+        error=error,
+    )
+    _emit(
+        "usage",
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        total_tokens=total_tokens,
+    )
+    _emit("run_end", **result.to_dict())
+    return result
+
+
+async def run_headless_async(
+    prompt: str,
+    *,
+    assistant_id: str,
+    thread_id: str,
+    auto_approve: bool = True,
+    sandbox_type: str = "none",
+    sandbox_id: str | None = None,
+    model_name: str | None = None,
+    reasoning_effort: str | None = None,
+    service_tier: str | None = None,
+    extensions: list[str] | None = None,
+    extensions_only: bool = False,
+    extensions_disabled: bool = False,
+    output: TextIO | None = None,
+) -> HeadlessResult:
+    """Build the agent and run a single prompt headlessly.
+
+    Events are written as JSONL to ``output`` (stdout by default). While the
+    run is in progress, anything else printed to stdout (status lines, MCP
+    warnings) is redirected to stderr so the event stream stays parseable.
+
+    Args:
+        prompt: The prompt to run
+        assistant_id: Agent identifier for memory storage
+        thread_id: Thread ID to use (new or resumed)
+        auto_approve: Whether to approve tool interrupts
+        sandbox_type: Type of sandbox ("none", "modal", "runloop", "daytona")
+        sandbox_id: Optional existing sandbox ID to reuse
+        model_name: Optional model name to use
+        reasoning_effort: Optional OpenAI reasoning effort override
+        service_tier: Optional OpenAI service tier override
+        extensions: Explicit extension entries to load
+        extensions_only: If True, skip auto-discovered extensions
+        extensions_disabled: If True, disable all extensions
+        output: Stream for JSONL events
+
+    Returns:
+        The run result.
+    """
+    from deepagents_cli.runtime import open_agent_runtime
+
+    emit = JsonlEventWriter(output or sys.stdout)
+    with contextlib.redirect_stdout(sys.stderr):
+        async with open_agent_runtime(
+            assistant_id,
+            sandbox_type=sandbox_type,
+            sandbox_id=sandbox_id,
+            reasoning_effort=reasoning_effort,
+            service_tier=service_tier,
+            extensions=extensions,
+            extensions_only=extensions_only,
+            extensions_disabled=extensions_disabled,
+        ) as runtime:
+            try:
+                agent, _backend, task_manager = runtime.build_agent(
+                    model_name, auto_approve=auto_approve
+                )
+            except (NoModelSelectedError, ModelConfigurationError) as exc:
+                return _report_build_error(emit, thread_id, exc)
+            try:
+                return await execute_task_headless(
+                    prompt,
+                    agent,
+                    assistant_id,
+                    thread_id,
+                    emit=emit,
+                    auto_approve=auto_approve,
+                )
+            finally:
+                if task_manager is not None:
+                    task_manager.cleanup()
+
+
+def _report_build_error(
+    emit: Callable[[dict[str, Any]], None], thread_id: str, exc: Exception
+) -> HeadlessResult:
+    """Emit ``error`` and ``run_end`` events for an agent that could not be built."""
+    result = HeadlessResult(
+        thread_id=thread_id,
+        status="error",
+        text="",
+        input_tokens=0,
+        output_tokens=0,
+        total_tokens=0,
+        tool_calls=0,
+        elapsed_s=0.0,
+        error=str(exc) or "No model selected",
+    )
+    error_type = type(exc).__name__
+    emit({"type": "error", "ts": time.time(), "error": result.error, "error_type": error_type})
+    emit({"type": "run_end", "ts": time.time(), **result.to_dict()})
+    return result
+
+
+__all__ = [
+    "HeadlessResult",
+    "JsonlEventWriter",
+    "execute_task_headless",
+    "run_headless_async",
+]
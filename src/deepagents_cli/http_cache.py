@@ -0,0 +1,435 @@
+"""On-disk cache of HTTP responses and web search results.
+
+Responses from ``fetch_url``, ``http_request`` (GET only) and ``web_search``
+are kept in ``~/.deepagents/http_cache.db``, shared by every thread and
+session. HTTP responses follow their caching headers: a response is reused
+while fresh (``Cache-Control: max-age``, ``Expires``, or a heuristic based on
+``Last-Modified``), revalidated with ``If-None-Match``/``If-Modified-Since``
+once stale, and never stored when marked ``no-store``. Search results have
+fixed time-to-live values instead. When the cache grows past its size limit
+(``DEEPAGENTS_HTTP_CACHE_MB``, ``0`` disables it), the least recently used
+entries are evicted.
+
+Hits and misses are counted per tool, for the session and across sessions,
+and reported by ``/cache``. Async tools use the ``a``-prefixed methods, which
+run the database calls in a worker thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal
+
+import httpx
+
+from deepagents_cli.config import settings
+
+# Size limit in MiB; override with DEEPAGENTS_HTTP_CACHE_MB (0 disables the cache).
+DEFAULT_MAX_MB = 200
+# Responses larger than this are not stored.
+MAX_ENTRY_BYTES = 10 * 1024 * 1024
+# Longest freshness inferred from Last-Modified when a response sets none.
+HEURISTIC_MAX_S = 24 * 3600
+# Evicting stops once the cache is below this fraction of its limit.
+EVICT_TO = 0.9
+
+# Not stored: bodies are kept decoded, and the rest describe the connection
+_UNSTORED_HEADERS = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+)
+
+# hit: served fresh; revalidated: served after a 304; bypass: the caller
+# skipped the cache (the response is still stored)
+Outcome = Literal["hit", "revalidated", "miss", "bypass"]
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        headers TEXT NOT NULL,
+        body BLOB NOT NULL,
+        meta TEXT NOT NULL,
+        stored_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        size INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)",
+    """CREATE TABLE IF NOT EXISTS stats (
+        tool TEXT NOT NULL,
+        outcome TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (tool, outcome)
+    )""",
+)
+
+
+@dataclass
+class CachedResponse:
+    """A stored response."""
+
+    url: str
+    status_code: int
+    headers: dict[str, str]
+    body: bytes
+    meta: dict[str, Any] = field(default_factory=dict)
+    """Extra values stored by the caller (e.g. whether the body was truncated)."""
+    stored_at: float = 0.0
+    expires_at: float = 0.0
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the response can be used without revalidating it."""
+        return time.time() < self.expires_at
+
+    def as_response(self) -> httpx.Response:
+        """The stored response as an ``httpx.Response``."""
+        return httpx.Response(
+            self.status_code,
+            headers=self.headers,
+            content=self.body,
+            request=httpx.Request("GET", self.url),
+        )
+
+    def validators(self) -> dict[str, str]:
+        """Request headers that revalidate this response."""
+        headers = {}
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+def max_cache_bytes() -> int:
+    """Cache size limit in bytes (0 when the cache is disabled)."""
+    value = os.environ.get("DEEPAGENTS_HTTP_CACHE_MB", "").strip()
+    try:
+        megabytes = max(0.0, float(value)) if value else DEFAULT_MAX_MB
+    except ValueError:
+        megabytes = DEFAULT_MAX_MB
+    return int(megabytes * 1024 * 1024)
+
+
+def request_key(method: str, url: str, extra: Any = None) -> str:
+    """Cache key for a request; ``extra`` holds anything else the response depends on."""
+    parts = json.dumps([method.upper(), url, extra], sort_keys=True, default=str)
+    return hashlib.sha256(parts.encode()).hexdigest()
+
+
+def _cache_control(headers: dict[str, str]) -> dict[str, str]:
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip().strip('"')
+    return directives
+
+
+def _http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def freshness_lifetime(headers: dict[str, str], now: float | None = None) -> float:
+    """Seconds a response stays fresh after it was received (RFC 9111 section 4.2).
+
+    Args:
+        headers: Response headers, with lowercase names.
+        now: When the response was received; defaults to the current time.
+    """
+    now = time.time() if now is None else now
+    directives = _cache_control(headers)
+    if "no-cache" in directives or "no-store" in directives:
+        return 0.0
+    age = headers.get("age", "").strip()
+    current_age = float(age) if age.isdigit() else 0.0
+    if directives.get("max-age", "").isdigit():
+        return max(0.0, float(directives["max-age"]) - current_age)
+    date = _http_date(headers.get("date")) or now
+    expires = _http_date(headers.get("expires"))
+    if "expires" in headers:
+        # An invalid Expires (often "0" or "-1") means already expired
+        return max(0.0, expires - date - current_age) if expires is not None else 0.0
+    last_modified = _http_date(headers.get("last-modified"))
+    if last_modified is not None and last_modified < date:
+        return max(0.0, min(0.1 * (date - last_modified), HEURISTIC_MAX_S) - current_age)
+    return 0.0
+
+
+def is_storable(status_code: int, headers: dict[str, str]) -> bool:
+    """Whether a response may be stored and is worth storing."""
+    if status_code != 200 or headers.get("vary", "").strip() == "*":
+        return False
+    if "no-store" in _cache_control(headers):
+        return False
+    return freshness_lifetime(headers) > 0 or "etag" in headers or "last-modified" in headers
+
+
+class HttpCache:
+    """SQLite store of responses with LRU eviction and hit counters.
+
+    Thread-safe: all access is serialized on one connection.
+    """
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        """Open (creating if needed) the cache database at ``path``."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.session: dict[str, Counter[str]] = {}
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, key: str) -> CachedResponse | None:
+        """The stored response for ``key``, marking it recently used."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, meta, stored_at, expires_at "
+                "FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+        url, status, headers, body, meta, stored_at, expires_at = row
+        return CachedResponse(
+            url, status, json.loads(headers), body, json.loads(meta), stored_at, expires_at
+        )
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        body: bytes,
+        *,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        meta: dict[str, Any] | None = None,
+        ttl: float | None = None,
+    ) -> bool:
+        """Store a response, evicting old entries if the cache is over its limit.
+
+        Args:
+            key: Cache key (see ``request_key``).
+            url: URL the response came from.
+            body: Response body.
+            status_code: Response status.
+            headers: Response headers; names are lowercased.
+            meta: Extra JSON-serializable values returned with the response.
+            ttl: Seconds the response stays fresh. By default this comes from
+                the caching headers, and responses they forbid storing (or
+                that could never be reused) are skipped.
+
+        Returns:
+            Whether the response was stored.
+        """
+        headers = {
+            name.lower(): value
+            for name, value in (headers or {}).items()
+            if name.lower() not in _UNSTORED_HEADERS
+        }
+        now = time.time()
+        if ttl is None:
+            if not is_storable(status_code, headers):
+                return False
+            ttl = freshness_lifetime(headers, now)
+        if len(body) > MAX_ENTRY_BYTES or len(body) > self.max_bytes:
+            return False
+        size = len(body) + len(url) + sum(len(k) + len(v) for k, v in headers.items())
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, status, headers, body, meta, "
+                "stored_at, expires_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    url,
+                    status_code,
+                    json.dumps(headers),
+                    body,
+                    json.dumps(meta or {}),
+                    now,
+                    now + ttl,
+                    now,
+                    size,
+                ),
+            )
+            self._evict()
+        return True
+
+    def revalidated(self, key: str, cached: CachedResponse, headers: dict[str, str]) -> None:
+        """Extend a stored response's freshness after a 304 Not Modified.
+
+        ``headers`` are the 304's headers; they replace the stored ones.
+        """
+        merged = {
+            **cached.headers,
+            **{
+                name.lower(): value
+                for name, value in headers.items()
+                if name.lower() not in _UNSTORED_HEADERS
+            },
+        }
+        now = time.time()
+        cached.headers = merged
+        cached.expires_at = now + freshness_lifetime(merged, now)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET headers = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                (json.dumps(merged), cached.expires_at, now, key),
+            )
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * EVICT_TO)
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at")
+        evicted = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            evicted.append((key,))
+            excess -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def record(self, tool: str, outcome: Outcome) -> None:
+        """Count a cache lookup by ``tool``."""
+        with self._lock, self._conn:
+            self.session.setdefault(tool, Counter())[outcome] += 1
+            self._conn.execute(
+                "INSERT INTO stats (tool, outcome, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (tool, outcome) DO UPDATE SET count = count + 1",
+                (tool, outcome),
+            )
+
+    async def alookup(self, key: str) -> CachedResponse | None:
+        """``lookup`` off the event loop."""
+        return await asyncio.to_thread(self.lookup, key)
+
+    async def astore(self, key: str, url: str, body: bytes, **kwargs: Any) -> bool:
+        """``store`` off the event loop; keyword arguments are those of ``store``."""
+        return await asyncio.to_thread(self.store, key, url, body, **kwargs)
+
+    async def arevalidated(
+        self, key: str, cached: CachedResponse, headers: dict[str, str]
+    ) -> None:
+        """``revalidated`` off the event loop."""
+        await asyncio.to_thread(self.revalidated, key, cached, headers)
+
+    async def arecord(self, tool: str, outcome: Outcome) -> None:
+        """``record`` off the event loop."""
+        await asyncio.to_thread(self.record, tool, outcome)
+
+    def totals(self) -> dict[str, Counter[str]]:
+        """Lookups per tool and outcome, across all sessions."""
+        with self._lock:
+            rows = self._conn.execute("SELECT tool, outcome, count FROM stats").fetchall()
+        totals: dict[str, Counter[str]] = {}
+        for tool, outcome, count in rows:
+            totals.setdefault(tool, Counter())[outcome] = count
+        return totals
+
+    def usage(self) -> tuple[int, int]:
+        """Number of entries and their total size in bytes."""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return count, size
+
+    def clear(self) -> None:
+        """Delete every entry (counters are kept)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+
+_cache: HttpCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache | None:
+    """The shared cache, opened on first use; None when disabled or unavailable."""
+    global _cache  # noqa: PLW0603
+    max_bytes = max_cache_bytes()
+    if max_bytes == 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = HttpCache(settings.user_deepagents_dir / "http_cache.db", max_bytes)
+            except (OSError, sqlite3.Error):
+                return None
+        _cache.max_bytes = max_bytes
+        return _cache
+
+
+async def aget_http_cache() -> HttpCache | None:
+    """``get_http_cache`` off the event loop (the first call opens the database)."""
+    return await asyncio.to_thread(get_http_cache)
+
+
+def format_report(cache: HttpCache) -> str:
+    """Entries, size and hit rates per tool, for ``/cache``."""
+    count, size = cache.usage()
+    lines = [
+        f"HTTP cache: {count} entries, {size / 1024 / 1024:.1f} of "
+        f"{cache.max_bytes / 1024 / 1024:.0f} MiB ({cache.path})"
+    ]
+    totals = cache.totals()
+    for tool in sorted(set(totals) | set(cache.session)):
+        columns = []
+        for label, counts in (("session", cache.session.get(tool)), ("all time", totals.get(tool))):
+            counts = counts or Counter()
+            lookups = counts["hit"] + counts["revalidated"] + counts["miss"]
+            served = counts["hit"] + counts["revalidated"]
+            rate = f"{served / lookups:.0%}" if lookups else "-"
+            columns.append(
+                f"{label} {served}/{lookups} ({rate}; {counts['revalidated']} revalidated, "
+                f"{counts['bypass']} bypassed)"
+            )
+        lines.append(f"  {tool}: {' | '.join(columns)}")
+    if len(lines) == 1:
+        lines.append("  No lookups yet")
+    return "\n".join(lines)
+
+
+__all__ = [
+    "CachedResponse",
+    "HttpCache",
+    "format_report",
+    "freshness_lifetime",
+    "get_http_cache",
+    "is_storable",
+    "max_cache_bytes",
+    "request_key",
+]
@@ -0,0 +1,263 @@
+"""Shared HTTP clients for tools, extensions and auth.
+
+Requests go through one pooled ``httpx`` client per event loop (and one for
+synchronous callers), so connections to a host are kept alive and reused,
+over HTTP/2 when the ``h2`` package is installed. Each host gets a bounded
+number of concurrent requests, and failed requests are retried with jittered
+exponential backoff when that is safe:
+
+- connection failures and 429/503 responses, for any method (the server
+  did not process the request)
+- read timeouts, dropped connections and 502/504 responses, for idempotent
+  methods only
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import importlib.util
+import os
+import random
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+
+DEFAULT_TIMEOUT = 30.0
+# Concurrent requests per host; override with DEEPAGENTS_HTTP_MAX_PER_HOST.
+DEFAULT_MAX_PER_HOST = 8
+MAX_KEEPALIVE_CONNECTIONS = 32
+KEEPALIVE_EXPIRY_S = 60.0
+DEFAULT_RETRIES = 2
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 8.0
+# Longest Retry-After honoured; longer waits fail the request instead.
+RETRY_AFTER_MAX_S = 30.0
+
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+_RETRY_STATUSES = frozenset({429, 503})
+_IDEMPOTENT_RETRY_STATUSES = frozenset({502, 504})
+
+# Per-host limits set by set_host_concurrency, overriding the default.
+_host_limits: dict[str, int] = {}
+
+
+def set_host_concurrency(host: str, limit: int) -> None:
+    """Limit concurrent requests to ``host`` (applies to clients created afterwards)."""
+    _host_limits[host.lower()] = max(1, limit)
+
+
+def _default_max_per_host() -> int:
+    value = os.environ.get("DEEPAGENTS_HTTP_MAX_PER_HOST", "").strip()
+    try:
+        return max(1, int(value)) if value else DEFAULT_MAX_PER_HOST
+    except ValueError:
+        return DEFAULT_MAX_PER_HOST
+
+
+def _host_limit(host: str) -> int:
+    return _host_limits.get(host.lower()) or _default_max_per_host()
+
+
+def _client_options() -> dict[str, Any]:
+    return {
+        "http2": importlib.util.find_spec("h2") is not None,
+        "follow_redirects": True,
+        "timeout": DEFAULT_TIMEOUT,
+        "limits": httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY_S,
+        ),
+    }
+
+
+def _retryable_error(method: str, error: httpx.TransportError) -> bool:
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    return method in _IDEMPOTENT_METHODS and isinstance(
+        error, (httpx.ReadTimeout, httpx.ReadError, httpx.RemoteProtocolError)
+    )
+
+
+def _retryable_status(method: str, status: int) -> bool:
+    return status in _RETRY_STATUSES or (
+        method in _IDEMPOTENT_METHODS and status in _IDEMPOTENT_RETRY_STATUSES
+    )
+
+
+def _retry_delay(attempt: int, response: httpx.Response | None = None) -> float | None:
+    """Seconds to wait before retry ``attempt`` (0-based), or None to give up.
+
+    Honours a numeric ``Retry-After`` header; otherwise uses full jitter.
+    """
+    retry_after = response.headers.get("retry-after", "") if response is not None else ""
+    if retry_after.strip().isdigit():
+        delay = float(retry_after)
+        return delay if delay <= RETRY_AFTER_MAX_S else None
+    return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2**attempt))  # noqa: S311
+
+
+class _AsyncPool:
+    """Client and per-host semaphores bound to one event loop."""
+
+    def __init__(self) -> None:
+        self.client = httpx.AsyncClient(**_client_options())
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(_host_limit(host))
+        return self._semaphores[host]
+
+
+# httpx async clients can't be shared across event loops
+_async_pools: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncPool] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _async_pool() -> _AsyncPool:
+    loop = asyncio.get_running_loop()
+    pool = _async_pools.get(loop)
+    if pool is None:
+        pool = _async_pools[loop] = _AsyncPool()
+    return pool
+
+
+@contextlib.asynccontextmanager
+async def astream(
+    method: str, url: str, *, retries: int = DEFAULT_RETRIES, **kwargs: Any
+) -> AsyncIterator[httpx.Response]:
+    """Send a request on the shared async client, leaving the body unread.
+
+    Same arguments and retry rules as ``arequest``; only the status line and
+    headers decide retries. The caller streams the body (``aiter_bytes``) and
+    may stop early. The host's concurrency slot is held until the block exits.
+
+    Yields:
+        The response, closed when the block exits.
+    """
+    method = method.upper()
+    pool = _async_pool()
+    attempt = 0
+    async with pool.semaphore(httpx.URL(url).host):
+        while True:
+            request = pool.client.build_request(method, url, **kwargs)
+            try:
+                response = await pool.client.send(request, stream=True)
+            except httpx.TransportError as e:
+                retry = attempt < retries and _retryable_error(method, e)
+                delay = _retry_delay(attempt) if retry else None
+                if delay is None:
+                    raise
+            else:
+                retry = attempt < retries and _retryable_status(method, response.status_code)
+                delay = _retry_delay(attempt, response) if retry else None
+                if delay is None:
+                    break
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+
+async def arequest(
+    method: str, url: str, *, retries: int = DEFAULT_RETRIES, **kwargs: Any
+) -> httpx.Response:
+    """Send a request on the shared async client.
+
+    Args:
+        method: HTTP method.
+        url: Absolute URL.
+        retries: Retries after the first attempt, when the failure is retryable.
+        **kwargs: Passed to ``httpx.AsyncClient.build_request`` (headers, params,
+            json, content, data, timeout, ...).
+
+    Returns:
+        The response (of the last attempt, if every attempt was retryable).
+
+    Raises:
+        httpx.HTTPError: If the request failed and could not be retried.
+    """
+    async with astream(method, url, retries=retries, **kwargs) as response:
+        await response.aread()
+    return response
+
+
+async def aclose() -> None:
+    """Close the running event loop's client."""
+    pool = _async_pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.client.aclose()
+
+
+_sync_client: httpx.Client | None = None
+_sync_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_sync_lock = threading.Lock()
+
+
+def request(
+    method: str, url: str, *, retries: int = DEFAULT_RETRIES, **kwargs: Any
+) -> httpx.Response:
+    """Send a request on the shared synchronous client (thread-safe).
+
+    Same arguments and retry rules as ``arequest``.
+    """
+    global _sync_client  # noqa: PLW0603
+    method = method.upper()
+    host = httpx.URL(url).host
+    with _sync_lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(**_client_options())
+        client = _sync_client
+        semaphore = _sync_semaphores.setdefault(
+            host, threading.BoundedSemaphore(_host_limit(host))
+        )
+    attempt = 0
+    with semaphore:
+        while True:
+            try:
+                response = client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                retry = attempt < retries and _retryable_error(method, e)
+                delay = _retry_delay(attempt) if retry else None
+                if delay is None:
+                    raise
+            else:
+                retry = attempt < retries and _retryable_status(method, response.status_code)
+                delay = _retry_delay(attempt, response) if retry else None
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+
+def close() -> None:
+    """Close the synchronous client."""
+    global _sync_client  # noqa: PLW0603
+    with _sync_lock:
+        client, _sync_client = _sync_client, None
+        _sync_semaphores.clear()
+    if client is not None:
+        client.close()
+
+
+__all__ = [
+    "DEFAULT_RETRIES",
+    "DEFAULT_TIMEOUT",
+    "aclose",
+    "arequest",
+    "astream",
+    "close",
+    "request",
+    "set_host_concurrency",
+]
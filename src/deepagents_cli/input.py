@@ -161,6 +161,47 @@ def parse_file_mentions(text: str) -> tuple[str, list[Path]]:
     return text, files
 
 
+# Max file size to embed inline (256KB, matching mistral-vibe)
+# Larger files get a reference instead - use read_file tool to view them
+MAX_EMBED_BYTES = 256 * 1024
+
+
+def expand_file_mentions(user_input: str) -> str:
+    """Append the contents of @-mentioned files to the prompt text.
+
+    Args:
+        user_input: Raw user input, possibly containing @file mentions
+
+    Returns:
+        The prompt with a "Referenced Files" section, or the input unchanged
+        if nothing was mentioned.
+    """
+    prompt_text, mentioned_files = parse_file_mentions(user_input)
+    if not mentioned_files:
+        return prompt_text
+
+    context_parts = [prompt_text, "\n\n## Referenced Files\n"]
+    for file_path in mentioned_files:
+        try:
+            file_size = file_path.stat().st_size
+            if file_size > MAX_EMBED_BYTES:
+                # File too large - include reference instead of content
+                size_kb = file_size // 1024
+                context_parts.append(
+                    f"\n### {file_path.name}\n"
+                    f"Path: `{file_path}`\n"
+                    f"Size: {size_kb}KB (too large to embed, use read_file tool to view)"
+                )
+            else:
+                content = file_path.read_text()
+                context_parts.append(
+                    f"\n### {file_path.name}\nPath: `{file_path}`\n```\n{content}\n```"
+                )
+        except Exception as e:
+            context_parts.append(f"\n### {file_path.name}\n[Error reading file: {e}]")
+    return "\n".join(context_parts)
+
+
 def parse_image_placeholders(text: str) -> tuple[str, int]:
     """Count image placeholders in text.
 
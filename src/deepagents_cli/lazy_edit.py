@@ -0,0 +1,425 @@
+"""Deterministic merging of lazy edit snippets for ``fast_apply``.
+
+A lazy edit shows the changed parts of a file, with marker comments such as
+``// ... existing code ...`` or ``# ... existing code ...`` standing for
+unchanged code. Each run of lines between markers (a chunk) is placed by
+anchoring: its leading lines must match one place in the file (the head)
+and its trailing lines a later place (the tail). The original lines between
+head and tail are replaced by the chunk's lines between them. Matching
+ignores trailing whitespace only.
+
+``merge`` gives up with ``AmbiguousEditError`` whenever the placement is not
+certain, leaving those edits to the remote model:
+
+- a head matches equally well in more than one place, as does a tail
+  without a head before it
+- no part of a chunk matches the file
+- a chunk has a head but no tail, and the line after the head continues the
+  same block, so it is unclear how much of the original the chunk replaces
+- only one end of a chunk is anchored and its other lines look like edits
+  of the original lines next to it rather than new code
+- the original lines a chunk replaces run past the block its head is in
+- the chunk would remove many more original lines than it adds
+- the edit has no markers but the file already has content
+- the merged file does not show the chunks in order, or repeats the
+  original line a one-sided chunk ends (or starts) with right next to it
+
+A tail of only punctuation (``}``, ``)``, ``\"\"\"``) anchors a chunk only
+when it is the line closing the bracket or string its head leaves open.
+
+``edit_window`` finds the part of a file an edit touches, so that only that
+window needs to go to the remote model.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+# Placeholder comments standing for unchanged code
+_MARKER = re.compile(r"^\s*(?:#|//|/\*|\{/\*|<!--|--|;)\s*\.\.\.")
+# An edit may remove at most this many more original lines than it adds
+MAX_EXTRA_REMOVED_LINES = 5
+# Lines of unchanged code around the edited lines in a remote window
+WINDOW_CONTEXT_LINES = 40
+# Snippet lines shorter than this (stripped) are too generic to locate an edit
+MIN_LOCATING_CHARS = 8
+# Unanchored lines this similar to a neighbouring original line are edits of it
+EDIT_SIMILARITY = 0.75
+# Brackets and triple quotes, for finding the line that closes a block
+_DELIMITER = re.compile(r'"""|\'\'\'|[()\[\]{}]')
+
+
+class AmbiguousEditError(ValueError):
+    """The edit cannot be placed in the file with certainty."""
+
+
+def _split(edit: str) -> tuple[list[list[str]], bool, bool, int]:
+    """Chunks of an edit, whether it starts/ends with a marker, and the marker count."""
+    chunks: list[list[str]] = [[]]
+    markers = 0
+    for line in edit.splitlines():
+        if _MARKER.match(line):
+            chunks.append([])
+            markers += 1
+        else:
+            chunks[-1].append(line.rstrip())
+    trimmed = []
+    for chunk in chunks:
+        start, end = 0, len(chunk)
+        while start < end and not chunk[start].strip():
+            start += 1
+        while end > start and not chunk[end - 1].strip():
+            end -= 1
+        trimmed.append(chunk[start:end])
+    open_start = markers > 0 and not trimmed[0]
+    open_end = markers > 0 and not trimmed[-1]
+    return [chunk for chunk in trimmed if chunk], open_start, open_end, markers
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _is_anchor(lines: list[str]) -> bool:
+    # Lines of only braces or brackets match too many places to anchor on
+    return any(char.isalnum() for line in lines for char in line)
+
+
+def _closing_line(lines: list[str], start: int, lo: int) -> int | None:
+    """Line at or after ``lo`` closing what ``lines[start:lo]`` leaves open.
+
+    That is the first line where the bracket depth drops below its level at
+    ``lo``, or the triple-quoted string open at ``lo`` ends. None when
+    nothing is left open or nothing closes it.
+    """
+    depth, quote = 0, None
+    level, open_quote = 0, None
+    for index in range(start, len(lines)):
+        if index == lo:
+            level, open_quote = depth, quote
+            if level <= 0 and open_quote is None:
+                return None
+        for token in _DELIMITER.findall(lines[index]):
+            if quote is not None:
+                quote = None if token == quote else quote
+            elif token in ('"""', "\'\'\'"):
+                quote = token
+            else:
+                depth += 1 if token in "([{" else -1
+        if index >= lo and (
+            quote is None if open_quote is not None else depth < level
+        ):
+            return index
+    return None
+
+
+def _code(lines: list[str]) -> list[str]:
+    return [line.strip() for line in lines if line.strip()]
+
+
+class _Merger:
+    def __init__(self, original: str) -> None:
+        self.raw = original.splitlines()
+        self.old = [line.rstrip() for line in self.raw]
+        self.positions: dict[str, list[int]] = defaultdict(list)
+        for index, line in enumerate(self.old):
+            self.positions[line].append(index)
+
+    def _forward(self, start: int, chunk: list[str], limit: int) -> int:
+        length = 0
+        while (
+            length < limit
+            and start + length < len(self.old)
+            and self.old[start + length] == chunk[length]
+        ):
+            length += 1
+        return length
+
+    def _backward(self, end: int, chunk: list[str], limit: int, lo: int) -> int:
+        length = 0
+        while (
+            length < limit
+            and end - length - 1 >= lo
+            and self.old[end - length - 1] == chunk[len(chunk) - length - 1]
+        ):
+            length += 1
+        return length
+
+    def _find_head(self, chunk: list[str], cursor: int) -> tuple[int, int]:
+        """Unique best match of the chunk's leading lines at or after ``cursor``."""
+        matches = []
+        for start in self.positions.get(chunk[0], []):
+            if start >= cursor:
+                length = self._forward(start, chunk, len(chunk))
+                # Blank lines say nothing about where the chunk goes
+                while length and not chunk[length - 1]:
+                    length -= 1
+                matches.append((length, start))
+        if not matches:
+            return cursor, 0
+        best = max(length for length, _ in matches)
+        starts = [start for length, start in matches if length == best]
+        if len(starts) > 1:
+            raise AmbiguousEditError(f"{chunk[0].strip()!r} matches {len(starts)} places")
+        if not _is_anchor(chunk[:best]):
+            return cursor, 0
+        return starts[0], best
+
+    def _find_tail(
+        self, chunk: list[str], lo: int, limit: int, nearest: bool
+    ) -> tuple[int, int] | None:
+        """Best match of the chunk's trailing lines at or after ``lo``.
+
+        Ties are ambiguous unless ``nearest``, when the first one wins.
+        """
+        matches = []
+        for index in self.positions.get(chunk[-1], []):
+            if index >= lo:
+                length = self._backward(index + 1, chunk, limit, lo)
+                while length and not chunk[len(chunk) - length]:
+                    length -= 1
+                matches.append((length, index + 1))
+        if not matches:
+            return None
+        best = max(length for length, _ in matches)
+        ends = [end for length, end in matches if length == best]
+        if len(ends) > 1 and not nearest:
+            raise AmbiguousEditError(f"{chunk[-1].strip()!r} matches {len(ends)} places")
+        if not _is_anchor(chunk[len(chunk) - best :]):
+            return None
+        return ends[0], best
+
+    def _closing_tail(
+        self, chunk: list[str], start: int, head: int, limit: int
+    ) -> tuple[int, int] | None:
+        """Tail at the original line closing what the head opens, e.g. a lone ``}``.
+
+        Only when the chunk itself closes its head's bracket or string at its
+        last line, so both refer to the same block.
+        """
+        closing = _closing_line(self.old, start, start + head)
+        if closing is None or self.old[closing] != chunk[-1]:
+            return None
+        if _closing_line(chunk, 0, head) != len(chunk) - 1:
+            return None
+        tail = self._backward(closing + 1, chunk, limit, start + head)
+        while tail and not chunk[len(chunk) - tail]:
+            tail -= 1
+        return (closing + 1, tail) if tail else None
+
+    def _resembles(self, lines: list[str], index: int, step: int) -> bool:
+        """Whether a code line of ``lines`` is (nearly) one of the next original code lines.
+
+        Looks at as many original code lines as ``lines`` has, plus one,
+        going from line ``index`` in direction ``step``.
+        """
+        wanted = _code(lines)
+        nearby: list[str] = []
+        while 0 <= index < len(self.old) and len(nearby) <= len(wanted):
+            if self.old[index].strip():
+                nearby.append(self.old[index].strip())
+            index += step
+        return any(
+            SequenceMatcher(None, line, other).ratio() >= EDIT_SIMILARITY
+            for line in wanted
+            for other in nearby
+        )
+
+    def _is_boundary(self, index: int, inserted: list[str]) -> bool:
+        """Whether inserting ``inserted`` next to original line ``index`` is clear-cut.
+
+        True when that line is blank, missing or less indented than the
+        inserted code (the edge of a block); otherwise the chunk may be
+        meant to replace it.
+        """
+        if index < 0 or index >= len(self.old) or not self.old[index].strip():
+            return True
+        first = next(line for line in inserted if line.strip())
+        return _indent(self.old[index]) < _indent(first)
+
+    def _leaves_block(self, anchor: int, lo: int, hi: int) -> bool:
+        """Whether replacing original lines ``lo:hi`` runs past the block of line ``anchor``.
+
+        When ``anchor`` opens a block (the next code line is indented more),
+        any line back at its indentation or less starts another block;
+        otherwise only a line indented less than it does.
+        """
+        level = _indent(self.old[anchor])
+        following = next((line for line in self.old[anchor + 1 :] if line.strip()), "")
+        opens = bool(following) and _indent(following) > level
+        return any(
+            line.strip() and (_indent(line) <= level if opens else _indent(line) < level)
+            for line in self.old[lo:hi]
+        )
+
+    def place(
+        self, chunk: list[str], cursor: int, at_start: bool, at_end: bool
+    ) -> tuple[int, int, int, int]:
+        """Where ``chunk`` goes: (start, end, head, tail) of the original lines it replaces.
+
+        ``old[start:start + head]`` and ``old[end - tail:end]`` are the
+        anchors; the lines between them are replaced by the chunk's middle.
+        """
+        if at_start:
+            start, head = cursor, self._forward(cursor, chunk, len(chunk))
+        else:
+            start, head = self._find_head(chunk, cursor)
+        if head == len(chunk):
+            return start, start + head, head, 0
+        # New lines attach to code, not to the blank lines around it
+        while head and not chunk[head - 1]:
+            head -= 1
+        rest = len(chunk) - head
+        lo = start + head
+        if at_end:
+            end = len(self.old)
+            tail = self._backward(end, chunk, rest, lo)
+            while tail and not chunk[len(chunk) - tail]:
+                tail -= 1
+            if head and self._leaves_block(lo - 1, lo, end - tail):
+                raise AmbiguousEditError(f"edit runs past the block of {chunk[head - 1].strip()!r}")
+            return start, end, head, tail
+
+        # After a head, the chunk replaces as little as possible
+        found = self._find_tail(chunk, lo if head else cursor, rest, nearest=head > 0)
+        if found is None and head:
+            found = self._closing_tail(chunk, start, head, rest)
+        if found is not None:
+            end, tail = found
+            if head == 0 and not at_start:
+                # Only a tail: the chunk's new lines go right before it
+                start = end - tail
+                inserted = chunk[: rest - tail] or chunk
+                if not self._is_boundary(start - 1, inserted) or self._resembles(
+                    inserted, start - 1, -1
+                ):
+                    raise AmbiguousEditError(f"unclear what {chunk[0].strip()!r} replaces")
+            elif head and self._leaves_block(lo - 1, lo, end - tail):
+                # The nearest tail lies in a later block, not the head's
+                raise AmbiguousEditError(f"edit runs past the block of {chunk[head - 1].strip()!r}")
+            return start, end, head, tail
+        if head == 0:
+            raise AmbiguousEditError(f"no anchor for {chunk[0].strip()!r}")
+        # Only a head: the chunk's new lines go right after it
+        if not self._is_boundary(lo, chunk[head:]) or self._resembles(chunk[head:], lo, 1):
+            raise AmbiguousEditError(f"unclear what follows {chunk[head - 1].strip()!r}")
+        return start, lo, head, 0
+
+
+def _check_context(
+    old: list[str], chunk: list[str], start: int, end: int, head: int, tail: int
+) -> None:
+    """Refuse a one-sided placement that would repeat the original line next to it.
+
+    A chunk placed by its head alone must not end with one of the original
+    code lines kept right after it (it was meant to replace up to there),
+    and likewise for a chunk placed by its tail alone.
+    """
+    middle = _code(chunk[head : len(chunk) - tail])
+    if not middle:
+        return
+    code = _code(chunk)
+    if not tail and end < len(old) and code[-1] in _code(old[end:])[: len(middle)]:
+        raise AmbiguousEditError(f"edit would repeat {code[-1]!r}")
+    if not head and start > 0 and code[0] in _code(old[:start])[-len(middle) :]:
+        raise AmbiguousEditError(f"edit would repeat {code[0]!r}")
+
+
+def _check_order(merged: list[str], chunks: list[list[str]]) -> None:
+    """Refuse a merge that does not contain every chunk, in order."""
+    lines = [line.rstrip() for line in merged]
+    position = 0
+    for chunk in chunks:
+        found = next(
+            (
+                index
+                for index in range(position, len(lines) - len(chunk) + 1)
+                if lines[index] == chunk[0] and lines[index : index + len(chunk)] == chunk
+            ),
+            None,
+        )
+        if found is None:
+            raise AmbiguousEditError(f"merged file lost {chunk[0].strip()!r}")
+        position = found + len(chunk)
+
+
+def merge(original: str, edit: str) -> str:
+    """Apply a lazy edit to ``original``.
+
+    Args:
+        original: Current file content ("" for a new file).
+        edit: The edit, with marker comments for unchanged code.
+
+    Returns:
+        The merged file content.
+
+    Raises:
+        AmbiguousEditError: If any part of the edit cannot be placed with certainty.
+    """
+    chunks, open_start, open_end, markers = _split(edit)
+    if not markers:
+        if original.strip():
+            raise AmbiguousEditError("edit has no '... existing code ...' markers")
+        return edit
+    if not original.strip():
+        raise AmbiguousEditError("markers refer to code the file does not have")
+
+    merger = _Merger(original)
+    out: list[str] = []
+    cursor = 0
+    for index, chunk in enumerate(chunks):
+        at_start = index == 0 and not open_start
+        at_end = index == len(chunks) - 1 and not open_end
+        start, end, head, tail = merger.place(chunk, cursor, at_start, at_end)
+        removed = (end - tail) - (start + head)
+        added = len(chunk) - head - tail
+        if removed > added + MAX_EXTRA_REMOVED_LINES:
+            raise AmbiguousEditError(f"edit would remove {removed} lines to add {added}")
+        _check_context(merger.old, chunk, start, end, head, tail)
+        out.extend(merger.raw[cursor : start + head])
+        out.extend(chunk[head : len(chunk) - tail])
+        out.extend(merger.raw[end - tail : end])
+        cursor = end
+    out.extend(merger.raw[cursor:])
+    _check_order(out, chunks)
+
+    newline = "\r\n" if "\r\n" in original else "\n"
+    merged = newline.join(out)
+    if original.endswith("\n"):
+        merged += newline
+    return merged
+
+
+def edit_window(original: str, edit: str) -> tuple[int, int] | None:
+    """Line range ``[start, end)`` of ``original`` that ``edit`` touches, with context.
+
+    Located from snippet lines that occur exactly once in the file. Returns
+    None when the edit cannot be located or the window would be most of
+    the file.
+    """
+    lines = original.splitlines()
+    counts = Counter(line.strip() for line in lines)
+    chunks, open_start, open_end, _ = _split(edit)
+    snippet = {
+        line.strip()
+        for chunk in chunks
+        for line in chunk
+        if len(line.strip()) >= MIN_LOCATING_CHARS
+    }
+    hits = [
+        index
+        for index, line in enumerate(lines)
+        if line.strip() in snippet and counts[line.strip()] == 1
+    ]
+    if not hits:
+        return None
+    start = 0 if not open_start else max(0, hits[0] - WINDOW_CONTEXT_LINES)
+    end = len(lines) if not open_end else min(len(lines), hits[-1] + WINDOW_CONTEXT_LINES + 1)
+    if end - start > len(lines) * 3 // 4:
+        return None
+    return start, end
+
+
+__all__ = ["AmbiguousEditError", "edit_window", "merge"]
@@ -2,8 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import os
 import subprocess
 from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import NotRequired, TypedDict, cast
 
@@ -13,8 +19,11 @@ from langchain.agents.middleware.types import (
     ModelRequest,
     ModelResponse,
 )
+from langchain_core.messages import SystemMessage
 from langgraph.runtime import Runtime
 
+from deepagents_cli.repo_map import DEFAULT_TOKEN_BUDGET, RepoMap, build_repo_map
+
 # Directories to ignore in file listings and tree views
 IGNORE_PATTERNS = frozenset(
     {
@@ -34,6 +43,12 @@ IGNORE_PATTERNS = frozenset(
 )
 
 
+# Bump when the rendered context changes, to invalidate cached fingerprints.
+FINGERPRINT_VERSION = 2
+
+# Files whose contents feed the context (their mtimes are part of the fingerprint).
+_PROBED_FILES = ("Makefile", "pyproject.toml", "package.json")
+
 class LocalContextState(AgentState):
     """State for local context middleware."""
 
@@ -48,6 +63,192 @@ class LocalContextStateUpdate(TypedDict):
     """Formatted local context: git, cwd, files, tree."""
 
 
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _scan_dir(path: Path) -> list[tuple[str, bool]]:
+    """List ``(name, is_dir)`` for a directory, sorted by name.
+
+    ``os.scandir`` gets the entry type from the directory listing itself, so
+    this costs one syscall batch per directory rather than a stat per entry.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            entries.append((entry.name, is_dir))
+    entries.sort()
+    return entries
+
+
+def _should_include(name: str) -> bool:
+    """Whether an entry is shown in file listings and the tree."""
+    # Skip hidden files (except .deepagents)
+    if name.startswith(".") and name != ".deepagents":
+        return False
+    # Skip ignored patterns
+    return name not in IGNORE_PATTERNS
+
+
+def _find_git_dir(cwd: Path) -> Path | None:
+    """Locate the git directory for ``cwd`` without running git."""
+    for directory in (cwd, *cwd.parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            # Worktrees and submodules: ".git" is a file pointing at the real dir
+            try:
+                content = dot_git.read_text().strip()
+            except (OSError, UnicodeDecodeError):
+                return None
+            if content.startswith("gitdir:"):
+                return (directory / content.removeprefix("gitdir:").strip()).resolve()
+            return None
+    return None
+
+
+def _git_head_stamps(cwd: Path) -> tuple[str | None, dict[str, int | None]]:
+    """Read git HEAD and the mtimes of the refs it and main/master depend on."""
+    git_dir = _find_git_dir(cwd)
+    if git_dir is None:
+        return None, {}
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+    except (OSError, UnicodeDecodeError):
+        head = None
+    # Worktrees keep branch refs in the common dir
+    common_dir = git_dir
+    commondir_file = git_dir / "commondir"
+    if commondir_file.is_file():
+        try:
+            common_dir = (git_dir / commondir_file.read_text().strip()).resolve()
+        except (OSError, UnicodeDecodeError):
+            pass
+    stamps = {
+        str(path): _mtime_ns(path)
+        for path in (common_dir / "refs" / "heads", common_dir / "packed-refs")
+    }
+    return head, stamps
+
+
+def _run_git(args: list[str], cwd: Path) -> str | None:
+    """Run a git command, returning stripped stdout or None on failure."""
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            timeout=2,
+            cwd=cwd,
+            check=False,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+@dataclass
+class ProjectFingerprint:
+    """Rendered local context plus what it was derived from.
+
+    The context is reused while git HEAD and the mtimes of every directory
+    and file the probes looked at are unchanged.
+    """
+
+    cwd: str
+    context: str
+    head: str | None = None
+    stamps: dict[str, int | None] = field(default_factory=dict)
+    version: int = FINGERPRINT_VERSION
+    # False if the context lacks details still being computed; not saved then
+    complete: bool = True
+
+    def is_current(self, cwd: Path) -> bool:
+        """Whether the project still looks the way it did when fingerprinted."""
+        if self.version != FINGERPRINT_VERSION or self.cwd != str(cwd):
+            return False
+        head, git_stamps = _git_head_stamps(cwd)
+        if head != self.head or not git_stamps.keys() <= self.stamps.keys():
+            return False
+        return all(_mtime_ns(Path(path)) == mtime for path, mtime in self.stamps.items())
+
+
+def get_fingerprint_path(cwd: Path) -> Path:
+    """Get the cache file for a working directory's fingerprint.
+
+    Returns:
+        Path to ~/.deepagents/project_fingerprints/{hash}.json
+    """
+    digest = hashlib.sha256(str(cwd).encode()).hexdigest()[:16]
+    return Path.home() / ".deepagents" / "project_fingerprints" / f"{digest}.json"
+
+
+def load_fingerprint(cwd: Path) -> ProjectFingerprint | None:
+    """Load the cached fingerprint for ``cwd`` if it is still current."""
+    try:
+        data = json.loads(get_fingerprint_path(cwd).read_text())
+        fingerprint = ProjectFingerprint(**data)
+    except (OSError, ValueError, TypeError):
+        return None
+    return fingerprint if fingerprint.is_current(cwd) else None
+
+
+def save_fingerprint(fingerprint: ProjectFingerprint) -> None:
+    """Persist a fingerprint (best effort; a failed write only loses the cache)."""
+    path = get_fingerprint_path(Path(fingerprint.cwd))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(fingerprint.__dict__))
+        tmp.replace(path)
+    except OSError:
+        pass
+
+
+class _ProjectScan:
+    """One listing of the working directory shared by all file probes."""
+
+    def __init__(self, cwd: Path) -> None:
+        self.cwd = cwd
+        try:
+            self.entries = _scan_dir(cwd)
+        except OSError:
+            self.entries = []
+        self._kinds = dict(self.entries)
+        self._texts: dict[str, str | None] = {}
+
+    def exists(self, name: str) -> bool:
+        return name in self._kinds
+
+    def is_dir(self, name: str) -> bool:
+        return self._kinds.get(name, False)
+
+    def is_file(self, name: str) -> bool:
+        return name in self._kinds and not self._kinds[name]
+
+    def read_text(self, name: str) -> str | None:
+        """Read a top-level file once, returning None if missing or unreadable."""
+        if name not in self._texts:
+            text = None
+            if self.is_file(name):
+                try:
+                    text = (self.cwd / name).read_text()
+                except (OSError, UnicodeDecodeError):
+                    text = None
+            self._texts[name] = text
+        return self._texts[name]
+
+
 class LocalContextMiddleware(AgentMiddleware):
     """Middleware for injecting local context into system prompt.
 
@@ -55,133 +256,108 @@ class LocalContextMiddleware(AgentMiddleware):
     1. Detects current git branch (if in a git repo)
     2. Checks if main/master branches exist locally
     3. Lists files in current directory (max 20)
-    4. Shows directory tree structure (max 3 levels, 20 entries)
+    4. Shows a ranked repository map with top-level symbols (in git
+       repositories; otherwise a directory tree, max 3 levels, 20 entries)
     5. Appends local context to system prompt
+
+    The probes run concurrently, and the result is cached as a
+    ``ProjectFingerprint`` so new threads in an unchanged project reuse it.
     """
 
     state_schema = LocalContextState
 
-    def _get_git_info(self) -> dict[str, str | list[str]]:
+    def __init__(self, *, repo_map_tokens: int = DEFAULT_TOKEN_BUDGET) -> None:
+        """Initialize the middleware.
+
+        Args:
+            repo_map_tokens: Approximate token budget of the repository map.
+        """
+        super().__init__()
+        self.repo_map_tokens = repo_map_tokens
+
+    def _get_git_info(self, cwd: Path) -> dict[str, str | list[str]]:
         """Gather git state information.
 
         Returns:
-            Dict with 'branch' (current branch) and 'main_branches' (list of main/master if they exist).
-            Returns empty dict if not in git repo.
+            Dict with 'branch' (current branch), 'main_branches' (list of
+            main/master if they exist) and 'project_root'. Returns empty dict
+            if not in git repo.
         """
-        try:
-            # Get current branch
-            result = subprocess.run(
-                ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-                capture_output=True,
-                text=True,
-                timeout=2,
-                cwd=Path.cwd(),
-                check=False,
-            )
-            if result.returncode != 0:
-                return {}
-
-            current_branch = result.stdout.strip()
-
-            # Get local branches to check for main/master
-            main_branches = []
-            result = subprocess.run(
-                ["git", "branch"],
-                capture_output=True,
-                text=True,
-                timeout=2,
-                cwd=Path.cwd(),
-                check=False,
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            branch = pool.submit(_run_git, ["rev-parse", "--abbrev-ref", "HEAD"], cwd)
+            root = pool.submit(_run_git, ["rev-parse", "--show-toplevel"], cwd)
+            # Only ask about main/master: listing every branch is slow in big repos
+            heads = pool.submit(
+                _run_git,
+                [
+                    "for-each-ref",
+                    "--format=%(refname:short)",
+                    "refs/heads/main",
+                    "refs/heads/master",
+                ],
+                cwd,
             )
-            if result.returncode == 0:
-                branches = set()
-                for line in result.stdout.strip().split("\n"):
-                    branch = line.strip().lstrip("*").strip()
-                    if branch:
-                        branches.add(branch)
-
-                if "main" in branches:
-                    main_branches.append("main")
-                if "master" in branches:
-                    main_branches.append("master")
-
-            return {"branch": current_branch, "main_branches": main_branches}
-
-        except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-            return {}
+        info: dict[str, str | list[str]] = {}
+        if root.result():
+            info["project_root"] = root.result() or ""
+        current_branch = branch.result()
+        if current_branch is None:
+            return info
+        found = set((heads.result() or "").split())
+        info["branch"] = current_branch
+        info["main_branches"] = [name for name in ("main", "master") if name in found]
+        return info
 
-    def _get_file_list(self, max_files: int = 20) -> list[str]:
+    def _get_file_list(self, scan: _ProjectScan, max_files: int = 20) -> list[str]:
         """Get list of files in current directory (non-recursive).
 
         Args:
+            scan: Listing of the current directory.
             max_files: Maximum number of files to show (default 20).
 
         Returns:
             List of file paths (sorted), truncated to max_files.
         """
-        cwd = Path.cwd()
-
         files = []
-        try:
-            for item in sorted(cwd.iterdir()):
-                # Skip hidden files (except .deepagents)
-                if item.name.startswith(".") and item.name != ".deepagents":
-                    continue
-
-                # Skip ignored patterns
-                if item.name in IGNORE_PATTERNS:
-                    continue
-
-                # Add files and dirs
-                if item.is_file():
-                    files.append(item.name)
-                elif item.is_dir():
-                    files.append(f"{item.name}/")
-
-                if len(files) >= max_files:
-                    break
-
-        except (OSError, PermissionError):
-            return []
-
+        for name, is_dir in scan.entries:
+            if not _should_include(name):
+                continue
+            files.append(f"{name}/" if is_dir else name)
+            if len(files) >= max_files:
+                break
         return files
 
-    def _get_directory_tree(self, max_depth: int = 3, max_entries: int = 20) -> str:
+    def _get_directory_tree(
+        self, cwd: Path, max_depth: int = 3, max_entries: int = 20
+    ) -> tuple[str, list[Path]]:
         """Get directory tree structure.
 
         Args:
+            cwd: Root of the tree.
             max_depth: Maximum depth to traverse (default 3).
             max_entries: Maximum total entries to show (default 20).
 
         Returns:
-            Formatted tree string or empty if error.
+            Formatted tree string (empty on error) and the directories listed.
         """
-        cwd = Path.cwd()
-
         lines: list[str] = []
+        visited: list[Path] = []
         entry_count = [0]  # Mutable for closure
 
-        def _should_include(item: Path) -> bool:
-            """Check if item should be included in tree."""
-            # Skip hidden files (except .deepagents)
-            if item.name.startswith(".") and item.name != ".deepagents":
-                return False
-            # Skip ignored patterns
-            return item.name not in IGNORE_PATTERNS
-
         def _build_tree(path: Path, prefix: str = "", depth: int = 0) -> None:
             """Recursive tree builder."""
             if depth >= max_depth or entry_count[0] >= max_entries:
                 return
 
             try:
-                all_items = sorted(path.iterdir(), key=lambda p: (not p.is_dir(), p.name))
-                # Pre-filter to get correct is_last determination
-                items = [item for item in all_items if _should_include(item)]
-            except (OSError, PermissionError):
+                all_items = sorted(_scan_dir(path), key=lambda e: (not e[1], e[0]))
+            except OSError:
                 return
+            visited.append(path)
+            # Pre-filter to get correct is_last determination
+            items = [item for item in all_items if _should_include(item[0])]
 
-            for i, item in enumerate(items):
+            for i, (name, is_dir) in enumerate(items):
                 if entry_count[0] >= max_entries:
                     lines.append(f"{prefix}... (truncated)")
                     return
@@ -189,24 +365,57 @@ class LocalContextMiddleware(AgentMiddleware):
                 is_last = i == len(items) - 1
                 connector = "└── " if is_last else "├── "
 
-                display_name = f"{item.name}/" if item.is_dir() else item.name
+                display_name = f"{name}/" if is_dir else name
                 lines.append(f"{prefix}{connector}{display_name}")
                 entry_count[0] += 1
 
                 # Recurse into directories
-                if item.is_dir() and depth + 1 < max_depth:
+                if is_dir and depth + 1 < max_depth:
                     extension = "    " if is_last else "│   "
-                    _build_tree(item, prefix + extension, depth + 1)
+                    _build_tree(path / name, prefix + extension, depth + 1)
 
+        lines.append(f"{cwd.name}/")
+        _build_tree(cwd)
+        return "\n".join(lines), visited
+
+    def _get_repo_map(self, cwd: Path) -> RepoMap | None:
+        """Get the ranked repository map, or None outside git or on failure."""
         try:
-            lines.append(f"{cwd.name}/")
-            _build_tree(cwd)
-        except (OSError, PermissionError):
-            return ""
+            return build_repo_map(cwd, self.repo_map_tokens)
+        except Exception:  # noqa: BLE001
+            # The map is an optimization; the tree still orients the agent
+            return None
 
-        return "\n".join(lines)
+    def _get_layout(self, cwd: Path) -> tuple[str, str, list[Path], bool]:
+        """Get the repository map, falling back to the directory tree.
 
-    def _detect_package_manager(self) -> str | None:
+        Returns:
+            Section heading, body, the directories whose mtimes it depends on,
+            and whether it is final (False while the symbol index is building).
+        """
+        repo_map = self._get_repo_map(cwd)
+        if repo_map is not None and repo_map.shown:
+            ranking = (
+                "imports, recent commits and size; top-level symbols after `:`"
+                if repo_map.complete
+                else "recent commits and size"
+            )
+            heading = (
+                f"**Repo Map** ({repo_map.shown} of {repo_map.total} files, "
+                f"ranked by {ranking}):"
+            )
+            # Parent directories too, so new subdirectories invalidate the context
+            dirs = {
+                cwd / directory
+                for shown in repo_map.dirs
+                if shown
+                for directory in (Path(shown), *Path(shown).parents[:-1])
+            }
+            return heading, repo_map.text, sorted(dirs), repo_map.complete
+        tree, tree_dirs = self._get_directory_tree(cwd)
+        return "**Tree** (3 levels):", tree, tree_dirs, True
+
+    def _detect_package_manager(self, scan: _ProjectScan) -> str | None:
         """Detect Python package manager in use.
 
         Checks for lock files and config files to determine the package manager.
@@ -217,41 +426,36 @@ class LocalContextMiddleware(AgentMiddleware):
         Returns:
             Package manager name (uv, poetry, pipenv, pip) or `None` if not detected.
         """
-        cwd = Path.cwd()
-
         # Check for uv (uv.lock or pyproject.toml with [tool.uv])
-        if (cwd / "uv.lock").exists():
+        if scan.exists("uv.lock"):
             return "uv"
 
         # Check for poetry (poetry.lock or pyproject.toml with [tool.poetry])
-        if (cwd / "poetry.lock").exists():
+        if scan.exists("poetry.lock"):
             return "poetry"
 
         # Check for pipenv
-        if (cwd / "Pipfile.lock").exists() or (cwd / "Pipfile").exists():
+        if scan.exists("Pipfile.lock") or scan.exists("Pipfile"):
             return "pipenv"
 
         # Check pyproject.toml for tool sections
-        pyproject = cwd / "pyproject.toml"
-        if pyproject.exists():
-            try:
-                content = pyproject.read_text()
+        if scan.exists("pyproject.toml"):
+            content = scan.read_text("pyproject.toml")
+            if content is not None:
                 if "[tool.uv]" in content:
                     return "uv"
                 if "[tool.poetry]" in content:
                     return "poetry"
                 # Has pyproject.toml but no specific tool - likely pip/setuptools
                 return "pip"
-            except (OSError, PermissionError, UnicodeDecodeError):
-                pass
 
         # Check for requirements.txt
-        if (cwd / "requirements.txt").exists():
+        if scan.exists("requirements.txt"):
             return "pip"
 
         return None
 
-    def _detect_node_package_manager(self) -> str | None:
+    def _detect_node_package_manager(self, scan: _ProjectScan) -> str | None:
         """Detect Node.js package manager in use.
 
         Uses priority order: `bun > pnpm > yarn > npm`.
@@ -261,167 +465,128 @@ class LocalContextMiddleware(AgentMiddleware):
         Returns:
             Package manager name (bun, pnpm, yarn, npm) or `None` if not detected.
         """
-        cwd = Path.cwd()
-
-        if (cwd / "bun.lockb").exists() or (cwd / "bun.lock").exists():
+        if scan.exists("bun.lockb") or scan.exists("bun.lock"):
             return "bun"
-        if (cwd / "pnpm-lock.yaml").exists():
+        if scan.exists("pnpm-lock.yaml"):
             return "pnpm"
-        if (cwd / "yarn.lock").exists():
+        if scan.exists("yarn.lock"):
             return "yarn"
-        if (cwd / "package-lock.json").exists() or (cwd / "package.json").exists():
+        if scan.exists("package-lock.json") or scan.exists("package.json"):
             return "npm"
 
         return None
 
-    def _get_makefile_preview(self, max_lines: int = 20) -> str | None:
+    def _get_makefile_preview(self, scan: _ProjectScan, max_lines: int = 20) -> str | None:
         """Get first N lines of `Makefile` if present.
 
         Args:
+            scan: Listing of the current directory.
             max_lines: Maximum lines to show.
 
         Returns:
             `Makefile` preview or `None` if not found.
         """
-        cwd = Path.cwd()
-        makefile = cwd / "Makefile"
-
-        if not makefile.exists():
-            return None
-
-        try:
-            content = makefile.read_text()
-            lines = content.split("\n")[:max_lines]
-            preview = "\n".join(lines)
-            if len(content.split("\n")) > max_lines:
-                preview += "\n... (truncated)"
-            return preview
-        except (OSError, PermissionError, UnicodeDecodeError):
+        content = scan.read_text("Makefile")
+        if content is None:
             return None
+        lines = content.split("\n")
+        preview = "\n".join(lines[:max_lines])
+        if len(lines) > max_lines:
+            preview += "\n... (truncated)"
+        return preview
 
-    def _detect_project_info(self) -> dict[str, str | bool | None]:
+    def _detect_project_info(self, scan: _ProjectScan) -> dict[str, str | bool | None]:
         """Detect project type, language, and structure.
 
         Returns:
-            Dict with `language`, `is_monorepo`, `project_root`, `has_venv`, `has_node_modules`.
+            Dict with `language`, `is_monorepo`, `has_venv`, `has_node_modules`.
         """
-        cwd = Path.cwd()
         info: dict[str, str | bool | None] = {
             "language": None,
             "is_monorepo": False,
-            "project_root": None,
             "has_venv": False,
             "has_node_modules": False,
         }
 
         # Check for virtual environments
-        info["has_venv"] = (cwd / ".venv").exists() or (cwd / "venv").exists()
-        info["has_node_modules"] = (cwd / "node_modules").exists()
+        info["has_venv"] = scan.exists(".venv") or scan.exists("venv")
+        info["has_node_modules"] = scan.exists("node_modules")
 
         # Detect primary language
-        if (cwd / "pyproject.toml").exists() or (cwd / "setup.py").exists():
+        if scan.exists("pyproject.toml") or scan.exists("setup.py"):
             info["language"] = "python"
-        elif (cwd / "package.json").exists():
+        elif scan.exists("package.json"):
             info["language"] = "javascript/typescript"
-        elif (cwd / "Cargo.toml").exists():
+        elif scan.exists("Cargo.toml"):
             info["language"] = "rust"
-        elif (cwd / "go.mod").exists():
+        elif scan.exists("go.mod"):
             info["language"] = "go"
-        elif (cwd / "pom.xml").exists() or (cwd / "build.gradle").exists():
+        elif scan.exists("pom.xml") or scan.exists("build.gradle"):
             info["language"] = "java"
 
         # Detect monorepo patterns
         # Check for common monorepo indicators
         monorepo_indicators = [
-            (cwd / "lerna.json").exists(),
-            (cwd / "pnpm-workspace.yaml").exists(),
-            (cwd / "packages").is_dir(),
-            (cwd / "libs").is_dir() and (cwd / "apps").is_dir(),
-            (cwd / "workspaces").is_dir(),
+            scan.exists("lerna.json"),
+            scan.exists("pnpm-workspace.yaml"),
+            scan.is_dir("packages"),
+            scan.is_dir("libs") and scan.is_dir("apps"),
+            scan.is_dir("workspaces"),
         ]
         info["is_monorepo"] = any(monorepo_indicators)
-
-        # Try to find project root (look for .git or pyproject.toml up the tree)
-        try:
-            result = subprocess.run(
-                ["git", "rev-parse", "--show-toplevel"],
-                capture_output=True,
-                text=True,
-                timeout=2,
-                cwd=cwd,
-                check=False,
-            )
-            if result.returncode == 0:
-                info["project_root"] = result.stdout.strip()
-        except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-            pass
-
         return info
 
-    def _detect_test_command(self) -> str | None:
+    def _detect_test_command(self, scan: _ProjectScan) -> str | None:
         """Detect how to run tests based on project structure.
 
         Returns:
             Suggested test command or `None` if not detected.
         """
-        cwd = Path.cwd()
-
         # Check Makefile for test target
-        makefile = cwd / "Makefile"
-        if makefile.exists():
-            try:
-                content = makefile.read_text()
-                if "test:" in content or "tests:" in content:
-                    return "make test"
-            except (OSError, PermissionError, UnicodeDecodeError):
-                pass
+        content = scan.read_text("Makefile")
+        if content is not None and ("test:" in content or "tests:" in content):
+            return "make test"
 
         # Python projects
-        if (cwd / "pyproject.toml").exists():
-            pyproject = cwd / "pyproject.toml"
-            try:
-                content = pyproject.read_text()
-                if "[tool.pytest" in content or (cwd / "pytest.ini").exists():
-                    return "pytest"
-            except (OSError, PermissionError, UnicodeDecodeError):
-                pass
-            if (cwd / "tests").is_dir() or (cwd / "test").is_dir():
+        if scan.exists("pyproject.toml"):
+            content = scan.read_text("pyproject.toml")
+            if content is not None and ("[tool.pytest" in content or scan.exists("pytest.ini")):
+                return "pytest"
+            if scan.is_dir("tests") or scan.is_dir("test"):
                 return "pytest"
 
         # Node projects
-        if (cwd / "package.json").exists():
+        content = scan.read_text("package.json")
+        if content is not None:
             try:
-                import json
-
-                pkg = json.loads((cwd / "package.json").read_text())
-                if "scripts" in pkg and "test" in pkg["scripts"]:
-                    return "npm test"
-            except (OSError, PermissionError, UnicodeDecodeError, json.JSONDecodeError):
-                pass
+                pkg = json.loads(content)
+            except json.JSONDecodeError:
+                pkg = None
+            if isinstance(pkg, dict) and "test" in (pkg.get("scripts") or {}):
+                return "npm test"
 
         return None
 
-    def before_agent(
-        self,
-        state: LocalContextState,
-        runtime: Runtime,
-    ) -> LocalContextStateUpdate | None:
-        """Load local context before agent execution.
+    def build_fingerprint(self, cwd: Path) -> ProjectFingerprint:
+        """Probe the project and render its local context.
 
-        Runs once at session start to preserve prompt caching.
-
-        Args:
-            state: Current agent state.
-            runtime: Runtime context.
-
-        Returns:
-            Updated state with local_context populated, or None if already set.
+        Git commands and the repository map (or tree walk) run concurrently
+        with the top-level file probes.
         """
-        # Only compute context on first interaction to preserve prompt caching
-        if state.get("local_context"):
-            return None
+        head, git_stamps = _git_head_stamps(cwd)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            git_future = pool.submit(self._get_git_info, cwd)
+            layout_future = pool.submit(self._get_layout, cwd)
+            scan = _ProjectScan(cwd)
+            project_info = self._detect_project_info(scan)
+            python_pkg = self._detect_package_manager(scan)
+            node_pkg = self._detect_node_package_manager(scan)
+            test_cmd = self._detect_test_command(scan)
+            files = self._get_file_list(scan)
+            makefile_preview = self._get_makefile_preview(scan)
+            git_info = git_future.result()
+            layout_heading, layout, layout_dirs, complete = layout_future.result()
 
-        cwd = Path.cwd()
         sections = ["## Local Context", ""]
 
         # Current directory
@@ -429,12 +594,12 @@ class LocalContextMiddleware(AgentMiddleware):
         sections.append("")
 
         # Project info (language, monorepo, root, environments)
-        project_info = self._detect_project_info()
         project_lines = []
         if project_info.get("language"):
             project_lines.append(f"Language: {project_info['language']}")
-        if project_info.get("project_root") and str(project_info["project_root"]) != str(cwd):
-            project_lines.append(f"Project root: `{project_info['project_root']}`")
+        project_root = git_info.get("project_root")
+        if project_root and str(project_root) != str(cwd):
+            project_lines.append(f"Project root: `{project_root}`")
         if project_info.get("is_monorepo"):
             project_lines.append("Monorepo: yes")
         env_indicators = []
@@ -451,10 +616,8 @@ class LocalContextMiddleware(AgentMiddleware):
 
         # Package managers
         pkg_managers = []
-        python_pkg = self._detect_package_manager()
         if python_pkg:
             pkg_managers.append(f"Python: {python_pkg}")
-        node_pkg = self._detect_node_package_manager()
         if node_pkg:
             pkg_managers.append(f"Node: {node_pkg}")
         if pkg_managers:
@@ -462,8 +625,7 @@ class LocalContextMiddleware(AgentMiddleware):
             sections.append("")
 
         # Git info
-        git_info = self._get_git_info()
-        if git_info:
+        if git_info.get("branch"):
             git_text = f"**Git**: Current branch `{git_info['branch']}`"
             if git_info.get("main_branches"):
                 main_branches = ", ".join(f"`{b}`" for b in git_info["main_branches"])
@@ -472,15 +634,13 @@ class LocalContextMiddleware(AgentMiddleware):
             sections.append("")
 
         # Test command
-        test_cmd = self._detect_test_command()
         if test_cmd:
             sections.append(f"**Run Tests**: `{test_cmd}`")
             sections.append("")
 
         # File list
-        files = self._get_file_list()
         if files:
-            total_items = len(list(Path.cwd().iterdir()))
+            total_items = len(scan.entries)
             sections.append(f"**Files** ({len(files)} shown):")
             for file in files:
                 sections.append(f"- {file}")
@@ -489,24 +649,81 @@ class LocalContextMiddleware(AgentMiddleware):
                 sections.append(f"... ({remaining} more files)")
             sections.append("")
 
-        # Directory tree
-        tree = self._get_directory_tree()
-        if tree:
-            sections.append("**Tree** (3 levels):")
+        # Repository map or directory tree
+        if layout:
+            sections.append(layout_heading)
             sections.append("```text")
-            sections.append(tree)
+            sections.append(layout)
             sections.append("```")
             sections.append("")
 
         # Makefile preview
-        makefile_preview = self._get_makefile_preview()
         if makefile_preview:
             sections.append("**Makefile** (first 20 lines):")
             sections.append("```makefile")
             sections.append(makefile_preview)
             sections.append("```")
 
-        local_context = "\n".join(sections)
+        stamps = {str(path): _mtime_ns(path) for path in (cwd, *layout_dirs)}
+        stamps.update({str(cwd / name): _mtime_ns(cwd / name) for name in _PROBED_FILES})
+        stamps.update(git_stamps)
+        return ProjectFingerprint(
+            cwd=str(cwd),
+            context="\n".join(sections),
+            head=head,
+            stamps=stamps,
+            complete=complete,
+        )
+
+    def get_local_context(self) -> str:
+        """Return the local context for the working directory, reusing the cache."""
+        cwd = Path.cwd()
+        fingerprint = load_fingerprint(cwd)
+        if fingerprint is None:
+            fingerprint = self.build_fingerprint(cwd)
+            # A map still waiting on the symbol index is rebuilt next time
+            if fingerprint.complete:
+                save_fingerprint(fingerprint)
+        return fingerprint.context
+
+    def before_agent(
+        self,
+        state: LocalContextState,
+        runtime: Runtime,
+    ) -> LocalContextStateUpdate | None:
+        """Load local context before agent execution.
+
+        Runs once at session start to preserve prompt caching.
+
+        Args:
+            state: Current agent state.
+            runtime: Runtime context.
+
+        Returns:
+            Updated state with local_context populated, or None if already set.
+        """
+        # Only compute context on first interaction to preserve prompt caching
+        if state.get("local_context"):
+            return None
+        return LocalContextStateUpdate(local_context=self.get_local_context())
+
+    async def abefore_agent(
+        self,
+        state: LocalContextState,
+        runtime: Runtime,
+    ) -> LocalContextStateUpdate | None:
+        """(async) Load local context before agent execution, off the event loop.
+
+        Args:
+            state: Current agent state.
+            runtime: Runtime context.
+
+        Returns:
+            Updated state with local_context populated, or None if already set.
+        """
+        if state.get("local_context"):
+            return None
+        local_context = await asyncio.to_thread(self.get_local_context)
         return LocalContextStateUpdate(local_context=local_context)
 
     def _get_modified_request(self, request: ModelRequest) -> ModelRequest | None:
@@ -524,11 +741,11 @@ class LocalContextMiddleware(AgentMiddleware):
         if not local_context:
             return None
 
-        # Append local context to system prompt
-        system_prompt = request.system_prompt or ""
-        new_prompt = system_prompt + "\n\n" + local_context
-
-        return request.override(system_prompt=new_prompt)
+        # Append local context as its own block so the segments other
+        # middleware added stay separate (see PromptCacheMiddleware)
+        blocks = list(request.system_message.content_blocks) if request.system_message else []
+        blocks.append({"type": "text", "text": f"\n\n{local_context}" if blocks else local_context})
+        return request.override(system_message=SystemMessage(content=blocks))
 
     def wrap_model_call(
         self,
@@ -565,4 +782,4 @@ class LocalContextMiddleware(AgentMiddleware):
         return await handler(modified_request if modified_request else request)
 
 
-__all__ = ["LocalContextMiddleware"]
+__all__ = ["LocalContextMiddleware", "ProjectFingerprint"]
@@ -11,8 +11,10 @@ import argparse
 import asyncio
 import contextlib
 import os
+import sqlite3
 import sys
 import warnings
+from importlib.util import find_spec
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
@@ -23,62 +25,32 @@ from rich.text import Text
 
 from deepagents_cli._version import __version__
 
-# Now safe to import agent (which imports LangChain modules)
-from deepagents_cli.agent import create_cli_agent, list_agents, reset_agent
-
-# CRITICAL: Import config FIRST to set LANGSMITH_PROJECT before LangChain loads
-from deepagents_cli.config import (
-    ModelConfigurationError,
-    NoModelSelectedError,
-    console,
-    create_model,
-    settings,
-)
-from deepagents_cli.integrations.sandbox_factory import create_sandbox
-from deepagents_cli.mcp import open_mcp_tools
-from deepagents_cli.sessions import (
-    ThreadLockError,
-    acquire_thread_lock,
-    delete_thread_command,
-    generate_thread_id,
-    get_checkpointer,
-    get_store,
-    get_most_recent,
-    get_thread_agent,
-    list_threads_command,
-    thread_exists,
-)
-from deepagents_cli.skills import execute_skills_command, setup_skills_parser
-from deepagents_cli.tools import fast_apply, fetch_url, http_request, warp_grep, web_search
-from deepagents_cli.ui import show_help
+# CRITICAL: Import config FIRST to set LANGSMITH_PROJECT before LangChain loads.
+# Everything heavier (agent, LangChain, provider SDKs, MCP, Textual) is imported
+# inside the subcommand that needs it, so `threads list`, `skills list` and
+# `--version` start without loading the agent framework.
+from deepagents_cli.config import console
+from deepagents_cli.skills.commands import setup_skills_parser
 
 if TYPE_CHECKING:
     from langgraph.pregel import Pregel
 
 
 def check_cli_dependencies() -> None:
-    """Check if CLI optional dependencies are installed."""
-    missing = []
+    """Check if CLI optional dependencies are installed.
 
-    try:
-        import requests  # noqa: F401
-    except ImportError:
-        missing.append("requests")
-
-    try:
-        import dotenv  # noqa: F401
-    except ImportError:
-        missing.append("python-dotenv")
-
-    try:
-        import tavily  # noqa: F401
-    except ImportError:
-        missing.append("tavily-python")
-
-    try:
-        import textual  # noqa: F401
-    except ImportError:
-        missing.append("textual")
+    Uses ``find_spec`` so the check doesn't import the packages themselves.
+    """
+    missing = [
+        package
+        for module, package in (
+            ("httpx", "httpx"),
+            ("dotenv", "python-dotenv"),
+            ("tavily", "tavily-python"),
+            ("textual", "textual"),
+        )
+        if find_spec(module) is None
+    ]
 
     if missing:
         print("\n❌ Missing required CLI dependencies!")
@@ -92,53 +64,21 @@ def check_cli_dependencies() -> None:
         sys.exit(1)
 
 
-def parse_args() -> argparse.Namespace:
-    """Parse command line arguments."""
-    parser = argparse.ArgumentParser(
-        description="DeepAgents - AI Coding Assistant",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        add_help=False,
-    )
-    parser.add_argument(
-        "--version",
-        action="version",
-        version=f"deepagents {__version__}",
-    )
-
-    subparsers = parser.add_subparsers(dest="command", help="Command to run")
-
-    # List command
-    subparsers.add_parser("list", help="List all available agents")
-
-    # Help command
-    subparsers.add_parser("help", help="Show help information")
-
-    # Reset command
-    reset_parser = subparsers.add_parser("reset", help="Reset an agent")
-    reset_parser.add_argument("--agent", required=True, help="Name of agent to reset")
-    reset_parser.add_argument(
-        "--target", dest="source_agent", help="Copy prompt from another agent"
-    )
-
-    # Skills command - setup delegated to skills module
-    setup_skills_parser(subparsers)
-
-    # Threads command
-    threads_parser = subparsers.add_parser("threads", help="Manage conversation threads")
-    threads_sub = threads_parser.add_subparsers(dest="threads_command")
-
-    # threads list
-    threads_list = threads_sub.add_parser("list", help="List threads")
-    threads_list.add_argument(
-        "--agent", default=None, help="Filter by agent name (default: show all)"
-    )
-    threads_list.add_argument("--limit", type=int, default=20, help="Max threads (default: 20)")
-
-    # threads delete
-    threads_delete = threads_sub.add_parser("delete", help="Delete a thread")
-    threads_delete.add_argument("thread_id", help="Thread ID to delete")
-
-    # Default interactive mode
+def _positive_int(value: str) -> int:
+    """Argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        msg = f"invalid int value: {value!r}"
+        raise argparse.ArgumentTypeError(msg) from None
+    if number < 1:
+        msg = f"must be at least 1, got {number}"
+        raise argparse.ArgumentTypeError(msg)
+    return number
+
+
+def _add_agent_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the agent, model and session options shared by interactive and run modes."""
     parser.add_argument(
         "--agent",
         default="agent",
@@ -231,6 +171,119 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Disable all extensions",
     )
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="DeepAgents - AI Coding Assistant",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        add_help=False,
+    )
+    parser.add_argument(
+        "--version",
+        action="version",
+        version=f"deepagents {__version__}",
+    )
+
+    subparsers = parser.add_subparsers(dest="command", help="Command to run")
+
+    # List command
+    subparsers.add_parser("list", help="List all available agents")
+
+    # Help command
+    subparsers.add_parser("help", help="Show help information")
+
+    # Reset command
+    reset_parser = subparsers.add_parser("reset", help="Reset an agent")
+    reset_parser.add_argument("--agent", required=True, help="Name of agent to reset")
+    reset_parser.add_argument(
+        "--target", dest="source_agent", help="Copy prompt from another agent"
+    )
+
+    # Skills command - setup delegated to skills module
+    setup_skills_parser(subparsers)
+
+    # Threads command
+    threads_parser = subparsers.add_parser("threads", help="Manage conversation threads")
+    threads_sub = threads_parser.add_subparsers(dest="threads_command")
+
+    # threads list
+    threads_list = threads_sub.add_parser("list", help="List threads")
+    threads_list.add_argument(
+        "--agent", default=None, help="Filter by agent name (default: show all)"
+    )
+    threads_list.add_argument("--limit", type=int, default=20, help="Max threads (default: 20)")
+
+    # threads delete
+    threads_delete = threads_sub.add_parser("delete", help="Delete a thread")
+    threads_delete.add_argument("thread_id", help="Thread ID to delete")
+
+    # threads prune
+    threads_prune = threads_sub.add_parser(
+        "prune",
+        help="Delete old checkpoints/threads and reclaim disk space",
+        description=(
+            "Without --keep or --older-than, uses DEEPAGENTS_PRUNE_KEEP_CHECKPOINTS and "
+            "DEEPAGENTS_PRUNE_MAX_AGE_DAYS, and otherwise only compacts the database."
+        ),
+    )
+    threads_prune.add_argument(
+        "--keep",
+        type=_positive_int,
+        default=None,
+        metavar="N",
+        help="Keep only the last N checkpoints of each thread",
+    )
+    threads_prune.add_argument(
+        "--older-than",
+        type=float,
+        default=None,
+        metavar="DAYS",
+        help="Delete threads not used in DAYS days",
+    )
+    threads_prune.add_argument(
+        "--no-vacuum", action="store_true", help="Skip VACUUM and WAL checkpointing"
+    )
+
+    # Run command - same agent options as interactive mode
+    run_parser = subparsers.add_parser(
+        "run", help="Run a prompt (use --headless for JSONL output without the TUI)"
+    )
+    run_parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Run without the Textual UI and stream JSONL events to stdout",
+    )
+    run_parser.add_argument(
+        "-o",
+        "--output",
+        dest="output_path",
+        help="Write headless JSONL events to this file instead of stdout",
+    )
+    _add_agent_arguments(run_parser)
+
+    # Batch command - many prompts on one agent graph
+    batch_parser = subparsers.add_parser(
+        "batch", help="Run prompts from a JSONL file concurrently (headless)"
+    )
+    batch_parser.add_argument("prompts_file", help="JSONL file with one prompt per line")
+    batch_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of prompts running at once (default: 4)",
+    )
+    batch_parser.add_argument(
+        "-o",
+        "--output",
+        dest="output_path",
+        help="Results JSONL file (default: <prompts_file>.results.jsonl)",
+    )
+    _add_agent_arguments(batch_parser)
+
+    # Default interactive mode
+    _add_agent_arguments(parser)
     return parser.parse_args()
 
 
@@ -283,32 +336,8 @@ async def run_textual_cli_async(
         extensions_disabled: If True, disable all extensions
     """
     from deepagents_cli.app import run_textual_app
-
-    def build_agent(
-        model_name_override: str | None,
-        *,
-        auto_approve_override: bool,
-        reasoning_effort_override: str | None = None,
-        service_tier_override: str | None = None,
-    ) -> tuple[Pregel, Any, Any]:
-        model = create_model(
-            model_name_override,
-            reasoning_effort=reasoning_effort_override or reasoning_effort,
-            service_tier=service_tier_override or service_tier,
-        )
-        return create_cli_agent(
-            model=model,
-            assistant_id=assistant_id,
-            tools=tools,
-            sandbox=sandbox_backend,
-            sandbox_type=sandbox_type if sandbox_type != "none" else None,
-            auto_approve=auto_approve_override,
-            checkpointer=checkpointer,
-            store=store,
-            extensions=extensions,
-            extensions_only=extensions_only,
-            extensions_disabled=extensions_disabled,
-        )
+    from deepagents_cli.config import ModelConfigurationError, NoModelSelectedError
+    from deepagents_cli.runtime import open_agent_runtime
 
     # Show thread info
     if is_resumed:
@@ -316,73 +345,145 @@ async def run_textual_cli_async(
     else:
         console.print(f"[dim]Thread: {thread_id}[/dim]")
 
-    # Use async context manager for checkpointer
-    async with get_checkpointer() as checkpointer:
-        async with get_store() as store:
-            async with open_mcp_tools() as mcp_tools:
-                # Create agent with conditional tools
-                tools = [http_request, fetch_url, warp_grep, fast_apply]
-                if settings.has_tavily:
-                    tools.append(web_search)
-                if mcp_tools:
-                    tools.extend(mcp_tools)
-
-                # Handle sandbox mode
-                sandbox_backend = None
-                sandbox_cm = None
-
-                if sandbox_type != "none":
-                    try:
-                        # Create sandbox context manager but keep it open
-                        sandbox_cm = create_sandbox(sandbox_type, sandbox_id=sandbox_id)
-                        sandbox_backend = sandbox_cm.__enter__()
-                    except (ImportError, ValueError, RuntimeError, NotImplementedError) as e:
-                        console.print()
-                        console.print("[red]❌ Sandbox creation failed[/red]")
-                        console.print(Text(str(e), style="dim"))
-                        sys.exit(1)
+    async with open_agent_runtime(
+        assistant_id,
+        sandbox_type=sandbox_type,
+        sandbox_id=sandbox_id,
+        reasoning_effort=reasoning_effort,
+        service_tier=service_tier,
+        extensions=extensions,
+        extensions_only=extensions_only,
+        extensions_disabled=extensions_disabled,
+    ) as runtime:
+
+        def build_agent(
+            model_name_override: str | None,
+            *,
+            auto_approve_override: bool,
+            reasoning_effort_override: str | None = None,
+            service_tier_override: str | None = None,
+        ) -> tuple[Pregel, Any, Any]:
+            return runtime.build_agent(
+                model_name_override,
+                auto_approve=auto_approve_override,
+                reasoning_effort=reasoning_effort_override,
+                service_tier=service_tier_override,
+            )
+
+        try:
+            agent = None
+            composite_backend = None
+            task_manager = None
+            try:
+                agent, composite_backend, task_manager = build_agent(
+                    model_name,
+                    auto_approve_override=auto_approve,
+                )
+            except NoModelSelectedError:
+                agent = None
+                composite_backend = None
+                task_manager = None
+
+            # Run Textual app
+            await run_textual_app(
+                agent=agent,
+                assistant_id=assistant_id,
+                backend=composite_backend,
+                agent_builder=build_agent,
+                auto_approve=auto_approve,
+                cwd=Path.cwd(),
+                thread_id=thread_id,
+                initial_prompt=initial_prompt,
+                task_manager=task_manager,
+            )
+        except ModelConfigurationError as e:
+            error_text = Text("❌ Failed to configure model: ", style="red")
+            error_text.append(str(e))
+            console.print(error_text)
+            sys.exit(1)
+        except Exception as e:
+            error_text = Text("❌ Failed to create agent: ", style="red")
+            error_text.append(str(e))
+            console.print(error_text)
+            sys.exit(1)
+
+
+def _run_headless(args: argparse.Namespace, thread_id: str, extensions: list[str]) -> Any:
+    """Run ``deepagents run --headless`` and return the run result."""
+    from deepagents_cli.headless import run_headless_async
+
+    run_kwargs = {
+        "assistant_id": args.agent,
+        "thread_id": thread_id,
+        "auto_approve": args.auto_approve,
+        "sandbox_type": args.sandbox,
+        "sandbox_id": args.sandbox_id,
+        "model_name": args.model,
+        "reasoning_effort": args.reasoning_effort,
+        "service_tier": args.service_tier,
+        "extensions": extensions,
+        "extensions_only": bool(args.extensions_only),
+        "extensions_disabled": bool(args.extensions_disabled),
+    }
+    if not args.output_path:
+        return asyncio.run(run_headless_async(args.initial_prompt, **run_kwargs))
+    with Path(args.output_path).open("w", encoding="utf-8") as output:
+        return asyncio.run(
+            run_headless_async(args.initial_prompt, output=output, **run_kwargs)
+        )
 
-                try:
-                    agent = None
-                    composite_backend = None
-                    task_manager = None
-                    try:
-                        agent, composite_backend, task_manager = build_agent(
-                            model_name,
-                            auto_approve_override=auto_approve,
-                        )
-                    except NoModelSelectedError:
-                        agent = None
-                        composite_backend = None
-                        task_manager = None
-
-                    # Run Textual app
-                    await run_textual_app(
-                        agent=agent,
-                        assistant_id=assistant_id,
-                        backend=composite_backend,
-                        agent_builder=build_agent,
-                        auto_approve=auto_approve,
-                        cwd=Path.cwd(),
-                        thread_id=thread_id,
-                        initial_prompt=initial_prompt,
-                        task_manager=task_manager,
-                    )
-                except ModelConfigurationError as e:
-                    error_text = Text("❌ Failed to configure model: ", style="red")
-                    error_text.append(str(e))
-                    console.print(error_text)
-                    sys.exit(1)
-                except Exception as e:
-                    error_text = Text("❌ Failed to create agent: ", style="red")
-                    error_text.append(str(e))
-                    console.print(error_text)
-                    sys.exit(1)
-                finally:
-                    # Clean up sandbox if we created one
-                    if sandbox_cm is not None:
-                        with contextlib.suppress(Exception):
-                            sandbox_cm.__exit__(None, None, None)
+
+def _run_batch(args: argparse.Namespace, extensions: list[str]) -> None:
+    """Run ``deepagents batch`` and print the summary."""
+    from deepagents_cli.batch import BatchInputError, run_batch_async
+    from deepagents_cli.config import ModelConfigurationError, NoModelSelectedError
+
+    prompts_path = Path(args.prompts_file)
+    if not prompts_path.is_file():
+        console.print(Text(f"Prompts file not found: {prompts_path}", style="red"))
+        sys.exit(1)
+    output_path = (
+        Path(args.output_path)
+        if args.output_path
+        else prompts_path.with_name(f"{prompts_path.stem}.results.jsonl")
+    )
+
+    try:
+        summary = asyncio.run(
+            run_batch_async(
+                prompts_path,
+                output_path,
+                assistant_id=args.agent,
+                concurrency=args.concurrency,
+                auto_approve=args.auto_approve,
+                sandbox_type=args.sandbox,
+                sandbox_id=args.sandbox_id,
+                model_name=args.model,
+                reasoning_effort=args.reasoning_effort,
+                service_tier=args.service_tier,
+                extensions=extensions,
+                extensions_only=bool(args.extensions_only),
+                extensions_disabled=bool(args.extensions_disabled),
+            )
+        )
+    except (BatchInputError, NoModelSelectedError, ModelConfigurationError) as e:
+        console.print(Text(str(e), style="red"))
+        sys.exit(1)
+
+    latency = summary["latency_s"]
+    statuses = ", ".join(f"{name}: {count}" for name, count in summary["statuses"].items())
+    console.print(
+        f"[bold]{summary['prompts']}[/bold] prompts in {summary['wall_s']:.1f}s ({statuses})"
+    )
+    console.print(
+        f"[dim]latency p50 {latency['p50']:.1f}s · p90 {latency['p90']:.1f}s · "
+        f"p99 {latency['p99']:.1f}s · tokens {summary['total_tokens']} "
+        f"({summary['input_tokens']} in, {summary['output_tokens']} out)[/dim]"
+    )
+    console.print(f"[dim]Results written to {output_path}[/dim]")
+    completed = summary["statuses"].get("completed", 0)
+    if completed != summary["prompts"]:
+        sys.exit(1)
 
 
 def cli_main() -> None:
@@ -406,14 +507,30 @@ def cli_main() -> None:
         extensions_disabled = bool(getattr(args, "extensions_disabled", False))
 
         if args.command == "help":
+            from deepagents_cli.ui import show_help
+
             show_help()
         elif args.command == "list":
+            from deepagents_cli.agent import list_agents
+
             list_agents()
         elif args.command == "reset":
+            from deepagents_cli.agent import reset_agent
+
             reset_agent(args.agent, args.source_agent)
         elif args.command == "skills":
+            from deepagents_cli.skills.commands import execute_skills_command
+
             execute_skills_command(args)
+        elif args.command == "batch":
+            _run_batch(args, extensions)
         elif args.command == "threads":
+            from deepagents_cli.sessions import (
+                delete_thread_command,
+                list_threads_command,
+                prune_threads_command,
+            )
+
             if args.threads_command == "list":
                 asyncio.run(
                     list_threads_command(
@@ -423,9 +540,29 @@ def cli_main() -> None:
                 )
             elif args.threads_command == "delete":
                 asyncio.run(delete_thread_command(args.thread_id))
+            elif args.threads_command == "prune":
+                asyncio.run(
+                    prune_threads_command(
+                        args.keep, args.older_than, vacuum=not args.no_vacuum
+                    )
+                )
             else:
-                console.print("[yellow]Usage: deepagents threads <list|delete>[/yellow]")
+                console.print("[yellow]Usage: deepagents threads <list|delete|prune>[/yellow]")
         else:
+            from deepagents_cli.sessions import (
+                ThreadLockError,
+                acquire_thread_lock,
+                find_thread,
+                format_prune_result,
+                generate_thread_id,
+                maybe_auto_prune,
+            )
+
+            headless = args.command == "run" and args.headless
+            if headless and not (args.initial_prompt or "").strip():
+                console.print("[red]deepagents run --headless requires -m/--message[/red]")
+                sys.exit(2)
+
             # Interactive mode - handle thread resume
             thread_id = None
             is_resumed = False
@@ -434,12 +571,12 @@ def cli_main() -> None:
                 # -r (no ID): Get most recent thread
                 # If --agent specified, filter by that agent; otherwise get most recent overall
                 agent_filter = args.agent if args.agent != "agent" else None
-                thread_id = asyncio.run(get_most_recent(agent_filter))
-                if thread_id:
+                thread = asyncio.run(find_thread(agent_name=agent_filter))
+                if thread:
+                    thread_id = thread["thread_id"]
                     is_resumed = True
-                    agent_name = asyncio.run(get_thread_agent(thread_id))
-                    if agent_name:
-                        args.agent = agent_name
+                    if thread["agent_name"]:
+                        args.agent = thread["agent_name"]
                 else:
                     if agent_filter:
                         msg = Text("No previous thread for '", style="yellow")
@@ -451,13 +588,12 @@ def cli_main() -> None:
 
             elif args.resume_thread:
                 # -r <ID>: Resume specific thread
-                if asyncio.run(thread_exists(args.resume_thread)):
+                thread = asyncio.run(find_thread(args.resume_thread))
+                if thread:
                     thread_id = args.resume_thread
                     is_resumed = True
-                    if args.agent == "agent":
-                        agent_name = asyncio.run(get_thread_agent(thread_id))
-                        if agent_name:
-                            args.agent = agent_name
+                    if args.agent == "agent" and thread["agent_name"]:
+                        args.agent = thread["agent_name"]
                 else:
                     error_msg = Text("Thread '", style="red")
                     error_msg.append(args.resume_thread)
@@ -472,6 +608,28 @@ def cli_main() -> None:
             if thread_id is None:
                 thread_id = generate_thread_id()
 
+            # Headless stdout is the JSONL event stream; prune notes go to stderr
+            prune_output = (
+                contextlib.redirect_stdout(sys.stderr) if headless else contextlib.nullcontext()
+            )
+            with prune_output:
+                try:
+                    prune_result = asyncio.run(maybe_auto_prune(exclude={thread_id}))
+                except sqlite3.Error as e:
+                    console.print(Text(f"Automatic thread prune failed: {e}", style="yellow"))
+                else:
+                    if prune_result is not None and prune_result.checkpoints_deleted:
+                        console.print(Text(format_prune_result(prune_result), style="dim"))
+
+            if headless:
+                try:
+                    with acquire_thread_lock(thread_id, enabled=not args.no_thread_lock):
+                        result = _run_headless(args, thread_id, extensions)
+                except ThreadLockError as e:
+                    console.print(Text(str(e), style="red"))
+                    sys.exit(1)
+                sys.exit(0 if result.status == "completed" else 1)
+
             # Run Textual CLI
             try:
                 with acquire_thread_lock(thread_id, enabled=not args.no_thread_lock):
@@ -0,0 +1,160 @@
+"""Middleware exposing a ``multi_edit`` tool: many replacements in one file, in one write.
+
+A refactor that touches one file in several places would otherwise take one
+``edit_file`` call per change, each with its own model turn, approval prompt
+and before/after snapshot. ``multi_edit`` validates an ordered list of
+replacements against the file and writes the result once, or changes nothing
+if any of them fails.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from deepagents.backends.utils import perform_string_replacement
+from deepagents.middleware.filesystem import _validate_path
+from langchain.agents.middleware.types import AgentMiddleware, AgentState
+from langchain_core.tools import StructuredTool
+from typing_extensions import NotRequired, TypedDict
+
+if TYPE_CHECKING:
+    from deepagents.backends.protocol import (
+        BackendProtocol,
+        FileDownloadResponse,
+        FileUploadResponse,
+    )
+
+MULTI_EDIT_TOOL_DESCRIPTION = """Apply several exact string replacements to one file at once.
+
+Use this instead of consecutive edit_file calls on the same file. Edits are applied in order,
+each to the result of the ones before it, with the same rules as edit_file: old_string must
+match exactly and be unique unless replace_all is true. If any edit fails, the file is left
+unchanged and the error names the failing edit.
+
+Args:
+    file_path: Absolute path to the file to edit.
+    edits: Ordered list of {old_string, new_string, replace_all?} replacements."""
+
+
+class StringEdit(TypedDict):
+    """One replacement of a ``multi_edit`` call."""
+
+    old_string: str
+    new_string: str
+    replace_all: NotRequired[bool]
+
+
+def apply_edits(content: str, edits: list[StringEdit]) -> tuple[str, int] | str:
+    """Apply ``edits`` in order to ``content``.
+
+    Args:
+        content: Current file content.
+        edits: Replacements, each applied to the result of the previous ones.
+
+    Returns:
+        Tuple of (new_content, total occurrences replaced), or an error message
+        naming the first edit that failed.
+    """
+    if not edits:
+        return "Error: No edits given."
+    occurrences = 0
+    for number, edit in enumerate(edits, start=1):
+        prefix = f"Error: Edit {number} of {len(edits)}:"
+        old_string = edit.get("old_string", "")
+        new_string = edit.get("new_string", "")
+        if not old_string:
+            return f"{prefix} old_string is empty."
+        if old_string == new_string:
+            return f"{prefix} old_string and new_string are identical."
+        result = perform_string_replacement(
+            content, old_string, new_string, bool(edit.get("replace_all", False))
+        )
+        if isinstance(result, str):
+            return f"{prefix} {result.removeprefix('Error: ')}"
+        content, count = result
+        occurrences += count
+    return content, occurrences
+
+
+class MultiEditMiddleware(AgentMiddleware[AgentState, Any]):
+    """Add the ``multi_edit`` tool, reading and writing files through ``backend``."""
+
+    def __init__(self, *, backend: BackendProtocol) -> None:
+        """Initialize the middleware.
+
+        Args:
+            backend: Backend holding the files (the agent's composite backend).
+        """
+        super().__init__()
+        self._backend = backend
+
+        def multi_edit(file_path: str, edits: list[StringEdit]) -> str:
+            return self._edit(file_path, edits)
+
+        async def amulti_edit(file_path: str, edits: list[StringEdit]) -> str:
+            return await self._aedit(file_path, edits)
+
+        self.tools = [
+            StructuredTool.from_function(
+                func=multi_edit,
+                coroutine=amulti_edit,
+                name="multi_edit",
+                description=MULTI_EDIT_TOOL_DESCRIPTION,
+            )
+        ]
+
+    def _edit(self, file_path: str, edits: list[StringEdit]) -> str:
+        try:
+            path = _validate_path(file_path)
+        except ValueError as e:
+            return f"Error: {e}"
+        (downloaded,) = self._backend.download_files([path])
+        prepared = _prepare(path, downloaded, edits)
+        if isinstance(prepared, str):
+            return prepared
+        content, occurrences = prepared
+        (uploaded,) = self._backend.upload_files([(path, content)])
+        return _result(path, len(edits), occurrences, uploaded)
+
+    async def _aedit(self, file_path: str, edits: list[StringEdit]) -> str:
+        try:
+            path = _validate_path(file_path)
+        except ValueError as e:
+            return f"Error: {e}"
+        (downloaded,) = await self._backend.adownload_files([path])
+        prepared = _prepare(path, downloaded, edits)
+        if isinstance(prepared, str):
+            return prepared
+        content, occurrences = prepared
+        (uploaded,) = await self._backend.aupload_files([(path, content)])
+        return _result(path, len(edits), occurrences, uploaded)
+
+
+def _prepare(
+    path: str, downloaded: FileDownloadResponse, edits: list[StringEdit]
+) -> tuple[bytes, int] | str:
+    """New content of ``path`` and the occurrences replaced, or an error message."""
+    if downloaded.error is not None or downloaded.content is None:
+        if downloaded.error == "file_not_found":
+            return f"Error: File '{path}' not found"
+        return f"Error: Could not read '{path}': {downloaded.error}"
+    try:
+        content = downloaded.content.decode("utf-8")
+    except UnicodeDecodeError:
+        return f"Error: '{path}' is not a UTF-8 text file"
+    applied = apply_edits(content, edits)
+    if isinstance(applied, str):
+        return applied
+    return applied[0].encode("utf-8"), applied[1]
+
+
+def _result(path: str, edits: int, occurrences: int, uploaded: FileUploadResponse) -> str:
+    if uploaded.error is not None:
+        return f"Error: Could not write '{path}': {uploaded.error}"
+    return (
+        f"Successfully applied {edits} edit(s) to '{path}', "
+        f"replacing {occurrences} occurrence(s) in one write"
+    )
+
+
+__all__ = ["MULTI_EDIT_TOOL_DESCRIPTION", "MultiEditMiddleware", "StringEdit", "apply_edits"]
@@ -0,0 +1,221 @@
+"""Cache-friendly system prompt assembly.
+
+The system prompt is built from segments: the CLI's own instructions (plus
+extension additions and background task instructions), and text appended by
+middleware on every model call (todo, filesystem and subagent instructions,
+memory, skills, local context). Providers cache requests by exact prefix, so
+``PromptCacheMiddleware`` orders segments from most to least stable and, for
+Anthropic models, marks a ``cache_control`` breakpoint at the end of each
+tier. OpenAI Responses models get a ``prompt_cache_key`` derived from the
+static tier instead, which routes requests sharing it to the same cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal
+
+from langchain.agents.middleware.types import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import SystemMessage
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+
+# "static": identical for every thread of this agent configuration.
+# "session": fixed for a thread, but differs between projects (working
+# directory, memory, skills, local context).
+SegmentScope = Literal["static", "session"]
+_SCOPE_ORDER: dict[str, int] = {"static": 0, "session": 1}
+
+# Middleware segments are recognized by how they start.
+_SEGMENT_MARKERS: tuple[tuple[str, str], ...] = (
+    ("memory", "<agent_memory>"),
+    ("skills", "## Skills System"),
+    ("local_context", "## Local Context"),
+)
+
+# Same heuristic as langchain_core's count_tokens_approximately.
+CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of ``text``."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass(frozen=True)
+class PromptSegment:
+    """One contiguous piece of the system prompt."""
+
+    name: str
+    text: str
+    scope: SegmentScope = "static"
+
+    @property
+    def tokens(self) -> int:
+        """Approximate token count."""
+        return estimate_tokens(self.text)
+
+
+def order_segments(segments: Sequence[PromptSegment]) -> list[PromptSegment]:
+    """Order segments most stable first, keeping the order within each scope."""
+    return sorted(segments, key=lambda segment: _SCOPE_ORDER[segment.scope])
+
+
+def build_system_message(segments: Sequence[PromptSegment]) -> SystemMessage:
+    """Build a system message with one text block per non-empty segment."""
+    blocks: list[str | dict[str, Any]] = []
+    for segment in segments:
+        text = segment.text.strip("\n")
+        if text:
+            blocks.append({"type": "text", "text": f"\n\n{text}" if blocks else text})
+    return SystemMessage(content=blocks)
+
+
+def format_segment_report(segments: Sequence[PromptSegment]) -> str:
+    """Format per-segment token sizes, one line per segment."""
+    total = sum(segment.tokens for segment in segments)
+    lines = [f"System prompt: ~{total} tokens"]
+    lines.extend(
+        f"  {segment.name:<24} {segment.scope:<8} ~{segment.tokens} tokens"
+        for segment in segments
+    )
+    return "\n".join(lines)
+
+
+def _segment_name(text: str, index: int) -> str:
+    """Name an unrecognized middleware segment after its first line."""
+    for line in text.splitlines():
+        line = line.strip().lstrip("#").strip()
+        if line:
+            return line[:24].rstrip()
+    return f"segment {index}"
+
+
+def _is_anthropic(model: Any) -> bool:
+    return getattr(model, "_llm_type", None) == "anthropic-chat"
+
+
+def _uses_openai_responses(model: Any) -> bool:
+    return getattr(model, "_llm_type", None) == "openai-chat" and bool(
+        getattr(model, "use_responses_api", False)
+    )
+
+
+class PromptCacheMiddleware(AgentMiddleware):
+    """Order system prompt segments for prefix caching and mark breakpoints.
+
+    Must be the innermost middleware that touches the system prompt, so it
+    sees every segment the others have appended.
+    """
+
+    def __init__(self, segments: Sequence[PromptSegment]) -> None:
+        """Initialize the middleware.
+
+        Args:
+            segments: Segments the CLI put in the system prompt itself; their
+                scope overrides the default of ``static``.
+        """
+        super().__init__()
+        self.segments = list(segments)
+        self._known = {segment.text.strip("\n"): segment for segment in self.segments}
+        self.last_segments: list[PromptSegment] = []
+
+    def _classify(self, text: str, index: int, local_context: str) -> PromptSegment:
+        stripped = text.strip("\n")
+        known = self._known.get(stripped)
+        if known is not None:
+            return PromptSegment(known.name, stripped, known.scope)
+        if local_context and stripped == local_context:
+            return PromptSegment("local_context", stripped, "session")
+        for name, marker in _SEGMENT_MARKERS:
+            if stripped.lstrip().startswith(marker):
+                return PromptSegment(name, stripped, "session")
+        return PromptSegment(_segment_name(stripped, index), stripped)
+
+    def _prepare_request(self, request: ModelRequest) -> ModelRequest:
+        system_message = request.system_message
+        if system_message is None:
+            return request
+        blocks = system_message.content_blocks
+        # Leave anything other than plain text alone.
+        if any(block.get("type") != "text" for block in blocks):
+            return request
+
+        local_context = str(request.state.get("local_context") or "").strip("\n")
+        segments = order_segments(
+            [
+                self._classify(block.get("text", ""), i, local_context)
+                for i, block in enumerate(blocks)
+            ]
+        )
+        segments = [segment for segment in segments if segment.text]
+        self.last_segments = segments
+
+        content: list[str | dict[str, Any]] = []
+        anthropic = _is_anthropic(request.model)
+        for i, segment in enumerate(segments):
+            block: dict[str, Any] = {
+                "type": "text",
+                "text": f"\n\n{segment.text}" if content else segment.text,
+            }
+            last_of_scope = i == len(segments) - 1 or segments[i + 1].scope != segment.scope
+            if anthropic and last_of_scope:
+                # One breakpoint per tier; with the one Anthropic's caching
+                # middleware puts on the last message, well within the limit of 4.
+                block["cache_control"] = {"type": "ephemeral"}
+            content.append(block)
+
+        overrides: dict[str, Any] = {"system_message": SystemMessage(content=content)}
+        settings = request.model_settings
+        if _uses_openai_responses(request.model) and "prompt_cache_key" not in settings:
+            static_text = "".join(s.text for s in segments if s.scope == "static")
+            overrides["model_settings"] = {
+                **settings,
+                "prompt_cache_key": hashlib.sha256(static_text.encode()).hexdigest()[:32],
+            }
+        return request.override(**overrides)
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """Reorder the system prompt and add cache breakpoints.
+
+        Args:
+            request: The model request being processed.
+            handler: The handler function to call with the modified request.
+
+        Returns:
+            The model response from the handler.
+        """
+        return handler(self._prepare_request(request))
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        """(async) Reorder the system prompt and add cache breakpoints.
+
+        Args:
+            request: The model request being processed.
+            handler: The handler function to call with the modified request.
+
+        Returns:
+            The model response from the handler.
+        """
+        return await handler(self._prepare_request(request))
+
+
+__all__ = [
+    "PromptCacheMiddleware",
+    "PromptSegment",
+    "build_system_message",
+    "estimate_tokens",
+    "format_segment_report",
+    "order_segments",
+]
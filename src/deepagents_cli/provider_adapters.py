@@ -2,15 +2,19 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import TYPE_CHECKING, Any
 import inspect
 
-from langchain_core.language_models import BaseChatModel
-
-from deepagents_cli.auth_store import AuthCredentials
 from deepagents_cli.model_types import ModelEntry, ProviderConfig
 from deepagents_cli.openai_compat import patch_responses_usage
 
+if TYPE_CHECKING:
+    # Provider SDKs and LangChain model classes are imported inside
+    # create_chat_model so that loading the config doesn't pull them in.
+    from langchain_core.language_models import BaseChatModel
+
+    from deepagents_cli.auth_store import AuthCredentials
+
 
 class ProviderError(RuntimeError):
     pass
@@ -0,0 +1,116 @@
+"""Frame-rate-limited batching of streamed text for the UI."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+
+DEFAULT_RENDER_FPS = 30.0
+DEFAULT_RENDER_MAX_BYTES = 4096
+
+
+class RenderScheduler:
+    """Coalesce streamed text per key and flush it at a bounded rate.
+
+    Fast models emit hundreds of tiny text chunks per second, and every
+    ``MarkdownStream.write`` re-parses markdown on the event loop. The
+    scheduler buffers text per key (stream namespace) and hands it to the sink
+    at most ``fps`` times per second, or sooner once ``max_bytes`` are pending.
+    Text that arrives between frames is flushed by a deferred timer, so a
+    stream that pauses mid-sentence still renders promptly.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[Hashable, str], Awaitable[None]],
+        *,
+        fps: float = DEFAULT_RENDER_FPS,
+        max_bytes: int = DEFAULT_RENDER_MAX_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            sink: Async callable receiving ``(key, text)`` for each flushed frame.
+            fps: Maximum flushes per second per key. ``0`` disables batching.
+            max_bytes: Flush immediately once this many characters are pending.
+            clock: Monotonic clock, overridable for tests.
+        """
+        self._sink = sink
+        self._interval = 1.0 / fps if fps > 0 else 0.0
+        self._max_bytes = max_bytes
+        self._clock = clock
+        self._pending: dict[Hashable, list[str]] = {}
+        self._pending_size: dict[Hashable, int] = {}
+        self._last_flush: dict[Hashable, float] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self._tasks: set[asyncio.Task[Any]] = set()
+        self.frames = 0
+
+    async def write(self, key: Hashable, text: str) -> None:
+        """Queue text for ``key`` and flush if a frame is due."""
+        if not text:
+            return
+        self._pending.setdefault(key, []).append(text)
+        size = self._pending_size.get(key, 0) + len(text)
+        self._pending_size[key] = size
+
+        elapsed = self._clock() - self._last_flush.get(key, float("-inf"))
+        if elapsed >= self._interval or size >= self._max_bytes:
+            await self.flush(key)
+            return
+
+        if key not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[key] = loop.call_later(
+                self._interval - elapsed, self._flush_from_timer, key
+            )
+
+    def _flush_from_timer(self, key: Hashable) -> None:
+        self._timers.pop(key, None)
+        task = asyncio.get_running_loop().create_task(self.flush(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self, key: Hashable) -> None:
+        """Flush pending text for ``key`` immediately."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            parts = self._pending.pop(key, None)
+            self._pending_size.pop(key, None)
+            if not parts:
+                return
+            self._last_flush[key] = self._clock()
+            self.frames += 1
+            await self._sink(key, "".join(parts))
+
+    async def flush_all(self) -> None:
+        """Flush every key with pending text."""
+        for key in list(self._pending):
+            await self.flush(key)
+
+    def has_pending(self, key: Hashable) -> bool:
+        """Return whether ``key`` has text waiting for the next frame."""
+        return bool(self._pending.get(key))
+
+    def close(self) -> None:
+        """Cancel deferred flushes without rendering pending text."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        self._pending.clear()
+        self._pending_size.clear()
+
+
+__all__ = ["DEFAULT_RENDER_FPS", "DEFAULT_RENDER_MAX_BYTES", "RenderScheduler"]
@@ -0,0 +1,285 @@
+"""Ranked, token-budgeted map of a repository for the system prompt.
+
+Files listed by git are scored by how central they are in the Python import
+graph (PageRank over the symbol index), how often recent commits touched
+them, and their size. The best files that fit the budget are listed by
+directory with their top-level classes and functions. The map is cached in
+``.deepagents/index/repo_map.json`` for the current git HEAD and file set.
+
+The first symbol index build of a large project takes seconds, so it runs in
+the background; until it finishes, maps are ranked by churn and size only and
+are not cached.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from deepagents_cli.code_index import MAX_FILE_BYTES, ensure_index_dir, list_project_files
+from deepagents_cli.prompt_cache import CHARS_PER_TOKEN
+from deepagents_cli.symbol_index import get_symbol_index
+
+# Bump when ranking or rendering changes, to invalidate cached maps.
+REPO_MAP_VERSION = 1
+DEFAULT_TOKEN_BUDGET = 1024
+# Commits read for churn.
+CHURN_COMMITS = 300
+MAX_SYMBOLS_PER_FILE = 8
+# Above this many Python files, the first symbol index build would stall the
+# session start, so centrality and symbols are left out.
+MAX_INDEXED_FILES = 5000
+# Up to this many Python files, a cold symbol index is built before ranking;
+# larger projects build it in the background and get symbols in a later map.
+SYNC_INDEX_MAX_FILES = 200
+# Weights of the normalized centrality, churn and size scores.
+CENTRALITY_WEIGHT = 0.5
+CHURN_WEIGHT = 0.3
+SIZE_WEIGHT = 0.2
+
+# Files that are never worth a line in the map.
+_SKIPPED_SUFFIXES = (
+    ".lock",
+    ".min.js",
+    ".map",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".ico",
+    ".svg",
+    ".pdf",
+    ".zip",
+    ".gz",
+    ".woff",
+    ".woff2",
+    ".ttf",
+)
+_SKIPPED_NAMES = frozenset({"package-lock.json", "pnpm-lock.yaml", ".gitignore", "LICENSE"})
+
+
+@dataclass
+class RepoMap:
+    """A rendered repository map."""
+
+    text: str
+    shown: int
+    total: int
+    dirs: list[str] = field(default_factory=list)
+    """Directories (relative to the root) holding the files shown."""
+    complete: bool = True
+    """False if ranked without the symbol index while it is being built."""
+
+
+@dataclass(frozen=True)
+class RankedFile:
+    """A file with its combined score and top-level symbols."""
+
+    path: str
+    score: float
+    symbols: tuple[str, ...] = ()
+
+
+def _git_lines(args: list[str], cwd: Path, timeout: float = 10) -> list[str] | None:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=timeout,
+            cwd=cwd,
+            check=False,
+        )
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.splitlines()
+
+
+def _churn(root: Path) -> dict[str, int]:
+    """How many of the last ``CHURN_COMMITS`` commits touched each file."""
+    lines = _git_lines(
+        ["log", f"-n{CHURN_COMMITS}", "--format=", "--name-only", "--no-renames", "--relative"],
+        root,
+    )
+    counts: dict[str, int] = {}
+    for line in lines or []:
+        if line:
+            counts[line] = counts.get(line, 0) + 1
+    return counts
+
+
+def _pagerank(
+    graph: dict[str, set[str]], iterations: int = 30, damping: float = 0.85
+) -> dict[str, float]:
+    """PageRank of each node; importing a file passes rank to it."""
+    nodes = set(graph).union(*graph.values()) if graph else set()
+    if not nodes:
+        return {}
+    base = (1 - damping) / len(nodes)
+    rank = dict.fromkeys(nodes, 1 / len(nodes))
+    for _ in range(iterations):
+        # Files importing nothing spread their rank evenly
+        dangling = sum(rank[node] for node in nodes if not graph.get(node))
+        new_rank = dict.fromkeys(nodes, base + damping * dangling / len(nodes))
+        for node, targets in graph.items():
+            share = damping * rank[node] / len(targets)
+            for target in targets:
+                new_rank[target] += share
+        rank = new_rank
+    return rank
+
+
+def _normalized(values: dict[str, float]) -> dict[str, float]:
+    top = max(values.values(), default=0)
+    return {key: value / top for key, value in values.items()} if top > 0 else {}
+
+
+def _index_pending(root: Path, files: list[str]) -> bool:
+    """Whether the symbol index is too cold to build now (it then builds in the background)."""
+    python_files = sum(path.endswith(".py") for path in files)
+    if not SYNC_INDEX_MAX_FILES < python_files <= MAX_INDEXED_FILES:
+        return False
+    index = get_symbol_index(root)
+    if index.built:
+        return False
+    index.refresh_in_background()
+    return True
+
+
+def rank_files(root: Path, files: list[str], *, use_index: bool = True) -> list[RankedFile]:
+    """Score ``files`` (relative to ``root``), best first.
+
+    Args:
+        root: Repository root.
+        files: Paths relative to ``root``.
+        use_index: Score centrality and list symbols from the symbol index,
+            building it first if needed.
+    """
+    sizes: dict[str, float] = {}
+    for path in files:
+        try:
+            size = os.stat(os.path.join(root, path)).st_size
+        except OSError:
+            continue
+        if 0 < size <= MAX_FILE_BYTES:
+            sizes[path] = math.log1p(size)
+
+    centrality: dict[str, float] = {}
+    symbols: dict[str, list[str]] = {}
+    python_files = sum(path.endswith(".py") for path in sizes)
+    if use_index and 0 < python_files <= MAX_INDEXED_FILES:
+        index = get_symbol_index(root)
+        index.refresh()
+        centrality = _normalized(_pagerank(index.import_graph()))
+        symbols = index.top_level_symbols()
+    churn = _normalized({path: math.log1p(count) for path, count in _churn(root).items()})
+    size_score = _normalized(sizes)
+
+    ranked = []
+    for path in sizes:
+        score = (
+            CENTRALITY_WEIGHT * centrality.get(path, 0.0)
+            + CHURN_WEIGHT * churn.get(path, 0.0)
+            + SIZE_WEIGHT * size_score.get(path, 0.0)
+        )
+        ranked.append(RankedFile(path, score, tuple(_pick_symbols(symbols.get(path, [])))))
+    ranked.sort(key=lambda file: (-file.score, file.path))
+    return ranked
+
+
+def _pick_symbols(names: list[str]) -> list[str]:
+    public = [name for name in names if not name.startswith("_")]
+    picked = public[:MAX_SYMBOLS_PER_FILE]
+    if len(public) > MAX_SYMBOLS_PER_FILE:
+        picked.append("...")
+    return picked
+
+
+def _file_line(file: RankedFile, indent: str) -> str:
+    name = file.path.rsplit("/", 1)[-1]
+    if file.symbols:
+        return f"{indent}{name}: {', '.join(file.symbols)}"
+    return f"{indent}{name}"
+
+
+def render_repo_map(ranked: list[RankedFile], token_budget: int) -> RepoMap:
+    """List the best files that fit ``token_budget``, grouped by directory."""
+    budget = int(token_budget * CHARS_PER_TOKEN)
+    used = 0
+    by_dir: dict[str, list[RankedFile]] = {}
+    for file in ranked:
+        directory = file.path.rsplit("/", 1)[0] if "/" in file.path else ""
+        cost = len(_file_line(file, "  ")) + 1
+        if directory not in by_dir:
+            cost += len(directory) + 2
+        if used + cost > budget:
+            # Keep trying smaller entries; only stop once the budget is nearly full
+            if budget - used < 40:
+                break
+            continue
+        used += cost
+        by_dir.setdefault(directory, []).append(file)
+
+    lines: list[str] = []
+    for directory in sorted(by_dir):
+        indent = "  " if directory else ""
+        if directory:
+            lines.append(f"{directory}/")
+        lines.extend(
+            _file_line(file, indent) for file in sorted(by_dir[directory], key=lambda f: f.path)
+        )
+    shown = sum(len(files) for files in by_dir.values())
+    if shown < len(ranked):
+        lines.append(f"... ({len(ranked) - shown} more files)")
+    return RepoMap(text="\n".join(lines), shown=shown, total=len(ranked), dirs=sorted(by_dir))
+
+
+def build_repo_map(root: Path, token_budget: int = DEFAULT_TOKEN_BUDGET) -> RepoMap | None:
+    """Map of the git repository at ``root``, or None outside a git work tree.
+
+    Reuses the cached map while HEAD and the listed files are unchanged. While
+    the symbol index is building in the background, returns an uncached map
+    without symbols (``complete`` False).
+    """
+    head = _git_lines(["rev-parse", "HEAD"], root, timeout=2)
+    if not head:
+        return None
+    files = [
+        path
+        for path in list_project_files(root)
+        if not path.endswith(_SKIPPED_SUFFIXES) and path.rsplit("/", 1)[-1] not in _SKIPPED_NAMES
+    ]
+    digest = hashlib.sha256("\0".join([head[0], *files]).encode(errors="surrogateescape"))
+    key = f"{REPO_MAP_VERSION}:{token_budget}:{digest.hexdigest()}"
+    cache_path = ensure_index_dir(root) / "repo_map.json"
+    try:
+        cached = json.loads(cache_path.read_text())
+        if cached.pop("key") == key:
+            return RepoMap(**cached)
+    except (OSError, ValueError, TypeError, KeyError):
+        pass
+
+    if _index_pending(root, files):
+        repo_map = render_repo_map(rank_files(root, files, use_index=False), token_budget)
+        repo_map.complete = False
+        return repo_map
+
+    repo_map = render_repo_map(rank_files(root, files), token_budget)
+    try:
+        tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"key": key, **repo_map.__dict__}))
+        tmp.replace(cache_path)
+    except OSError:
+        pass
+    return repo_map
+
+
+__all__ = ["DEFAULT_TOKEN_BUDGET", "RankedFile", "RepoMap", "build_repo_map", "rank_files"]
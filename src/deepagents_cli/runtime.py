@@ -0,0 +1,166 @@
+"""Shared agent runtime setup for the interactive, headless and batch runners."""
+
+from __future__ import annotations
+
+import contextlib
+import sys
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from rich.text import Text
+
+from deepagents_cli import http_client
+from deepagents_cli.agent import create_cli_agent
+from deepagents_cli.config import console, create_model, settings
+from deepagents_cli.integrations.sandbox_factory import create_sandbox
+from deepagents_cli.mcp import open_mcp_tools
+from deepagents_cli.session_db import open_session_databases
+from deepagents_cli.sessions import get_checkpointer, get_store
+from deepagents_cli.shell import aclose_all_sessions
+from deepagents_cli.tools import (
+    code_search,
+    fast_apply,
+    fetch_url,
+    find_definition,
+    find_references,
+    http_request,
+    outline_file,
+    warp_grep,
+    warp_grep_many,
+    web_search,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from langgraph.pregel import Pregel
+
+
+@dataclass
+class AgentRuntime:
+    """Long-lived resources an agent graph is built from.
+
+    The checkpointer, store, MCP sessions and sandbox stay open for the
+    lifetime of the runtime, so any number of agents (or runs of one agent)
+    can share them.
+    """
+
+    assistant_id: str
+    checkpointer: Any
+    store: Any
+    tools: list[Any]
+    sandbox_backend: Any = None
+    sandbox_type: str = "none"
+    reasoning_effort: str | None = None
+    service_tier: str | None = None
+    extensions: list[str] | None = None
+    extensions_only: bool = False
+    extensions_disabled: bool = False
+
+    def build_agent(
+        self,
+        model_name: str | None,
+        *,
+        auto_approve: bool,
+        reasoning_effort: str | None = None,
+        service_tier: str | None = None,
+    ) -> tuple[Pregel, Any, Any]:
+        """Create the model and agent graph on top of the shared resources.
+
+        Returns:
+            Tuple of (agent_graph, composite_backend, task_manager).
+        """
+        model = create_model(
+            model_name,
+            reasoning_effort=reasoning_effort or self.reasoning_effort,
+            service_tier=service_tier or self.service_tier,
+        )
+        return create_cli_agent(
+            model=model,
+            assistant_id=self.assistant_id,
+            tools=self.tools,
+            sandbox=self.sandbox_backend,
+            sandbox_type=self.sandbox_type if self.sandbox_type != "none" else None,
+            auto_approve=auto_approve,
+            checkpointer=self.checkpointer,
+            store=self.store,
+            extensions=self.extensions,
+            extensions_only=self.extensions_only,
+            extensions_disabled=self.extensions_disabled,
+        )
+
+
+@asynccontextmanager
+async def open_agent_runtime(
+    assistant_id: str,
+    *,
+    sandbox_type: str = "none",
+    sandbox_id: str | None = None,
+    reasoning_effort: str | None = None,
+    service_tier: str | None = None,
+    extensions: list[str] | None = None,
+    extensions_only: bool = False,
+    extensions_disabled: bool = False,
+) -> AsyncIterator[AgentRuntime]:
+    """Open the checkpointer, store, MCP tools and sandbox for agent runs.
+
+    Exits the process if the requested sandbox cannot be created, matching
+    the interactive CLI.
+    """
+    # The checkpointer, store and any thread helpers called during the run share
+    # pooled connections, closed when the runtime exits.
+    async with open_session_databases(), get_checkpointer() as checkpointer:
+        async with get_store() as store:
+            async with open_mcp_tools() as mcp_tools:
+                # Create agent with conditional tools
+                tools = [http_request, fetch_url, warp_grep, warp_grep_many, fast_apply]
+                if settings.has_tavily:
+                    tools.append(web_search)
+                if sandbox_type == "none":
+                    # Index local files, so only useful when tools run locally
+                    tools.extend([code_search, find_definition, find_references, outline_file])
+                if mcp_tools:
+                    tools.extend(mcp_tools)
+
+                # Handle sandbox mode
+                sandbox_backend = None
+                sandbox_cm = None
+
+                if sandbox_type != "none":
+                    try:
+                        # Create sandbox context manager but keep it open
+                        sandbox_cm = create_sandbox(sandbox_type, sandbox_id=sandbox_id)
+                        sandbox_backend = sandbox_cm.__enter__()
+                    except (ImportError, ValueError, RuntimeError, NotImplementedError) as e:
+                        console.print()
+                        console.print("[red]❌ Sandbox creation failed[/red]")
+                        console.print(Text(str(e), style="dim"))
+                        sys.exit(1)
+
+                try:
+                    yield AgentRuntime(
+                        assistant_id=assistant_id,
+                        checkpointer=checkpointer,
+                        store=store,
+                        tools=tools,
+                        sandbox_backend=sandbox_backend,
+                        sandbox_type=sandbox_type,
+                        reasoning_effort=reasoning_effort,
+                        service_tier=service_tier,
+                        extensions=extensions,
+                        extensions_only=extensions_only,
+                        extensions_disabled=extensions_disabled,
+                    )
+                finally:
+                    # Clean up sandbox if we created one
+                    if sandbox_cm is not None:
+                        with contextlib.suppress(Exception):
+                            sandbox_cm.__exit__(None, None, None)
+                    # Persistent shells of the agents built on this runtime
+                    await aclose_all_sessions()
+                    # Pooled connections opened by HTTP tools on this loop
+                    await http_client.aclose()
+
+
+__all__ = ["AgentRuntime", "open_agent_runtime"]
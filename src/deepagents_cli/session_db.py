@@ -0,0 +1,177 @@
+"""Pooled, tuned SQLite connections for the sessions and store databases."""
+
+from __future__ import annotations
+
+import contextlib
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+import aiosqlite
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+    from pathlib import Path
+
+# Seconds to wait on a locked database (also applied as PRAGMA busy_timeout).
+BUSY_TIMEOUT_S = 30.0
+# Memory-map up to this many bytes of the database file for reads.
+MMAP_SIZE = 256 * 1024 * 1024
+# Idle connections kept open per database.
+DEFAULT_MAX_IDLE = 4
+
+# WAL with synchronous=NORMAL only fsyncs at checkpoints rather than on every
+# commit, which matters for checkpoint-heavy agent runs. A crash can lose the
+# last few commits but never corrupts the database.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA mmap_size={MMAP_SIZE}",
+    f"PRAGMA busy_timeout={int(BUSY_TIMEOUT_S * 1000)}",
+)
+
+
+async def connect(path: Path, *, isolation_level: str | None = "") -> aiosqlite.Connection:
+    """Open a connection with the session database pragmas applied.
+
+    Args:
+        path: Database file
+        isolation_level: Passed to sqlite3. ``""`` (the default) opens
+            transactions implicitly; ``None`` is autocommit, which
+            ``AsyncSqliteStore`` expects.
+    """
+    conn = await aiosqlite.connect(
+        str(path), timeout=BUSY_TIMEOUT_S, isolation_level=isolation_level
+    )
+    try:
+        for pragma in _PRAGMAS:
+            async with conn.execute(pragma) as cursor:
+                await cursor.fetchall()
+    except BaseException:
+        await conn.close()
+        raise
+    return conn
+
+
+class ConnectionPool:
+    """Reuse connections to one database within an event loop.
+
+    Connections are handed out one caller at a time. Short-lived helpers return
+    theirs on exit; the checkpointer and store hold one for their lifetime.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        isolation_level: str | None = "",
+        max_idle: int = DEFAULT_MAX_IDLE,
+    ) -> None:
+        self.path = path
+        self.isolation_level = isolation_level
+        self.max_idle = max_idle
+        self._idle: list[aiosqlite.Connection] = []
+        self._in_use: set[aiosqlite.Connection] = set()
+        self.opened = 0
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection, opening one if none is idle."""
+        if self._idle:
+            conn = self._idle.pop()
+        else:
+            conn = await connect(self.path, isolation_level=self.isolation_level)
+            self.opened += 1
+        self._in_use.add(conn)
+        reusable = False
+        try:
+            yield conn
+            reusable = True
+        finally:
+            self._in_use.discard(conn)
+            if reusable and conn.in_transaction:
+                # Don't hand a half-finished transaction to the next caller.
+                with contextlib.suppress(Exception):
+                    await conn.rollback()
+            if reusable and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+            else:
+                with contextlib.suppress(Exception):
+                    await conn.close()
+
+    async def aclose(self) -> None:
+        """Close every connection, including ones still borrowed."""
+        connections = [*self._idle, *self._in_use]
+        self._idle.clear()
+        self._in_use.clear()
+        for conn in connections:
+            with contextlib.suppress(Exception):
+                await conn.close()
+
+
+class SessionDatabases:
+    """One connection pool per database file."""
+
+    def __init__(self) -> None:
+        self._pools: dict[Path, ConnectionPool] = {}
+
+    def pool(self, path: Path, *, isolation_level: str | None = "") -> ConnectionPool:
+        """Return the pool for ``path``, creating it on first use."""
+        pool = self._pools.get(path)
+        if pool is None:
+            pool = self._pools[path] = ConnectionPool(path, isolation_level=isolation_level)
+        return pool
+
+    async def aclose(self) -> None:
+        """Close all pools."""
+        pools = list(self._pools.values())
+        self._pools.clear()
+        for pool in pools:
+            await pool.aclose()
+
+
+# aiosqlite connections run on non-daemon threads, so pools are scoped to an
+# `open_session_databases()` block and always closed on exit.
+_active_databases: ContextVar[SessionDatabases | None] = ContextVar(
+    "deepagents_session_databases", default=None
+)
+
+
+@asynccontextmanager
+async def open_session_databases() -> AsyncIterator[SessionDatabases]:
+    """Share pooled connections with everything running inside this block."""
+    databases = SessionDatabases()
+    token = _active_databases.set(databases)
+    try:
+        yield databases
+    finally:
+        _active_databases.reset(token)
+        await databases.aclose()
+
+
+@asynccontextmanager
+async def session_connection(
+    path: Path, *, isolation_level: str | None = ""
+) -> AsyncIterator[aiosqlite.Connection]:
+    """Borrow a pooled connection, or open a one-off one outside a pool scope."""
+    databases = _active_databases.get()
+    if databases is not None:
+        pool = databases.pool(path, isolation_level=isolation_level)
+        async with pool.connection() as conn:
+            yield conn
+        return
+
+    conn = await connect(path, isolation_level=isolation_level)
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+
+__all__ = [
+    "ConnectionPool",
+    "SessionDatabases",
+    "connect",
+    "open_session_databases",
+    "session_connection",
+]
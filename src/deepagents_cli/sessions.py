@@ -1,21 +1,31 @@
 """Thread management using LangGraph's built-in checkpoint persistence."""
 
+from __future__ import annotations
+
 import contextlib
+import json
 import os
+import sqlite3
+import time
 import uuid
-from collections.abc import AsyncIterator, Iterator
+from collections.abc import AsyncIterator, Collection, Iterator
 from contextlib import asynccontextmanager, contextmanager
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from typing import IO
+from typing import IO, TYPE_CHECKING
 
 import aiosqlite
-from langgraph.store.base import BaseStore
-from langgraph.store.sqlite.aio import AsyncSqliteStore
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from rich.table import Table
 
 from deepagents_cli.config import COLORS, console
+from deepagents_cli.session_db import session_connection
+
+if TYPE_CHECKING:
+    # LangGraph's SQLite saver/store are imported where they are opened so that
+    # thread listing and resume lookups don't pay the LangGraph import cost.
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    from langgraph.store.base import BaseStore
 
 # Patch aiosqlite.Connection to add is_alive() method required by langgraph-checkpoint>=2.1.0
 # See: https://github.com/langchain-ai/langgraph/issues/6583
@@ -144,108 +154,232 @@ async def _table_exists(conn: aiosqlite.Connection, table: str) -> bool:
         return await cursor.fetchone() is not None
 
 
+# Metadata is written as UTF-8 bytes by AsyncSqliteSaver; cast before json_extract
+# so the expressions also work on SQLite builds that treat BLOBs as JSONB.
+_AGENT_NAME_SQL = "json_extract(CAST({row}.metadata AS TEXT), '$.agent_name')"
+_UPDATED_AT_SQL = "json_extract(CAST({row}.metadata AS TEXT), '$.updated_at')"
+_MESSAGE_COUNT_SQL = "json_extract(CAST({row}.metadata AS TEXT), '$.message_count')"
+
+# One row per thread, maintained by triggers on `checkpoints` so every writer
+# (including older CLI versions) keeps it current. `message_count` comes from
+# checkpoint metadata written by IndexedAsyncSqliteSaver.
+_THREAD_INDEX_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS thread_index (
+    thread_id TEXT PRIMARY KEY,
+    agent_name TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    last_checkpoint_id TEXT,
+    message_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS thread_index_updated
+    ON thread_index (updated_at DESC, last_checkpoint_id DESC);
+CREATE INDEX IF NOT EXISTS thread_index_agent_updated
+    ON thread_index (agent_name, updated_at DESC, last_checkpoint_id DESC);
+CREATE TRIGGER IF NOT EXISTS thread_index_checkpoint_insert
+AFTER INSERT ON checkpoints
+BEGIN
+    INSERT INTO thread_index (
+        thread_id, agent_name, created_at, updated_at, last_checkpoint_id, message_count
+    )
+    VALUES (
+        NEW.thread_id,
+        {_AGENT_NAME_SQL.format(row="NEW")},
+        {_UPDATED_AT_SQL.format(row="NEW")},
+        {_UPDATED_AT_SQL.format(row="NEW")},
+        NEW.checkpoint_id,
+        CASE WHEN NEW.checkpoint_ns = '' THEN {_MESSAGE_COUNT_SQL.format(row="NEW")} END
+    )
+    ON CONFLICT (thread_id) DO UPDATE SET
+        agent_name = COALESCE(thread_index.agent_name, excluded.agent_name),
+        created_at = COALESCE(MIN(thread_index.created_at, excluded.created_at),
+                              thread_index.created_at, excluded.created_at),
+        updated_at = COALESCE(MAX(thread_index.updated_at, excluded.updated_at),
+                              thread_index.updated_at, excluded.updated_at),
+        last_checkpoint_id = MAX(thread_index.last_checkpoint_id, excluded.last_checkpoint_id),
+        message_count = COALESCE(excluded.message_count, thread_index.message_count);
+END;
+CREATE TRIGGER IF NOT EXISTS thread_index_checkpoint_delete
+AFTER DELETE ON checkpoints
+WHEN NOT EXISTS (SELECT 1 FROM checkpoints WHERE thread_id = OLD.thread_id)
+BEGIN
+    DELETE FROM thread_index WHERE thread_id = OLD.thread_id;
+END;
+"""
+
+# One-time backfill from checkpoints written before the index existed.
+_THREAD_INDEX_BACKFILL = f"""
+INSERT OR REPLACE INTO thread_index (
+    thread_id, agent_name, created_at, updated_at, last_checkpoint_id, message_count
+)
+SELECT c.thread_id,
+       MAX({_AGENT_NAME_SQL.format(row="c")}),
+       MIN({_UPDATED_AT_SQL.format(row="c")}),
+       MAX({_UPDATED_AT_SQL.format(row="c")}),
+       MAX(c.checkpoint_id),
+       (SELECT {_MESSAGE_COUNT_SQL.format(row="latest")}
+        FROM checkpoints AS latest
+        WHERE latest.thread_id = c.thread_id AND latest.checkpoint_ns = ''
+        ORDER BY latest.checkpoint_id DESC
+        LIMIT 1)
+FROM checkpoints AS c
+GROUP BY c.thread_id
+"""
+
+_THREAD_COLUMNS = "thread_id, agent_name, created_at, updated_at, message_count"
+
+
+async def ensure_thread_index(conn: aiosqlite.Connection) -> bool:
+    """Create and backfill the thread index if needed.
+
+    Returns:
+        False if there is no checkpoints table yet (fresh install), else True.
+    """
+    if await _table_exists(conn, "thread_index"):
+        return True
+    if not await _table_exists(conn, "checkpoints"):
+        return False
+
+    # BEGIN IMMEDIATE serializes concurrent migrations; re-check under the lock.
+    await conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not await _table_exists(conn, "thread_index"):
+            for statement in _split_sql_script(_THREAD_INDEX_SCHEMA):
+                await conn.execute(statement)
+            await conn.execute(_THREAD_INDEX_BACKFILL)
+    except BaseException:
+        await conn.rollback()
+        raise
+    await conn.commit()
+    return True
+
+
+def _split_sql_script(script: str) -> list[str]:
+    """Split a schema script into statements, keeping trigger bodies intact."""
+    statements: list[str] = []
+    current: list[str] = []
+    for line in script.strip().splitlines():
+        current.append(line)
+        statement = "\n".join(current)
+        if line.rstrip().endswith(";") and sqlite3.complete_statement(statement):
+            statements.append(statement)
+            current = []
+    return statements
+
+
+def _thread_row(row: tuple) -> dict:
+    return {
+        "thread_id": row[0],
+        "agent_name": row[1],
+        "created_at": row[2],
+        "updated_at": row[3],
+        "message_count": row[4],
+    }
+
+
+async def _find_thread(
+    conn: aiosqlite.Connection,
+    thread_id: str | None = None,
+    agent_name: str | None = None,
+) -> dict | None:
+    if not await ensure_thread_index(conn):
+        return None
+    if thread_id is not None:
+        query = f"SELECT {_THREAD_COLUMNS} FROM thread_index WHERE thread_id = ?"
+        params: tuple = (thread_id,)
+    elif agent_name:
+        query = f"""
+            SELECT {_THREAD_COLUMNS} FROM thread_index
+            WHERE agent_name = ?
+            ORDER BY updated_at DESC, last_checkpoint_id DESC
+            LIMIT 1
+        """
+        params = (agent_name,)
+    else:
+        query = f"""
+            SELECT {_THREAD_COLUMNS} FROM thread_index
+            ORDER BY updated_at DESC, last_checkpoint_id DESC
+            LIMIT 1
+        """
+        params = ()
+    async with conn.execute(query, params) as cursor:
+        row = await cursor.fetchone()
+        return _thread_row(row) if row else None
+
+
+async def find_thread(
+    thread_id: str | None = None,
+    agent_name: str | None = None,
+) -> dict | None:
+    """Look up a thread in the index with a single connection.
+
+    Args:
+        thread_id: Thread to look up. If None, the most recent thread is returned.
+        agent_name: When looking up the most recent thread, only consider this agent.
+
+    Returns:
+        Dict with thread_id, agent_name, created_at, updated_at and message_count,
+        or None if no thread matches.
+    """
+    async with session_connection(get_db_path()) as conn:
+        return await _find_thread(conn, thread_id, agent_name)
+
+
 async def list_threads(
     agent_name: str | None = None,
     limit: int = 20,
 ) -> list[dict]:
-    """List threads from checkpoints table."""
-    db_path = str(get_db_path())
-    async with aiosqlite.connect(db_path, timeout=30.0) as conn:
+    """List threads from the thread index, most recently used first."""
+    async with session_connection(get_db_path()) as conn:
         # Return empty if table doesn't exist yet (fresh install)
-        if not await _table_exists(conn, "checkpoints"):
+        if not await ensure_thread_index(conn):
             return []
 
         if agent_name:
-            query = """
-                SELECT thread_id,
-                       json_extract(metadata, '$.agent_name') as agent_name,
-                       MAX(json_extract(metadata, '$.updated_at')) as updated_at
-                FROM checkpoints
-                WHERE json_extract(metadata, '$.agent_name') = ?
-                GROUP BY thread_id
-                ORDER BY updated_at DESC
+            query = f"""
+                SELECT {_THREAD_COLUMNS} FROM thread_index
+                WHERE agent_name = ?
+                ORDER BY updated_at DESC, last_checkpoint_id DESC
                 LIMIT ?
             """
             params: tuple = (agent_name, limit)
         else:
-            query = """
-                SELECT thread_id,
-                       json_extract(metadata, '$.agent_name') as agent_name,
-                       MAX(json_extract(metadata, '$.updated_at')) as updated_at
-                FROM checkpoints
-                GROUP BY thread_id
-                ORDER BY updated_at DESC
+            query = f"""
+                SELECT {_THREAD_COLUMNS} FROM thread_index
+                ORDER BY updated_at DESC, last_checkpoint_id DESC
                 LIMIT ?
             """
             params = (limit,)
 
         async with conn.execute(query, params) as cursor:
             rows = await cursor.fetchall()
-            return [{"thread_id": r[0], "agent_name": r[1], "updated_at": r[2]} for r in rows]
+            return [_thread_row(r) for r in rows]
 
 
 async def get_most_recent(agent_name: str | None = None) -> str | None:
     """Get most recent thread_id, optionally filtered by agent."""
-    db_path = str(get_db_path())
-    async with aiosqlite.connect(db_path, timeout=30.0) as conn:
-        if not await _table_exists(conn, "checkpoints"):
-            return None
-
-        if agent_name:
-            query = """
-                SELECT thread_id FROM checkpoints
-                WHERE json_extract(metadata, '$.agent_name') = ?
-                ORDER BY checkpoint_id DESC
-                LIMIT 1
-            """
-            params: tuple = (agent_name,)
-        else:
-            query = "SELECT thread_id FROM checkpoints ORDER BY checkpoint_id DESC LIMIT 1"
-            params = ()
-
-        async with conn.execute(query, params) as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else None
+    thread = await find_thread(agent_name=agent_name)
+    return thread["thread_id"] if thread else None
 
 
 async def get_thread_agent(thread_id: str) -> str | None:
     """Get agent_name for a thread."""
-    db_path = str(get_db_path())
-    async with aiosqlite.connect(db_path, timeout=30.0) as conn:
-        if not await _table_exists(conn, "checkpoints"):
-            return None
-
-        query = """
-            SELECT json_extract(metadata, '$.agent_name')
-            FROM checkpoints
-            WHERE thread_id = ?
-            LIMIT 1
-        """
-        async with conn.execute(query, (thread_id,)) as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else None
+    thread = await find_thread(thread_id)
+    return thread["agent_name"] if thread else None
 
 
 async def thread_exists(thread_id: str) -> bool:
     """Check if a thread exists in checkpoints."""
-    db_path = str(get_db_path())
-    async with aiosqlite.connect(db_path, timeout=30.0) as conn:
-        if not await _table_exists(conn, "checkpoints"):
-            return False
-
-        query = "SELECT 1 FROM checkpoints WHERE thread_id = ? LIMIT 1"
-        async with conn.execute(query, (thread_id,)) as cursor:
-            row = await cursor.fetchone()
-            return row is not None
+    return await find_thread(thread_id) is not None
 
 
 async def delete_thread(thread_id: str) -> bool:
     """Delete thread checkpoints. Returns True if deleted."""
-    db_path = str(get_db_path())
-    async with aiosqlite.connect(db_path, timeout=30.0) as conn:
-        if not await _table_exists(conn, "checkpoints"):
+    async with session_connection(get_db_path()) as conn:
+        if not await ensure_thread_index(conn):
             return False
 
+        # The delete trigger removes the thread_index row with the last checkpoint.
         cursor = await conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
         deleted = cursor.rowcount > 0
         if await _table_exists(conn, "writes"):
@@ -254,18 +388,226 @@ async def delete_thread(thread_id: str) -> bool:
         return deleted
 
 
+@dataclass
+class PruneResult:
+    """What a prune run removed from the sessions database."""
+
+    threads_deleted: int = 0
+    checkpoints_deleted: int = 0
+    writes_deleted: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        """Bytes freed on disk (database plus WAL)."""
+        return max(0, self.bytes_before - self.bytes_after)
+
+
+def _db_size(db_path: Path) -> int:
+    """Size of a SQLite database including its WAL file."""
+    total = 0
+    for path in (db_path, db_path.with_name(db_path.name + "-wal")):
+        with contextlib.suppress(OSError):
+            total += path.stat().st_size
+    return total
+
+
+async def _reclaim_space(conn: aiosqlite.Connection) -> None:
+    """Return free pages to the filesystem and truncate the WAL."""
+    async with conn.execute("PRAGMA auto_vacuum") as cursor:
+        row = await cursor.fetchone()
+    if row and row[0] == 2:  # INCREMENTAL
+        async with conn.execute("PRAGMA incremental_vacuum") as cursor:
+            await cursor.fetchall()
+    else:
+        # Switching to incremental auto-vacuum only takes effect after a full
+        # VACUUM, so the first prune rewrites the file once; later prunes are cheap.
+        await conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await conn.execute("VACUUM")
+    async with conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+        await cursor.fetchall()
+
+
+async def prune_threads(
+    *,
+    keep_checkpoints: int | None = None,
+    max_age_days: float | None = None,
+    vacuum: bool = True,
+    exclude: Collection[str] = (),
+) -> PruneResult:
+    """Delete old threads and checkpoints, then reclaim disk space.
+
+    Args:
+        keep_checkpoints: Keep only this many most recent checkpoints per thread
+            (and subgraph namespace), at least 1. None keeps all.
+        max_age_days: Delete threads not used for this many days. None keeps all.
+        vacuum: Reclaim freed pages and truncate the WAL afterwards.
+        exclude: Thread IDs that are never pruned (e.g. the thread being resumed).
+
+    Returns:
+        Counts of deleted rows and the on-disk size before and after.
+
+    Raises:
+        ValueError: If ``keep_checkpoints`` is less than 1.
+    """
+    if keep_checkpoints is not None and keep_checkpoints < 1:
+        msg = f"keep_checkpoints must be at least 1, got {keep_checkpoints}"
+        raise ValueError(msg)
+    db_path = get_db_path()
+    result = PruneResult(bytes_before=_db_size(db_path))
+    excluded = json.dumps(list(exclude))
+
+    async with session_connection(db_path) as conn:
+        if not await ensure_thread_index(conn):
+            result.bytes_after = result.bytes_before
+            return result
+
+        if max_age_days is not None:
+            cutoff = (datetime.now(UTC) - timedelta(days=max_age_days)).isoformat()
+            query = """
+                SELECT thread_id FROM thread_index
+                WHERE updated_at < ? AND thread_id NOT IN (SELECT value FROM json_each(?))
+            """
+            async with conn.execute(query, (cutoff, excluded)) as cursor:
+                stale = [row[0] for row in await cursor.fetchall()]
+            if stale:
+                cursor = await conn.execute(
+                    "DELETE FROM checkpoints WHERE thread_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(stale),),
+                )
+                result.checkpoints_deleted += cursor.rowcount
+                result.threads_deleted = len(stale)
+
+        if keep_checkpoints is not None:
+            cursor = await conn.execute(
+                """
+                DELETE FROM checkpoints WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY thread_id, checkpoint_ns
+                                   ORDER BY checkpoint_id DESC
+                               ) AS recency
+                        FROM checkpoints
+                        WHERE thread_id NOT IN (SELECT value FROM json_each(?))
+                    )
+                    WHERE recency > ?
+                )
+                """,
+                (excluded, keep_checkpoints),
+            )
+            result.checkpoints_deleted += cursor.rowcount
+
+        if result.checkpoints_deleted and await _table_exists(conn, "writes"):
+            # Pending writes belong to a checkpoint; drop the ones left orphaned.
+            cursor = await conn.execute(
+                """
+                DELETE FROM writes WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints AS c
+                    WHERE c.thread_id = writes.thread_id
+                      AND c.checkpoint_ns = writes.checkpoint_ns
+                      AND c.checkpoint_id = writes.checkpoint_id
+                )
+                """
+            )
+            result.writes_deleted = cursor.rowcount
+        await conn.commit()
+
+        if vacuum:
+            await _reclaim_space(conn)
+
+    result.bytes_after = _db_size(db_path)
+    return result
+
+
+# Minimum time between automatic prunes.
+AUTO_PRUNE_INTERVAL_S = 24 * 60 * 60
+
+
+def _env_number(name: str) -> float | None:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        console.print(f"[yellow]Ignoring {name}={value!r}: expected a number[/yellow]")
+        return None
+
+
+def auto_prune_policy() -> tuple[int | None, float | None]:
+    """Read the automatic prune policy from the environment.
+
+    ``DEEPAGENTS_PRUNE_KEEP_CHECKPOINTS`` keeps the last N checkpoints per
+    thread and ``DEEPAGENTS_PRUNE_MAX_AGE_DAYS`` drops threads unused for N
+    days. Automatic pruning is off unless at least one is set.
+
+    Returns:
+        Tuple of (keep_checkpoints, max_age_days).
+    """
+    keep = _env_number("DEEPAGENTS_PRUNE_KEEP_CHECKPOINTS")
+    if keep is not None and keep < 1:
+        console.print(
+            f"[yellow]Ignoring DEEPAGENTS_PRUNE_KEEP_CHECKPOINTS={keep:g}: "
+            "expected at least 1[/yellow]"
+        )
+        keep = None
+    return (int(keep) if keep is not None else None, _env_number("DEEPAGENTS_PRUNE_MAX_AGE_DAYS"))
+
+
+async def maybe_auto_prune(exclude: Collection[str] = ()) -> PruneResult | None:
+    """Run the automatic prune policy if configured and not run recently.
+
+    Returns:
+        The prune result, or None if pruning was skipped.
+    """
+    keep_checkpoints, max_age_days = auto_prune_policy()
+    if keep_checkpoints is None and max_age_days is None:
+        return None
+
+    marker = get_db_path().with_name("last_prune")
+    with contextlib.suppress(OSError):
+        if time.time() - marker.stat().st_mtime < AUTO_PRUNE_INTERVAL_S:
+            return None
+    # Touch first so a failing prune is not retried on every launch.
+    marker.touch()
+    return await prune_threads(
+        keep_checkpoints=keep_checkpoints, max_age_days=max_age_days, exclude=exclude
+    )
+
+
+def format_prune_result(result: PruneResult) -> str:
+    """One-line summary of a prune run."""
+    return (
+        f"Pruned {result.threads_deleted} threads and {result.checkpoints_deleted} checkpoints, "
+        f"reclaimed {result.bytes_reclaimed / (1024 * 1024):.1f} MB "
+        f"({result.bytes_after / (1024 * 1024):.1f} MB now)"
+    )
+
+
 @asynccontextmanager
 async def get_checkpointer() -> AsyncIterator[AsyncSqliteSaver]:
-    """Get AsyncSqliteSaver for the global database."""
-    async with AsyncSqliteSaver.from_conn_string(str(get_db_path())) as checkpointer:
+    """Get the thread-indexing AsyncSqliteSaver for the global database.
+
+    The saver holds one pooled connection for its lifetime.
+    """
+    from deepagents_cli.checkpoint_saver import IndexedAsyncSqliteSaver
+
+    async with session_connection(get_db_path()) as conn:
+        checkpointer = IndexedAsyncSqliteSaver(conn)
+        await checkpointer.setup()
         yield checkpointer
 
 
 @asynccontextmanager
 async def get_store() -> AsyncIterator[BaseStore]:
     """Get AsyncSqliteStore for persistent cross-thread storage."""
-    async with AsyncSqliteStore.from_conn_string(str(get_store_path())) as store:
-        yield store
+    from langgraph.store.sqlite.aio import AsyncSqliteStore
+
+    # AsyncSqliteStore manages its own transactions and expects autocommit.
+    async with session_connection(get_store_path(), isolation_level=None) as conn:
+        yield AsyncSqliteStore(conn)
 
 
 async def list_threads_command(
@@ -288,12 +630,15 @@ async def list_threads_command(
     table = Table(title=title, show_header=True, header_style=f"bold {COLORS['primary']}")
     table.add_column("Thread ID", style="bold")
     table.add_column("Agent")
+    table.add_column("Messages", justify="right")
     table.add_column("Last Used", style="dim")
 
     for t in threads:
+        message_count = t.get("message_count")
         table.add_row(
             t["thread_id"],
             t["agent_name"] or "unknown",
+            "" if message_count is None else str(message_count),
             _format_timestamp(t.get("updated_at")),
         )
 
@@ -310,3 +655,19 @@ async def delete_thread_command(thread_id: str) -> None:
         console.print(f"[#00AEEF]Thread '{thread_id}' deleted.[/#00AEEF]")
     else:
         console.print(f"[red]Thread '{thread_id}' not found.[/red]")
+
+
+async def prune_threads_command(
+    keep_checkpoints: int | None = None,
+    max_age_days: float | None = None,
+    *,
+    vacuum: bool = True,
+) -> None:
+    """CLI handler for: deepagents threads prune."""
+    if keep_checkpoints is None and max_age_days is None:
+        keep_checkpoints, max_age_days = auto_prune_policy()
+
+    result = await prune_threads(
+        keep_checkpoints=keep_checkpoints, max_age_days=max_age_days, vacuum=vacuum
+    )
+    console.print(f"[#00AEEF]{format_prune_result(result)}.[/#00AEEF]")
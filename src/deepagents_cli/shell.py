@@ -2,15 +2,516 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import logging
 import os
+import shlex
+import shutil
+import signal
 import subprocess
-from typing import Any
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
 from langchain.agents.middleware.types import AgentMiddleware, AgentState
-from langchain.tools import ToolRuntime, tool
+from langchain.tools import ToolRuntime
 from langchain_core.messages import ToolMessage
+from langchain_core.tools import StructuredTool
 from langchain_core.tools.base import ToolException
 
+from deepagents_cli.stream_parsing import tool_output_event
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import IO
+
+logger = logging.getLogger(__name__)
+
+# Bytes requested per read from the command's pipes.
+_READ_CHUNK = 64 * 1024
+# Minimum seconds between live output updates sent to the UI.
+_STREAM_INTERVAL_S = 0.1
+# Prefix of the marker a persistent shell prints after each command.
+_SENTINEL_PREFIX = b"__DEEPAGENTS_DONE_"
+# Persistent shells kept per middleware; the least recently used idle one is killed beyond this.
+MAX_SHELL_SESSIONS = 8
+
+
+@dataclass(frozen=True)
+class ShellLimits:
+    """Resource limits applied with ``setrlimit`` to every shell command.
+
+    ``None`` leaves a limit as inherited. Limits are per process (each child
+    of the shell gets its own CPU and memory budget), except ``processes``,
+    which the kernel counts across all of the user's processes.
+    """
+
+    cpu_seconds: int | None = None
+    memory_bytes: int | None = None
+    open_files: int | None = None
+    processes: int | None = None
+
+    @classmethod
+    def from_environment(cls) -> ShellLimits:
+        """Read limits from ``DEEPAGENTS_SHELL_*`` environment variables."""
+        memory_mb = _env_int("DEEPAGENTS_SHELL_MEMORY_MB")
+        return cls(
+            cpu_seconds=_env_int("DEEPAGENTS_SHELL_CPU_SECONDS"),
+            memory_bytes=memory_mb * 1024 * 1024 if memory_mb is not None else None,
+            open_files=_env_int("DEEPAGENTS_SHELL_MAX_OPEN_FILES"),
+            processes=_env_int("DEEPAGENTS_SHELL_MAX_PROCESSES"),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any limit is set (and the platform supports them)."""
+        return resource is not None and any(
+            value is not None
+            for value in (self.cpu_seconds, self.memory_bytes, self.open_files, self.processes)
+        )
+
+    def apply(self) -> None:
+        """Set the limits on the current process.
+
+        Runs in the forked child before ``exec``. A limit the platform rejects
+        (e.g. ``RLIMIT_AS`` on macOS) is skipped rather than failing the command.
+        """
+        for name, value in (
+            ("RLIMIT_CPU", self.cpu_seconds),
+            ("RLIMIT_AS", self.memory_bytes),
+            ("RLIMIT_NOFILE", self.open_files),
+            ("RLIMIT_NPROC", self.processes),
+        ):
+            if value is None or not hasattr(resource, name):
+                continue
+            limit = getattr(resource, name)
+            with contextlib.suppress(ValueError, OSError):
+                _, hard = resource.getrlimit(limit)
+                if hard != resource.RLIM_INFINITY:
+                    value = min(value, hard)
+                resource.setrlimit(limit, (value, value))
+
+
+def _env_int(name: str) -> int | None:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        # Logged rather than printed: shells start while the Textual app owns the screen
+        logger.warning("Ignoring %s=%r: expected a positive integer", name, value)
+        return None
+    return number
+
+
+@dataclass(frozen=True)
+class ResourceUsage:
+    """CPU time and peak memory of a finished command and its reaped children."""
+
+    cpu_seconds: float
+    max_rss_bytes: int
+
+    @classmethod
+    def from_rusage(cls, usage: Any) -> ResourceUsage:  # noqa: ANN401
+        """Convert a ``struct rusage`` from ``wait4``."""
+        # ru_maxrss is in bytes on macOS and KiB elsewhere
+        scale = 1 if sys.platform == "darwin" else 1024
+        return cls(
+            cpu_seconds=round(usage.ru_utime + usage.ru_stime, 3),
+            max_rss_bytes=usage.ru_maxrss * scale,
+        )
+
+    def as_metadata(self) -> dict[str, float | int]:
+        """Usage as JSON-serializable tool result metadata."""
+        return {"cpu_seconds": self.cpu_seconds, "max_rss_bytes": self.max_rss_bytes}
+
+
+class CappedOutput:
+    """Output of one stream, keeping only its first and last bytes.
+
+    Memory stays bounded by ``limit`` however much the command prints: past
+    the limit, new bytes only replace the retained tail.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """Initialize the buffer.
+
+        Args:
+            limit: Maximum bytes retained, split between head and tail
+        """
+        self.head_limit = limit - limit // 2
+        self.tail_limit = limit // 2
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def feed(self, data: bytes) -> None:
+        """Record a chunk of output."""
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data or not self.tail_limit:
+            return
+        if len(data) >= self.tail_limit:
+            self.tail[:] = data[-self.tail_limit :]
+            return
+        self.tail += data
+        overflow = len(self.tail) - self.tail_limit
+        if overflow > 0:
+            del self.tail[:overflow]
+
+    @property
+    def omitted(self) -> int:
+        """Bytes received but not retained."""
+        return self.total - len(self.head) - len(self.tail)
+
+    def text(self) -> str:
+        """Decode the retained output, marking where bytes were dropped."""
+        head = self.head.decode(errors="replace")
+        if not self.omitted:
+            return head + self.tail.decode(errors="replace")
+        tail = self.tail.decode(errors="replace")
+        return f"{head}\n\n... {self.omitted} bytes of output omitted ...\n\n{tail}"
+
+
+def _stream_writer() -> Callable[[Any], None] | None:
+    """Writer for ``custom`` stream events, or None outside a graph run."""
+    try:
+        from langgraph.config import get_stream_writer
+
+        return get_stream_writer()
+    except (ImportError, RuntimeError):
+        return None
+
+
+def _thread_id(runtime: ToolRuntime[None, AgentState]) -> str | None:
+    """Thread ID from the tool runtime's config, if any."""
+    config = getattr(runtime, "config", None) or {}
+    thread_id = config.get("configurable", {}).get("thread_id")
+    return str(thread_id) if thread_id is not None else None
+
+
+def _kill_process_group(pid: int) -> None:
+    """Kill a command's shell and everything it started."""
+    with contextlib.suppress(ProcessLookupError, PermissionError):
+        if hasattr(os, "killpg"):
+            # start_new_session makes the shell the leader of its own group
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            os.kill(pid, signal.SIGTERM)
+
+
+@dataclass
+class ShellCommandResult:
+    """Captured output and exit status of one shell command."""
+
+    stdout: CappedOutput
+    stderr: CappedOutput
+    returncode: int | None
+    timed_out: bool = False
+    usage: ResourceUsage | None = None
+
+
+async def run_shell_command(
+    command: str,
+    *,
+    cwd: str,
+    timeout: float,
+    max_output_bytes: int,
+    env: dict[str, str] | None = None,
+    limits: ShellLimits | None = None,
+    on_output: Callable[[bytes], None] | None = None,
+) -> ShellCommandResult:
+    """Run ``command`` in a fresh shell with bounded output and resource limits.
+
+    The shell runs in its own session, so on timeout or cancellation the whole
+    process group is killed. It is reaped with ``wait4`` to report the CPU time
+    and peak RSS of the command and the children it waited for.
+
+    Args:
+        command: Shell command to run.
+        cwd: Working directory.
+        timeout: Seconds before the command is killed.
+        max_output_bytes: Bytes kept per stream (head and tail).
+        env: Environment for the command; None inherits this process's.
+        limits: Resource limits to apply in the child.
+        on_output: Called with each chunk of output as it arrives.
+
+    Returns:
+        The captured output, exit status and resource usage.
+    """
+    stdout = CappedOutput(max_output_bytes)
+    stderr = CappedOutput(max_output_bytes)
+    process = subprocess.Popen(  # noqa: S602
+        command,
+        shell=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        cwd=cwd,
+        start_new_session=True,
+        # preexec_fn disables the fast spawn path, so only use it when needed
+        preexec_fn=limits.apply if limits is not None and limits.enabled else None,  # noqa: PLW1509
+    )
+    exited = _wait_in_thread(process)
+    loop = asyncio.get_running_loop()
+
+    async def _pump(pipe: IO[bytes] | None, capture: CappedOutput) -> None:
+        if pipe is None:
+            return
+        reader = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), pipe
+        )
+        try:
+            while chunk := await reader.read(_READ_CHUNK):
+                capture.feed(chunk)
+                if on_output is not None:
+                    on_output(chunk)
+        finally:
+            transport.close()
+
+    timed_out = False
+    finished = False
+    try:
+        async with asyncio.timeout(timeout):
+            await asyncio.gather(_pump(process.stdout, stdout), _pump(process.stderr, stderr))
+            # Shielded so the exit status can still be collected after a timeout
+            await asyncio.shield(exited)
+        finished = True
+    except TimeoutError:
+        timed_out = True
+    finally:
+        # Also runs when the user interrupts (CancelledError). A command that
+        # finished normally keeps its intentionally backgrounded children.
+        if not finished:
+            _kill_process_group(process.pid)
+        returncode, usage = await asyncio.shield(exited)
+
+    return ShellCommandResult(
+        stdout=stdout, stderr=stderr, returncode=returncode, timed_out=timed_out, usage=usage
+    )
+
+
+def _describe_exit(returncode: int | None) -> str:
+    """Exit code, naming the signal for commands that were killed."""
+    if returncode is not None and returncode < 0:
+        with contextlib.suppress(ValueError):
+            return f"{returncode} ({signal.Signals(-returncode).name})"
+    return str(returncode)
+
+
+def _wait_in_thread(
+    process: subprocess.Popen[bytes],
+) -> asyncio.Future[tuple[int, ResourceUsage | None]]:
+    """Reap ``process`` from a dedicated thread and resolve with its status and usage.
+
+    A thread per command (rather than the default executor) mirrors asyncio's
+    own child watcher: long-running commands never starve other ``to_thread``
+    work.
+    """
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[tuple[int, ResourceUsage | None]] = loop.create_future()
+
+    def _resolve(result: tuple[int, ResourceUsage | None]) -> None:
+        if not future.done():
+            future.set_result(result)
+
+    def _wait() -> None:
+        if hasattr(os, "wait4"):
+            _, status, rusage = os.wait4(process.pid, 0)
+            # Record the status so Popen never tries to reap the pid again
+            process.returncode = os.waitstatus_to_exitcode(status)
+            result = (process.returncode, ResourceUsage.from_rusage(rusage))
+        else:
+            result = (process.wait(), None)
+        with contextlib.suppress(RuntimeError):  # loop already closed
+            loop.call_soon_threadsafe(_resolve, result)
+
+    threading.Thread(target=_wait, name=f"shell-wait-{process.pid}", daemon=True).start()
+    return future
+
+
+class _ShellExited(Exception):
+    """The persistent shell closed its output before finishing a command."""
+
+
+class _PersistentShell:
+    """A long-lived bash that runs commands one at a time over pipes.
+
+    Each command is ``eval``'d in the shell itself, so ``cd``, ``export`` and
+    ``source`` carry over to the next command. Output is framed by a random
+    sentinel printed on both streams once the command finishes; the sentinel
+    on stdout also carries the exit status.
+    """
+
+    def __init__(
+        self, *, cwd: str, env: dict[str, str], limits: ShellLimits | None = None
+    ) -> None:
+        self._cwd = cwd
+        self._env = env
+        self._limits = limits
+        self._process: asyncio.subprocess.Process | None = None
+        # Pipes and locks belong to one event loop; a new loop gets a new shell
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+
+    async def _ensure_started(self) -> asyncio.subprocess.Process:
+        if self._process is not None and self._process.returncode is None:
+            return self._process
+        self.close()
+        shell = shutil.which("bash", path=self._env.get("PATH")) or "/bin/sh"
+        args = [shell, "--noprofile", "--norc"] if shell.endswith("bash") else [shell]
+        self._process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self._env,
+            cwd=self._cwd,
+            start_new_session=True,
+            preexec_fn=(  # noqa: PLW1509
+                self._limits.apply if self._limits is not None and self._limits.enabled else None
+            ),
+        )
+        return self._process
+
+    async def run(
+        self,
+        command: str,
+        stdout: CappedOutput,
+        stderr: CappedOutput,
+        live: _LiveOutput,
+    ) -> int:
+        """Run ``command`` and return its exit status.
+
+        If the command ends the shell (``exit``), its status is returned and
+        the next command starts a new shell. On timeout or cancellation the
+        shell is killed before the exception propagates.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self.close()
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        assert self._lock is not None
+        async with self._lock:
+            process = await self._ensure_started()
+            token = _SENTINEL_PREFIX + uuid.uuid4().hex.encode() + b"_"
+            marker = token.decode()
+            script = (
+                f"eval {shlex.quote(command)} </dev/null\n"
+                f"printf '\\n%s%d\\n' '{marker}' \"$?\"\n"
+                f"printf '\\n%s\\n' '{marker}' >&2\n"
+            )
+            try:
+                assert process.stdin is not None
+                process.stdin.write(script.encode())
+                await process.stdin.drain()
+                # Read both streams to the end even if the shell exits mid-command
+                status, _ = await asyncio.gather(
+                    _read_framed(process.stdout, token, stdout, live),
+                    _read_framed(process.stderr, token, stderr, live),
+                    return_exceptions=True,
+                )
+            except ConnectionError:
+                status = _ShellExited()
+            except BaseException:
+                self.close()
+                raise
+            if isinstance(status, BaseException):
+                self.close()
+                return await process.wait()
+            return int(status)
+
+    @property
+    def busy(self) -> bool:
+        """Whether a command is running in the shell."""
+        return self._lock is not None and self._lock.locked()
+
+    def close(self) -> None:
+        """Kill the shell and everything it started."""
+        if self._process is not None:
+            _end_shell(self._process)
+        self._process = None
+
+    async def aclose(self) -> None:
+        """Kill the shell and wait for it to exit."""
+        process = self._process
+        self.close()
+        if process is not None and self._loop is asyncio.get_running_loop():
+            await process.wait()
+
+
+def _end_shell(process: asyncio.subprocess.Process) -> None:
+    """Kill a persistent shell's process group and release its stdin pipe."""
+    if process.returncode is None:
+        _kill_process_group(process.pid)
+    if process.stdin is not None:
+        process.stdin.close()
+
+
+async def _read_framed(
+    stream: asyncio.StreamReader | None,
+    token: bytes,
+    capture: CappedOutput,
+    live: _LiveOutput,
+) -> bytes:
+    """Forward ``stream`` up to ``token`` and return the line that follows it.
+
+    The sentinel is printed after a newline so it always starts a line; that
+    newline is dropped again so the output matches a fresh shell's.
+    """
+    if stream is None:
+        raise _ShellExited
+    frame = b"\n" + token
+    # Hold back enough bytes to recognize a frame split across reads
+    keep = len(frame) - 1
+    pending = b""
+    while True:
+        chunk = await stream.read(_READ_CHUNK)
+        if not chunk:
+            _feed(pending, capture, live)
+            raise _ShellExited
+        pending += chunk
+        index = pending.find(frame)
+        if index >= 0:
+            break
+        if len(pending) > keep:
+            _feed(pending[:-keep], capture, live)
+            pending = pending[-keep:]
+    _feed(pending[:index], capture, live)
+    rest = pending[index + len(frame) :]
+    while b"\n" not in rest:
+        chunk = await stream.read(_READ_CHUNK)
+        if not chunk:
+            raise _ShellExited
+        rest += chunk
+    return rest.split(b"\n", 1)[0]
+
+
+def _feed(data: bytes, capture: CappedOutput, live: _LiveOutput) -> None:
+    if data:
+        capture.feed(data)
+        live.feed(data)
+
 
 class ShellMiddleware(AgentMiddleware[AgentState, Any]):
     """Give basic shell access to agents via the shell.
@@ -26,6 +527,9 @@ class ShellMiddleware(AgentMiddleware[AgentState, Any]):
         timeout: float = 120.0,
         max_output_bytes: int = 100_000,
         env: dict[str, str] | None = None,
+        persistent: bool = False,
+        limits: ShellLimits | None = None,
+        max_sessions: int = MAX_SHELL_SESSIONS,
     ) -> None:
         """Initialize an instance of `ShellMiddleware`.
 
@@ -37,6 +541,14 @@ class ShellMiddleware(AgentMiddleware[AgentState, Any]):
                 Defaults to 100,000 bytes.
             env: Environment variables to pass to the subprocess. If None,
                 uses the current process's environment. Defaults to None.
+            persistent: Keep one long-lived shell per thread so the working
+                directory and environment carry over between commands.
+                Defaults to False.
+            limits: Resource limits applied to every command. Defaults to None
+                (no limits).
+            max_sessions: Persistent shells kept at once; starting one more
+                kills the least recently used idle shell. Defaults to
+                ``MAX_SHELL_SESSIONS``.
         """
         super().__init__()
         self._timeout = timeout
@@ -44,16 +556,31 @@ class ShellMiddleware(AgentMiddleware[AgentState, Any]):
         self._tool_name = "shell"
         self._env = env if env is not None else os.environ.copy()
         self._workspace_root = workspace_root
+        self._persistent = persistent
+        self._limits = limits
+        self._max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _PersistentShell] = OrderedDict()
+        if persistent:
+            _persistent_middlewares.add(self)
 
         # Build description with working directory information
+        if persistent:
+            session_note = (
+                "Commands run in a persistent shell session: the working directory and "
+                "environment variables (cd, export, source) carry over to later commands. "
+                "The session restarts from the initial directory if it exits or times out."
+            )
+        else:
+            session_note = (
+                "Each command runs in a fresh shell environment with the current "
+                "process's environment variables."
+            )
         description = (
             f"Execute a shell command directly on the host. Commands will run in "
-            f"the working directory: {workspace_root}. Each command runs in a fresh shell "
-            f"environment with the current process's environment variables. Commands may "
+            f"the working directory: {workspace_root}. {session_note} Commands may "
             f"be truncated if they exceed the configured timeout or output limits."
         )
 
-        @tool(self._tool_name, description=description)
         def shell_tool(
             command: str,
             runtime: ToolRuntime[None, AgentState],
@@ -64,22 +591,53 @@ class ShellMiddleware(AgentMiddleware[AgentState, Any]):
                 command: The shell command to execute.
                 runtime: The tool runtime context.
             """
-            return self._run_shell_command(command, tool_call_id=runtime.tool_call_id)
+            # Each asyncio.run has its own loop, so no shell could outlive the
+            # call: sync invocations always use a fresh shell.
+            return asyncio.run(
+                self._run_shell_command(command, tool_call_id=runtime.tool_call_id)
+            )
+
+        async def ashell_tool(
+            command: str,
+            runtime: ToolRuntime[None, AgentState],
+        ) -> ToolMessage | str:
+            """Execute a shell command.
+
+            Args:
+                command: The shell command to execute.
+                runtime: The tool runtime context.
+            """
+            return await self._run_shell_command(
+                command, tool_call_id=runtime.tool_call_id, thread_id=_thread_id(runtime)
+            )
 
-        self._shell_tool = shell_tool
+        self._shell_tool = StructuredTool.from_function(
+            func=shell_tool,
+            coroutine=ashell_tool,
+            name=self._tool_name,
+            description=description,
+        )
         self.tools = [self._shell_tool]
 
-    def _run_shell_command(
+    async def _run_shell_command(
         self,
         command: str,
         *,
         tool_call_id: str | None,
+        thread_id: str | None = None,
     ) -> ToolMessage | str:
         """Execute a shell command and return the result.
 
+        Output is read incrementally: at most ``max_output_bytes`` per stream
+        are kept (head and tail), and partial output is streamed to the UI
+        while the command runs. On timeout or cancellation the whole process
+        group is killed.
+
         Args:
             command: The shell command to execute.
             tool_call_id: The tool call ID for creating a ToolMessage.
+            thread_id: Thread whose persistent shell runs the command. Without
+                one, or when persistent mode is off, a fresh shell is used.
 
         Returns:
             A ToolMessage with the command output or an error message.
@@ -88,51 +646,186 @@ class ShellMiddleware(AgentMiddleware[AgentState, Any]):
             msg = "Shell tool expects a non-empty command string."
             raise ToolException(msg)
 
+        live = _LiveOutput(_stream_writer(), tool_call_id, self._max_output_bytes)
+        in_session = self._persistent and thread_id is not None
         try:
-            result = subprocess.run(
-                command,
-                check=False,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=self._timeout,
-                env=self._env,
-                cwd=self._workspace_root,
+            if in_session:
+                result = await self._run_in_session(command, thread_id, live)
+            else:
+                result = await run_shell_command(
+                    command,
+                    cwd=self._workspace_root,
+                    timeout=self._timeout,
+                    max_output_bytes=self._max_output_bytes,
+                    env=self._env,
+                    limits=self._limits,
+                    on_output=live.feed,
+                )
+        finally:
+            live.flush()
+        return self._to_message(result, tool_call_id=tool_call_id, in_session=in_session)
+
+    async def _run_in_session(
+        self, command: str, thread_id: str, live: _LiveOutput
+    ) -> ShellCommandResult:
+        """Run ``command`` in the thread's persistent shell, starting it if needed."""
+        session = self._sessions.get(thread_id)
+        if session is None:
+            self._evict_idle(self._max_sessions - 1)
+            session = _PersistentShell(
+                cwd=self._workspace_root, env=self._env, limits=self._limits
             )
+            self._sessions[thread_id] = session
+        self._sessions.move_to_end(thread_id)
 
-            # Combine stdout and stderr
-            output_parts = []
-            if result.stdout:
-                output_parts.append(result.stdout)
-            if result.stderr:
-                stderr_lines = result.stderr.strip().split("\n")
-                for line in stderr_lines:
-                    output_parts.append(f"[stderr] {line}")
+        result = ShellCommandResult(
+            stdout=CappedOutput(self._max_output_bytes),
+            stderr=CappedOutput(self._max_output_bytes),
+            returncode=None,
+        )
+        try:
+            async with asyncio.timeout(self._timeout):
+                result.returncode = await session.run(command, result.stdout, result.stderr, live)
+        except TimeoutError:
+            result.timed_out = True
+        return result
 
-            output = "\n".join(output_parts) if output_parts else "<no output>"
+    def _evict_idle(self, keep: int) -> None:
+        """Kill least recently used idle shells until at most ``keep`` remain."""
+        for thread_id in list(self._sessions):
+            if len(self._sessions) <= keep:
+                return
+            if not self._sessions[thread_id].busy:
+                self._sessions.pop(thread_id).close()
 
-            # Truncate output if needed
-            if len(output) > self._max_output_bytes:
-                output = output[: self._max_output_bytes]
-                output += f"\n\n... Output truncated at {self._max_output_bytes} bytes."
+    def close_session(self, thread_id: str) -> None:
+        """Kill the persistent shell of ``thread_id``, if any."""
+        session = self._sessions.pop(thread_id, None)
+        if session is not None:
+            session.close()
 
-            # Add exit code info if non-zero
-            if result.returncode != 0:
-                output = f"{output.rstrip()}\n\nExit code: {result.returncode}"
-                status = "error"
-            else:
-                status = "success"
+    async def aclose_sessions(self) -> None:
+        """Kill all persistent shells (they also exit when this process does)."""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(session.aclose() for session in sessions))
 
-        except subprocess.TimeoutExpired:
+    def _to_message(
+        self, result: ShellCommandResult, *, tool_call_id: str | None, in_session: bool
+    ) -> ToolMessage:
+        """Build the tool result from the captured output, exit status and usage."""
+        stdout, stderr = result.stdout, result.stderr
+        output = self._format_output(stdout, stderr)
+        if result.timed_out:
             output = f"Error: Command timed out after {self._timeout:.1f} seconds."
+            partial = self._format_output(stdout, stderr, placeholder="")
+            if partial:
+                output = f"{output}\n\nPartial output:\n{partial}"
+            if in_session:
+                output = (
+                    f"{output}\n\nThe shell session was restarted; "
+                    f"working directory and environment changes were lost."
+                )
+            status = "error"
+        elif result.returncode != 0:
+            # Add exit code info if non-zero
+            output = f"{output.rstrip()}\n\nExit code: {_describe_exit(result.returncode)}"
             status = "error"
+        else:
+            status = "success"
 
+        metadata = {}
+        if result.usage is not None:
+            metadata["resource_usage"] = result.usage.as_metadata()
         return ToolMessage(
             content=output,
             tool_call_id=tool_call_id,
             name=self._tool_name,
             status=status,
+            response_metadata=metadata,
         )
 
+    def _format_output(
+        self, stdout: CappedOutput, stderr: CappedOutput, *, placeholder: str = "<no output>"
+    ) -> str:
+        """Combine stdout and stderr, capped at ``max_output_bytes`` overall."""
+        output_parts = []
+        if stdout.total:
+            output_parts.append(stdout.text())
+        if stderr.total:
+            stderr_lines = stderr.text().strip().split("\n")
+            for line in stderr_lines:
+                output_parts.append(f"[stderr] {line}")
+
+        output = "\n".join(output_parts) if output_parts else placeholder
+
+        # Truncate output if needed, keeping the end (usually the errors)
+        if len(output) > self._max_output_bytes:
+            half = self._max_output_bytes // 2
+            output = (
+                f"{output[:half]}\n\n... Output truncated at {self._max_output_bytes} "
+                f"bytes ...\n\n{output[-half:]}"
+            )
+        return output
+
+
+# Middlewares that may hold persistent shells, for the runtime and UI to close
+_persistent_middlewares: weakref.WeakSet[ShellMiddleware] = weakref.WeakSet()
+
+
+def close_thread_sessions(thread_id: str) -> None:
+    """Kill the persistent shells of ``thread_id``, e.g. when the UI leaves the thread."""
+    for middleware in list(_persistent_middlewares):
+        middleware.close_session(thread_id)
+
+
+async def aclose_all_sessions() -> None:
+    """Kill every persistent shell; called when the agent runtime shuts down."""
+    await asyncio.gather(
+        *(middleware.aclose_sessions() for middleware in list(_persistent_middlewares))
+    )
+
+
+class _LiveOutput:
+    """Forward command output to the UI in batches while it runs."""
+
+    def __init__(
+        self, writer: Callable[[Any], None] | None, tool_call_id: str | None, limit: int
+    ) -> None:
+        self._writer = writer if tool_call_id else None
+        self._tool_call_id = tool_call_id or ""
+        self._remaining = limit
+        self._pending = bytearray()
+        # Send the first output straight away
+        self._last_sent = float("-inf")
+
+    def feed(self, data: bytes) -> None:
+        if self._writer is None or self._remaining <= 0:
+            return
+        data = data[: self._remaining]
+        self._remaining -= len(data)
+        self._pending += data
+        if self._remaining <= 0 or time.monotonic() - self._last_sent >= _STREAM_INTERVAL_S:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._writer is None or not self._pending:
+            return
+        text = self._pending.decode(errors="replace")
+        self._pending.clear()
+        self._last_sent = time.monotonic()
+        with contextlib.suppress(Exception):
+            self._writer(tool_output_event(self._tool_call_id, text))
+
 
-__all__ = ["ShellMiddleware"]
+__all__ = [
+    "MAX_SHELL_SESSIONS",
+    "CappedOutput",
+    "ResourceUsage",
+    "ShellCommandResult",
+    "ShellLimits",
+    "ShellMiddleware",
+    "aclose_all_sessions",
+    "close_thread_sessions",
+    "run_shell_command",
+]
@@ -12,7 +12,6 @@ from pathlib import Path
 from typing import Any
 
 from deepagents_cli.config import COLORS, Settings, console
-from deepagents_cli.skills.load import list_skills
 
 MAX_SKILL_NAME_LENGTH = 64
 
@@ -97,6 +96,8 @@ def _list(agent: str, *, project: bool = False) -> None:
         project: If True, show only project skills.
             If False, show all skills (default + user + project).
     """
+    from deepagents_cli.skills.load import list_skills
+
     settings = Settings.from_environment()
     default_skills_dir = settings.get_default_skills_dir()
     user_skills_dir = settings.get_user_skills_dir(agent)
@@ -350,6 +351,8 @@ def _info(skill_name: str, *, agent: str = "agent", project: bool = False) -> No
         project: If True, only search in project skills.
             If False, search in default, user, and project skills.
     """
+    from deepagents_cli.skills.load import list_skills
+
     settings = Settings.from_environment()
     default_skills_dir = settings.get_default_skills_dir()
     user_skills_dir = settings.get_user_skills_dir(agent)
@@ -0,0 +1,153 @@
+"""Shared parsing helpers for ``agent.astream`` chunks.
+
+Used by both the Textual adapter and the headless runner so they interpret
+namespaces, interrupts, token usage and tool results the same way. This module
+must not import Textual.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import Any
+
+from langchain.agents.middleware.human_in_the_loop import HITLRequest
+from langgraph.types import Interrupt
+from pydantic import TypeAdapter
+
+from deepagents_cli.ui import format_tool_message_content
+
+HITL_REQUEST_ADAPTER = TypeAdapter(HITLRequest)
+
+# ``agent.astream`` arguments used by every execution loop. ``custom`` carries
+# live tool output (see ``tool_output_event``).
+STREAM_MODES = ["messages", "updates", "custom"]
+
+# Key of the custom stream events that carry partial tool output.
+TOOL_OUTPUT_EVENT = "tool_output"
+
+
+def is_summarization_chunk(metadata: dict | None) -> bool:
+    """Check if a message chunk is from summarization middleware.
+
+    Args:
+        metadata: The metadata dict from the stream chunk.
+
+    Returns:
+        Whether the chunk is from summarization and should be filtered.
+    """
+    if metadata is None:
+        return False
+    return metadata.get("lc_source") == "summarization"
+
+
+def build_run_config(thread_id: str, assistant_id: str | None) -> dict[str, Any]:
+    """Build the LangGraph run config for a thread.
+
+    The metadata fields are what the session helpers query when listing and
+    resuming threads.
+    """
+    return {
+        "configurable": {"thread_id": thread_id},
+        "metadata": {
+            "assistant_id": assistant_id,
+            "agent_name": assistant_id,
+            "updated_at": datetime.now(UTC).isoformat(),
+        }
+        if assistant_id
+        else {},
+    }
+
+
+def split_stream_chunk(chunk: Any) -> tuple[tuple, str, Any] | None:
+    """Split a ``subgraphs=True`` stream chunk into ``(ns_key, mode, data)``.
+
+    Returns None for chunks that are not in the expected 3-tuple shape. The
+    main agent uses the empty namespace tuple.
+    """
+    if not isinstance(chunk, tuple) or len(chunk) != 3:
+        return None
+    namespace, stream_mode, data = chunk
+    ns_key = tuple(namespace) if namespace else ()
+    return ns_key, stream_mode, data
+
+
+def tool_output_event(tool_call_id: str, text: str) -> dict[str, Any]:
+    """Build a ``custom`` stream event carrying partial output of a running tool."""
+    return {TOOL_OUTPUT_EVENT: {"tool_call_id": tool_call_id, "text": text}}
+
+
+def parse_tool_output(data: Any) -> tuple[str, str] | None:
+    """Return ``(tool_call_id, text)`` for a tool output event, else None."""
+    if not isinstance(data, dict):
+        return None
+    event = data.get(TOOL_OUTPUT_EVENT)
+    if not isinstance(event, dict):
+        return None
+    tool_call_id = event.get("tool_call_id")
+    text = event.get("text")
+    if not isinstance(tool_call_id, str) or not isinstance(text, str):
+        return None
+    return tool_call_id, text
+
+
+def parse_interrupts(data: dict[str, Any]) -> dict[str, HITLRequest]:
+    """Validate human-in-the-loop interrupts from an ``updates`` chunk.
+
+    Raises:
+        ValidationError: If an interrupt payload is not a HITL request.
+    """
+    interrupts: list[Interrupt] = data.get("__interrupt__") or []
+    return {
+        interrupt_obj.id: HITL_REQUEST_ADAPTER.validate_python(interrupt_obj.value)
+        for interrupt_obj in interrupts
+    }
+
+
+def extract_todos(data: dict[str, Any]) -> list[Any] | None:
+    """Return the todo list carried by an ``updates`` chunk, if any."""
+    chunk_data = next(iter(data.values())) if data else None
+    if chunk_data and isinstance(chunk_data, dict) and "todos" in chunk_data:
+        return chunk_data.get("todos", [])
+    return None
+
+
+def usage_total_tokens(message: Any) -> int:
+    """Return the total token count reported on a message chunk, or 0."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return 0
+    # Use total_tokens which includes input + output
+    total_toks = usage.get("total_tokens", 0)
+    if total_toks:
+        return total_toks
+    # Fallback to input + output if total not provided
+    return usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+
+
+def summarize_tool_result(message: Any) -> str:
+    """Format a one-line summary of a ToolMessage for compact displays."""
+    tool_name = getattr(message, "name", "tool")
+    tool_status = getattr(message, "status", "success")
+    tool_content = format_tool_message_content(message.content)
+    summary = f"tool result: {tool_name} ({tool_status})"
+    content_str = str(tool_content).strip() if tool_content else ""
+    if content_str:
+        first_line = content_str.splitlines()[0]
+        summary = f"{summary} · {first_line[:160]}"
+    return summary
+
+
+__all__ = [
+    "HITL_REQUEST_ADAPTER",
+    "STREAM_MODES",
+    "TOOL_OUTPUT_EVENT",
+    "build_run_config",
+    "extract_todos",
+    "is_summarization_chunk",
+    "parse_interrupts",
+    "parse_tool_output",
+    "split_stream_chunk",
+    "summarize_tool_result",
+    "tool_output_event",
+    "usage_total_tokens",
+]
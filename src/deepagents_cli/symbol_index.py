@@ -0,0 +1,596 @@
+"""Cached ``ast`` index of a project's Python symbols, imports and references.
+
+Each project root gets a SQLite database at ``.deepagents/index/symbols.db``
+holding, per Python file:
+
+- definitions: the module, classes, functions, methods and module/class level
+  variables, with qualified names, line spans and signatures
+- import edges, with relative imports resolved to absolute module names
+- references: every identifier used (names and attribute accesses) by line
+
+Files are re-parsed only when their mtime or size changes. Large batches
+(such as the first build) are parsed in a process pool.
+"""
+
+from __future__ import annotations
+
+import ast
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+
+from deepagents_cli.code_index import MAX_FILE_BYTES, ensure_index_dir, list_project_files
+
+# Bump when the schema or extraction changes; older indexes are rebuilt.
+SCHEMA_VERSION = 1
+# Minimum seconds between change scans triggered by lookups.
+REFRESH_INTERVAL_S = 2.0
+# Parse in a process pool when at least this many files changed.
+POOL_MIN_FILES = 200
+# Files parsed and written per transaction.
+INDEX_BATCH_FILES = 500
+
+# (symbols, imports, refs, error) for one file, as produced by _parse_job.
+_Parsed = tuple[list[tuple], list[tuple], "dict[str, str]", "str | None"]
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE,
+        module TEXT NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        error TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS symbols (
+        file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        qualname TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        line INTEGER NOT NULL,
+        end_line INTEGER NOT NULL,
+        depth INTEGER NOT NULL,
+        signature TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS symbols_name ON symbols(name)",
+    "CREATE INDEX IF NOT EXISTS symbols_file ON symbols(file_id)",
+    """CREATE TABLE IF NOT EXISTS imports (
+        file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+        module TEXT NOT NULL,
+        name TEXT,
+        alias TEXT,
+        line INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS imports_name ON imports(name)",
+    "CREATE INDEX IF NOT EXISTS imports_module ON imports(module)",
+    "CREATE INDEX IF NOT EXISTS imports_file ON imports(file_id)",
+    # One row per name used in a file; lines is a space-separated list
+    """CREATE TABLE IF NOT EXISTS refs (
+        file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        lines TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS refs_name ON refs(name)",
+    "CREATE INDEX IF NOT EXISTS refs_file ON refs(file_id)",
+)
+
+
+@dataclass(frozen=True)
+class Symbol:
+    """A definition in a Python file."""
+
+    path: str
+    module: str
+    qualname: str
+    kind: str
+    line: int
+    end_line: int
+    depth: int
+    signature: str
+
+
+@dataclass(frozen=True)
+class Reference:
+    """A use of a name, or an import of it."""
+
+    path: str
+    line: int
+    kind: str
+    text: str
+
+
+@dataclass(frozen=True)
+class RefreshStats:
+    """What one change scan did."""
+
+    files: int
+    parsed: int
+    removed: int
+    seconds: float
+
+
+class SymbolIndex:
+    """Symbol index of one project root.
+
+    Thread-safe: all access goes through one connection under a lock.
+    """
+
+    def __init__(self, root: Path, db_path: Path | None = None) -> None:
+        """Open (creating if needed) the index for ``root``.
+
+        Args:
+            root: Project root to index.
+            db_path: Index database; defaults to ``root/.deepagents/index/symbols.db``.
+        """
+        self.root = root.resolve()
+        self.db_path = db_path or ensure_index_dir(self.root) / "symbols.db"
+        self._lock = threading.Lock()
+        self._refreshed_at = float("-inf")
+        self._background: threading.Thread | None = None
+        self._background_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            version = None
+            if self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'"
+            ).fetchone():
+                row = self._conn.execute(
+                    "SELECT value FROM meta WHERE key = 'schema_version'"
+                ).fetchone()
+                version = row[0] if row else None
+            if version != str(SCHEMA_VERSION):
+                for table in ("refs", "imports", "symbols", "files", "meta"):
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(SCHEMA_VERSION),),
+            )
+            # Whether a full scan has finished since the index was created
+            self.built = bool(
+                self._conn.execute("SELECT 1 FROM meta WHERE key = 'built'").fetchone()
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def refresh(self, *, force: bool = True) -> RefreshStats | None:
+        """Re-parse new and changed Python files and drop deleted ones.
+
+        Args:
+            force: Scan even if the last scan was under ``REFRESH_INTERVAL_S`` ago.
+
+        Returns:
+            Scan statistics, or None if the scan was skipped.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < REFRESH_INTERVAL_S:
+                return None
+            stats = self._refresh()
+            self._refreshed_at = time.monotonic()
+            if not self.built:
+                with self._conn:
+                    self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('built', '1')")
+                self.built = True
+            return stats
+
+    def refresh_in_background(self) -> threading.Thread:
+        """Scan in a daemon thread, unless a background scan is already running.
+
+        Lookups made meanwhile wait for it, as they would for a foreground scan.
+
+        Returns:
+            The thread running the scan.
+        """
+        with self._background_lock:
+            if self._background is None or not self._background.is_alive():
+                self._background = threading.Thread(
+                    target=self.refresh, name="symbol-index", daemon=True
+                )
+                self._background.start()
+            return self._background
+
+    def find_definition(self, name: str, *, limit: int = 50) -> list[Symbol]:
+        """Definitions matching ``name``.
+
+        ``name`` may be bare (``warp_grep``), qualified by class
+        (``ShellMiddleware.close``) or by module (``pkg.tools.warp_grep``,
+        also matching a module itself).
+        """
+        self.refresh(force=False)
+        parts = name.strip().split(".")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT files.path, files.module, symbols.qualname, symbols.kind, symbols.line, "
+                "symbols.end_line, symbols.depth, symbols.signature "
+                "FROM symbols JOIN files ON files.id = symbols.file_id "
+                "WHERE symbols.name = ? ORDER BY files.path, symbols.line",
+                (parts[-1],),
+            ).fetchall()
+        symbols = [Symbol(*row) for row in rows]
+        if len(parts) > 1:
+            suffix = "." + name.strip()
+            symbols = [symbol for symbol in symbols if f".{_full_name(symbol)}".endswith(suffix)]
+        return symbols[:limit]
+
+    def find_references(self, name: str, *, limit: int = 200) -> list[Reference]:
+        """Uses and imports of the last component of ``name``, by file and line."""
+        self.refresh(force=False)
+        target = name.strip().split(".")[-1]
+        with self._lock:
+            imports = self._conn.execute(
+                "SELECT files.path, imports.line FROM imports "
+                "JOIN files ON files.id = imports.file_id "
+                "WHERE imports.name = ? OR imports.module = ? OR imports.module LIKE ? ESCAPE '\\'",
+                (target, target, "%." + target.replace("%", r"\%").replace("_", r"\_")),
+            ).fetchall()
+            uses = self._conn.execute(
+                "SELECT files.path, refs.lines FROM refs "
+                "JOIN files ON files.id = refs.file_id WHERE refs.name = ? ORDER BY files.path",
+                (target,),
+            )
+            found: dict[tuple[str, int], str] = {}
+            for path, line in imports:
+                found[(path, line)] = "import"
+            for path, lines in uses:
+                for line in lines.split():
+                    found.setdefault((path, int(line)), "use")
+                if len(found) > limit + len(imports):
+                    break
+        references: list[Reference] = []
+        lines_by_path: dict[str, list[str]] = {}
+        for (path, line), kind in sorted(found.items())[:limit]:
+            if path not in lines_by_path:
+                lines_by_path[path] = _read_lines(self.root / path)
+            file_lines = lines_by_path[path]
+            text = file_lines[line - 1].strip() if 0 < line <= len(file_lines) else ""
+            references.append(Reference(path, line, kind, text))
+        return references
+
+    def outline(self, path: str) -> tuple[list[Symbol], list[tuple[str, str | None, int]]]:
+        """Definitions and imports of one file, in line order.
+
+        Args:
+            path: File path relative to the root (or absolute inside it).
+
+        Raises:
+            KeyError: If the file is not an indexed Python file.
+        """
+        self.refresh(force=False)
+        rel_path = _relative(self.root, path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, module, error FROM files WHERE path = ?", (rel_path,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(rel_path)
+            file_id, module, error = row
+            if error:
+                raise SyntaxError(error)
+            rows = self._conn.execute(
+                "SELECT qualname, kind, line, end_line, depth, signature FROM symbols "
+                "WHERE file_id = ? ORDER BY line, depth",
+                (file_id,),
+            ).fetchall()
+            imports = self._conn.execute(
+                "SELECT module, name, line FROM imports WHERE file_id = ? ORDER BY line",
+                (file_id,),
+            ).fetchall()
+        symbols = [Symbol(rel_path, module, *row) for row in rows]
+        return symbols, imports
+
+    def import_graph(self) -> dict[str, set[str]]:
+        """Indexed files each indexed file imports, by path.
+
+        ``from pkg import name`` counts as importing ``pkg/name.py`` when that
+        module exists, otherwise ``pkg/__init__.py``.
+        """
+        self.refresh(force=False)
+        with self._lock:
+            modules = dict(self._conn.execute("SELECT module, path FROM files"))
+            rows = self._conn.execute(
+                "SELECT files.path, imports.module, imports.name FROM imports "
+                "JOIN files ON files.id = imports.file_id"
+            ).fetchall()
+        graph: dict[str, set[str]] = {}
+        for path, module, name in rows:
+            target = modules.get(f"{module}.{name}") if name else None
+            target = target or modules.get(module)
+            if target and target != path:
+                graph.setdefault(path, set()).add(target)
+        return graph
+
+    def top_level_symbols(self) -> dict[str, list[str]]:
+        """Module-level class and function names of each file, in line order."""
+        self.refresh(force=False)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT files.path, symbols.name FROM symbols "
+                "JOIN files ON files.id = symbols.file_id "
+                "WHERE symbols.depth = 0 AND symbols.kind IN ('class', 'function') "
+                "ORDER BY files.path, symbols.line"
+            ).fetchall()
+        symbols: dict[str, list[str]] = {}
+        for path, name in rows:
+            symbols.setdefault(path, []).append(name)
+        return symbols
+
+    def _refresh(self) -> RefreshStats:
+        start = time.perf_counter()
+        known = {
+            path: (file_id, mtime_ns, size)
+            for path, file_id, mtime_ns, size in self._conn.execute(
+                "SELECT path, id, mtime_ns, size FROM files"
+            )
+        }
+        root = str(self.root)
+        seen: set[str] = set()
+        changed: list[tuple[str, int, int]] = []
+        for path in list_project_files(self.root):
+            if not path.endswith((".py", ".pyi")):
+                continue
+            try:
+                stat = os.stat(os.path.join(root, path))
+            except OSError:
+                continue
+            if stat.st_size > MAX_FILE_BYTES:
+                continue
+            seen.add(path)
+            previous = known.get(path)
+            if previous is None or previous[1:] != (stat.st_mtime_ns, stat.st_size):
+                changed.append((path, stat.st_mtime_ns, stat.st_size))
+        removed = [known[path][0] for path in known if path not in seen]
+
+        with self._conn:
+            self._conn.executemany("DELETE FROM files WHERE id = ?", ((i,) for i in removed))
+
+        pool = None
+        if len(changed) >= POOL_MIN_FILES:
+            # spawn, not fork: the CLI process runs threads and an event loop
+            pool = ProcessPoolExecutor(
+                max_workers=min(os.cpu_count() or 1, 8),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        try:
+            for offset in range(0, len(changed), INDEX_BATCH_FILES):
+                batch = changed[offset : offset + INDEX_BATCH_FILES]
+                jobs = [(root, path) for path, _, _ in batch]
+                parsed = None
+                if pool is not None:
+                    try:
+                        parsed = list(pool.map(_parse_job, jobs, chunksize=32))
+                    except (BrokenProcessPool, OSError):
+                        # Workers can't start in some embeddings; parse here instead
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = None
+                if parsed is None:
+                    parsed = [_parse_job(job) for job in jobs]
+                self._store(batch, parsed)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return RefreshStats(
+            files=len(seen),
+            parsed=len(changed),
+            removed=len(removed),
+            seconds=time.perf_counter() - start,
+        )
+
+    def _store(self, batch: list[tuple[str, int, int]], parsed: list[_Parsed]) -> None:
+        """Write one batch of parse results, replacing each file's old rows."""
+        with self._conn:
+            for (path, mtime_ns, size), (symbols, imports, refs, error) in zip(
+                batch, parsed, strict=True
+            ):
+                self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                file_id = self._conn.execute(
+                    "INSERT INTO files (path, module, mtime_ns, size, error) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (path, module_name(path), mtime_ns, size, error),
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((file_id, *symbol) for symbol in symbols),
+                )
+                self._conn.executemany(
+                    "INSERT INTO imports VALUES (?, ?, ?, ?, ?)",
+                    ((file_id, *edge) for edge in imports),
+                )
+                self._conn.executemany(
+                    "INSERT INTO refs VALUES (?, ?, ?)",
+                    ((file_id, name, lines) for name, lines in refs.items()),
+                )
+
+
+def module_name(path: str) -> str:
+    """Dotted module name for a project-relative path (``src/`` layouts stripped)."""
+    parts = path.removesuffix(".pyi").removesuffix(".py").split("/")
+    if parts[-1] == "__init__":
+        parts.pop()
+    if len(parts) > 1 and parts[0] == "src":
+        parts.pop(0)
+    return ".".join(parts)
+
+
+def _parse_job(job: tuple[str, str]) -> _Parsed:
+    root, path = job
+    try:
+        with open(os.path.join(root, path), "rb") as f:
+            source = f.read()
+        tree = ast.parse(source, filename=path)
+    except (OSError, SyntaxError, ValueError) as e:
+        return [], [], {}, f"{type(e).__name__}: {e}"
+    collector = _Collector(module_name(path), is_package=path.endswith("__init__.py"))
+    collector.collect(tree)
+    return collector.symbols, collector.imports, _uses(tree), None
+
+
+# Statement fields that hold nested blocks (if/for/while/with/try/match bodies)
+_BLOCK_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+
+class _Collector:
+    """Gather definitions and imports from one module's statements."""
+
+    def __init__(self, module: str, *, is_package: bool) -> None:
+        self.module = module
+        self.is_package = is_package
+        self.symbols: list[tuple[str, str, str, int, int, int, str]] = []
+        self.imports: list[tuple[str, str | None, str | None, int]] = []
+        self._scope: list[str] = []
+        self._in_function = 0
+
+    def collect(self, tree: ast.Module) -> None:
+        end = max((getattr(node, "end_lineno", 1) or 1 for node in tree.body), default=1)
+        name = self.module.rsplit(".", 1)[-1] if self.module else ""
+        self.symbols.append((name, self.module, "module", 1, end, 0, ""))
+        self._statements(tree.body)
+
+    def _statements(self, body: list[ast.stmt]) -> None:
+        # Only statements are walked; definitions never appear inside expressions
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                self._class(node)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self._function(node)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                self._import(node)
+            else:
+                if isinstance(node, (ast.Assign, ast.AnnAssign)) and not self._in_function:
+                    self._assign(node)
+                for field in _BLOCK_FIELDS:
+                    for child in getattr(node, field, ()):
+                        if isinstance(child, (ast.ExceptHandler, ast.match_case)):
+                            self._statements(child.body)
+                        else:
+                            self._statements([child])
+
+    def _define(self, node: ast.stmt, name: str, kind: str, signature: str) -> None:
+        qualname = ".".join([*self._scope, name])
+        decorators = getattr(node, "decorator_list", [])
+        start = min([node.lineno, *(d.lineno for d in decorators)])
+        end = node.end_lineno or node.lineno
+        self.symbols.append((name, qualname, kind, start, end, len(self._scope), signature))
+
+    def _class(self, node: ast.ClassDef) -> None:
+        bases = ", ".join(ast.unparse(base) for base in [*node.bases, *node.keywords])
+        signature = f"class {node.name}({bases})" if bases else f"class {node.name}"
+        self._define(node, node.name, "class", signature)
+        self._scope.append(node.name)
+        self._statements(node.body)
+        self._scope.pop()
+
+    def _function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        signature = f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+        in_class = bool(self._scope) and not self._in_function
+        self._define(node, node.name, "method" if in_class else "function", signature)
+        self._scope.append(node.name)
+        self._in_function += 1
+        self._statements(node.body)
+        self._in_function -= 1
+        self._scope.pop()
+
+    def _assign(self, node: ast.Assign | ast.AnnAssign) -> None:
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        for target in targets:
+            for name_node in ast.walk(target):
+                if isinstance(name_node, ast.Name):
+                    self._define(node, name_node.id, "variable", "")
+
+    def _import(self, node: ast.Import | ast.ImportFrom) -> None:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                self.imports.append((alias.name, None, alias.asname, node.lineno))
+            return
+        module = node.module or ""
+        if node.level:
+            package = self.module.split(".") if self.module else []
+            if not self.is_package:
+                package = package[:-1]
+            base = package[: len(package) - (node.level - 1)] if node.level > 1 else package
+            module = ".".join([*base, module] if module else base)
+        for alias in node.names:
+            self.imports.append((module, alias.name, alias.asname, node.lineno))
+
+
+def _uses(tree: ast.Module) -> dict[str, str]:
+    """Lines each identifier or attribute name is used on, space-separated."""
+    # A hand-rolled walk: ast.walk/NodeVisitor dominate indexing time otherwise
+    lines: dict[str, set[int]] = {}
+    node_type, name_type, attribute_type = ast.AST, ast.Name, ast.Attribute
+    stack: list[ast.AST] = [tree]
+    while stack:
+        node = stack.pop()
+        kind = type(node)
+        if kind is name_type:
+            lines.setdefault(node.id, set()).add(node.lineno)
+            continue
+        if kind is attribute_type:
+            lines.setdefault(node.attr, set()).add(node.end_lineno or node.lineno)
+        for field in kind._fields:
+            value = getattr(node, field, None)
+            if type(value) is list:
+                stack.extend(item for item in value if isinstance(item, node_type))
+            elif isinstance(value, node_type) and field != "ctx":
+                stack.append(value)
+    return {name: " ".join(map(str, sorted(used))) for name, used in lines.items()}
+
+
+def _full_name(symbol: Symbol) -> str:
+    if symbol.kind == "module":
+        return symbol.module
+    return f"{symbol.module}.{symbol.qualname}" if symbol.module else symbol.qualname
+
+
+def _relative(root: Path, path: str) -> str:
+    candidate = Path(path)
+    if candidate.is_absolute():
+        candidate = candidate.resolve().relative_to(root)
+    return candidate.as_posix().removeprefix("./")
+
+
+def _read_lines(path: Path) -> list[str]:
+    try:
+        return path.read_text(errors="replace").splitlines()
+    except OSError:
+        return []
+
+
+_indexes: dict[Path, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root: Path) -> SymbolIndex:
+    """Shared index for ``root``, opened on first use."""
+    root = root.resolve()
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = SymbolIndex(root)
+        return index
+
+
+__all__ = [
+    "RefreshStats",
+    "Reference",
+    "Symbol",
+    "SymbolIndex",
+    "get_symbol_index",
+    "module_name",
+]
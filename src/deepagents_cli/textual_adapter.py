@@ -5,8 +5,7 @@
 from __future__ import annotations
 
 import asyncio
-import json
-from datetime import UTC, datetime
+import os
 from typing import TYPE_CHECKING, Any
 
 from langchain.agents.middleware.human_in_the_loop import (
@@ -15,12 +14,28 @@ from langchain.agents.middleware.human_in_the_loop import (
     HITLResponse,
 )
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
-from langgraph.types import Command, Interrupt
-from pydantic import TypeAdapter, ValidationError
+from langgraph.types import Command
 
 from deepagents_cli.file_ops import FileOpTracker
 from deepagents_cli.image_utils import create_multimodal_content
-from deepagents_cli.input import ImageTracker, parse_file_mentions
+from deepagents_cli.input import ImageTracker, expand_file_mentions
+from deepagents_cli.render_scheduler import (
+    DEFAULT_RENDER_FPS,
+    DEFAULT_RENDER_MAX_BYTES,
+    RenderScheduler,
+)
+from deepagents_cli.stream_parsing import (
+    STREAM_MODES,
+    build_run_config,
+    extract_todos,
+    is_summarization_chunk,
+    parse_interrupts,
+    parse_tool_output,
+    split_stream_chunk,
+    summarize_tool_result,
+    usage_total_tokens,
+)
+from deepagents_cli.tool_call_args import ToolCallBuffers
 from deepagents_cli.ui import format_tool_message_content
 from deepagents_cli.widgets.messages import (
     AssistantMessage,
@@ -32,21 +47,13 @@ from deepagents_cli.widgets.messages import (
 if TYPE_CHECKING:
     from collections.abc import Callable
 
-_HITL_REQUEST_ADAPTER = TypeAdapter(HITLRequest)
-
+    from deepagents_cli.file_ops import FileOperationRecord
 
-def _is_summarization_chunk(metadata: dict | None) -> bool:
-    """Check if a message chunk is from summarization middleware.
-
-    Args:
-        metadata: The metadata dict from the stream chunk.
 
-    Returns:
-        Whether the chunk is from summarization and should be filtered.
-    """
-    if metadata is None:
-        return False
-    return metadata.get("lc_source") == "summarization"
+def _show_diffs_default() -> bool:
+    """Whether file edit diffs are shown in chat (``DEEPAGENTS_SHOW_DIFFS``)."""
+    value = os.environ.get("DEEPAGENTS_SHOW_DIFFS", "").strip().lower()
+    return value not in {"0", "false", "no", "off"}
 
 
 class TextualUIAdapter:
@@ -70,6 +77,9 @@ class TextualUIAdapter:
         on_subagent_text: Callable[[tuple, str], None] | None = None,
         on_subagent_tool_call: Callable[[tuple, str, dict[str, Any]], None] | None = None,
         on_subagent_update: Callable[[tuple, str], None] | None = None,
+        render_fps: float = DEFAULT_RENDER_FPS,
+        render_max_bytes: int = DEFAULT_RENDER_MAX_BYTES,
+        show_diffs: bool | None = None,
     ) -> None:
         """Initialize the adapter.
 
@@ -86,6 +96,12 @@ class TextualUIAdapter:
             on_subagent_text: Callback fired when subagent text is streamed
             on_subagent_tool_call: Callback fired when subagent tool calls are emitted
             on_subagent_update: Callback fired for subagent status/update events
+            render_fps: Maximum rate at which streamed text is rendered per
+                namespace. ``0`` renders every chunk as it arrives.
+            render_max_bytes: Pending text size that forces a render before
+                the next frame is due.
+            show_diffs: Show a diff after each file edit. When False, files
+                are not snapshotted at all. Defaults to ``DEEPAGENTS_SHOW_DIFFS``.
         """
         self._mount_message = mount_message
         self._update_status = update_status
@@ -99,6 +115,9 @@ class TextualUIAdapter:
         self._on_subagent_text = on_subagent_text
         self._on_subagent_tool_call = on_subagent_tool_call
         self._on_subagent_update = on_subagent_update
+        self._render_fps = render_fps
+        self._render_max_bytes = render_max_bytes
+        self._show_diffs = _show_diffs_default() if show_diffs is None else show_diffs
 
         # State tracking
         self._current_assistant_message: AssistantMessage | None = None
@@ -171,35 +190,7 @@ async def execute_task_textual(
         image_tracker: Optional tracker for images
     """
     # Parse file mentions and inject content if any
-    prompt_text, mentioned_files = parse_file_mentions(user_input)
-
-    # Max file size to embed inline (256KB, matching mistral-vibe)
-    # Larger files get a reference instead - use read_file tool to view them
-    max_embed_bytes = 256 * 1024
-
-    if mentioned_files:
-        context_parts = [prompt_text, "\n\n## Referenced Files\n"]
-        for file_path in mentioned_files:
-            try:
-                file_size = file_path.stat().st_size
-                if file_size > max_embed_bytes:
-                    # File too large - include reference instead of content
-                    size_kb = file_size // 1024
-                    context_parts.append(
-                        f"\n### {file_path.name}\n"
-                        f"Path: `{file_path}`\n"
-                        f"Size: {size_kb}KB (too large to embed, use read_file tool to view)"
-                    )
-                else:
-                    content = file_path.read_text()
-                    context_parts.append(
-                        f"\n### {file_path.name}\nPath: `{file_path}`\n```\n{content}\n```"
-                    )
-            except Exception as e:
-                context_parts.append(f"\n### {file_path.name}\n[Error reading file: {e}]")
-        final_input = "\n".join(context_parts)
-    else:
-        final_input = prompt_text
+    final_input = expand_file_mentions(user_input)
 
     # Include images in the message content
     images_to_send = []
@@ -211,16 +202,7 @@ async def execute_task_textual(
         message_content = final_input
 
     thread_id = session_state.thread_id
-    config = {
-        "configurable": {"thread_id": thread_id},
-        "metadata": {
-            "assistant_id": assistant_id,
-            "agent_name": assistant_id,
-            "updated_at": datetime.now(UTC).isoformat(),
-        }
-        if assistant_id
-        else {},
-    }
+    config = build_run_config(thread_id, assistant_id)
 
     captured_input_tokens = 0
     captured_output_tokens = 0
@@ -233,9 +215,20 @@ async def execute_task_textual(
     if adapter._token_tracker:
         adapter._token_tracker.hide()
 
-    file_op_tracker = FileOpTracker(assistant_id=assistant_id, backend=backend)
+    # Before-snapshots come from the agent's FileSnapshotMiddleware, which reads
+    # each file before its write tool runs; this loop may see the call later.
+    file_op_tracker = FileOpTracker(
+        assistant_id=assistant_id,
+        backend=backend,
+        capture_diffs=adapter._show_diffs,
+        tool_snapshots=True,
+    )
+    # File edits whose diff is still waiting on its after-snapshot. Results that
+    # arrive back to back share one snapshot read; diffs mount in order once
+    # the run of tool results ends.
+    pending_diffs: list[FileOperationRecord] = []
     displayed_tool_ids: set[str] = set()
-    tool_call_buffers: dict[tuple[tuple, str | int], dict] = {}
+    tool_call_buffers = ToolCallBuffers()
 
     # Track main-assistant pending text/message state.
     # Subagent streams are routed via dedicated callbacks.
@@ -257,6 +250,7 @@ async def execute_task_textual(
     async def _emit_subagent_end(ns_key: tuple) -> None:
         if ns_key == () or ns_key not in active_subagent_namespaces:
             return
+        await render_scheduler.flush(ns_key)
         active_subagent_namespaces.discard(ns_key)
         callback = adapter._on_subagent_end
         if callback is None:
@@ -297,6 +291,29 @@ async def execute_task_textual(
         if asyncio.iscoroutine(result):
             await result
 
+    async def _render_text(ns_key: tuple, text: str) -> None:
+        if ns_key != ():
+            await _emit_subagent_text(ns_key, text)
+            return
+        current_msg = assistant_message_by_namespace.get(ns_key)
+        if current_msg is not None:
+            # Uses MarkdownStream internally, so only the new text is parsed
+            await current_msg.append_content(text)
+
+    # Streamed text is coalesced per namespace and rendered at a bounded frame
+    # rate instead of re-parsing markdown for every tiny chunk.
+    render_scheduler = RenderScheduler(
+        _render_text,
+        fps=adapter._render_fps,
+        max_bytes=adapter._render_max_bytes,
+    )
+
+    async def _mount_pending_diffs() -> None:
+        while pending_diffs:
+            record = await file_op_tracker.finalize_diff(pending_diffs.pop(0))
+            if record.diff:
+                await adapter._mount_message(DiffMessage(record.diff, record.display_path))
+
     # Clear images from tracker after creating the message
     if image_tracker:
         image_tracker.clear()
@@ -312,18 +329,17 @@ async def execute_task_textual(
 
             async for chunk in agent.astream(
                 stream_input,
-                stream_mode=["messages", "updates"],
+                stream_mode=STREAM_MODES,
                 subgraphs=True,
                 config=config,
                 durability="exit",
             ):
-                if not isinstance(chunk, tuple) or len(chunk) != 3:
+                parsed_chunk = split_stream_chunk(chunk)
+                if parsed_chunk is None:
                     continue
 
-                namespace, current_stream_mode, data = chunk
-
-                # Convert namespace to hashable tuple for dict keys
-                ns_key = tuple(namespace) if namespace else ()
+                # Namespace is converted to a hashable tuple for dict keys
+                ns_key, current_stream_mode, data = parsed_chunk
                 await _emit_subagent_start(ns_key)
 
                 # Main agent uses empty namespace tuple.
@@ -336,22 +352,14 @@ async def execute_task_textual(
 
                     # Check for interrupts
                     if "__interrupt__" in data:
-                        interrupts: list[Interrupt] = data["__interrupt__"]
-                        if interrupts:
-                            for interrupt_obj in interrupts:
-                                try:
-                                    validated_request = _HITL_REQUEST_ADAPTER.validate_python(
-                                        interrupt_obj.value
-                                    )
-                                    pending_interrupts[interrupt_obj.id] = validated_request
-                                    interrupt_occurred = True
-                                except ValidationError:
-                                    raise
+                        validated_requests = parse_interrupts(data)
+                        if validated_requests:
+                            pending_interrupts.update(validated_requests)
+                            interrupt_occurred = True
 
                     # Check for todo updates
-                    chunk_data = next(iter(data.values())) if data else None
-                    if chunk_data and isinstance(chunk_data, dict) and "todos" in chunk_data:
-                        todos = chunk_data.get("todos", [])
+                    todos = extract_todos(data)
+                    if todos is not None:
                         if not is_main_agent:
                             await _emit_subagent_update(
                                 ns_key, f"todo update: {len(todos)} item(s)"
@@ -360,6 +368,15 @@ async def execute_task_textual(
                     if not is_main_agent and "__interrupt__" in data:
                         await _emit_subagent_update(ns_key, "awaiting approval")
 
+                # Handle CUSTOM stream - live output from running tools
+                elif current_stream_mode == "custom":
+                    tool_output = parse_tool_output(data)
+                    if is_main_agent and tool_output is not None:
+                        tool_id, text = tool_output
+                        tool_msg = adapter._current_tool_messages.get(tool_id)
+                        if tool_msg is not None:
+                            tool_msg.append_output(text)
+
                 # Handle MESSAGES stream - for content and tool calls
                 elif current_stream_mode == "messages":
                     if not is_main_agent:
@@ -367,19 +384,13 @@ async def execute_task_textual(
                             continue
                         subagent_message, subagent_metadata = data
 
-                        if _is_summarization_chunk(subagent_metadata):
+                        if is_summarization_chunk(subagent_metadata):
                             continue
 
                         if isinstance(subagent_message, ToolMessage):
-                            tool_name = getattr(subagent_message, "name", "tool")
-                            tool_status = getattr(subagent_message, "status", "success")
-                            tool_content = format_tool_message_content(subagent_message.content)
-                            summary = f"tool result: {tool_name} ({tool_status})"
-                            content_str = str(tool_content).strip() if tool_content else ""
-                            if content_str:
-                                first_line = content_str.splitlines()[0]
-                                summary = f"{summary} · {first_line[:160]}"
-                            await _emit_subagent_update(ns_key, summary)
+                            await _emit_subagent_update(
+                                ns_key, summarize_tool_result(subagent_message)
+                            )
                             if getattr(subagent_message, "chunk_position", None) == "last":
                                 await _emit_subagent_end(ns_key)
                             continue
@@ -394,68 +405,18 @@ async def execute_task_textual(
                             if block_type == "text":
                                 text = block.get("text", "")
                                 if text:
-                                    await _emit_subagent_text(ns_key, text)
+                                    await render_scheduler.write(ns_key, text)
                                 continue
 
                             if block_type not in ("tool_call_chunk", "tool_call"):
                                 continue
 
-                            chunk_name = block.get("name")
-                            chunk_args = block.get("args")
-                            chunk_id = block.get("id")
-                            chunk_index = block.get("index")
-
-                            inner_key: str | int
-                            if chunk_index is not None:
-                                inner_key = chunk_index
-                            elif chunk_id is not None:
-                                inner_key = chunk_id
-                            else:
-                                inner_key = f"unknown-{len(tool_call_buffers)}"
-                            buffer_key = (ns_key, inner_key)
-
-                            buffer = tool_call_buffers.setdefault(
-                                buffer_key,
-                                {"name": None, "id": None, "args": None, "args_parts": []},
-                            )
-
-                            if chunk_name:
-                                buffer["name"] = chunk_name
-                            if chunk_id:
-                                buffer["id"] = chunk_id
-
-                            if isinstance(chunk_args, dict):
-                                buffer["args"] = chunk_args
-                                buffer["args_parts"] = []
-                            elif isinstance(chunk_args, str):
-                                if chunk_args:
-                                    parts: list[str] = buffer.setdefault("args_parts", [])
-                                    if not parts or chunk_args != parts[-1]:
-                                        parts.append(chunk_args)
-                                    buffer["args"] = "".join(parts)
-                            elif chunk_args is not None:
-                                buffer["args"] = chunk_args
-
-                            buffer_name = buffer.get("name")
-                            if buffer_name is None:
-                                continue
-
-                            parsed_args = buffer.get("args")
-                            if isinstance(parsed_args, str):
-                                if not parsed_args:
-                                    continue
-                                try:
-                                    parsed_args = json.loads(parsed_args)
-                                except json.JSONDecodeError:
-                                    continue
-                            elif parsed_args is None:
+                            tool_call = tool_call_buffers.feed(ns_key, block)
+                            if tool_call is None:
                                 continue
 
-                            if not isinstance(parsed_args, dict):
-                                parsed_args = {"value": parsed_args}
-
-                            await _emit_subagent_tool_call(ns_key, buffer_name, parsed_args)
-                            tool_call_buffers.pop(buffer_key, None)
+                            await render_scheduler.flush(ns_key)
+                            await _emit_subagent_tool_call(ns_key, tool_call.name, tool_call.args)
 
                         if getattr(subagent_message, "chunk_position", None) == "last":
                             await _emit_subagent_end(ns_key)
@@ -467,16 +428,23 @@ async def execute_task_textual(
                     message, _metadata = data
 
                     # Filter out summarization LLM output
-                    if _is_summarization_chunk(_metadata):
+                    if is_summarization_chunk(_metadata):
                         continue
 
+                    if pending_diffs and not isinstance(message, ToolMessage):
+                        await _mount_pending_diffs()
+
                     if isinstance(message, HumanMessage):
                         content = message.text
                         # Flush pending text for this namespace
                         pending_text = pending_text_by_namespace.get(ns_key, "")
                         if content and pending_text:
                             await _flush_assistant_text_ns(
-                                adapter, pending_text, ns_key, assistant_message_by_namespace
+                                adapter,
+                                pending_text,
+                                ns_key,
+                                assistant_message_by_namespace,
+                                render_scheduler,
                             )
                             pending_text_by_namespace[ns_key] = ""
                         continue
@@ -503,35 +471,28 @@ async def execute_task_textual(
                             # Clean up - remove from tracking dict after status update
                             del adapter._current_tool_messages[tool_id]
 
-                        # Show file operation results - always show diffs in chat
+                        # Show file operation results; the diff mounts once its
+                        # snapshots are in (see _mount_pending_diffs)
                         if record:
                             pending_text = pending_text_by_namespace.get(ns_key, "")
                             if pending_text:
                                 await _flush_assistant_text_ns(
-                                    adapter, pending_text, ns_key, assistant_message_by_namespace
+                                    adapter,
+                                    pending_text,
+                                    ns_key,
+                                    assistant_message_by_namespace,
+                                    render_scheduler,
                                 )
                                 pending_text_by_namespace[ns_key] = ""
-                            if record.diff:
-                                await adapter._mount_message(
-                                    DiffMessage(record.diff, record.display_path)
-                                )
+                            if record.tool_name != "read_file" and record.status == "success":
+                                pending_diffs.append(record)
                         continue
 
                     # Extract token usage (before content_blocks check - usage may be on any chunk)
-                    if adapter._token_tracker and hasattr(message, "usage_metadata"):
-                        usage = message.usage_metadata
-                        if usage:
-                            # Use total_tokens which includes input + output
-                            total_toks = usage.get("total_tokens", 0)
-                            if total_toks:
-                                captured_input_tokens = max(captured_input_tokens, total_toks)
-                            else:
-                                # Fallback to input + output if total not provided
-                                input_toks = usage.get("input_tokens", 0)
-                                output_toks = usage.get("output_tokens", 0)
-                                if input_toks or output_toks:
-                                    total = input_toks + output_toks
-                                    captured_input_tokens = max(captured_input_tokens, total)
+                    if adapter._token_tracker:
+                        total_toks = usage_total_tokens(message)
+                        if total_toks:
+                            captured_input_tokens = max(captured_input_tokens, total_toks)
 
                     # Check if this is an AIMessageChunk with content
                     if not hasattr(message, "content_blocks"):
@@ -563,71 +524,27 @@ async def execute_task_textual(
                                     if adapter._scroll_to_bottom:
                                         adapter._scroll_to_bottom()
 
-                                # Append just the new text chunk for smoother streaming
-                                # (uses MarkdownStream internally for better performance)
-                                await current_msg.append_content(text)
+                                # Queue just the new text chunk; the scheduler appends
+                                # batched text to the message once per frame
+                                await render_scheduler.write(ns_key, text)
 
                         elif block_type in ("tool_call_chunk", "tool_call"):
-                            chunk_name = block.get("name")
-                            chunk_args = block.get("args")
-                            chunk_id = block.get("id")
-                            chunk_index = block.get("index")
-
-                            inner_key: str | int
-                            if chunk_index is not None:
-                                inner_key = chunk_index
-                            elif chunk_id is not None:
-                                inner_key = chunk_id
-                            else:
-                                inner_key = f"unknown-{len(tool_call_buffers)}"
-                            buffer_key = (ns_key, inner_key)
-
-                            buffer = tool_call_buffers.setdefault(
-                                buffer_key,
-                                {"name": None, "id": None, "args": None, "args_parts": []},
-                            )
-
-                            if chunk_name:
-                                buffer["name"] = chunk_name
-                            if chunk_id:
-                                buffer["id"] = chunk_id
-
-                            if isinstance(chunk_args, dict):
-                                buffer["args"] = chunk_args
-                                buffer["args_parts"] = []
-                            elif isinstance(chunk_args, str):
-                                if chunk_args:
-                                    parts: list[str] = buffer.setdefault("args_parts", [])
-                                    if not parts or chunk_args != parts[-1]:
-                                        parts.append(chunk_args)
-                                    buffer["args"] = "".join(parts)
-                            elif chunk_args is not None:
-                                buffer["args"] = chunk_args
-
-                            buffer_name = buffer.get("name")
-                            buffer_id = buffer.get("id")
-                            if buffer_name is None:
-                                continue
-
-                            parsed_args = buffer.get("args")
-                            if isinstance(parsed_args, str):
-                                if not parsed_args:
-                                    continue
-                                try:
-                                    parsed_args = json.loads(parsed_args)
-                                except json.JSONDecodeError:
-                                    continue
-                            elif parsed_args is None:
+                            tool_call = tool_call_buffers.feed(ns_key, block)
+                            if tool_call is None:
                                 continue
-
-                            if not isinstance(parsed_args, dict):
-                                parsed_args = {"value": parsed_args}
+                            buffer_name = tool_call.name
+                            buffer_id = tool_call.id
+                            parsed_args = tool_call.args
 
                             # Flush pending text before tool call
                             pending_text = pending_text_by_namespace.get(ns_key, "")
                             if pending_text:
                                 await _flush_assistant_text_ns(
-                                    adapter, pending_text, ns_key, assistant_message_by_namespace
+                                    adapter,
+                                    pending_text,
+                                    ns_key,
+                                    assistant_message_by_namespace,
+                                    render_scheduler,
                                 )
                                 pending_text_by_namespace[ns_key] = ""
                                 assistant_message_by_namespace.pop(ns_key, None)
@@ -645,23 +562,32 @@ async def execute_task_textual(
                                 await adapter._mount_message(tool_msg)
                                 adapter._current_tool_messages[buffer_id] = tool_msg
 
-                            tool_call_buffers.pop(buffer_key, None)
-
                     if getattr(message, "chunk_position", None) == "last":
                         pending_text = pending_text_by_namespace.get(ns_key, "")
                         if pending_text:
                             await _flush_assistant_text_ns(
-                                adapter, pending_text, ns_key, assistant_message_by_namespace
+                                adapter,
+                                pending_text,
+                                ns_key,
+                                assistant_message_by_namespace,
+                                render_scheduler,
                             )
                             pending_text_by_namespace[ns_key] = ""
                             assistant_message_by_namespace.pop(ns_key, None)
 
+            await _mount_pending_diffs()
+
             # Flush any remaining text from all namespaces
             for ns_key, pending_text in list(pending_text_by_namespace.items()):
                 if pending_text:
                     await _flush_assistant_text_ns(
-                        adapter, pending_text, ns_key, assistant_message_by_namespace
+                        adapter,
+                        pending_text,
+                        ns_key,
+                        assistant_message_by_namespace,
+                        render_scheduler,
                     )
+            await render_scheduler.flush_all()
             pending_text_by_namespace.clear()
             assistant_message_by_namespace.clear()
 
@@ -680,7 +606,7 @@ async def execute_task_textual(
 
                         def mark_hitl_approved(action_request: ActionRequest) -> None:
                             tool_name = action_request.get("name")
-                            if tool_name not in {"write_file", "edit_file"}:
+                            if tool_name not in {"write_file", "edit_file", "multi_edit"}:
                                 return
                             args = action_request.get("args", {})
                             if isinstance(args, dict):
@@ -770,6 +696,7 @@ async def execute_task_textual(
                 break
 
     except asyncio.CancelledError:
+        render_scheduler.close()
         await adapter._mount_message(SystemMessage("Interrupted by user"))
 
         # Save accumulated state before marking tools as rejected
@@ -804,6 +731,7 @@ async def execute_task_textual(
         return
 
     except KeyboardInterrupt:
+        render_scheduler.close()
         await adapter._mount_message(SystemMessage("Interrupted by user"))
 
         # Save accumulated state before marking tools as rejected
@@ -837,6 +765,9 @@ async def execute_task_textual(
             await _emit_subagent_end(ns_key)
         return
 
+    finally:
+        file_op_tracker.close()
+
     # Update token tracker
     if adapter._token_tracker and (captured_input_tokens or captured_output_tokens):
         adapter._token_tracker.add(captured_input_tokens, captured_output_tokens)
@@ -850,12 +781,16 @@ async def _flush_assistant_text_ns(
     text: str,
     ns_key: tuple,
     assistant_message_by_namespace: dict[tuple, Any],
+    render_scheduler: RenderScheduler | None = None,
 ) -> None:
     """Flush accumulated assistant text for a specific namespace.
 
-    Finalizes the streaming by stopping the MarkdownStream.
+    Renders any text still waiting for the next frame, then finalizes the
+    streaming by stopping the MarkdownStream.
     If no message exists yet, creates one with the full content.
     """
+    if render_scheduler is not None:
+        await render_scheduler.flush(ns_key)
     if not text.strip():
         return
 
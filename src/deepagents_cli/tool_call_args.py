@@ -0,0 +1,237 @@
+"""Incremental assembly of streamed tool-call arguments.
+
+Models stream tool-call arguments as a sequence of JSON string fragments.
+Re-joining every fragment and calling ``json.loads`` on each chunk is quadratic
+in the payload size, which stalls the UI while a large ``write_file`` or
+``fast_apply`` call streams in. The assembler here scans each fragment once,
+tracking string/escape state and bracket depth, and only attempts a full parse
+when the top-level value can actually be complete.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+# Characters that change scanner state outside / inside a JSON string.
+_STRUCTURAL_RE = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+_WHITESPACE = " \t\r\n"
+
+
+class ToolCallArgsAssembler:
+    """Resumable JSON argument assembler for a single tool call.
+
+    Fragments are appended with ``feed``. The assembler keeps track of whether
+    the scanner is inside a string, whether the previous fragment ended on an
+    escape, and the current object/array nesting depth, so each byte of the
+    payload is inspected once no matter how many fragments arrive.
+    """
+
+    __slots__ = (
+        "_depth",
+        "_escape",
+        "_in_string",
+        "_last_fragment",
+        "_parts",
+        "_size",
+        "_top_level",
+    )
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._last_fragment: str | None = None
+        self._size = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # First non-whitespace character of the payload, once seen.
+        self._top_level: str | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def feed(self, fragment: str) -> None:
+        """Append a streamed fragment of the JSON argument string.
+
+        Consecutive identical fragments are ignored, matching providers that
+        re-send the last chunk when a stream is resumed.
+        """
+        if not fragment or fragment == self._last_fragment:
+            return
+        self._last_fragment = fragment
+        self._parts.append(fragment)
+        self._size += len(fragment)
+        self._scan(fragment)
+
+    def _scan(self, fragment: str) -> None:
+        pos = 0
+        end = len(fragment)
+
+        if self._top_level is None:
+            while pos < end and fragment[pos] in _WHITESPACE:
+                pos += 1
+            if pos == end:
+                return
+            self._top_level = fragment[pos]
+            if self._top_level not in "{[":
+                # Scalars are parsed directly; no structure to track.
+                return
+
+        elif self._top_level not in "{[":
+            return
+
+        while pos < end:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_SPECIAL_RE.search(fragment, pos)
+                if match is None:
+                    return
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL_RE.search(fragment, pos)
+            if match is None:
+                return
+            pos = match.end()
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+
+    @property
+    def may_be_complete(self) -> bool:
+        """Whether the buffered text could be a complete JSON value."""
+        if self._top_level is None:
+            return False
+        if self._top_level not in "{[":
+            return True
+        return self._depth <= 0 and not self._in_string
+
+    def text(self) -> str:
+        """Return the buffered argument text, compacting the fragment list."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def parse(self) -> tuple[bool, Any]:
+        """Try to decode the buffered arguments.
+
+        Returns:
+            Tuple of (ok, value). ``ok`` is False while the payload is still
+            incomplete or does not decode yet.
+        """
+        if not self.may_be_complete:
+            return False, None
+        try:
+            return True, json.loads(self.text())
+        except json.JSONDecodeError:
+            return False, None
+
+
+@dataclass
+class _ToolCallBuffer:
+    name: str | None = None
+    id: str | None = None
+    assembler: ToolCallArgsAssembler = field(default_factory=ToolCallArgsAssembler)
+    # Structured args delivered directly (e.g. complete ``tool_call`` blocks).
+    args: Any = None
+
+
+@dataclass(frozen=True)
+class AssembledToolCall:
+    """A tool call whose name and arguments have been fully received."""
+
+    name: str
+    id: str | None
+    args: dict[str, Any]
+
+
+class ToolCallBuffers:
+    """Per-stream tool-call buffers keyed by ``(namespace, index)``.
+
+    Shared by the main-agent and subagent branches of the stream loop: feed
+    every ``tool_call_chunk``/``tool_call`` content block and a call is
+    returned once its name is known and its arguments decode.
+    """
+
+    def __init__(self) -> None:
+        self._buffers: dict[tuple[tuple, str | int], _ToolCallBuffer] = {}
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def feed(self, ns_key: tuple, block: dict[str, Any]) -> AssembledToolCall | None:
+        """Accumulate a tool-call content block.
+
+        Args:
+            ns_key: Stream namespace the block belongs to.
+            block: A ``tool_call_chunk`` or ``tool_call`` content block.
+
+        Returns:
+            The assembled tool call once complete, otherwise None.
+        """
+        chunk_name = block.get("name")
+        chunk_args = block.get("args")
+        chunk_id = block.get("id")
+        chunk_index = block.get("index")
+
+        inner_key: str | int
+        if chunk_index is not None:
+            inner_key = chunk_index
+        elif chunk_id is not None:
+            inner_key = chunk_id
+        else:
+            inner_key = f"unknown-{len(self._buffers)}"
+        buffer_key = (ns_key, inner_key)
+
+        buffer = self._buffers.get(buffer_key)
+        if buffer is None:
+            buffer = self._buffers[buffer_key] = _ToolCallBuffer()
+
+        if chunk_name:
+            buffer.name = chunk_name
+        if chunk_id:
+            buffer.id = chunk_id
+
+        if isinstance(chunk_args, dict):
+            buffer.args = chunk_args
+            buffer.assembler = ToolCallArgsAssembler()
+        elif isinstance(chunk_args, str):
+            if chunk_args:
+                buffer.args = None
+                buffer.assembler.feed(chunk_args)
+        elif chunk_args is not None:
+            buffer.args = chunk_args
+
+        if buffer.name is None:
+            return None
+
+        parsed_args = buffer.args
+        if parsed_args is None:
+            if not len(buffer.assembler):
+                return None
+            ok, parsed_args = buffer.assembler.parse()
+            if not ok:
+                return None
+
+        if not isinstance(parsed_args, dict):
+            parsed_args = {"value": parsed_args}
+
+        del self._buffers[buffer_key]
+        return AssembledToolCall(name=buffer.name, id=buffer.id, args=parsed_args)
+
+
+__all__ = ["AssembledToolCall", "ToolCallArgsAssembler", "ToolCallBuffers"]
@@ -2,31 +2,46 @@
 
 from __future__ import annotations
 
+from concurrent.futures import Executor, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Literal
+import asyncio
+import json
 import os
 import re
 import shutil
 import subprocess
+import threading
 
-import requests
-from markdownify import markdownify
-from tavily import TavilyClient
+import httpx
 
+from deepagents_cli import http_cache, http_client, lazy_edit, web_content
+from deepagents_cli.code_index import get_code_index, notify_files_changed
 from deepagents_cli.config import settings
+from deepagents_cli.symbol_index import get_symbol_index
 
-# Initialize Tavily client if API key is available
-tavily_client = TavilyClient(api_key=settings.tavily_api_key) if settings.has_tavily else None
+# Tavily client, created on first web_search call if an API key is available
+_tavily_client: Any = None
 
 
-def http_request(
+def _get_tavily_client() -> Any:
+    global _tavily_client  # noqa: PLW0603
+    if _tavily_client is None and settings.has_tavily:
+        from tavily import TavilyClient
+
+        _tavily_client = TavilyClient(api_key=settings.tavily_api_key)
+    return _tavily_client
+
+
+async def http_request(
     url: str,
     method: str = "GET",
     headers: dict[str, str] | None = None,
     data: str | dict | None = None,
     params: dict[str, str] | None = None,
     timeout: int = 30,
+    use_cache: bool = True,
 ) -> dict[str, Any]:
     """Make HTTP requests to APIs and web services.
 
@@ -37,13 +52,14 @@ def http_request(
         data: Request body data (string or dict)
         params: URL query parameters
         timeout: Request timeout in seconds
+        use_cache: Reuse a cached GET response while the server's caching
+            headers allow it; set False to always fetch a fresh response
 
     Returns:
         Dictionary with response data including status, headers, and content
     """
     try:
-        kwargs = {"url": url, "method": method.upper(), "timeout": timeout}
-
+        kwargs: dict[str, Any] = {"timeout": timeout}
         if headers:
             kwargs["headers"] = headers
         if params:
@@ -52,24 +68,41 @@ def http_request(
             if isinstance(data, dict):
                 kwargs["json"] = data
             else:
-                kwargs["data"] = data
-
-        response = requests.request(**kwargs)
-
-        try:
-            content = response.json()
-        except:
-            content = response.text
-
-        return {
-            "success": response.status_code < 400,
-            "status_code": response.status_code,
-            "headers": dict(response.headers),
-            "content": content,
-            "url": response.url,
-        }
+                kwargs["content"] = data
+
+        cache = await http_cache.aget_http_cache() if method.upper() == "GET" and not data else None
+        cached = None
+        if cache is not None:
+            cache_key = http_cache.request_key(
+                "GET",
+                str(httpx.URL(url, params=params or {})),
+                sorted((name.lower(), value) for name, value in (headers or {}).items()),
+            )
+            cached = await cache.alookup(cache_key) if use_cache else None
+            if cached is not None and cached.fresh:
+                await cache.arecord("http_request", "hit")
+                return _http_result(cached.as_response())
+            if cached is not None:
+                kwargs["headers"] = {**cached.validators(), **(headers or {})}
+
+        response = await http_client.arequest(method, url, **kwargs)
+
+        if cache is not None:
+            if cached is not None and response.status_code == 304:
+                await cache.arevalidated(cache_key, cached, dict(response.headers))
+                await cache.arecord("http_request", "revalidated")
+                return _http_result(cached.as_response())
+            await cache.astore(
+                cache_key,
+                str(response.url),
+                response.content,
+                status_code=response.status_code,
+                headers=dict(response.headers),
+            )
+            await cache.arecord("http_request", "miss" if use_cache else "bypass")
+        return _http_result(response)
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         return {
             "success": False,
             "status_code": 0,
@@ -77,7 +110,7 @@ def http_request(
             "content": f"Request timed out after {timeout} seconds",
             "url": url,
         }
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return {
             "success": False,
             "status_code": 0,
@@ -95,11 +128,31 @@ def http_request(
         }
 
 
+def _http_result(response: httpx.Response) -> dict[str, Any]:
+    try:
+        content = response.json()
+    except:
+        content = response.text
+
+    return {
+        "success": response.status_code < 400,
+        "status_code": response.status_code,
+        "headers": dict(response.headers),
+        "content": content,
+        "url": str(response.url),
+    }
+
+
+# Seconds cached web_search results are reused, by topic
+WEB_SEARCH_TTL_S = {"general": 6 * 3600, "news": 30 * 60, "finance": 5 * 60}
+
+
 def web_search(
     query: str,
     max_results: int = 5,
     topic: Literal["general", "news", "finance"] = "general",
     include_raw_content: bool = False,
+    use_cache: bool = True,
 ):
     """Search the web using Tavily for current information and documentation.
 
@@ -111,6 +164,9 @@ def web_search(
         max_results: Number of results to return (default: 5)
         topic: Search topic type - "general" for most queries, "news" for current events
         include_raw_content: Include full page content (warning: uses more tokens)
+        use_cache: Reuse results of the same search made recently (within
+            minutes for news and finance, hours otherwise); set False for a
+            fresh search
 
     Returns:
         Dictionary containing:
@@ -128,14 +184,28 @@ def web_search(
     4. Cite sources by mentioning the page titles or URLs
     5. NEVER show the raw JSON to the user - always provide a formatted response
     """
+    tavily_client = _get_tavily_client()
     if tavily_client is None:
         return {
             "error": "Tavily API key not configured. Please set TAVILY_API_KEY environment variable.",
             "query": query,
         }
 
+    cache = http_cache.get_http_cache()
+    # Searches differing only in case or spacing share results
+    cache_key = http_cache.request_key(
+        "SEARCH",
+        " ".join(query.lower().split()),
+        [max_results, topic, include_raw_content],
+    )
+    if cache is not None and use_cache:
+        cached = cache.lookup(cache_key)
+        if cached is not None and cached.fresh:
+            cache.record("web_search", "hit")
+            return json.loads(cached.body)
+
     try:
-        return tavily_client.search(
+        results = tavily_client.search(
             query,
             max_results=max_results,
             include_raw_content=include_raw_content,
@@ -144,25 +214,48 @@ def web_search(
     except Exception as e:
         return {"error": f"Web search error: {e!s}", "query": query}
 
+    if cache is not None:
+        cache.store(
+            cache_key,
+            f"tavily:{query}",
+            json.dumps(results).encode(),
+            ttl=WEB_SEARCH_TTL_S.get(topic, WEB_SEARCH_TTL_S["general"]),
+        )
+        cache.record("web_search", "miss" if use_cache else "bypass")
+    return results
+
 
-def fetch_url(url: str, timeout: int = 30) -> dict[str, Any]:
+async def fetch_url(
+    url: str, timeout: int = 30, cursor: int = 0, use_cache: bool = True
+) -> dict[str, Any]:
     """Fetch content from a URL and convert HTML to markdown format.
 
-    This tool fetches web page content and converts it to clean markdown text,
-    making it easy to read and process HTML content. After receiving the markdown,
-    you MUST synthesize the information into a natural, helpful response for the user.
+    This tool fetches a web page, keeps its main content (dropping navigation,
+    sidebars, scripts and other page chrome) and converts it to markdown.
+    Long pages are returned in chunks: when the result has a `next_cursor`,
+    call fetch_url again with the same URL and `cursor=next_cursor` to read
+    the next chunk (only if you need more of the page). Binary content such
+    as PDFs and images is not downloaded. After receiving the markdown, you
+    MUST synthesize the information into a natural, helpful response for the
+    user.
 
     Args:
         url: The URL to fetch (must be a valid HTTP/HTTPS URL)
         timeout: Request timeout in seconds (default: 30)
+        cursor: Where to continue reading a long page, from a previous
+            result's `next_cursor` (default: 0, the start)
+        use_cache: Reuse a cached copy of the page while the site's caching
+            headers allow it; set False to always download it again
 
     Returns:
         Dictionary containing:
-        - success: Whether the request succeeded
         - url: The final URL after redirects
-        - markdown_content: The page content converted to markdown
+        - title: The page title, if any
+        - markdown_content: This chunk of the page content as markdown
         - status_code: HTTP status code
-        - content_length: Length of the markdown content in characters
+        - content_length: Length of this chunk in characters
+        - next_cursor: Cursor for the next chunk, or None at the end
+        - truncated: Whether the page was larger than the download limit
 
     IMPORTANT: After using this tool:
     1. Read through the markdown content
@@ -170,25 +263,103 @@ def fetch_url(url: str, timeout: int = 30) -> dict[str, Any]:
     3. Synthesize this into a clear, natural language response
     4. NEVER show the raw markdown to the user unless specifically requested
     """
+    max_bytes = web_content.max_fetch_bytes()
+    cache_key = f"{max_bytes}:{url}"
+    fetched = web_content.recall(cache_key) if cursor and use_cache else None
     try:
-        response = requests.get(
-            url,
-            timeout=timeout,
-            headers={"User-Agent": "Mozilla/5.0 (compatible; DeepAgents/1.0)"},
-        )
+        if fetched is None:
+            fetched = await _fetch_page(url, timeout, max_bytes, use_cache)
+            if "error" in fetched:
+                return fetched
+            web_content.remember(cache_key, fetched)
+        document = fetched["document"]
+        # Converting a large page takes a while; keep the event loop free
+        chunk, next_cursor = await asyncio.to_thread(document.read, cursor)
+    except Exception as e:
+        return {"error": f"Fetch URL error: {e!s}", "url": url}
+
+    return {
+        "url": fetched["url"],
+        "title": document.title,
+        "markdown_content": chunk,
+        "status_code": fetched["status_code"],
+        "content_length": len(chunk),
+        "next_cursor": next_cursor,
+        "truncated": fetched["truncated"],
+    }
+
+
+async def _fetch_page(url: str, timeout: int, max_bytes: int, use_cache: bool) -> dict[str, Any]:
+    """Stream up to ``max_bytes`` of ``url`` (or reuse a cached copy) for conversion."""
+    cache = await http_cache.aget_http_cache()
+    cache_key = http_cache.request_key("GET", url, {"max_bytes": max_bytes})
+    cached = await cache.alookup(cache_key) if cache is not None and use_cache else None
+    if cached is not None and cached.fresh:
+        await cache.arecord("fetch_url", "hit")
+        return await _page_document(cached.as_response(), cached.body, cached.meta["truncated"])
+
+    headers = {"User-Agent": "Mozilla/5.0 (compatible; DeepAgents/1.0)"}
+    if cached is not None:
+        headers.update(cached.validators())
+    async with http_client.astream("GET", url, timeout=timeout, headers=headers) as response:
+        if cached is not None and response.status_code == 304:
+            await cache.arevalidated(cache_key, cached, dict(response.headers))
+            await cache.arecord("fetch_url", "revalidated")
+            return await _page_document(
+                cached.as_response(), cached.body, cached.meta["truncated"]
+            )
         response.raise_for_status()
+        content_type = response.headers.get("content-type", "")
+        if web_content.content_kind(content_type) == "binary":
+            return {
+                "error": f"Not a text document ({content_type}); content not downloaded",
+                "url": str(response.url),
+                "status_code": response.status_code,
+            }
+        body = bytearray()
+        truncated = False
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) > max_bytes:
+                del body[max_bytes:]
+                truncated = True
+                break
+
+    fetched = await _page_document(response, bytes(body), truncated)
+    if cache is not None and "error" not in fetched:
+        await cache.astore(
+            cache_key,
+            str(response.url),
+            bytes(body),
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            meta={"truncated": truncated},
+        )
+        await cache.arecord("fetch_url", "miss" if use_cache else "bypass")
+    return fetched
 
-        # Convert HTML content to markdown
-        markdown_content = markdownify(response.text)
 
+async def _page_document(response: httpx.Response, body: bytes, truncated: bool) -> dict[str, Any]:
+    """Parse a fetched body into a document to read from."""
+    content_type = response.headers.get("content-type", "")
+    kind = web_content.content_kind(content_type, body[:1024])
+    if kind == "binary":
         return {
+            "error": "Not a text document",
             "url": str(response.url),
-            "markdown_content": markdown_content,
             "status_code": response.status_code,
-            "content_length": len(markdown_content),
         }
-    except Exception as e:
-        return {"error": f"Fetch URL error: {e!s}", "url": url}
+    text = web_content.decode(body, response.charset_encoding)
+    if kind == "html":
+        document = await asyncio.to_thread(web_content.html_document, text)
+    else:
+        document = web_content.text_document(text)
+    return {
+        "url": str(response.url),
+        "document": document,
+        "status_code": response.status_code,
+        "truncated": truncated,
+    }
 
 
 # ======================
@@ -197,9 +368,11 @@ def fetch_url(url: str, timeout: int = 30) -> dict[str, Any]:
 
 MORPH_API_URL = "https://api.morphllm.com/v1/chat/completions"
 FAST_APPLY_DEFAULT_MODEL = "auto"
+# Files with more lines than this send only the edited window to Morph.
+FAST_APPLY_WINDOW_MIN_LINES = 400
 
 
-def fast_apply(
+async def fast_apply(
     file_path: str,
     instruction: str,
     code_edit: str,
@@ -208,6 +381,9 @@ def fast_apply(
 ) -> dict[str, Any]:
     """Apply code edits using Morph Fast Apply (OpenAI-compatible API).
 
+    Edits whose placement is unambiguous are merged locally, without calling
+    Morph. The rest go to Morph, with only the edited part of large files.
+
     Args:
         file_path: Target file path to update.
         instruction: Brief first-person description of the change (first person).
@@ -218,10 +394,6 @@ def fast_apply(
     Returns:
         Dict with status and metadata, or error.
     """
-    api_key = os.environ.get("MORPH_API_KEY")
-    if not api_key:
-        return {"error": "MORPH_API_KEY not configured in environment."}
-
     target_path = Path(file_path).expanduser()
     if not target_path.is_absolute():
         target_path = (Path.cwd() / target_path).resolve()
@@ -233,6 +405,60 @@ def fast_apply(
         except Exception as e:  # noqa: BLE001
             return {"error": f"Failed to read file: {e!s}", "path": str(target_path)}
 
+    window = None
+    try:
+        merged_code = lazy_edit.merge(original_code, code_edit)
+        applied = "local"
+    except lazy_edit.AmbiguousEditError as e:
+        api_key = os.environ.get("MORPH_API_KEY")
+        if not api_key:
+            return {
+                "error": f"Could not apply the edit locally ({e}) and "
+                "MORPH_API_KEY is not configured in environment.",
+                "path": str(target_path),
+            }
+        lines = original_code.splitlines(keepends=True)
+        if len(lines) > FAST_APPLY_WINDOW_MIN_LINES:
+            window = lazy_edit.edit_window(original_code, code_edit)
+        start, end = window or (0, len(lines))
+        try:
+            merged_window = await _call_fast_apply(
+                api_key, model, instruction, "".join(lines[start:end]), code_edit, timeout
+            )
+        except Exception as e:  # noqa: BLE001
+            return {"error": f"Fast apply error: {e!s}", "path": str(target_path)}
+        if window and end < len(lines) and not merged_window.endswith("\n"):
+            merged_window += "\n"
+        merged_code = "".join(lines[:start]) + merged_window + "".join(lines[end:])
+        applied = "remote"
+
+    try:
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        target_path.write_text(merged_code)
+    except Exception as e:  # noqa: BLE001
+        return {"error": f"Failed to write file: {e!s}", "path": str(target_path)}
+    await asyncio.to_thread(notify_files_changed, [target_path])
+
+    result = {
+        "status": "ok",
+        "path": str(target_path),
+        "bytes_written": len(merged_code.encode("utf-8")),
+        "applied": applied,
+    }
+    if window:
+        result["window"] = f"lines {window[0] + 1}-{window[1]}"
+    return result
+
+
+async def _call_fast_apply(
+    api_key: str,
+    model: str | None,
+    instruction: str,
+    code: str,
+    code_edit: str,
+    timeout: int,
+) -> str:
+    """Merge ``code_edit`` into ``code`` with Morph and return the merged code."""
     payload = {
         "model": model or FAST_APPLY_DEFAULT_MODEL,
         "messages": [
@@ -240,7 +466,7 @@ def fast_apply(
                 "role": "user",
                 "content": (
                     f"<instruction>{instruction}</instruction>\n"
-                    f"<code>{original_code}</code>\n"
+                    f"<code>{code}</code>\n"
                     f"<update>{code_edit}</update>"
                 ),
             }
@@ -248,32 +474,179 @@ def fast_apply(
         "temperature": 0.0,
         "max_tokens": 8192,
     }
+    response = await http_client.arequest(
+        "POST",
+        MORPH_API_URL,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        json=payload,
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
+
+# ======================
+# Local Code Search Tool
+# ======================
+
+CODE_SEARCH_MAX_RESULTS = 100
+# Matching lines longer than this are cut in results.
+CODE_SEARCH_MAX_LINE_CHARS = 300
 
+
+def code_search(
+    pattern: str,
+    glob: str | None = None,
+    literal: bool = False,
+    ignore_case: bool = False,
+    max_results: int = CODE_SEARCH_MAX_RESULTS,
+) -> dict[str, Any]:
+    """Search the project's files for a regex or literal string using a local index.
+
+    Fast on large repositories and needs no network. Searches files listed by
+    git (tracked and untracked, not ignored), line by line.
+
+    Args:
+        pattern: Regular expression (Python syntax), or plain text if literal is true.
+        glob: Optional file filter like "*.py", "*.{ts,tsx}" or "src/**/*.go".
+        literal: Treat pattern as plain text instead of a regex.
+        ignore_case: Match case-insensitively.
+        max_results: Maximum matching lines to return.
+
+    Returns:
+        Dict with matches as "path:line:text" strings, or error.
+    """
+    root = settings.project_root or Path.cwd()
+    limit = max(1, min(max_results, 1000))
     try:
-        response = requests.post(
-            MORPH_API_URL,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=timeout,
+        matches = get_code_index(root).search(
+            pattern, literal=literal, ignore_case=ignore_case, glob=glob, max_results=limit + 1
         )
-        response.raise_for_status()
-        merged_code = response.json()["choices"][0]["message"]["content"]
+    except re.error as e:
+        return {"error": f"Invalid regex: {e}"}
     except Exception as e:  # noqa: BLE001
-        return {"error": f"Fast apply error: {e!s}", "path": str(target_path)}
+        return {"error": f"Code search error: {e!s}"}
+
+    lines = []
+    for match in matches[:limit]:
+        text = match.line
+        if len(text) > CODE_SEARCH_MAX_LINE_CHARS:
+            text = text[:CODE_SEARCH_MAX_LINE_CHARS] + "..."
+        lines.append(f"{match.path}:{match.line_number}:{text}")
+    return {
+        "root": str(root),
+        "matches": lines,
+        "truncated": len(matches) > limit,
+    }
+
+
+# ======================
+# Python Symbol Tools
+# ======================
+
+SYMBOL_MAX_DEFINITIONS = 50
+SYMBOL_MAX_REFERENCES = 200
+
+
+def find_definition(name: str) -> dict[str, Any]:
+    """Find where a Python module, class, function, method or variable is defined.
+
+    Uses a local index of the project's Python files, so it is exact and fast.
+
+    Args:
+        name: Bare name ("warp_grep"), Class.method ("ShellMiddleware.aclose_sessions")
+            or dotted module path ("deepagents_cli.tools.warp_grep").
 
+    Returns:
+        Dict with definitions (path, line span, kind, qualified name, signature), or error.
+    """
+    root = settings.project_root or Path.cwd()
     try:
-        target_path.parent.mkdir(parents=True, exist_ok=True)
-        target_path.write_text(merged_code)
+        symbols = get_symbol_index(root).find_definition(name, limit=SYMBOL_MAX_DEFINITIONS)
     except Exception as e:  # noqa: BLE001
-        return {"error": f"Failed to write file: {e!s}", "path": str(target_path)}
+        return {"error": f"Symbol index error: {e!s}"}
+    return {
+        "root": str(root),
+        "definitions": [
+            {
+                "path": symbol.path,
+                "lines": f"{symbol.line}-{symbol.end_line}",
+                "kind": symbol.kind,
+                "name": symbol.qualname,
+                "signature": symbol.signature,
+            }
+            for symbol in symbols
+        ],
+    }
+
 
+def find_references(name: str) -> dict[str, Any]:
+    """Find the lines in the project's Python files that use or import a name.
+
+    Matches identifiers and attribute accesses by name (not by type), so
+    unrelated names that are spelled the same are included.
+
+    Args:
+        name: The name to look up; for dotted names only the last part is matched.
+
+    Returns:
+        Dict with references as "path:line:text" strings, or error.
+    """
+    root = settings.project_root or Path.cwd()
+    try:
+        references = get_symbol_index(root).find_references(
+            name, limit=SYMBOL_MAX_REFERENCES + 1
+        )
+    except Exception as e:  # noqa: BLE001
+        return {"error": f"Symbol index error: {e!s}"}
+
+    lines = []
+    for ref in references[:SYMBOL_MAX_REFERENCES]:
+        text = ref.text
+        if len(text) > CODE_SEARCH_MAX_LINE_CHARS:
+            text = text[:CODE_SEARCH_MAX_LINE_CHARS] + "..."
+        lines.append(f"{ref.path}:{ref.line}:{text}")
     return {
-        "status": "ok",
-        "path": str(target_path),
-        "bytes_written": len(merged_code.encode("utf-8")),
+        "root": str(root),
+        "references": lines,
+        "truncated": len(references) > SYMBOL_MAX_REFERENCES,
+    }
+
+
+def outline_file(path: str) -> dict[str, Any]:
+    """List the imports, classes, functions and methods of a Python file.
+
+    Cheaper than reading the file when you only need its structure.
+
+    Args:
+        path: File path relative to the project root.
+
+    Returns:
+        Dict with imported modules and an indented outline of definitions, or error.
+    """
+    root = settings.project_root or Path.cwd()
+    try:
+        symbols, imports = get_symbol_index(root).outline(path)
+    except KeyError:
+        return {"error": f"Not an indexed Python file: {path}"}
+    except SyntaxError as e:
+        return {"error": f"Could not parse {path}: {e!s}"}
+    except Exception as e:  # noqa: BLE001
+        return {"error": f"Symbol index error: {e!s}"}
+
+    outline = []
+    for symbol in symbols:
+        if symbol.kind == "module" or symbol.depth > 2:
+            continue
+        label = symbol.signature or f"{symbol.qualname.rsplit('.', 1)[-1]} ="
+        outline.append(f"{'  ' * symbol.depth}{symbol.line}-{symbol.end_line} {label}")
+    return {
+        "path": path,
+        "imports": sorted({f"{module}.{name}" if name else module for module, name, _ in imports}),
+        "outline": outline,
     }
 
 
@@ -286,6 +659,10 @@ MAX_TURNS = 4
 MAX_GREP_LINES = 200
 MAX_LIST_LINES = 200
 MAX_READ_LINES = 800
+# Local tool calls run concurrently within a turn (the model issues up to 8).
+WARP_GREP_PARALLEL_CALLS = 8
+# Searches run at once by warp_grep_many (each holds a Morph API session).
+WARP_GREP_MANY_CONCURRENCY = 4
 
 WARP_GREP_SYSTEM_PROMPT = r"""You are a code search agent. Your task is to find all relevant code for a given search_string.
 
@@ -489,11 +866,45 @@ class _ToolCall:
     args: dict[str, Any]
 
 
+class _FileCache:
+    """Lines of files read during one warp_grep invocation.
+
+    Turns often re-read the same files and ``finish`` reads them once more;
+    each file is read and split only once. Safe to share across the turn's
+    worker threads.
+    """
+
+    def __init__(self) -> None:
+        self._lines: dict[Path, list[str] | Exception] = {}
+        self._lock = threading.Lock()
+
+    def lines(self, file_path: Path) -> list[str]:
+        """Return the file's lines, reading it on first use.
+
+        Raises:
+            Exception: Whatever reading the file raised (also cached).
+        """
+        with self._lock:
+            cached = self._lines.get(file_path)
+        if cached is None:
+            try:
+                cached = file_path.read_text().splitlines()
+            except Exception as e:  # noqa: BLE001
+                cached = e
+            with self._lock:
+                cached = self._lines.setdefault(file_path, cached)
+        if isinstance(cached, Exception):
+            raise cached
+        return cached
+
+
 def _call_morph(messages: list[dict[str, str]]) -> str:
     api_key = os.environ.get("MORPH_API_KEY")
     if not api_key:
         raise RuntimeError("MORPH_API_KEY not configured in environment.")
-    response = requests.post(
+    # Sync: warp_grep runs its turns on a worker thread
+    response = http_client.request(
+        "POST",
         MORPH_API_URL,
         headers={
             "Authorization": f"Bearer {api_key}",
@@ -513,7 +924,7 @@ def _call_morph(messages: list[dict[str, str]]) -> str:
 
 def _parse_xml_elements(content: str) -> dict[str, Any]:
     args: dict[str, Any] = {}
-    for match in re.finditer(r"<(\\w+)>(.*?)</\\1>", content, re.DOTALL):
+    for match in re.finditer(r"<(\w+)>(.*?)</\1>", content, re.DOTALL):
         key = match.group(1)
         value = match.group(2).strip()
         if key == "file":
@@ -586,7 +997,9 @@ def _execute_grep(repo_root: Path, pattern: str, sub_dir: str = ".", glob: str |
     return output.strip() if output.strip() else "no matches"
 
 
-def _execute_read(repo_root: Path, path: str, lines: str | None = None) -> str:
+def _execute_read(
+    repo_root: Path, path: str, lines: str | None = None, cache: _FileCache | None = None
+) -> str:
     try:
         file_path = _safe_path(repo_root, path)
     except ValueError as e:
@@ -594,7 +1007,10 @@ def _execute_read(repo_root: Path, path: str, lines: str | None = None) -> str:
     if not file_path.exists():
         return f"Error: file not found: {path}"
     try:
-        all_lines = file_path.read_text().splitlines()
+        if cache is not None:
+            all_lines = cache.lines(file_path)
+        else:
+            all_lines = file_path.read_text().splitlines()
     except Exception as e:  # noqa: BLE001
         return f"Error: {e!s}"
 
@@ -733,17 +1149,41 @@ def _format_turn_message(turn: int, chars_used: int = 0, max_chars: int = 160000
     return f"\n{msg}\n{budget}"
 
 
-def _resolve_finish(repo_root: Path, finish_call: _ToolCall) -> list[dict[str, str]]:
-    results: list[dict[str, str]] = []
+def _resolve_finish(
+    repo_root: Path,
+    finish_call: _ToolCall,
+    cache: _FileCache | None = None,
+    executor: Executor | None = None,
+) -> list[dict[str, str]]:
     files = finish_call.args.get("files", [])
-    for file_spec in files:
+
+    def _resolve(file_spec: dict[str, Any]) -> dict[str, str]:
         path = file_spec.get("path", "")
         lines = file_spec.get("lines")
         if lines == "*":
             lines = None
-        content = _execute_read(repo_root, path, lines)
-        results.append({"path": path, "content": content})
-    return results
+        return {"path": path, "content": _execute_read(repo_root, path, lines, cache)}
+
+    if executor is None:
+        return [_resolve(file_spec) for file_spec in files]
+    return list(executor.map(_resolve, files))
+
+
+def _execute_tool_call(repo_root: Path, tc: _ToolCall, cache: _FileCache) -> str:
+    if tc.name == "grep":
+        output = _execute_grep(
+            repo_root,
+            tc.args.get("pattern", ""),
+            tc.args.get("sub_dir", "."),
+            tc.args.get("glob"),
+        )
+    elif tc.name == "read":
+        output = _execute_read(repo_root, tc.args.get("path", ""), tc.args.get("lines"), cache)
+    elif tc.name == "list_directory":
+        output = _execute_list_directory(repo_root, tc.args.get("path", "."), tc.args.get("pattern"))
+    else:
+        output = f"Unknown tool: {tc.name}"
+    return _format_result(tc, output)
 
 
 def _get_repo_structure(repo_root: Path) -> str:
@@ -781,47 +1221,59 @@ def warp_grep(query: str, repo_root: str | None = None) -> dict[str, Any]:
 
     chars_used = sum(len(m["content"]) for m in messages)
 
-    for turn in range(MAX_TURNS):
-        try:
-            response = _call_morph(messages)
-        except Exception as e:  # noqa: BLE001
-            return {"error": f"WarpGrep API error: {e!s}"}
-        messages.append({"role": "assistant", "content": response})
-        chars_used += len(response)
+    # Files read this invocation, shared by every turn and by finish
+    cache = _FileCache()
+    with ThreadPoolExecutor(
+        max_workers=WARP_GREP_PARALLEL_CALLS, thread_name_prefix="warp-grep"
+    ) as executor:
+        for turn in range(MAX_TURNS):
+            try:
+                response = _call_morph(messages)
+            except Exception as e:  # noqa: BLE001
+                return {"error": f"WarpGrep API error: {e!s}"}
+            messages.append({"role": "assistant", "content": response})
+            chars_used += len(response)
+
+            tool_calls = _parse_tool_calls(response)
+            if not tool_calls:
+                return {"error": "WarpGrep returned no tool calls."}
+
+            finish_call = next((tc for tc in tool_calls if tc.name == "finish"), None)
+            if finish_call:
+                return {
+                    "query": query,
+                    "repo_root": str(root),
+                    "results": _resolve_finish(root, finish_call, cache, executor),
+                }
+
+            # Results keep the order of the calls regardless of completion order
+            results = list(executor.map(lambda tc: _execute_tool_call(root, tc, cache), tool_calls))
+
+            result_content = "\n\n".join(results) + _format_turn_message(turn + 1, chars_used)
+            messages.append({"role": "user", "content": result_content})
+            chars_used += len(result_content)
 
-        tool_calls = _parse_tool_calls(response)
-        if not tool_calls:
-            return {"error": "WarpGrep returned no tool calls."}
+    return {"error": "WarpGrep did not finish within turn limit."}
 
-        finish_call = next((tc for tc in tool_calls if tc.name == "finish"), None)
-        if finish_call:
-            return {
-                "query": query,
-                "repo_root": str(root),
-                "results": _resolve_finish(root, finish_call),
-            }
 
-        results: list[str] = []
-        for tc in tool_calls:
-            if tc.name == "grep":
-                output = _execute_grep(
-                    root,
-                    tc.args.get("pattern", ""),
-                    tc.args.get("sub_dir", "."),
-                    tc.args.get("glob"),
-                )
-            elif tc.name == "read":
-                output = _execute_read(root, tc.args.get("path", ""), tc.args.get("lines"))
-            elif tc.name == "list_directory":
-                output = _execute_list_directory(
-                    root, tc.args.get("path", "."), tc.args.get("pattern")
-                )
-            else:
-                output = f"Unknown tool: {tc.name}"
-            results.append(_format_result(tc, output))
+async def warp_grep_many(queries: list[str], repo_root: str | None = None) -> dict[str, Any]:
+    """Run several Morph WarpGrep searches concurrently.
 
-        result_content = "\n\n".join(results) + _format_turn_message(turn + 1, chars_used)
-        messages.append({"role": "user", "content": result_content})
-        chars_used += len(result_content)
+    Use this instead of repeated warp_grep calls when you have multiple
+    independent questions about the same codebase.
 
-    return {"error": "WarpGrep did not finish within turn limit."}
+    Args:
+        queries: Natural language search requests.
+        repo_root: Optional repo root (defaults to detected project root or cwd).
+
+    Returns:
+        Dict with a searches list holding each query's warp_grep result, in order.
+    """
+    semaphore = asyncio.Semaphore(WARP_GREP_MANY_CONCURRENCY)
+
+    async def _search(query: str) -> dict[str, Any]:
+        async with semaphore:
+            result = await asyncio.to_thread(warp_grep, query, repo_root)
+        return {"query": query, **result}
+
+    return {"searches": list(await asyncio.gather(*(_search(query) for query in queries)))}
@@ -82,7 +82,7 @@ def format_tool_display(tool_name: str, tool_args: dict) -> str:
             return truncate_value(path_str, max_length)
 
     # Tool-specific formatting - show the most important argument(s)
-    if tool_name in ("read_file", "write_file", "edit_file"):
+    if tool_name in ("read_file", "write_file", "edit_file", "multi_edit"):
         # File operations: show the primary file path argument (file_path or path)
         path_value = tool_args.get("file_path")
         if path_value is None:
@@ -195,6 +195,12 @@ def show_help() -> None:
     console.print(
         "  deepagents reset --agent AGENT --target SOURCE Reset agent to copy of another agent"
     )
+    console.print(
+        "  deepagents run --headless -m PROMPT            Run a prompt without the TUI (JSONL output)"
+    )
+    console.print(
+        "  deepagents batch FILE --concurrency N          Run JSONL prompts concurrently"
+    )
     console.print("  deepagents help                                Show this help message")
     console.print("  deepagents --version                           Show deepagents version")
     console.print()
@@ -237,6 +243,10 @@ def show_help() -> None:
         "  deepagents -r abc123                    # Resume specific thread",
         style=COLORS["dim"],
     )
+    console.print(
+        '  deepagents run --headless -m "fix it"   # Scripted run, JSONL events on stdout',
+        style=COLORS["dim"],
+    )
     console.print(
         "  deepagents --auto-approve               # Start with auto-approve enabled",
         style=COLORS["dim"],
@@ -254,6 +264,10 @@ def show_help() -> None:
     console.print(
         "  deepagents threads delete <ID>          # Delete a session", style=COLORS["dim"]
     )
+    console.print(
+        "  deepagents threads prune --keep 20      # Trim checkpoints and vacuum",
+        style=COLORS["dim"],
+    )
     console.print()
 
     console.print("[bold]Interactive Features:[/bold]", style=COLORS["primary"])
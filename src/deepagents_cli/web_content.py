@@ -0,0 +1,385 @@
+"""Turn fetched web pages into compact, paged markdown for ``fetch_url``.
+
+Pages are converted in three steps:
+
+1. ``content_kind`` classifies the response from its Content-Type, so binary
+   bodies are never downloaded.
+2. ``extract_main`` narrows the HTML down to the main content (``<main>``,
+   ``<article>``, or the block holding the most paragraph text) and strips
+   scripts, navigation, sidebars and other page chrome.
+3. ``html_document`` converts the content to markdown one block at a time,
+   only as far as it is read: ``Document.read`` returns chunks cut at
+   paragraph boundaries, with a cursor to continue from.
+
+Recently fetched documents are kept in memory (``remember``/``recall``) so
+reading the next chunk of a page does not fetch and parse it again.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, Literal
+
+from bs4 import BeautifulSoup
+from bs4.element import Comment, PageElement, PreformattedString, Tag
+from markdownify import MarkdownConverter
+
+# Bytes of body read per fetch; override with DEEPAGENTS_FETCH_MAX_BYTES.
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+# Characters of markdown returned per call (about 6k tokens).
+PAGE_CHARS = 24_000
+# Converted pages kept in memory for continuation reads.
+MAX_RECENT_PAGES = 16
+
+_HTML_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+_TEXT_TYPES = frozenset(
+    {
+        "application/json",
+        "application/xml",
+        "application/javascript",
+        "application/ecmascript",
+        "application/x-yaml",
+        "application/yaml",
+        "application/toml",
+        "application/x-sh",
+    }
+)
+# Never part of the readable content, wherever they appear
+_DROPPED_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "object",
+    "embed",
+    "form",
+    "button",
+    "input",
+    "select",
+    "textarea",
+    "dialog",
+)
+# Page chrome, dropped from inside the chosen content block
+_CHROME_TAGS = ("nav", "aside", "footer", "header")
+_CHROME_PATTERN = re.compile(
+    r"(^|[\s_-])(nav|navbar|menu|sidebar|breadcrumbs?|cookies?|consent|banner|"
+    r"footer|advert|ads|share|social|related|skip-link)($|[\s_-])",
+    re.IGNORECASE,
+)
+# Opened up when splitting the content into blocks
+_CONTAINER_TAGS = frozenset({"main", "article", "section", "div", "header"})
+_INLINE_TAGS = frozenset(
+    {
+        "a",
+        "abbr",
+        "b",
+        "br",
+        "cite",
+        "code",
+        "del",
+        "em",
+        "i",
+        "img",
+        "kbd",
+        "mark",
+        "q",
+        "s",
+        "samp",
+        "small",
+        "span",
+        "strong",
+        "sub",
+        "sup",
+        "time",
+        "u",
+        "var",
+    }
+)
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w.:-]+)""", re.IGNORECASE)
+_BLANK_LINES = re.compile(r"\n{3,}")
+_SPACES = re.compile(r"\s+")
+
+_recent: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+
+def max_fetch_bytes() -> int:
+    """Body size limit for ``fetch_url``."""
+    value = os.environ.get("DEEPAGENTS_FETCH_MAX_BYTES", "").strip()
+    try:
+        return max(1024, int(value)) if value else DEFAULT_MAX_BYTES
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+
+
+def content_kind(content_type: str, head: bytes = b"") -> Literal["html", "text", "binary"]:
+    """Classify a response by its Content-Type header.
+
+    Args:
+        content_type: The Content-Type header value (may be empty).
+        head: The first bytes of the body, sniffed when the header is missing.
+    """
+    mime = content_type.split(";", 1)[0].strip().lower()
+    if not mime:
+        start = head[:512].lstrip().lower()
+        if start.startswith((b"<!doctype html", b"<html")) or b"<body" in start:
+            return "html"
+        return "binary" if b"\0" in head[:1024] else "text"
+    if mime in _HTML_TYPES:
+        return "html"
+    if mime.startswith("text/") or mime in _TEXT_TYPES or mime.endswith(("+json", "+xml")):
+        return "text"
+    return "binary"
+
+
+def decode(body: bytes, charset: str | None) -> str:
+    """Decode a (possibly truncated) body, sniffing ``<meta charset>`` for HTML."""
+    if not charset:
+        match = _META_CHARSET.search(body[:4096])
+        charset = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def _parser() -> str:
+    return "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+
+def _is_chrome(tag: Tag) -> bool:
+    if tag.name in _CHROME_TAGS:
+        return True
+    if tag.get("hidden") is not None or tag.get("aria-hidden") == "true":
+        return True
+    if tag.get("role") in ("navigation", "banner", "contentinfo", "complementary"):
+        return True
+    label = " ".join([*(tag.get("class") or []), tag.get("id") or ""])
+    return _CHROME_PATTERN.search(label) is not None
+
+
+def _text_length(tag: Tag) -> int:
+    return len(tag.get_text(" ", strip=True))
+
+
+def _densest_block(body: Tag) -> Tag:
+    """The element holding the most paragraph text, readability-style.
+
+    Each paragraph credits its text length to its parent, and half of it to
+    its grandparent; the best-scoring element wins unless it holds less than
+    a quarter of the page's paragraph text.
+    """
+    scores: dict[int, float] = {}
+    nodes: dict[int, Tag] = {}
+    total = 0
+    for paragraph in body.find_all(("p", "pre", "li", "td")):
+        length = _text_length(paragraph)
+        if length < 25:
+            continue
+        total += length
+        parent = paragraph.parent
+        for weight in (1.0, 0.5):
+            if not isinstance(parent, Tag) or parent is body:
+                break
+            scores[id(parent)] = scores.get(id(parent), 0) + length * weight
+            nodes[id(parent)] = parent
+            parent = parent.parent
+    if not scores:
+        return body
+    best = max(scores, key=scores.__getitem__)
+    return nodes[best] if scores[best] >= total / 4 else body
+
+
+def _prune(root: Tag, drop: Callable[[PageElement], bool]) -> None:
+    """Remove every element under ``root`` for which ``drop`` is true.
+
+    Removed subtrees are not visited.
+    """
+    stack = list(reversed(root.contents))
+    while stack:
+        node = stack.pop()
+        if drop(node):
+            node.extract()
+        elif isinstance(node, Tag):
+            stack.extend(reversed(node.contents))
+
+
+def _is_boilerplate(node: PageElement) -> bool:
+    return isinstance(node, Comment) or (isinstance(node, Tag) and node.name in _DROPPED_TAGS)
+
+
+def _is_chrome_except_title(node: PageElement) -> bool:
+    # Keep an article's own header (usually its title)
+    if not isinstance(node, Tag) or (node.name == "header" and node.find(("h1", "h2"))):
+        return False
+    return _is_chrome(node)
+
+
+def extract_main(html: str) -> tuple[str | None, Tag]:
+    """Parse ``html`` and return its title and main content element.
+
+    The returned element has scripts, styles, forms and navigation chrome
+    removed.
+    """
+    soup = BeautifulSoup(html, _parser())
+    title_tag = soup.find("title")
+    title = title_tag.get_text(strip=True) or None if title_tag else None
+    _prune(soup, _is_boilerplate)
+
+    body = soup.body or soup
+    main = body.find("main") or body.find(attrs={"role": "main"})
+    if main is None:
+        articles = body.find_all("article")
+        # Several <article>s are usually teasers on an index page
+        main = articles[0] if len(articles) == 1 else None
+    if main is None:
+        _prune(body, lambda node: isinstance(node, Tag) and _is_chrome(node))
+        return title, _densest_block(body)
+    _prune(main, _is_chrome_except_title)
+    return title, main
+
+
+def _blocks(node: Tag) -> Iterator[Tag | list[PageElement]]:
+    """Block elements under ``node`` in document order.
+
+    Wrapper elements (``div``, ``section``, ...) are opened up, so a long
+    article yields its headings, paragraphs, lists and code blocks one by
+    one. Runs of text and inline elements between blocks are yielded as a
+    list.
+    """
+    run: list[PageElement] = []
+    for child in list(node.children):
+        if isinstance(child, PreformattedString):
+            continue
+        if not isinstance(child, Tag) or child.name in _INLINE_TAGS:
+            run.append(child)
+            continue
+        if run:
+            yield run
+            run = []
+        if child.name in _CONTAINER_TAGS:
+            yield from _blocks(child)
+        else:
+            yield child
+    if run:
+        yield run
+
+
+class Document:
+    """Markdown of a fetched page, converted as far as it has been read."""
+
+    def __init__(self, blocks: Iterable[str], title: str | None = None) -> None:
+        self.title = title
+        self._blocks = iter(blocks)
+        self._parts: list[str] = []
+        self._length = 0
+        self._complete = False
+        self._lock = threading.Lock()
+
+    def read(self, cursor: int = 0, size: int | None = None) -> tuple[str, int | None]:
+        """The chunk starting at ``cursor`` and the cursor after it (see ``page``)."""
+        size = size or PAGE_CHARS
+        with self._lock:
+            while not self._complete and self._length <= cursor + size:
+                block = next(self._blocks, None)
+                if block is None:
+                    self._complete = True
+                elif block:
+                    if self._parts:
+                        block = "\n\n" + block
+                    self._parts.append(block)
+                    self._length += len(block)
+            text = "".join(self._parts)
+        chunk, next_cursor = page(text, cursor, size)
+        if next_cursor is None and not self._complete:
+            next_cursor = len(text)
+        return chunk, next_cursor
+
+
+def text_document(text: str) -> Document:
+    """A document of plain text, returned as is."""
+    return Document([text])
+
+
+def html_document(html: str) -> Document:
+    """A document of the main content of ``html``, converted block by block."""
+    title, main = extract_main(html)
+    converter = MarkdownConverter(heading_style="ATX")
+
+    def _convert() -> Iterator[str]:
+        for block in _blocks(main):
+            if isinstance(block, Tag):
+                markdown = converter.convert_soup(block)
+            else:
+                markdown = "".join(
+                    converter.convert_soup(node) if isinstance(node, Tag) else str(node)
+                    for node in block
+                )
+                markdown = _SPACES.sub(" ", markdown)
+            yield _BLANK_LINES.sub("\n\n", markdown).strip()
+
+    return Document(_convert(), title)
+
+
+def html_to_markdown(html: str) -> tuple[str | None, str]:
+    """Title and markdown of the main content of ``html``."""
+    document = html_document(html)
+    return document.title, document.read(size=sys.maxsize)[0]
+
+
+def page(text: str, cursor: int = 0, size: int | None = None) -> tuple[str, int | None]:
+    """The chunk of ``text`` starting at ``cursor`` and the cursor after it.
+
+    Chunks hold at most ``size`` characters (default ``PAGE_CHARS``) and end
+    at a paragraph break (or line break) when there is one in the second half
+    of the chunk. The returned cursor is None at the end of text.
+    """
+    size = size or PAGE_CHARS
+    cursor = max(0, cursor)
+    end = cursor + size
+    if end >= len(text):
+        return text[cursor:], None
+    for separator in ("\n\n", "\n"):
+        cut = text.rfind(separator, cursor + size // 2, end)
+        if cut != -1:
+            end = cut + len(separator)
+            break
+    return text[cursor:end], end
+
+
+def remember(key: str, fetched: dict[str, Any]) -> None:
+    """Keep a converted page for continuation reads."""
+    _recent[key] = fetched
+    _recent.move_to_end(key)
+    while len(_recent) > MAX_RECENT_PAGES:
+        _recent.popitem(last=False)
+
+
+def recall(key: str) -> dict[str, Any] | None:
+    """A page kept by ``remember``, if still in memory."""
+    return _recent.get(key)
+
+
+__all__ = [
+    "DEFAULT_MAX_BYTES",
+    "PAGE_CHARS",
+    "Document",
+    "content_kind",
+    "decode",
+    "extract_main",
+    "html_document",
+    "html_to_markdown",
+    "max_fetch_bytes",
+    "page",
+    "recall",
+    "remember",
+    "text_document",
+]
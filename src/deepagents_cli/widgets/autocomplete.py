@@ -68,6 +68,7 @@ SLASH_COMMANDS: list[tuple[str, str]] = [
     ("/quit", "Exit app"),
     ("/exit", "Exit app"),
     ("/tokens", "Token usage"),
+    ("/cache", "HTTP cache hit rates (/cache clear to empty it)"),
     ("/threads", "Show session info"),
     ("/version", "Show version"),
 ]
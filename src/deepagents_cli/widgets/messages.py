@@ -222,6 +222,8 @@ class ToolCallMessage(Vertical):
     # Max lines/chars to show in preview mode
     _PREVIEW_LINES = 8
     _PREVIEW_CHARS = 560
+    # Chars of live output kept while a tool is still running
+    _LIVE_OUTPUT_CHARS = 20_000
 
     # Tools that show an executing indicator (long-running)
     _LONG_RUNNING_TOOLS = {"task"}
@@ -244,6 +246,7 @@ class ToolCallMessage(Vertical):
         self._args = args or {}
         self._status = "pending"
         self._output: str = ""
+        self._live_output: str = ""
         self._expanded: bool = False
         # Widget references (set in on_mount)
         self._header_widget: Static | None = None
@@ -344,6 +347,25 @@ class ToolCallMessage(Vertical):
             self._status_widget.remove_class("executing")
             self._status_widget.display = False
 
+    def append_output(self, text: str) -> None:
+        """Show output from the tool while it is still running.
+
+        Only the most recent lines are previewed; the final result passed to
+        `set_success` or `set_error` replaces them.
+
+        Args:
+            text: Newly produced output
+        """
+        if self._status != "pending" or not self._preview_widget:
+            return
+        self._live_output = (self._live_output + text)[-self._LIVE_OUTPUT_CHARS :]
+        lines = self._live_output.rstrip("\n").split("\n")
+        preview_text = "\n".join(lines[-self._PREVIEW_LINES :])
+        if len(preview_text) > self._PREVIEW_CHARS:
+            preview_text = "..." + preview_text[-self._PREVIEW_CHARS :]
+        self._preview_widget.update(preview_text)
+        self._preview_widget.display = True
+
     def set_success(self, result: str = "") -> None:
         """Mark the tool call as successful.
 
@@ -352,6 +374,7 @@ class ToolCallMessage(Vertical):
         """
         self._stop_executing()
         self._status = "success"
+        self._live_output = ""
         self._update_header_icon("success")
         if self._tool_name == "write_todos" and "todos" in self._args:
             self._output = format_todos_checklist(self._args["todos"])
@@ -367,6 +390,7 @@ class ToolCallMessage(Vertical):
         """
         self._stop_executing()
         self._status = "error"
+        self._live_output = ""
         self._update_header_icon("error")
         self._output = error
         if self._status_widget:
@@ -467,7 +491,7 @@ class ToolCallMessage(Vertical):
         """Filter large tool args for display."""
         if self._tool_name == "write_todos":
             return {}
-        if self._tool_name not in {"write_file", "edit_file"}:
+        if self._tool_name not in {"write_file", "edit_file", "multi_edit"}:
             return self._args
 
         filtered: dict[str, Any] = {}
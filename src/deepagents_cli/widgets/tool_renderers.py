@@ -5,6 +5,7 @@ from __future__ import annotations
 import difflib
 from typing import TYPE_CHECKING, Any
 
+from deepagents_cli.file_ops import build_approval_preview
 from deepagents_cli.widgets.tool_widgets import (
     EditFileApprovalWidget,
     FastApplyApprovalWidget,
@@ -100,6 +101,35 @@ class EditFileRenderer(ToolRenderer):
         return diff_list[2:] if len(diff_list) > 2 else diff_list
 
 
+class MultiEditRenderer(EditFileRenderer):
+    """Renderer for multi_edit tool - shows one diff for all the edits."""
+
+    def get_approval_widget(
+        self, tool_args: dict[str, Any]
+    ) -> tuple[type[ToolApprovalWidget], dict[str, Any]]:
+        file_path = tool_args.get("file_path", "")
+        edits = tool_args.get("edits") or []
+
+        # Diff of the whole file when it is local, else the edits one by one
+        preview = build_approval_preview("multi_edit", tool_args, assistant_id=None)
+        if preview is not None and preview.diff:
+            diff_lines = preview.diff.splitlines()
+        else:
+            diff_lines = []
+            for edit in edits:
+                diff_lines.extend(
+                    self._generate_diff(edit.get("old_string", ""), edit.get("new_string", ""))
+                )
+
+        data = {
+            "file_path": file_path,
+            "diff_lines": diff_lines,
+            "old_string": "",
+            "new_string": "",
+        }
+        return EditFileApprovalWidget, data
+
+
 class FastApplyRenderer(ToolRenderer):
     """Renderer for fast_apply tool - shows instruction and code edit snippet."""
 
@@ -120,6 +150,7 @@ class FastApplyRenderer(ToolRenderer):
 _RENDERER_REGISTRY: dict[str, type[ToolRenderer]] = {
     "write_file": WriteFileRenderer,
     "edit_file": EditFileRenderer,
+    "multi_edit": MultiEditRenderer,
     "fast_apply": FastApplyRenderer,
 }
 
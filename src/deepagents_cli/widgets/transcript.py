@@ -0,0 +1,354 @@
+"""Virtualized transcript for resumed thread history.
+
+Resuming a long thread used to mount one widget per historical message. The
+transcript instead keeps a lightweight record per message and only mounts
+widgets for a window around the viewport, paging older (or newer) records in
+as the user scrolls and evicting widgets that fall far outside the window.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Literal
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from rich.text import Text
+from textual.containers import Vertical
+from textual.widgets import Static
+
+from deepagents_cli import theme
+from deepagents_cli.widgets.messages import AssistantMessage, ToolCallMessage, UserMessage
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from langchain_core.messages import BaseMessage
+    from textual.app import ComposeResult
+    from textual.widget import Widget
+
+# Records mounted per page when scrolling through history.
+DEFAULT_PAGE_SIZE = 40
+# Upper bound on history widgets mounted at once.
+DEFAULT_MAX_MATERIALIZED = 120
+
+
+@dataclass
+class TranscriptRecord:
+    """Display data for one historical message (or tool call)."""
+
+    kind: Literal["user", "assistant", "tool"]
+    content: str = ""
+    tool_name: str = ""
+    tool_args: dict[str, Any] = field(default_factory=dict)
+    # "success" | "error" | "rejected" (a tool call with no result is shown as rejected)
+    tool_status: str = "rejected"
+
+
+def records_from_messages(messages: Sequence[BaseMessage]) -> list[TranscriptRecord]:
+    """Convert checkpointed messages to transcript records without building widgets.
+
+    Tool results are folded into the record of the tool call they answer.
+    """
+    records: list[TranscriptRecord] = []
+    pending_tool_calls: dict[str, TranscriptRecord] = {}
+
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            content = msg.content if isinstance(msg.content, str) else str(msg.content)
+            # Skip system messages that were auto-injected
+            if content.startswith("[SYSTEM]"):
+                continue
+            records.append(TranscriptRecord("user", content))
+
+        elif isinstance(msg, AIMessage):
+            if isinstance(msg.content, str) and msg.content.strip():
+                records.append(TranscriptRecord("assistant", msg.content))
+            for tc in getattr(msg, "tool_calls", []):
+                tc_id = tc.get("id")
+                if not tc_id:
+                    continue
+                record = TranscriptRecord(
+                    "tool", tool_name=tc.get("name", "unknown"), tool_args=tc.get("args", {})
+                )
+                pending_tool_calls[tc_id] = record
+                records.append(record)
+
+        elif isinstance(msg, ToolMessage):
+            record = pending_tool_calls.pop(getattr(msg, "tool_call_id", None) or "", None)
+            if record is None:
+                continue
+            record.content = msg.content if isinstance(msg.content, str) else str(msg.content)
+            record.tool_status = (
+                "success" if getattr(msg, "status", "success") == "success" else "error"
+            )
+
+    return records
+
+
+class TranscriptWindow:
+    """Bookkeeping for which records are materialized: the range ``[start, end)``.
+
+    The window starts empty at the newest end of the transcript and grows one
+    page at a time in either direction. When it would exceed
+    ``max_materialized`` records, the far end is evicted.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        *,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_materialized: int = DEFAULT_MAX_MATERIALIZED,
+    ) -> None:
+        self.total = total
+        self.page_size = max(1, page_size)
+        # Keep room for the page being added plus at least one page of context.
+        self.max_materialized = max(max_materialized, 2 * self.page_size)
+        self.start = total
+        self.end = total
+
+    @property
+    def has_older(self) -> bool:
+        """Whether records before the window remain unmounted."""
+        return self.start > 0
+
+    @property
+    def has_newer(self) -> bool:
+        """Whether records after the window remain unmounted."""
+        return self.end < self.total
+
+    def page_older(self) -> tuple[range, range]:
+        """Extend the window one page towards the oldest record.
+
+        Returns:
+            Tuple of (records to mount, records to evict from the newer end).
+        """
+        new_start = max(0, self.start - self.page_size)
+        added = range(new_start, self.start)
+        new_end = min(self.end, new_start + self.max_materialized)
+        evicted = range(new_end, self.end)
+        self.start, self.end = new_start, new_end
+        return added, evicted
+
+    def page_newer(self) -> tuple[range, range]:
+        """Extend the window one page towards the newest record.
+
+        Returns:
+            Tuple of (records to mount, records to evict from the older end).
+        """
+        new_end = min(self.total, self.end + self.page_size)
+        added = range(self.end, new_end)
+        new_start = max(self.start, new_end - self.max_materialized)
+        evicted = range(self.start, new_start)
+        self.start, self.end = new_start, new_end
+        return added, evicted
+
+
+class HistoryMarker(Static):
+    """One-line placeholder standing in for unmounted history."""
+
+    DEFAULT_CSS = """
+    HistoryMarker {
+        height: 1;
+        padding: 0 2;
+        color: #9aa8b7;
+    }
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.display = False
+
+    def set_count(self, count: int, direction: str) -> None:
+        self.display = count > 0
+        if count:
+            self.update(Text(f"{direction} {count} more messages", style=theme.MUTED))
+
+
+class VirtualTranscript(Vertical):
+    """History of a resumed thread, mounted a page at a time."""
+
+    DEFAULT_CSS = """
+    VirtualTranscript {
+        height: auto;
+    }
+    """
+
+    def __init__(
+        self,
+        records: list[TranscriptRecord],
+        *,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_materialized: int = DEFAULT_MAX_MATERIALIZED,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the transcript.
+
+        Args:
+            records: All history records, oldest first
+            page_size: Records mounted per page
+            max_materialized: Maximum history widgets mounted at once
+            **kwargs: Additional arguments passed to parent
+        """
+        super().__init__(**kwargs)
+        self.records = records
+        self.window = TranscriptWindow(
+            len(records), page_size=page_size, max_materialized=max_materialized
+        )
+        self._widgets: dict[int, Widget] = {}
+        self._older_marker = HistoryMarker()
+        self._newer_marker = HistoryMarker()
+        self._scroll: Widget | None = None
+        self._paging = False
+
+    def compose(self) -> ComposeResult:
+        """Compose the placeholders that bracket the mounted window."""
+        yield self._older_marker
+        yield self._newer_marker
+
+    @property
+    def older_marker(self) -> Widget:
+        """Placeholder above the mounted window."""
+        return self._older_marker
+
+    @property
+    def newer_marker(self) -> Widget:
+        """Placeholder below the mounted window."""
+        return self._newer_marker
+
+    @property
+    def materialized(self) -> int:
+        """Number of history widgets currently mounted."""
+        return len(self._widgets)
+
+    def anchor(self, *, older: bool) -> Widget | None:
+        """The mounted widget at the older (or newer) edge of the window."""
+        if not self._widgets:
+            return None
+        return self._widgets[min(self._widgets) if older else max(self._widgets)]
+
+    def follow_scroll(self, scroll: Widget) -> None:
+        """Page history in and out as ``scroll``'s viewport nears the window edges.
+
+        Args:
+            scroll: The scrollable container the transcript is mounted in
+        """
+        self._scroll = scroll
+        self.watch(scroll, "scroll_y", self._schedule_check, init=False)
+        # The first page may not fill the viewport, in which case nothing scrolls.
+        self._schedule_check()
+
+    def _schedule_check(self) -> None:
+        # Widget regions only reflect a new scroll offset after the next refresh.
+        self.call_after_refresh(self._check_viewport)
+
+    def _check_viewport(self) -> None:
+        if self._scroll is None or self._paging or not self.is_attached:
+            return
+        viewport = self._scroll.region
+        # Start loading a screen ahead so pages are ready before they scroll in.
+        margin = viewport.height
+        if self.window.has_older and self._older_marker.region.bottom >= viewport.y - margin:
+            self._paging = True
+            self.run_worker(self._page(older=True), group="transcript")
+        elif self.window.has_newer and self._newer_marker.region.y <= viewport.bottom + margin:
+            self._paging = True
+            self.run_worker(self._page(older=False), group="transcript")
+
+    async def _page(self, *, older: bool) -> None:
+        """Mount one page and keep the visible content where it was."""
+        # Mounting (or evicting) above the viewport shifts everything below it:
+        # track a widget that stays mounted and scroll by however far it moved.
+        anchor = self.anchor(older=older)
+        anchor_y = anchor.region.y if anchor is not None else 0
+        try:
+            if older:
+                await self.load_older()
+            else:
+                await self.load_newer()
+        finally:
+            self._paging = False
+
+        def _restore() -> None:
+            if self._scroll is None:
+                return
+            if anchor is not None and anchor.is_attached:
+                self._scroll.scroll_relative(
+                    y=anchor.region.y - anchor_y, animate=False, immediate=True
+                )
+            # The viewport may still be near an edge: keep paging if so.
+            self._check_viewport()
+
+        self.call_after_refresh(_restore)
+
+    async def load_older(self) -> int:
+        """Mount the next page of older records.
+
+        Returns:
+            Number of records mounted.
+        """
+        if not self.window.has_older:
+            return 0
+        added, evicted = self.window.page_older()
+        await self._evict(evicted)
+        await self._materialize(added, after=self._older_marker)
+        return len(added)
+
+    async def load_newer(self) -> int:
+        """Mount the next page of newer records.
+
+        Returns:
+            Number of records mounted.
+        """
+        if not self.window.has_newer:
+            return 0
+        added, evicted = self.window.page_newer()
+        await self._evict(evicted)
+        await self._materialize(added, before=self._newer_marker)
+        return len(added)
+
+    async def _evict(self, indices: range) -> None:
+        widgets = [self._widgets.pop(i) for i in indices if i in self._widgets]
+        if widgets:
+            await self.remove_children(widgets)
+
+    async def _materialize(self, indices: range, **position: Widget) -> None:
+        widgets = [_build_widget(self.records[i]) for i in indices]
+        if widgets:
+            # One mount call (and layout pass) per page instead of per message.
+            await self.mount_all(widgets, **position)
+        for i, widget in zip(indices, widgets, strict=True):
+            self._widgets[i] = widget
+            await _finish_widget(self.records[i], widget)
+        self._older_marker.set_count(self.window.start, "↑")
+        self._newer_marker.set_count(self.window.total - self.window.end, "↓")
+
+
+def _build_widget(record: TranscriptRecord) -> Widget:
+    if record.kind == "user":
+        return UserMessage(record.content)
+    if record.kind == "assistant":
+        return AssistantMessage(record.content)
+    return ToolCallMessage(record.tool_name, record.tool_args)
+
+
+async def _finish_widget(record: TranscriptRecord, widget: Widget) -> None:
+    """Fill in content that needs the widget to be mounted first."""
+    if isinstance(widget, AssistantMessage):
+        await widget.set_content(record.content)
+    elif isinstance(widget, ToolCallMessage):
+        if record.tool_status == "success":
+            widget.set_success(record.content)
+        elif record.tool_status == "error":
+            widget.set_error(record.content)
+        else:
+            # No ToolMessage result: shows as interrupted/rejected in UI
+            widget.set_rejected()
+
+
+__all__ = [
+    "TranscriptRecord",
+    "TranscriptWindow",
+    "VirtualTranscript",
+    "records_from_messages",
+]
@@ -0,0 +1,123 @@
+"""Test the batch prompt executor."""
+
+import argparse
+import asyncio
+import contextlib
+import json
+
+import pytest
+
+from deepagents_cli import main, runtime
+from deepagents_cli.batch import (
+    BatchInputError,
+    BatchPrompt,
+    execute_batch,
+    load_batch_prompts,
+    percentile,
+    summarize_batch,
+)
+from deepagents_cli.config import NoModelSelectedError
+
+
+class _Chunk:
+    def __init__(self, text: str) -> None:
+        self.content_blocks = [{"type": "text", "text": text}]
+        self.chunk_position = "last"
+        self.usage_metadata = {"input_tokens": 7, "output_tokens": 3, "total_tokens": 10}
+
+
+class _ConcurrencyProbeAgent:
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self.thread_ids: list[str] = []
+
+    async def astream(self, stream_input, **kwargs):
+        self.thread_ids.append(kwargs["config"]["configurable"]["thread_id"])
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        prompt = stream_input["messages"][0]["content"]
+        yield ((), "messages", (_Chunk(f"echo: {prompt}"), {}))
+
+
+def test_load_batch_prompts(tmp_path):
+    path = tmp_path / "prompts.jsonl"
+    path.write_text('"first"\n\n{"id": "b", "prompt": "second"}\n{"message": "third"}\n')
+    prompts = load_batch_prompts(path)
+    assert prompts == [
+        BatchPrompt(id="1", prompt="first"),
+        BatchPrompt(id="b", prompt="second"),
+        BatchPrompt(id="4", prompt="third"),
+    ]
+
+    path.write_text('{"id": "x"}\n')
+    with pytest.raises(BatchInputError):
+        load_batch_prompts(path)
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([5.0, 1.0], 100) == 5.0
+
+
+async def test_execute_batch_respects_concurrency_and_threads():
+    agent = _ConcurrencyProbeAgent()
+    prompts = [BatchPrompt(id=str(i), prompt=f"p{i}") for i in range(6)]
+    finished: list[str] = []
+
+    results = await execute_batch(
+        prompts, agent, "agent", concurrency=2, on_result=lambda item: finished.append(item.id)
+    )
+
+    assert agent.peak == 2
+    assert len(set(agent.thread_ids)) == 6
+    assert [item.id for item in results] == [p.id for p in prompts]
+    assert results[3].result.text == "echo: p3"
+    assert sorted(finished) == sorted(p.id for p in prompts)
+
+    summary = summarize_batch(results, wall_s=1.0)
+    assert summary["statuses"] == {"completed": 6}
+    assert (summary["input_tokens"], summary["output_tokens"]) == (42, 18)
+    assert summary["total_tokens"] == 60
+    json.dumps(summary)
+
+
+def test_agent_build_errors_exit_the_batch(tmp_path, monkeypatch):
+    class _Runtime:
+        def build_agent(self, *_args, **_kwargs):
+            raise NoModelSelectedError("No model configured")
+
+    @contextlib.asynccontextmanager
+    async def _open_runtime(*_args, **_kwargs):
+        yield _Runtime()
+
+    monkeypatch.setattr(runtime, "open_agent_runtime", _open_runtime)
+    printed = []
+    monkeypatch.setattr(main.console, "print", lambda text, *_a, **_k: printed.append(text))
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text('"hi"\n')
+    args = argparse.Namespace(
+        prompts_file=str(prompts),
+        output_path=None,
+        agent="agent",
+        concurrency=1,
+        auto_approve=False,
+        sandbox="none",
+        sandbox_id=None,
+        model=None,
+        reasoning_effort=None,
+        service_tier=None,
+        extensions_only=False,
+        extensions_disabled=False,
+    )
+
+    with pytest.raises(SystemExit) as exit_info:
+        main._run_batch(args, [])
+
+    assert exit_info.value.code == 1
+    assert str(printed[-1]) == "No model configured"
+    assert printed[-1].style == "red"
+    assert not (tmp_path / "prompts.results.jsonl").exists()
@@ -0,0 +1,153 @@
+"""Test the trigram code index and the code_search tool."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+
+from deepagents_cli import code_index, tools
+from deepagents_cli.code_index import CodeIndex, _fts_query, _required_literals
+from deepagents_cli.file_backend import IndexedFilesystemBackend
+
+
+def _git_repo(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    (tmp_path / ".gitignore").write_text("ignored/\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "auth.py").write_text(
+        "import os\n\ndef authenticate(user):\n    return login(user)\n"
+    )
+    (tmp_path / "src" / "session.ts").write_text("export function Login() {}\n")
+    (tmp_path / "ignored").mkdir()
+    (tmp_path / "ignored" / "auth.py").write_text("def authenticate(): pass\n")
+    (tmp_path / "blob.bin").write_bytes(b"authenticate\0\1\2")
+    return tmp_path
+
+
+def _hits(index: CodeIndex, pattern: str, **kwargs) -> list[tuple[str, int]]:
+    return [(m.path, m.line_number) for m in index.search(pattern, **kwargs)]
+
+
+def test_required_literals_drive_the_trigram_query():
+    def query(pattern: str) -> str | None:
+        import re
+
+        return _fts_query(_required_literals(re.compile(pattern)))
+
+    assert query(r"def\s+login") == '("def") AND ("log" AND "ogi" AND "gin")'
+    assert query("(foo|barx)") == '("foo") OR ("bar" AND "arx")'
+    assert query("(foo|x)") is None
+    assert query(".*") is None
+    assert query("ab") is None
+
+
+def test_search_regex_literal_and_globs(tmp_path):
+    root = _git_repo(tmp_path)
+    index = CodeIndex(root)
+    stats = index.refresh()
+    assert stats.files == 4  # .gitignore, auth.py, session.ts, blob.bin
+    assert (root / ".deepagents" / "index" / ".gitignore").read_text() == "*\n"
+
+    assert _hits(index, r"def\s+authenticate") == [("src/auth.py", 3)]
+    assert _hits(index, "login", ignore_case=True) == [("src/auth.py", 4), ("src/session.ts", 1)]
+    assert _hits(index, "login", ignore_case=True, glob="*.ts") == [("src/session.ts", 1)]
+    assert _hits(index, "login", ignore_case=True, glob="src/**/*.{py,js}") == [("src/auth.py", 4)]
+    assert _hits(index, "login(user)", literal=True) == [("src/auth.py", 4)]
+    assert _hits(index, "(import|export) ") == [("src/auth.py", 1), ("src/session.ts", 1)]
+    assert _hits(index, ".", max_results=2) == [(".gitignore", 1), ("src/auth.py", 1)]
+    index.close()
+
+
+def test_refresh_is_incremental(tmp_path):
+    root = _git_repo(tmp_path)
+    index = CodeIndex(root)
+    index.refresh()
+    assert index.refresh().indexed == 0
+
+    auth = root / "src" / "auth.py"
+    auth.write_text("def authorize(user):\n    pass\n")
+    os.utime(auth, ns=(1, 1))
+    (root / "src" / "session.ts").unlink()
+    (root / "src" / "new.py").write_text("authorize()\n")
+    stats = index.refresh()
+    assert (stats.indexed, stats.removed) == (2, 1)
+    assert _hits(index, "authenticate") == []
+    assert _hits(index, "authorize") == [("src/auth.py", 1), ("src/new.py", 1)]
+    index.close()
+
+    # A reopened index picks up where it left off
+    reopened = CodeIndex(root)
+    assert reopened.refresh().indexed == 0
+    assert _hits(reopened, "authorize") == [("src/auth.py", 1), ("src/new.py", 1)]
+    reopened.close()
+
+
+def test_slow_scans_refresh_in_the_background(tmp_path, monkeypatch):
+    root = _git_repo(tmp_path)
+    index = CodeIndex(root)
+    assert _hits(index, "authenticate") == [("src/auth.py", 3)]
+
+    # Pretend scans are too slow to wait for, and due on every search
+    monkeypatch.setattr(code_index, "SYNC_REFRESH_BUDGET_S", -1.0)
+    monkeypatch.setattr(code_index, "REFRESH_INTERVAL_S", 0.0)
+    (root / "src" / "new.py").write_text("authenticate()\n")
+    # Served from the index as it was; the scan starts in the background
+    assert _hits(index, "authenticate") == [("src/auth.py", 3)]
+    index._background.join(timeout=10)
+    monkeypatch.setattr(code_index, "REFRESH_INTERVAL_S", 60.0)
+    assert _hits(index, "authenticate") == [("src/auth.py", 3), ("src/new.py", 1)]
+    index.close()
+
+
+def test_stale_rows_trigger_rebuild(tmp_path, monkeypatch):
+    monkeypatch.setattr(code_index, "MIN_STALE_FOR_REBUILD", 0)
+    root = _git_repo(tmp_path)
+    index = CodeIndex(root)
+    index.refresh()
+    # Four live files: the fifth stale row makes the sixth refresh rebuild
+    for i in range(6):
+        (root / "src" / "auth.py").write_text(f"version_{i} = {i}\n" * (i + 1))
+        index.refresh()
+        assert index._meta("stale_rows") == str((i + 1) % 6)
+    assert len(_hits(index, "version_5")) == 6
+    assert _hits(index, "version_4") == []
+    index.close()
+
+
+def test_written_files_are_searchable_at_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(code_index, "_indexes", {})
+    root = _git_repo(tmp_path)
+    index = code_index.get_code_index(root)
+    assert _hits(index, "authorize") == []
+
+    # Within the refresh interval, so only the write hooks can update the index
+    backend = IndexedFilesystemBackend()
+    backend.write(str(root / "src" / "new.py"), "authorize()\n")
+    backend.edit(str(root / "src" / "auth.py"), "def authenticate", "def authorize")
+    assert _hits(index, "authorize") == [("src/auth.py", 3), ("src/new.py", 1)]
+
+    (root / "src" / "new.py").unlink()
+    code_index.notify_files_changed([root / "src" / "new.py", tmp_path.parent / "elsewhere.py"])
+    assert _hits(index, "authorize") == [("src/auth.py", 3)]
+    # Replaced rows count towards the next rebuild
+    assert index._meta("stale_rows") == "2"
+    index.close()
+
+
+def test_code_search_tool(tmp_path, monkeypatch):
+    root = _git_repo(tmp_path)
+    monkeypatch.setattr(tools.settings, "project_root", root)
+    result = tools.code_search("authenticate", glob="*.py")
+    assert result["matches"] == ["src/auth.py:3:def authenticate(user):"]
+    assert result["truncated"] is False
+    assert tools.code_search("o", max_results=1)["truncated"] is True
+    assert tools.code_search("(")["error"].startswith("Invalid regex")
+
+
+def test_walks_directories_outside_git(tmp_path):
+    (tmp_path / "a.py").write_text("needle\n")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "b.js").write_text("needle\n")
+    index = CodeIndex(tmp_path)
+    assert _hits(index, "needle") == [("a.py", 1)]
+    index.close()
@@ -0,0 +1,61 @@
+"""Test indexed page reads against the base FilesystemBackend."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+from deepagents.backends.filesystem import FilesystemBackend
+
+from deepagents_cli import file_backend
+from deepagents_cli.file_backend import IndexedFilesystemBackend
+
+
+@pytest.fixture
+def backends(tmp_path, monkeypatch):
+    # Index every file, in blocks small enough for lines to cross them
+    monkeypatch.setattr(file_backend, "INDEXED_READ_MIN_BYTES", 0)
+    monkeypatch.setattr(file_backend, "INDEX_BLOCK_BYTES", 64)
+    return (
+        FilesystemBackend(root_dir=tmp_path, virtual_mode=True),
+        IndexedFilesystemBackend(root_dir=tmp_path, virtual_mode=True),
+    )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "".join(f"line {i} {'x' * (i % 23)}\n" for i in range(500)),
+        "".join(f"row {i}: é\r\n" for i in range(300)) + "last without newline",
+        "\n\n\nthree blank lines first\n" + "y\n" * 40,
+    ],
+)
+def test_pages_match_the_base_backend(backends, tmp_path, text):
+    base, indexed = backends
+    (tmp_path / "log.txt").write_bytes(text.encode())
+
+    for offset, limit in [(0, 2000), (0, 7), (13, 50), (64, 1), (299, 5), (450, 100)]:
+        expected = base.read("/log.txt", offset, limit)
+        assert indexed.read("/log.txt", offset, limit) == expected
+
+
+def test_index_is_rebuilt_when_the_file_changes(backends, tmp_path):
+    _, indexed = backends
+    path = tmp_path / "grow.log"
+    path.write_text("a\nb\n")
+    assert "Line offset 2 exceeds file length (2 lines)" in indexed.read("/grow.log", 2)
+
+    with path.open("a") as f:
+        f.write("c\n")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert indexed.read("/grow.log", 2).endswith("\tc")
+
+
+def test_binary_and_blank_files(backends, tmp_path):
+    _, indexed = backends
+    (tmp_path / "blob.bin").write_bytes(b"\x89PNG\0\0" + b"x\n" * 100)
+    (tmp_path / "blank.txt").write_text("  \n\n \n")
+
+    assert indexed.read("/blob.bin") == "Error reading file '/blob.bin': binary file"
+    assert indexed.read("/blank.txt") == FilesystemBackend().read(str(tmp_path / "blank.txt"))
+    assert indexed.read("/missing.txt") == "Error: File '/missing.txt' not found"
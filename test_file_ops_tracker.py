@@ -0,0 +1,113 @@
+"""Test FileOpTracker snapshot batching and before-write snapshots."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+from langchain_core.messages import ToolMessage
+
+from deepagents_cli.file_ops import FileOpTracker, FileSnapshotMiddleware
+
+
+@dataclass
+class _Response:
+    content: bytes | None
+    error: str | None = None
+
+
+class _FakeBackend:
+    def __init__(self, files: dict[str, str], delay: float = 0.0) -> None:
+        self.files = files
+        self.delay = delay
+        self.calls: list[list[str]] = []
+
+    def download_files(self, paths: list[str]) -> list[_Response]:
+        self.calls.append(list(paths))
+        time.sleep(self.delay)
+        return [
+            _Response(self.files[p].encode()) if p in self.files else _Response(None, "missing")
+            for p in paths
+        ]
+
+
+async def test_parallel_edits_share_snapshot_reads():
+    backend = _FakeBackend({"/a.py": "a = 1\n", "/b.py": "b = 1\n"})
+    tracker = FileOpTracker(assistant_id=None, backend=backend)
+
+    tracker.start_operation("edit_file", {"file_path": "/a.py"}, "1")
+    tracker.start_operation("write_file", {"file_path": "/b.py"}, "2")
+    tracker.start_operation("read_file", {"file_path": "/a.py"}, "3")
+    await asyncio.sleep(0.05)
+    assert backend.calls == [["/a.py", "/b.py"]]
+
+    backend.files = {"/a.py": "a = 2\n", "/b.py": "b = 1\nc = 2\n"}
+    records = [
+        tracker.complete_with_message(ToolMessage(content="ok", tool_call_id=call_id))
+        for call_id in ("1", "2")
+    ]
+    records = [await tracker.finalize_diff(record) for record in records]
+    assert backend.calls[1] == ["/a.py", "/b.py"]
+    assert len(backend.calls) == 2
+    assert records[0].metrics.lines_added == 1
+    assert records[0].metrics.lines_removed == 1
+    assert records[1].metrics.lines_added == 1
+    assert all(record.diff for record in records)
+
+
+async def test_missing_after_snapshot_is_an_error():
+    backend = _FakeBackend({})
+    tracker = FileOpTracker(assistant_id=None, backend=backend)
+    tracker.start_operation("write_file", {"file_path": "/gone.py"}, "1")
+    record = tracker.complete_with_message(ToolMessage(content="ok", tool_call_id="1"))
+    record = await tracker.finalize_diff(record)
+    assert record.status == "error"
+    assert record.diff is None
+
+
+async def test_no_snapshots_when_diffs_disabled():
+    backend = _FakeBackend({"/a.py": "a = 1\n"})
+    tracker = FileOpTracker(assistant_id=None, backend=backend, capture_diffs=False)
+    tracker.start_operation("edit_file", {"file_path": "/a.py"}, "1")
+    record = tracker.complete_with_message(ToolMessage(content="ok", tool_call_id="1"))
+    record = await tracker.finalize_diff(record)
+    await asyncio.sleep(0.05)
+    assert backend.calls == []
+    assert record.status == "success"
+    assert record.diff is None
+
+
+async def test_before_snapshot_precedes_a_concurrent_write():
+    backend = _FakeBackend({"/a.py": "a = 1\n"}, delay=0.1)
+    middleware = FileSnapshotMiddleware(backend=backend)
+    tracker = FileOpTracker(assistant_id=None, backend=backend, tool_snapshots=True)
+    call = {"name": "edit_file", "args": {"file_path": "/a.py"}, "id": "1"}
+
+    async def write(request):
+        backend.files["/a.py"] = "a = 2\n"
+        return ToolMessage(content="ok", tool_call_id="1")
+
+    # The tool runs before the stream consumer starts tracking the call
+    message = await middleware.awrap_tool_call(SimpleNamespace(tool_call=call), write)
+    tracker.start_operation("edit_file", call["args"], "1")
+    record = await tracker.finalize_diff(tracker.complete_with_message(message))
+    tracker.close()
+
+    assert record.before_content == "a = 1\n"
+    assert record.metrics.lines_added == 1
+    assert record.metrics.lines_removed == 1
+    assert backend.calls == [["/a.py"], ["/a.py"]]
+
+
+async def test_no_tool_snapshots_without_a_tracker():
+    backend = _FakeBackend({"/a.py": "a = 1\n"})
+    middleware = FileSnapshotMiddleware(backend=backend)
+    call = {"name": "write_file", "args": {"file_path": "/a.py"}, "id": "1"}
+
+    async def write(request):
+        return ToolMessage(content="ok", tool_call_id="1")
+
+    await middleware.awrap_tool_call(SimpleNamespace(tool_call=call), write)
+    assert backend.calls == []
@@ -0,0 +1,118 @@
+"""Test the headless JSONL runner."""
+
+import contextlib
+import io
+import json
+
+from langchain_core.messages import ToolMessage
+
+from deepagents_cli import runtime
+from deepagents_cli.config import NoModelSelectedError
+from deepagents_cli.headless import JsonlEventWriter, execute_task_headless, run_headless_async
+
+
+class _Chunk:
+    def __init__(self, blocks, position=None, usage=None) -> None:
+        self.content_blocks = blocks
+        self.chunk_position = position
+        self.usage_metadata = usage or {}
+
+
+class _FakeAgent:
+    async def astream(self, *_args, **_kwargs):
+        yield ((), "messages", (_Chunk([{"type": "text", "text": "Let me "}]), {}))
+        yield ((), "messages", (_Chunk([{"type": "text", "text": "look."}]), {}))
+        yield (
+            (),
+            "messages",
+            (
+                _Chunk(
+                    [
+                        {
+                            "type": "tool_call_chunk",
+                            "name": "read_file",
+                            "id": "call_1",
+                            "index": 0,
+                            "args": '{"file_path": ',
+                        },
+                        {"type": "tool_call_chunk", "index": 0, "args": '"/tmp/a.txt"}'},
+                    ],
+                    usage={"input_tokens": 40, "output_tokens": 2, "total_tokens": 42},
+                ),
+                {},
+            ),
+        )
+        yield (
+            (),
+            "messages",
+            (ToolMessage(content="hello", tool_call_id="call_1", name="read_file"), {}),
+        )
+        yield (("worker",), "messages", (_Chunk([{"type": "text", "text": "sub"}], "last"), {}))
+        # A second model call reports its own usage
+        usage = {"input_tokens": 50, "output_tokens": 5, "total_tokens": 55}
+        yield ((), "messages", (_Chunk([{"type": "text", "text": "Done."}], "last", usage), {}))
+
+
+async def test_execute_task_headless_emits_jsonl_events():
+    buffer = io.StringIO()
+    result = await execute_task_headless(
+        "read it",
+        _FakeAgent(),
+        "agent",
+        "thread-1",
+        emit=JsonlEventWriter(buffer),
+    )
+
+    events = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    types = [event["type"] for event in events]
+    assert types == [
+        "run_start",
+        "text",
+        "tool_call",
+        "tool_result",
+        "subagent_start",
+        "text",
+        "subagent_end",
+        "text",
+        "usage",
+        "run_end",
+    ]
+    assert events[1]["text"] == "Let me look."
+    assert events[2]["args"] == {"file_path": "/tmp/a.txt"}
+    assert events[3]["content"] == "hello"
+    assert events[5]["namespace"] == ["worker"]
+
+    assert result.status == "completed"
+    assert result.text == "Done."
+    assert (result.input_tokens, result.output_tokens, result.total_tokens) == (90, 7, 97)
+    assert events[-2] == {
+        "type": "usage",
+        "ts": events[-2]["ts"],
+        "input_tokens": 90,
+        "output_tokens": 7,
+        "total_tokens": 97,
+    }
+    assert result.tool_calls == 1
+
+
+async def test_agent_build_errors_end_the_run(monkeypatch):
+    class _Runtime:
+        def build_agent(self, *_args, **_kwargs):
+            raise NoModelSelectedError("No model configured")
+
+    @contextlib.asynccontextmanager
+    async def _open_runtime(*_args, **_kwargs):
+        yield _Runtime()
+
+    monkeypatch.setattr(runtime, "open_agent_runtime", _open_runtime)
+    buffer = io.StringIO()
+    result = await run_headless_async(
+        "hi", assistant_id="agent", thread_id="thread-1", output=buffer
+    )
+
+    events = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    assert [event["type"] for event in events] == ["error", "run_end"]
+    assert events[0]["error_type"] == "NoModelSelectedError"
+    assert events[1]["status"] == "error"
+    assert result.status == "error"
+    assert result.error == "No model configured"
@@ -0,0 +1,177 @@
+"""Test the on-disk HTTP cache and its use by the web tools."""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import threading
+import time
+
+import httpx
+import pytest
+
+from deepagents_cli import http_cache, http_client, tools, web_content
+from deepagents_cli.http_cache import HttpCache, format_report, freshness_lifetime
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = HttpCache(tmp_path / "http_cache.db", max_bytes=10 * 1024 * 1024)
+    monkeypatch.setattr(http_cache, "_cache", cache)
+    monkeypatch.delenv("DEEPAGENTS_HTTP_CACHE_MB", raising=False)
+    monkeypatch.setattr(http_cache, "DEFAULT_MAX_MB", 10)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Serve ``routes`` (path -> handler(request)) through the shared client."""
+    routes = {}
+    requests: list[httpx.Request] = []
+
+    async def _handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return routes[request.url.path](request)
+
+    options = http_client._client_options
+    monkeypatch.setattr(
+        http_client,
+        "_client_options",
+        lambda: {**options(), "transport": httpx.MockTransport(_handle)},
+    )
+    monkeypatch.setattr(web_content, "_recent", type(web_content._recent)())
+    return routes, requests
+
+
+def _run(coro):
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await http_client.aclose()
+
+    return asyncio.run(_main())
+
+
+def test_freshness_lifetime():
+    now = time.time()
+    date = email.utils.formatdate(now, usegmt=True)
+    assert freshness_lifetime({"cache-control": "public, max-age=600", "age": "100"}) == 500
+    assert freshness_lifetime({"cache-control": "no-cache, max-age=600"}) == 0
+    expires = email.utils.formatdate(now + 60, usegmt=True)
+    assert freshness_lifetime({"date": date, "expires": expires}, now) == pytest.approx(60, abs=1)
+    assert freshness_lifetime({"expires": "0"}) == 0
+    modified = email.utils.formatdate(now - 10 * 3600, usegmt=True)
+    lifetime = freshness_lifetime({"date": date, "last-modified": modified}, now)
+    assert lifetime == pytest.approx(3600, abs=1)
+
+
+def test_fresh_pages_are_served_from_the_cache(cache, server):
+    routes, requests = server
+    routes["/doc"] = lambda _: httpx.Response(
+        200, html="<main><p>Cached page</p></main>", headers={"Cache-Control": "max-age=300"}
+    )
+
+    first = _run(tools.fetch_url("https://docs.test/doc"))
+    second = _run(tools.fetch_url("https://docs.test/doc"))
+    bypassed = _run(tools.fetch_url("https://docs.test/doc", use_cache=False))
+
+    assert first["markdown_content"] == second["markdown_content"] == "Cached page"
+    assert bypassed["markdown_content"] == "Cached page"
+    assert len(requests) == 2
+    assert cache.session["fetch_url"] == {"miss": 1, "hit": 1, "bypass": 1}
+
+
+def test_stale_responses_are_revalidated(cache, server):
+    routes, requests = server
+    body = {"version": 1}
+
+    def _api(request):
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json=body, headers={"ETag": '"v1"', "Cache-Control": "no-cache"})
+
+    routes["/api"] = _api
+
+    first = _run(tools.http_request("https://api.test/api", params={"q": "x"}))
+    second = _run(tools.http_request("https://api.test/api", params={"q": "x"}))
+    other = _run(tools.http_request("https://api.test/api", params={"q": "y"}))
+
+    assert first["content"] == second["content"] == other["content"] == body
+    assert second["status_code"] == 200
+    assert [r.headers.get("if-none-match") for r in requests] == [None, '"v1"', None]
+    assert cache.session["http_request"] == {"miss": 2, "revalidated": 1}
+
+
+def test_cache_calls_run_off_the_event_loop(cache, server, monkeypatch):
+    routes, _ = server
+    routes["/doc"] = lambda _: httpx.Response(
+        200, html="<main><p>Page</p></main>", headers={"Cache-Control": "max-age=300"}
+    )
+    threads = set()
+    for name in ("lookup", "store", "record"):
+
+        def _called(*args, _method=getattr(cache, name), **kwargs):
+            threads.add(threading.get_ident())
+            return _method(*args, **kwargs)
+
+        monkeypatch.setattr(cache, name, _called)
+
+    _run(tools.fetch_url("https://docs.test/doc"))
+    _run(tools.http_request("https://docs.test/doc"))
+
+    assert threads
+    assert threading.get_ident() not in threads
+
+
+def test_uncacheable_responses_are_not_stored(cache, server):
+    routes, requests = server
+    routes["/private"] = lambda _: httpx.Response(
+        200, text="secret", headers={"Cache-Control": "no-store", "ETag": '"x"'}
+    )
+    routes["/post"] = lambda _: httpx.Response(200, json={"ok": True})
+
+    for _ in range(2):
+        _run(tools.http_request("https://api.test/private"))
+        _run(tools.http_request("https://api.test/post", method="POST", data={"a": 1}))
+
+    assert len(requests) == 4
+    assert cache.usage()[0] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = HttpCache(tmp_path / "cache.db", max_bytes=10_000)
+    for name in ("a", "b", "c"):
+        assert cache.store(name, f"https://x.test/{name}", b"x" * 2800, ttl=60)
+    cache.lookup("a")
+    assert cache.store("d", "https://x.test/d", b"x" * 2800, ttl=60)
+
+    assert cache.lookup("b") is None
+    assert all(cache.lookup(name) is not None for name in ("a", "c", "d"))
+    cache.close()
+
+
+def test_web_search_results_are_cached_by_topic(cache, monkeypatch):
+    searches = []
+
+    class _Tavily:
+        def search(self, query, **kwargs):
+            searches.append((query, kwargs["topic"]))
+            return {"query": query, "results": [{"title": "Result"}]}
+
+    monkeypatch.setattr(tools, "_tavily_client", _Tavily())
+    monkeypatch.setattr(tools, "_get_tavily_client", lambda: tools._tavily_client)
+
+    first = tools.web_search("Python  asyncio")
+    assert tools.web_search("python asyncio") == first
+    tools.web_search("python asyncio", topic="news")
+    tools.web_search("python asyncio", use_cache=False)
+
+    assert searches == [
+        ("Python  asyncio", "general"),
+        ("python asyncio", "news"),
+        ("python asyncio", "general"),
+    ]
+    report = format_report(cache)
+    assert "web_search: session 1/3 (33%; 0 revalidated, 1 bypassed)" in report
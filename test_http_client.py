@@ -0,0 +1,151 @@
+"""Test the shared HTTP clients: retries, per-host limits and connection reuse."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from deepagents_cli import http_client
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Route the shared clients through a MockTransport calling ``handler``."""
+    calls: list[httpx.Request] = []
+    handlers = {}
+
+    async def _handle(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return await handlers["handler"](request)
+
+    options = http_client._client_options
+
+    def _options():
+        return {**options(), "transport": httpx.MockTransport(_handle)}
+
+    monkeypatch.setattr(http_client, "_client_options", _options)
+    monkeypatch.setattr(http_client, "BACKOFF_BASE_S", 0.001)
+
+    def _install(handler):
+        handlers["handler"] = handler
+        return calls
+
+    return _install
+
+
+def test_retryable_statuses_depend_on_the_method(transport):
+    statuses = iter([503, 502, 502, 200])
+
+    async def _handler(request):
+        return httpx.Response(next(statuses))
+
+    calls = transport(_handler)
+
+    async def _run():
+        # 503 is retried for POST, but 502 only for GET (POST isn't idempotent)
+        post = await http_client.arequest("POST", "https://api.test/x")
+        get = await http_client.arequest("GET", "https://api.test/y")
+        await http_client.aclose()
+        return post.status_code, get.status_code
+
+    assert asyncio.run(_run()) == (502, 200)
+    assert [c.method for c in calls] == ["POST", "POST", "GET", "GET"]
+
+
+def test_retry_after_is_honoured_or_gives_up(transport):
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(200),
+            httpx.Response(429, headers={"Retry-After": "3600"}),
+        ]
+    )
+
+    async def _handler(request):
+        return next(responses)
+
+    calls = transport(_handler)
+
+    async def _run():
+        first = await http_client.arequest("POST", "https://api.test/x")
+        second = await http_client.arequest("POST", "https://api.test/x")
+        await http_client.aclose()
+        return first.status_code, second.status_code
+
+    assert asyncio.run(_run()) == (200, 429)
+    assert len(calls) == 3
+
+
+def test_connect_errors_are_retried_then_raised(transport):
+    async def _handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    calls = transport(_handler)
+
+    async def _run():
+        try:
+            await http_client.arequest("POST", "https://down.test/", retries=2)
+        finally:
+            await http_client.aclose()
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(_run())
+    assert len(calls) == 3
+
+
+def test_concurrency_is_limited_per_host(transport, monkeypatch):
+    monkeypatch.setattr(http_client, "_host_limits", {})
+    http_client.set_host_concurrency("slow.test", 2)
+    active = {"slow.test": 0, "fast.test": 0}
+    peak = dict(active)
+
+    async def _handler(request):
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.02)
+        active[host] -= 1
+        return httpx.Response(200)
+
+    transport(_handler)
+
+    async def _run():
+        await asyncio.gather(
+            *(http_client.arequest("GET", f"https://{host}/") for host in active for _ in range(6))
+        )
+        await http_client.aclose()
+
+    asyncio.run(_run())
+    assert peak == {"slow.test": 2, "fast.test": 6}
+
+
+def test_sync_requests_reuse_one_connection():
+    ports: set[int] = set()
+
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):  # noqa: N802
+            ports.add(self.client_address[1])
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/"
+        bodies = [http_client.request("GET", url).text for _ in range(5)]
+    finally:
+        http_client.close()
+        server.shutdown()
+    assert bodies == ["ok"] * 5
+    assert len(ports) == 1
@@ -0,0 +1,227 @@
+"""Test local merging of lazy edits and its use by fast_apply."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from deepagents_cli import http_client, lazy_edit, tools
+from deepagents_cli.lazy_edit import AmbiguousEditError, edit_window, merge
+
+ORIGINAL = """import os
+
+
+class Counter:
+    def __init__(self):
+        self.size = 0
+
+    def grow(self):
+        self.size += 1
+        return self.size
+
+    def shrink(self):
+        self.size -= 1
+        return self.size
+"""
+
+
+def test_replaces_lines_between_anchors():
+    edit = """# ... existing code ...
+    def grow(self):
+        self.size += 2
+        return self.size
+# ... existing code ...
+"""
+    assert merge(ORIGINAL, edit) == ORIGINAL.replace("size += 1", "size += 2")
+
+
+def test_inserts_a_method_after_its_anchor():
+    edit = """# ... existing code ...
+        self.size = 0
+
+    def reset(self):
+        self.size = 0
+
+    def grow(self):
+# ... existing code ...
+"""
+    merged = merge(ORIGINAL, edit)
+    assert merged.replace("    def reset(self):\n        self.size = 0\n\n", "", 1) == ORIGINAL
+    assert merged.index("def reset") < merged.index("def grow")
+
+
+def test_edits_at_both_ends_of_the_file():
+    edit = """import os
+import sys
+
+
+class Counter:
+# ... existing code ...
+        self.size -= 1
+        return self.size
+
+    def __len__(self):
+        return self.size
+"""
+    merged = merge(ORIGINAL, edit)
+    expected = ORIGINAL.replace("import os\n", "import os\nimport sys\n")
+    assert merged == expected + "\n    def __len__(self):\n        return self.size\n"
+
+
+def test_keeps_crlf_newlines():
+    original = ORIGINAL.replace("\n", "\r\n")
+    edit = (
+        "# ... existing code ...\n    def shrink(self):\n        self.size -= 2\n"
+        "        return self.size\n"
+    )
+    assert merge(original, edit) == original.replace("size -= 1", "size -= 2")
+
+
+def test_ambiguous_edits_are_refused():
+    ambiguous = [
+        # The only anchor, "return self.size", occurs twice
+        "// ... existing code ...\n        self.size -= 2\n        return self.size\n// ...\n",
+        # "return self.size" could be the end of grow() or of shrink()
+        "# ... existing code ...\n        return self.size\n\n    def __len__(self):\n"
+        "        return 0\n",
+        # A head only, and the line after it continues the same block
+        "# ... existing code ...\n    def shrink(self):\n        self.size -= 2\n# ...\n",
+        # Existing content but no markers
+        "print('no markers')\n",
+    ]
+    for edit in ambiguous:
+        with pytest.raises(AmbiguousEditError):
+            merge(ORIGINAL, edit)
+    assert merge("", "print('new file')\n") == "print('new file')\n"
+
+
+def test_tail_in_a_later_block_is_refused():
+    original = "def f():\n    a = 1\n    b = 2\n\ndef g():\n    return None\n"
+    # The nearest "return None" is g's, so merging would delete def g()
+    edit = "# ... existing code ...\ndef f():\n    y = compute()\n    return None\n# ...\n"
+    with pytest.raises(AmbiguousEditError):
+        merge(original, edit)
+
+    # Statements replaced within one block still merge locally
+    edit = "# ... existing code ...\n    a = 1\n    b = 20\n\ndef g():\n# ...\n"
+    assert merge(original, edit) == original.replace("b = 2", "b = 20")
+
+
+def test_lone_closing_brace_anchors_after_its_head():
+    original = "function f() {\n\n  return 1;\n}\n\nfunction g() {\n  return 0;\n}\n"
+    edit = "function f() {\n\n  return 2;\n}\n// ... existing code ...\n"
+    assert merge(original, edit) == original.replace("return 1", "return 2")
+
+    # Inserting after f() is unclear: its lines look like g()'s
+    edit = "function f() {\n  return 1;\n}\n\nfunction h() {\n  return 3;\n}\n// ...\n"
+    with pytest.raises(AmbiguousEditError):
+        merge(original, edit)
+
+
+def test_tail_only_edits_of_nearby_lines_are_refused():
+    original = (
+        "from x import (\n    A,\n    B,\n)\nfrom y import C\n\n\n"
+        "@dataclass\nclass R:\n    a: int\n"
+    )
+    # Anchored only by its tail, the chunk would keep "from y import C" and add a ")"
+    edit = "# ... existing code ...\n)\nfrom y import C, D\n\n\n@dataclass\nclass R:\n# ...\n"
+    with pytest.raises(AmbiguousEditError):
+        merge(original, edit)
+
+
+def test_docstring_edits_replace_the_docstring():
+    original = 'def f():\n    """Summary.\n\n    Body line.\n    """\n    return 1\n'
+    edit = '# ...\ndef f():\n    """Summary.\n\n    New body.\n    """\n# ...\n'
+    assert merge(original, edit) == original.replace("Body line", "New body")
+
+
+def test_edit_window_surrounds_the_edited_lines():
+    lines = [f"value_{i} = compute({i})" for i in range(1000)]
+    edit = "# ... existing code ...\nvalue_500 = compute(-1)\nvalue_501 = compute(501)\n# ...\n"
+    start, end = edit_window("\n".join(lines), edit)
+    assert start == 501 - lazy_edit.WINDOW_CONTEXT_LINES
+    assert end == 502 + lazy_edit.WINDOW_CONTEXT_LINES
+    assert edit_window("\n".join(lines), "# ...\nnothing_like_it = 1\n# ...\n") is None
+
+
+@pytest.fixture
+def morph(monkeypatch):
+    """Answer Morph requests with ``reply(code)`` and record the sent code."""
+    sent: list[str] = []
+    state = {"reply": lambda code: code}
+
+    async def _handle(request: httpx.Request) -> httpx.Response:
+        content = json.loads(request.content)["messages"][0]["content"]
+        code = content.split("<code>", 1)[1].split("</code>", 1)[0]
+        sent.append(code)
+        message = {"content": state["reply"](code)}
+        return httpx.Response(200, json={"choices": [{"message": message}]})
+
+    options = http_client._client_options
+    monkeypatch.setattr(
+        http_client,
+        "_client_options",
+        lambda: {**options(), "transport": httpx.MockTransport(_handle)},
+    )
+    return state, sent
+
+
+def _run(coro):
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await http_client.aclose()
+
+    return asyncio.run(_main())
+
+
+def test_fast_apply_merges_locally_without_morph(tmp_path, monkeypatch, morph):
+    _, sent = morph
+    monkeypatch.delenv("MORPH_API_KEY", raising=False)
+    target = tmp_path / "counter.py"
+    target.write_text(ORIGINAL)
+    edit = "# ... existing code ...\n    def grow(self):\n        self.size += 2\n"
+    edit += "        return self.size\n# ... existing code ...\n"
+
+    result = _run(tools.fast_apply(str(target), "I double the step", edit))
+
+    assert result["applied"] == "local"
+    assert target.read_text() == ORIGINAL.replace("size += 1", "size += 2")
+    assert sent == []
+
+
+def test_fast_apply_sends_only_the_window_of_large_files(tmp_path, monkeypatch, morph):
+    state, sent = morph
+    monkeypatch.setenv("MORPH_API_KEY", "test-key")
+    lines = [f"value_{i} = compute({i})\n" for i in range(1000)]
+    target = tmp_path / "values.py"
+    target.write_text("".join(lines))
+    state["reply"] = lambda code: code.replace("compute(500)", "compute(-1)")
+    # Unclear whether the new line replaces value_500 or goes before it
+    edit = "# ... existing code ...\nvalue_499 = compute(499)\nvalue_500 = compute(-1)\n# ...\n"
+
+    result = _run(tools.fast_apply(str(target), "I negate value 500", edit))
+
+    assert result["applied"] == "remote"
+    assert result["window"] == "lines 460-540"
+    assert sent[0].startswith("value_459 = ")
+    expected = "".join(lines).replace("compute(500)", "compute(-1)")
+    assert target.read_text() == expected
+
+
+def test_fast_apply_does_not_write_a_refused_merge(tmp_path, monkeypatch, morph):
+    _, sent = morph
+    monkeypatch.delenv("MORPH_API_KEY", raising=False)
+    target = tmp_path / "counter.py"
+    target.write_text(ORIGINAL)
+    edit = "# ... existing code ...\n    def shrink(self):\n        self.size -= 2\n# ...\n"
+
+    result = _run(tools.fast_apply(str(target), "I double the step", edit))
+
+    assert "MORPH_API_KEY" in result["error"]
+    assert target.read_text() == ORIGINAL
+    assert sent == []
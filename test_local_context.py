@@ -0,0 +1,77 @@
+"""Test local context probing and the cached project fingerprint."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from deepagents_cli import local_context
+from deepagents_cli.local_context import LocalContextMiddleware
+
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    home = tmp_path / "home"
+    repo = tmp_path / "repo"
+    (repo / "src" / "pkg").mkdir(parents=True)
+    (repo / "src" / "pkg" / "core.py").write_text("x = 1\n")
+    (repo / "pyproject.toml").write_text("[tool.pytest.ini_options]\n")
+    (repo / "Makefile").write_text("test:\n\tpytest\n")
+    _git(repo, "init", "-q", "-b", "main")
+    identity = ("-c", "user.name=test", "-c", "user.email=test@example.com")
+    _git(repo, *identity, "commit", "-q", "--allow-empty", "-m", "init")
+    _git(repo, "branch", "feature")
+    for i in range(50):
+        _git(repo, "branch", f"topic-{i}")
+    monkeypatch.setattr(Path, "home", lambda: home)
+    monkeypatch.chdir(repo)
+    return repo
+
+
+def _context() -> str:
+    update = LocalContextMiddleware().before_agent({}, None)
+    assert update is not None
+    return update["local_context"]
+
+
+def test_context_contents(project):
+    context = _context()
+    assert "**Git**: Current branch `main`, main branch available: `main`" in context
+    assert "Language: python" in context
+    assert "**Run Tests**: `make test`" in context
+    assert "**Repo Map** (3 of 3 files" in context
+    assert "src/pkg/\n  core.py\n" in context
+    assert "- pyproject.toml" in context
+
+
+def test_fingerprint_is_reused_until_the_project_changes(project, monkeypatch):
+    first = _context()
+    assert local_context.get_fingerprint_path(project).exists()
+
+    def _no_git(*args, **kwargs):
+        raise AssertionError("cached context should not run git")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(local_context, "_run_git", _no_git)
+        assert _context() == first
+
+    # A new file bumps the directory mtime and invalidates the fingerprint.
+    (project / "src" / "new_module.py").write_text("def handler():\n    pass\n")
+    stat = (project / "src").stat()
+    os.utime(project / "src", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert "new_module.py: handler" in _context()
+
+    # So does switching branches.
+    _git(project, "checkout", "-q", "feature")
+    assert "Current branch `feature`" in _context()
+
+
+def test_context_is_skipped_once_set(project):
+    assert LocalContextMiddleware().before_agent({"local_context": "x"}, None) is None
@@ -0,0 +1,81 @@
+"""Test the multi_edit tool and its approval preview."""
+
+from __future__ import annotations
+
+from deepagents.backends.filesystem import FilesystemBackend
+
+from deepagents_cli.file_ops import build_approval_preview
+from deepagents_cli.multi_edit import MultiEditMiddleware, apply_edits
+
+SOURCE = "def area(w, h):\n    return w * h\n\n\nprint(area(2, 3))\nprint(area(4, 5))\n"
+
+
+def test_edits_apply_in_order():
+    edits = [
+        {"old_string": "def area(w, h)", "new_string": "def area(width, height)"},
+        {"old_string": "return w * h", "new_string": "return width * height"},
+        {"old_string": "area(", "new_string": "rect_area(", "replace_all": True},
+    ]
+    content, occurrences = apply_edits(SOURCE, edits)
+
+    assert content.startswith("def rect_area(width, height):\n    return width * height\n")
+    assert content.count("rect_area(") == 3
+    assert occurrences == 5
+
+
+def test_errors_name_the_failing_edit():
+    assert apply_edits(SOURCE, []) == "Error: No edits given."
+    error = apply_edits(SOURCE, [{"old_string": "w * h", "new_string": "h * w"}] * 2)
+    assert error == "Error: Edit 2 of 2: String not found in file: 'w * h'"
+    error = apply_edits(SOURCE, [{"old_string": "print", "new_string": "log"}])
+    assert error.startswith("Error: Edit 1 of 1: String 'print' appears 2 times")
+
+
+async def test_tool_writes_once_or_not_at_all(tmp_path):
+    (tmp_path / "shapes.py").write_text(SOURCE)
+    backend = FilesystemBackend(root_dir=tmp_path, virtual_mode=True)
+    tool = MultiEditMiddleware(backend=backend).tools[0]
+
+    failed = await tool.ainvoke(
+        {
+            "file_path": "/shapes.py",
+            "edits": [
+                {"old_string": "area(2, 3)", "new_string": "area(2, 4)"},
+                {"old_string": "missing", "new_string": "x"},
+            ],
+        }
+    )
+    assert failed.startswith("Error: Edit 2 of 2")
+    assert (tmp_path / "shapes.py").read_text() == SOURCE
+
+    result = tool.invoke(
+        {
+            "file_path": "/shapes.py",
+            "edits": [
+                {"old_string": "area(2, 3)", "new_string": "area(2, 4)"},
+                {"old_string": "area(4, 5)", "new_string": "area(4, 6)"},
+            ],
+        }
+    )
+    assert result.startswith("Successfully applied 2 edit(s)")
+    expected = SOURCE.replace("(2, 3)", "(2, 4)").replace("(4, 5)", "(4, 6)")
+    assert (tmp_path / "shapes.py").read_text() == expected
+
+    edits = [{"old_string": "a", "new_string": "b"}]
+    missing = tool.invoke({"file_path": "/nope.py", "edits": edits})
+    assert missing == "Error: File '/nope.py' not found"
+
+
+def test_approval_preview_shows_one_diff(tmp_path):
+    path = tmp_path / "shapes.py"
+    path.write_text(SOURCE)
+    edits = [
+        {"old_string": "area(2, 3)", "new_string": "area(2, 4)"},
+        {"old_string": "area(4, 5)", "new_string": "area(4, 6)"},
+    ]
+    preview = build_approval_preview("multi_edit", {"file_path": str(path), "edits": edits}, None)
+
+    assert "Action: Replace text (2 edits in one write)" in preview.details
+    assert "Lines changed: +2 / -2" in preview.details
+    assert preview.diff.count("@@") == 2
+    assert preview.error is None
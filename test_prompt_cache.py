@@ -0,0 +1,103 @@
+"""Test cache-friendly system prompt assembly."""
+
+from __future__ import annotations
+
+from langchain.agents.middleware.types import ModelRequest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from deepagents_cli.local_context import LocalContextMiddleware
+from deepagents_cli.prompt_cache import (
+    PromptCacheMiddleware,
+    PromptSegment,
+    build_system_message,
+    format_segment_report,
+    order_segments,
+)
+
+
+class _Model:
+    def __init__(self, llm_type: str, *, use_responses_api: bool = False) -> None:
+        self._llm_type = llm_type
+        self.use_responses_api = use_responses_api
+
+
+SEGMENTS = [
+    PromptSegment("working_directory", "Working in /repo", "session"),
+    PromptSegment("instructions", "Be helpful."),
+    PromptSegment("background_tasks", "\n## Background Task Execution\nPoll tasks."),
+]
+
+
+def _request(model: _Model, *, local_context: str = "## Local Context\n\ncwd: /a") -> ModelRequest:
+    system_message = build_system_message(order_segments(SEGMENTS))
+    # What the middleware stack appends on every model call.
+    blocks = [
+        *system_message.content_blocks,
+        {"type": "text", "text": "\n\n<agent_memory>\nprefers tabs\n</agent_memory>"},
+        {"type": "text", "text": "\n\n## Filesystem Tools\nls, read_file"},
+    ]
+    request = ModelRequest(
+        model=model,
+        messages=[HumanMessage("hi")],
+        system_message=SystemMessage(content=blocks),
+        state={"messages": [], "local_context": local_context},
+    )
+    return LocalContextMiddleware()._get_modified_request(request)
+
+
+def _run(middleware: PromptCacheMiddleware, request: ModelRequest) -> ModelRequest:
+    seen: list[ModelRequest] = []
+    middleware.wrap_model_call(request, lambda r: seen.append(r) or "response")
+    return seen[0]
+
+
+def test_segments_are_ordered_stable_first_with_breakpoints():
+    middleware = PromptCacheMiddleware(SEGMENTS)
+    request = _run(middleware, _request(_Model("anthropic-chat")))
+
+    names = [segment.name for segment in middleware.last_segments]
+    assert names == [
+        "instructions",
+        "background_tasks",
+        "Filesystem Tools",
+        "working_directory",
+        "memory",
+        "local_context",
+    ]
+    content = request.system_message.content
+    breakpoints = [i for i, block in enumerate(content) if "cache_control" in block]
+    # End of the static tier and end of the system prompt.
+    assert breakpoints == [2, 5]
+    assert content[0]["text"] == "Be helpful."
+    assert content[3]["text"] == "\n\nWorking in /repo"
+
+
+def test_static_prefix_is_shared_across_projects():
+    middleware = PromptCacheMiddleware(SEGMENTS)
+    first = _run(middleware, _request(_Model("anthropic-chat")))
+    second = _run(middleware, _request(_Model("anthropic-chat"), local_context="cwd: /b"))
+    assert first.system_message.content[:3] == second.system_message.content[:3]
+    assert first.system_message.content[5] != second.system_message.content[5]
+
+
+def test_other_providers_get_ordering_without_cache_control():
+    middleware = PromptCacheMiddleware(SEGMENTS)
+    request = _run(middleware, _request(_Model("openai-chat", use_responses_api=True)))
+    assert not any("cache_control" in block for block in request.system_message.content)
+    key = request.model_settings["prompt_cache_key"]
+    other = _run(
+        middleware, _request(_Model("openai-chat", use_responses_api=True), local_context="cwd: /b")
+    )
+    assert other.model_settings["prompt_cache_key"] == key
+
+    request = _run(middleware, _request(_Model("openai-chat")))
+    assert "prompt_cache_key" not in request.model_settings
+
+
+def test_report_lists_segment_sizes():
+    middleware = PromptCacheMiddleware(SEGMENTS)
+    _run(middleware, _request(_Model("anthropic-chat")))
+    report = format_segment_report(middleware.last_segments)
+    assert report.splitlines()[0].startswith("System prompt: ~")
+    assert "local_context" in report
+    assert "session" in report
@@ -0,0 +1,44 @@
+"""Test frame-rate-limited batching of streamed text."""
+
+import asyncio
+
+from deepagents_cli.render_scheduler import RenderScheduler
+
+
+async def test_scheduler_coalesces_chunks_between_frames():
+    frames: list[tuple[tuple, str]] = []
+
+    async def sink(key: tuple, text: str) -> None:
+        frames.append((key, text))
+
+    scheduler = RenderScheduler(sink, fps=20)
+    for text in ["a", "b", "c"]:
+        await scheduler.write((), text)
+    await scheduler.write(("task", "x"), "sub")
+
+    # First chunk per namespace renders immediately, the rest wait for a frame.
+    assert frames == [((), "a"), (("task", "x"), "sub")]
+    assert scheduler.has_pending(())
+
+    await asyncio.sleep(0.1)
+    assert frames[-1] == ((), "bc")
+    assert not scheduler.has_pending(())
+
+
+async def test_scheduler_flushes_on_byte_threshold_and_explicit_flush():
+    frames: list[str] = []
+
+    async def sink(_key: tuple, text: str) -> None:
+        frames.append(text)
+
+    scheduler = RenderScheduler(sink, fps=1, max_bytes=4)
+    await scheduler.write((), "x")
+    await scheduler.write((), "yy")
+    await scheduler.write((), "zz")
+    assert frames == ["x", "yyzz"]
+
+    await scheduler.write((), "tail")
+    await scheduler.write((), "!")
+    await scheduler.flush_all()
+    assert "".join(frames) == "xyyzztail!"
+    scheduler.close()
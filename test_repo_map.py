@@ -0,0 +1,87 @@
+"""Test repository map ranking, budgeting and caching."""
+
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+from deepagents_cli import repo_map
+from deepagents_cli.symbol_index import get_symbol_index
+from deepagents_cli.repo_map import RankedFile, build_repo_map, rank_files, render_repo_map
+
+
+def _git(cwd: Path, *args: str) -> None:
+    identity = ("-c", "user.name=test", "-c", "user.email=test@example.com")
+    subprocess.run(["git", *identity, *args], cwd=cwd, check=True, capture_output=True)
+
+
+def _repo(tmp_path: Path) -> Path:
+    pkg = tmp_path / "pkg"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    (pkg / "core.py").write_text("class Engine:\n    pass\n\n\ndef run():\n    pass\n")
+    for name in ("cli", "api", "jobs"):
+        (pkg / f"{name}.py").write_text(f"from pkg.core import Engine\n\n\ndef {name}_main():\n    pass\n")
+    (tmp_path / "notes.txt").write_text("x" * 2000)
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "init")
+    return tmp_path
+
+
+def test_imported_modules_rank_first(tmp_path):
+    root = _repo(tmp_path)
+    ranked = rank_files(root, ["pkg/core.py", "pkg/cli.py", "pkg/api.py", "notes.txt"])
+
+    assert ranked[0] == RankedFile("pkg/core.py", ranked[0].score, ("Engine", "run"))
+    assert {file.path for file in ranked[1:]} == {"pkg/cli.py", "pkg/api.py", "notes.txt"}
+
+
+def test_render_respects_the_token_budget():
+    ranked = [RankedFile(f"src/m{i:03}.py", 1 - i / 1000, ("handler",)) for i in range(500)]
+
+    small = render_repo_map(ranked, token_budget=50)
+    assert len(small.text) <= 50 * 4 + 40
+    assert small.text.splitlines()[:2] == ["src/", "  m000.py: handler"]
+    assert small.text.endswith(f"... ({500 - small.shown} more files)")
+    assert render_repo_map(ranked, token_budget=2000).shown > small.shown
+
+
+def test_map_is_cached_per_head(tmp_path, monkeypatch):
+    root = _repo(tmp_path)
+    first = build_repo_map(root)
+    assert first is not None
+    assert "pkg/\n" in first.text
+    assert "  core.py: Engine, run" in first.text
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("cached map should not be re-ranked")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(repo_map, "rank_files", _fail)
+        assert build_repo_map(root) == first
+
+    (root / "pkg" / "extra.py").write_text("def extra():\n    pass\n")
+    _git(root, "add", ".")
+    _git(root, "commit", "-q", "-m", "extra")
+    assert "  extra.py: extra" in build_repo_map(root).text
+
+
+def test_cold_index_builds_in_the_background(tmp_path, monkeypatch):
+    root = _repo(tmp_path)
+    monkeypatch.setattr(repo_map, "SYNC_INDEX_MAX_FILES", 2)
+
+    cold = build_repo_map(root)
+    assert not cold.complete
+    assert "  core.py\n" in cold.text
+    assert not (root / ".deepagents" / "index" / "repo_map.json").exists()
+
+    get_symbol_index(root).refresh_in_background().join(timeout=30)
+    warm = build_repo_map(root)
+    assert warm.complete
+    assert "  core.py: Engine, run" in warm.text
+
+
+def test_no_map_outside_git(tmp_path):
+    (tmp_path / "a.py").write_text("x = 1\n")
+    assert build_repo_map(tmp_path) is None
@@ -0,0 +1,59 @@
+"""Test pooled session database connections."""
+
+from pathlib import Path
+
+from deepagents_cli import sessions
+from deepagents_cli.session_db import (
+    MMAP_SIZE,
+    ConnectionPool,
+    open_session_databases,
+    session_connection,
+)
+
+
+async def _pragma(conn, name: str):
+    async with conn.execute(f"PRAGMA {name}") as cursor:
+        return (await cursor.fetchone())[0]
+
+
+async def test_connections_are_tuned(tmp_path):
+    async with session_connection(tmp_path / "a.db") as conn:
+        assert await _pragma(conn, "journal_mode") == "wal"
+        assert await _pragma(conn, "synchronous") == 1  # NORMAL
+        assert await _pragma(conn, "busy_timeout") == 30000
+        assert await _pragma(conn, "mmap_size") == MMAP_SIZE
+
+
+async def test_pool_reuses_and_closes_connections(tmp_path):
+    pool = ConnectionPool(tmp_path / "a.db", max_idle=1)
+    async with pool.connection() as first:
+        await first.execute("CREATE TABLE t (x)")
+        await first.execute("INSERT INTO t VALUES (1)")
+        # Left uncommitted: the pool rolls it back before reuse.
+    async with pool.connection() as second:
+        assert second is first
+        assert not second.in_transaction
+        async with pool.connection() as third:
+            assert third is not first
+    assert pool.opened == 2
+
+    await pool.aclose()
+    assert not first.is_alive()
+
+
+async def test_runtime_helpers_share_the_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+
+    async with open_session_databases() as databases:
+        async with sessions.get_checkpointer() as checkpointer, sessions.get_store() as store:
+            for _ in range(5):
+                await sessions.list_threads()
+                await sessions.find_thread()
+            sessions_pool = databases.pool(sessions.get_db_path())
+            # One connection held by the saver, one reused by every helper call.
+            assert sessions_pool.opened == 2
+            assert databases.pool(sessions.get_store_path()).opened == 1
+            saver_conn = checkpointer.conn
+            assert store.conn.isolation_level is None
+
+    assert not saver_conn.is_alive()
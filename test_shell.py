@@ -0,0 +1,248 @@
+"""Test the shell tool's streaming, output cap and process cleanup."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+import pytest
+
+from deepagents_cli import shell
+from deepagents_cli.shell import CappedOutput, ShellLimits, ShellMiddleware
+from deepagents_cli.stream_parsing import parse_tool_output
+
+
+def _run(middleware: ShellMiddleware, command: str, tool_call_id: str = "call_1"):
+    return asyncio.run(middleware._run_shell_command(command, tool_call_id=tool_call_id))
+
+
+def _alive(pid: int) -> bool:
+    # Orphans may linger as zombies when nothing reaps them, so check the state.
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_capped_output_keeps_head_and_tail():
+    capture = CappedOutput(10)
+    for chunk in (b"abc", b"defgh", b"ijklmnop", b"qrstuvwxyz"):
+        capture.feed(chunk)
+    assert capture.total == 26
+    assert bytes(capture.head) == b"abcde"
+    assert bytes(capture.tail) == b"vwxyz"
+    assert capture.omitted == 16
+    assert capture.text() == "abcde\n\n... 16 bytes of output omitted ...\n\nvwxyz"
+
+
+def test_output_and_exit_code(tmp_path):
+    middleware = ShellMiddleware(workspace_root=str(tmp_path))
+    result = _run(middleware, "pwd; echo oops >&2; exit 3")
+    assert result.status == "error"
+    assert result.content == f"{tmp_path}\n\n[stderr] oops\n\nExit code: 3"
+    assert _run(middleware, "true").content == "<no output>"
+
+
+def test_large_output_is_capped_with_head_and_tail(tmp_path):
+    middleware = ShellMiddleware(workspace_root=str(tmp_path), max_output_bytes=1000)
+    result = _run(middleware, "echo START; yes | head -c 20000000; echo END")
+    assert result.status == "success"
+    assert result.content.startswith("START\ny\n")
+    assert result.content.rstrip().endswith("END")
+    assert "Output truncated at 1000 bytes" in result.content
+    assert len(result.content) < 1100
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_timeout_kills_the_process_group(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    middleware = ShellMiddleware(workspace_root=str(tmp_path), timeout=0.5)
+    start = time.monotonic()
+    result = _run(middleware, f"echo partial; sleep 30 & echo $! > {pid_file}; wait")
+    assert time.monotonic() - start < 10
+    assert result.status == "error"
+    assert result.content.startswith("Error: Command timed out after 0.5 seconds.")
+    assert "partial" in result.content
+    child = int(pid_file.read_text())
+    time.sleep(0.1)
+    assert not _alive(child)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_cancellation_kills_the_process_group(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    middleware = ShellMiddleware(workspace_root=str(tmp_path))
+
+    async def _cancel() -> None:
+        task = asyncio.create_task(
+            middleware._run_shell_command(
+                f"sleep 30 & echo $! > {pid_file}; wait", tool_call_id="call_1"
+            )
+        )
+        while not pid_file.exists() or not pid_file.read_text().strip():
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(_cancel())
+    time.sleep(0.1)
+    assert not _alive(int(pid_file.read_text()))
+
+
+def test_output_is_streamed_while_running(tmp_path, monkeypatch):
+    events: list[object] = []
+    monkeypatch.setattr(shell, "_stream_writer", lambda: events.append)
+    middleware = ShellMiddleware(workspace_root=str(tmp_path))
+    _run(middleware, "echo one; sleep 0.3; echo two", tool_call_id="call_7")
+
+    chunks = [parse_tool_output(event) for event in events]
+    assert all(chunk is not None and chunk[0] == "call_7" for chunk in chunks)
+    assert len(chunks) >= 2
+    assert "".join(chunk[1] for chunk in chunks) == "one\ntwo\n"
+
+
+def test_persistent_shell_keeps_cwd_and_environment(tmp_path):
+    (tmp_path / "sub").mkdir()
+    middleware = ShellMiddleware(workspace_root=str(tmp_path), persistent=True)
+
+    async def _session() -> list:
+        run = middleware._run_shell_command
+        results = [
+            await run("cd sub && export GREETING=hi", tool_call_id="c1", thread_id="t1"),
+            await run('pwd; printf "$GREETING"', tool_call_id="c2", thread_id="t1"),
+            await run("echo oops >&2; false", tool_call_id="c3", thread_id="t1"),
+            await run("pwd", tool_call_id="c4", thread_id="t2"),
+        ]
+        await middleware.aclose_sessions()
+        return results
+
+    setup, state, failure, other = asyncio.run(_session())
+    assert setup.content == "<no output>"
+    assert state.content == f"{tmp_path / 'sub'}\nhi"
+    assert failure.status == "error"
+    assert failure.content == "[stderr] oops\n\nExit code: 1"
+    assert other.content == f"{tmp_path}\n"
+
+
+def test_persistent_shell_restarts_after_exit_and_timeout(tmp_path):
+    middleware = ShellMiddleware(workspace_root=str(tmp_path), timeout=0.5, persistent=True)
+
+    async def _session() -> list:
+        run = middleware._run_shell_command
+        results = [
+            await run("cd /; echo bye; exit 3", tool_call_id="c1", thread_id="t"),
+            await run("pwd", tool_call_id="c2", thread_id="t"),
+            await run("cd /; sleep 30", tool_call_id="c3", thread_id="t"),
+            await run("pwd", tool_call_id="c4", thread_id="t"),
+        ]
+        await middleware.aclose_sessions()
+        return results
+
+    start = time.monotonic()
+    exited, after_exit, timed_out, after_timeout = asyncio.run(_session())
+    assert time.monotonic() - start < 10
+    assert exited.content == "bye\n\nExit code: 3"
+    assert after_exit.content == f"{tmp_path}\n"
+    assert timed_out.content.startswith("Error: Command timed out after 0.5 seconds.")
+    assert "shell session was restarted" in timed_out.content
+    assert after_timeout.content == f"{tmp_path}\n"
+
+
+def test_persistent_shell_does_not_read_commands_as_stdin(tmp_path):
+    middleware = ShellMiddleware(workspace_root=str(tmp_path), persistent=True)
+
+    async def _session() -> list:
+        run = middleware._run_shell_command
+        results = [
+            await run("cat; echo done", tool_call_id="c1", thread_id="t"),
+            await run("echo \"it's\" '$HOME' $((1 + 1))", tool_call_id="c2", thread_id="t"),
+        ]
+        await middleware.aclose_sessions()
+        return results
+
+    stdin_reader, quoting = asyncio.run(_session())
+    assert stdin_reader.content == "done\n"
+    assert quoting.content == "it's $HOME 2\n"
+
+
+def test_persistent_shells_are_capped_and_closed(tmp_path):
+    middleware = ShellMiddleware(workspace_root=str(tmp_path), persistent=True, max_sessions=2)
+
+    async def _session() -> tuple[list, list, list]:
+        run = middleware._run_shell_command
+        for thread_id in ("t1", "t2", "t1", "t3"):
+            await run("echo $$", tool_call_id="c", thread_id=thread_id)
+        after_cap = list(middleware._sessions)
+        shell.close_thread_sessions("t1")
+        after_leave = list(middleware._sessions)
+        await shell.aclose_all_sessions()
+        return after_cap, after_leave, list(middleware._sessions)
+
+    after_cap, after_leave, after_shutdown = asyncio.run(_session())
+    # t2 was used least recently when t3 needed a shell
+    assert after_cap == ["t1", "t3"]
+    assert after_leave == ["t3"]
+    assert after_shutdown == []
+
+
+def test_limits_from_environment(monkeypatch, caplog):
+    monkeypatch.setenv("DEEPAGENTS_SHELL_CPU_SECONDS", "30")
+    monkeypatch.setenv("DEEPAGENTS_SHELL_MEMORY_MB", "512")
+    monkeypatch.setenv("DEEPAGENTS_SHELL_MAX_OPEN_FILES", "nope")
+    monkeypatch.delenv("DEEPAGENTS_SHELL_MAX_PROCESSES", raising=False)
+    limits = ShellLimits.from_environment()
+    assert limits == ShellLimits(cpu_seconds=30, memory_bytes=512 * 1024 * 1024)
+    assert "Ignoring DEEPAGENTS_SHELL_MAX_OPEN_FILES='nope'" in caplog.text
+    assert limits.enabled
+    assert not ShellLimits().enabled
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs setrlimit")
+def test_limits_apply_to_fresh_and_persistent_shells(tmp_path):
+    limits = ShellLimits(cpu_seconds=7, open_files=64)
+    middleware = ShellMiddleware(workspace_root=str(tmp_path), limits=limits)
+    assert _run(middleware, "ulimit -t; ulimit -n").content == "7\n64\n"
+
+    persistent = ShellMiddleware(workspace_root=str(tmp_path), limits=limits, persistent=True)
+
+    async def _session():
+        result = await persistent._run_shell_command(
+            "ulimit -t; ulimit -n", tool_call_id="c1", thread_id="t"
+        )
+        await persistent.aclose_sessions()
+        return result
+
+    assert asyncio.run(_session()).content == "7\n64\n"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs setrlimit")
+def test_cpu_limit_kills_busy_loop(tmp_path):
+    middleware = ShellMiddleware(workspace_root=str(tmp_path), limits=ShellLimits(cpu_seconds=1))
+    start = time.monotonic()
+    result = _run(middleware, "while :; do :; done")
+    assert time.monotonic() - start < 10
+    assert result.status == "error"
+    assert "Exit code: " in result.content
+    assert result.response_metadata["resource_usage"]["cpu_seconds"] >= 0.9
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="RLIMIT_AS is Linux-only")
+def test_memory_limit_and_usage_metadata(tmp_path):
+    python = sys.executable
+    allocate = f"{python} -c 'b = bytearray(300 * 1024 * 1024); print(len(b))'"
+    middleware = ShellMiddleware(workspace_root=str(tmp_path))
+    result = _run(middleware, allocate)
+    assert result.status == "success"
+    usage = result.response_metadata["resource_usage"]
+    assert usage["max_rss_bytes"] > 250 * 1024 * 1024
+    assert usage["cpu_seconds"] >= 0
+
+    limited = ShellMiddleware(
+        workspace_root=str(tmp_path), limits=ShellLimits(memory_bytes=200 * 1024 * 1024)
+    )
+    result = _run(limited, allocate)
+    assert result.status == "error"
+    assert "MemoryError" in result.content
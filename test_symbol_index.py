@@ -0,0 +1,135 @@
+"""Test the ast symbol index and the find_definition/find_references/outline_file tools."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+
+from deepagents_cli import symbol_index, tools
+from deepagents_cli.symbol_index import SymbolIndex, module_name
+
+
+def _project(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    package = tmp_path / "src" / "shop"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text("from .cart import Cart\n")
+    (package / "cart.py").write_text(
+        "from dataclasses import dataclass\n"
+        "\n"
+        "from . import pricing\n"
+        "\n"
+        "TAX = 0.2\n"
+        "\n"
+        "\n"
+        "@dataclass\n"
+        "class Cart:\n"
+        "    items: list\n"
+        "\n"
+        "    def total(self, discount: float = 0.0) -> float:\n"
+        "        return pricing.price(self.items) * (1 + TAX) - discount\n"
+    )
+    (package / "pricing.py").write_text("def price(items):\n    return sum(items)\n")
+    (tmp_path / "main.py").write_text(
+        "from shop.cart import Cart\n\nprint(Cart([1, 2]).total())\n"
+    )
+    return tmp_path
+
+
+def test_module_names_follow_package_layout():
+    assert module_name("src/shop/cart.py") == "shop.cart"
+    assert module_name("src/shop/__init__.py") == "shop"
+    assert module_name("main.py") == "main"
+
+
+def test_definitions_spans_and_qualified_lookup(tmp_path):
+    index = SymbolIndex(_project(tmp_path))
+
+    [cart] = index.find_definition("Cart")
+    assert (cart.path, cart.kind, cart.line, cart.end_line) == ("src/shop/cart.py", "class", 8, 13)
+    [total] = index.find_definition("Cart.total")
+    assert total.kind == "method"
+    assert total.signature == "def total(self, discount: float=0.0) -> float"
+    assert index.find_definition("shop.cart.Cart.total") == [total]
+    assert index.find_definition("Other.total") == []
+    [module] = index.find_definition("shop.pricing")
+    assert (module.kind, module.path) == ("module", "src/shop/pricing.py")
+    index.close()
+
+
+def test_references_include_resolved_relative_imports(tmp_path):
+    index = SymbolIndex(_project(tmp_path))
+
+    refs = {(ref.path, ref.line, ref.kind) for ref in index.find_references("Cart")}
+    assert refs == {
+        ("main.py", 1, "import"),
+        ("main.py", 3, "use"),
+        ("src/shop/__init__.py", 1, "import"),
+    }
+    pricing_refs = {(ref.path, ref.line, ref.kind) for ref in index.find_references("pricing")}
+    assert ("src/shop/cart.py", 3, "import") in pricing_refs
+    assert ("src/shop/cart.py", 13, "use") in pricing_refs
+    index.close()
+
+
+def test_refresh_reparses_only_changed_files(tmp_path):
+    root = _project(tmp_path)
+    index = SymbolIndex(root)
+    assert index.refresh().parsed == 4
+    assert index.refresh().parsed == 0
+
+    pricing = root / "src" / "shop" / "pricing.py"
+    pricing.write_text("def price(items):\n    return sum(items)\n\n\ndef refund(items):\n    pass\n")
+    stat = pricing.stat()
+    os.utime(pricing, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    (root / "main.py").unlink()
+
+    stats = index.refresh()
+    assert (stats.parsed, stats.removed) == (1, 1)
+    assert [s.line for s in index.find_definition("refund")] == [5]
+    assert index.find_references("Cart") == [
+        symbol_index.Reference("src/shop/__init__.py", 1, "import", "from .cart import Cart")
+    ]
+    index.close()
+
+
+def test_process_pool_build_matches_serial(tmp_path, monkeypatch):
+    root = _project(tmp_path)
+    serial = SymbolIndex(root, db_path=tmp_path / "serial.db")
+    serial.refresh()
+    monkeypatch.setattr(symbol_index, "POOL_MIN_FILES", 1)
+    pooled = SymbolIndex(root, db_path=tmp_path / "pooled.db")
+    pooled.refresh()
+
+    assert pooled.outline("src/shop/cart.py") == serial.outline("src/shop/cart.py")
+    serial.close()
+    pooled.close()
+
+
+def test_symbol_tools(tmp_path, monkeypatch):
+    root = _project(tmp_path)
+    (root / "broken.py").write_text("def broken(:\n")
+    monkeypatch.setattr(tools.settings, "project_root", root)
+    monkeypatch.setattr(symbol_index, "_indexes", {})
+
+    assert tools.find_definition("price")["definitions"] == [
+        {
+            "path": "src/shop/pricing.py",
+            "lines": "1-2",
+            "kind": "function",
+            "name": "price",
+            "signature": "def price(items)",
+        }
+    ]
+    assert "main.py:3:print(Cart([1, 2]).total())" in tools.find_references("total")["references"]
+
+    outline = tools.outline_file("src/shop/cart.py")
+    assert outline["imports"] == ["dataclasses.dataclass", "shop.pricing"]
+    assert outline["outline"] == [
+        "5-5 TAX =",
+        "8-13 class Cart",
+        "  10-10 items =",
+        "  12-13 def total(self, discount: float=0.0) -> float",
+    ]
+    assert "Could not parse" in tools.outline_file("broken.py")["error"]
+    assert "Not an indexed" in tools.outline_file("missing.py")["error"]
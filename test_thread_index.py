@@ -0,0 +1,143 @@
+"""Test the thread index maintained alongside checkpoints."""
+
+import argparse
+import sqlite3
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from deepagents_cli import main, sessions
+
+
+def _graph(checkpointer):
+    builder = StateGraph(MessagesState)
+    builder.add_node("reply", lambda _state: {"messages": [AIMessage(content="hi")]})
+    builder.add_edge(START, "reply")
+    builder.add_edge("reply", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def _config(thread_id: str, agent: str, updated_at: datetime) -> dict:
+    return {
+        "configurable": {"thread_id": thread_id},
+        "metadata": {"agent_name": agent, "updated_at": updated_at.isoformat()},
+    }
+
+
+async def _run(graph, thread_id: str, agent: str, updated_at: datetime) -> None:
+    await graph.ainvoke(
+        {"messages": [HumanMessage(content="hello")]}, _config(thread_id, agent, updated_at)
+    )
+
+
+async def test_thread_index_tracks_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    assert await sessions.list_threads() == []
+
+    now = datetime.now(UTC)
+    async with sessions.get_checkpointer() as checkpointer:
+        graph = _graph(checkpointer)
+        await _run(graph, "t1", "coder", now - timedelta(hours=2))
+        await _run(graph, "t2", "writer", now - timedelta(hours=1))
+        await _run(graph, "t1", "coder", now)
+
+    threads = await sessions.list_threads()
+    assert [t["thread_id"] for t in threads] == ["t1", "t2"]
+    assert threads[0]["agent_name"] == "coder"
+    assert threads[0]["message_count"] == 4
+    assert threads[0]["created_at"] < threads[0]["updated_at"]
+
+    assert [t["thread_id"] for t in await sessions.list_threads("writer")] == ["t2"]
+    assert await sessions.get_most_recent() == "t1"
+    assert await sessions.get_most_recent("writer") == "t2"
+    assert await sessions.get_thread_agent("t2") == "writer"
+    assert (await sessions.find_thread("t2"))["message_count"] == 2
+    assert await sessions.find_thread("missing") is None
+
+    assert await sessions.delete_thread("t1")
+    assert not await sessions.thread_exists("t1")
+    assert [t["thread_id"] for t in await sessions.list_threads()] == ["t2"]
+
+
+async def test_thread_index_backfills_existing_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    db_path = sessions.get_db_path()
+
+    # Checkpoints written by a plain saver, before the index existed.
+    async with AsyncSqliteSaver.from_conn_string(str(db_path)) as checkpointer:
+        await _run(_graph(checkpointer), "old", "legacy", datetime.now(UTC))
+
+    with sqlite3.connect(db_path) as conn:
+        assert not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'thread_index'"
+        ).fetchone()
+
+    thread = await sessions.find_thread()
+    assert thread["thread_id"] == "old"
+    assert thread["agent_name"] == "legacy"
+    assert thread["message_count"] is None
+
+    # Opening the indexing saver decodes the latest checkpoint once.
+    async with sessions.get_checkpointer():
+        pass
+    assert (await sessions.find_thread("old"))["message_count"] == 2
+
+
+async def test_prune_threads_keeps_recent_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    now = datetime.now(UTC)
+    async with sessions.get_checkpointer() as checkpointer:
+        graph = _graph(checkpointer)
+        for _ in range(20):
+            await _run(graph, "busy", "coder", now)
+        await _run(graph, "stale", "coder", now - timedelta(days=40))
+        await _run(graph, "pinned", "coder", now - timedelta(days=40))
+
+    result = await sessions.prune_threads(
+        keep_checkpoints=2, max_age_days=30, exclude={"pinned"}
+    )
+
+    assert result.threads_deleted == 1
+    assert result.checkpoints_deleted > 20
+    assert result.bytes_reclaimed > 0
+    assert {t["thread_id"] for t in await sessions.list_threads()} == {"busy", "pinned"}
+    with sqlite3.connect(sessions.get_db_path()) as conn:
+        counts = dict(
+            conn.execute("SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id")
+        )
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert counts["busy"] == 2
+    assert counts["pinned"] > 2
+
+    # Resuming still sees the latest state of a pruned thread.
+    async with sessions.get_checkpointer() as checkpointer:
+        state = await _graph(checkpointer).aget_state({"configurable": {"thread_id": "busy"}})
+    assert len(state.values["messages"]) == 40
+
+
+async def test_maybe_auto_prune_runs_once_per_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    monkeypatch.delenv("DEEPAGENTS_PRUNE_KEEP_CHECKPOINTS", raising=False)
+    monkeypatch.delenv("DEEPAGENTS_PRUNE_MAX_AGE_DAYS", raising=False)
+    assert await sessions.maybe_auto_prune() is None
+
+    monkeypatch.setenv("DEEPAGENTS_PRUNE_KEEP_CHECKPOINTS", "5")
+    assert await sessions.maybe_auto_prune() is not None
+    assert await sessions.maybe_auto_prune() is None
+
+
+async def test_prune_keeps_at_least_one_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(Path, "home", lambda: tmp_path)
+    with pytest.raises(ValueError, match="at least 1"):
+        await sessions.prune_threads(keep_checkpoints=0)
+    with pytest.raises(argparse.ArgumentTypeError, match="at least 1"):
+        main._positive_int("0")
+    assert main._positive_int("3") == 3
+
+    monkeypatch.setenv("DEEPAGENTS_PRUNE_KEEP_CHECKPOINTS", "0")
+    monkeypatch.delenv("DEEPAGENTS_PRUNE_MAX_AGE_DAYS", raising=False)
+    assert sessions.auto_prune_policy() == (None, None)
@@ -0,0 +1,48 @@
+"""Test incremental tool-call argument assembly."""
+
+import json
+
+from deepagents_cli.tool_call_args import ToolCallArgsAssembler, ToolCallBuffers
+
+
+def _stream(payload: str, size: int) -> list[str]:
+    return [payload[i : i + size] for i in range(0, len(payload), size)]
+
+
+def test_assembler_waits_for_complete_structure():
+    payload = json.dumps({"content": 'a "quoted" {brace} \\ [x]', "n": [1, {"b": 2}]})
+    assembler = ToolCallArgsAssembler()
+    chunks = _stream(payload, 3)
+    for chunk in chunks[:-1]:
+        assembler.feed(chunk)
+        assert assembler.parse() == (False, None)
+    assembler.feed(chunks[-1])
+    assert assembler.parse() == (True, json.loads(payload))
+
+
+def test_assembler_handles_escape_split_across_chunks():
+    assembler = ToolCallArgsAssembler()
+    for chunk in ['{"a": "x\\', '"', '}', '"}']:
+        assembler.feed(chunk)
+    assert assembler.parse() == (True, {"a": 'x"}'})
+
+
+def test_buffers_share_namespaces_and_dedupe():
+    buffers = ToolCallBuffers()
+    ns = ("task", "sub-1")
+    assert buffers.feed(ns, {"name": "read_file", "id": "c1", "index": 0, "args": '{"pa'}) is None
+    assert buffers.feed((), {"name": "ls", "id": "c2", "index": 0, "args": "{}"}).args == {}
+    # Consecutive duplicate fragments are ignored.
+    assert buffers.feed(ns, {"index": 0, "args": 'th": '}) is None
+    assert buffers.feed(ns, {"index": 0, "args": 'th": '}) is None
+    call = buffers.feed(ns, {"index": 0, "args": '"/a"}'})
+    assert (call.name, call.id, call.args) == ("read_file", "c1", {"path": "/a"})
+    assert len(buffers) == 0
+
+
+def test_buffers_accept_structured_and_scalar_args():
+    buffers = ToolCallBuffers()
+    call = buffers.feed((), {"type": "tool_call", "name": "ls", "id": "c3", "args": {"p": 1}})
+    assert call.args == {"p": 1}
+    call = buffers.feed((), {"name": "echo", "id": "c4", "index": 1, "args": "42"})
+    assert call.args == {"value": 42}
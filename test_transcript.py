@@ -0,0 +1,107 @@
+"""Tests for the virtualized resume transcript."""
+
+from __future__ import annotations
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from textual.app import App, ComposeResult
+from textual.containers import Container, VerticalScroll
+
+from deepagents_cli.widgets.messages import ToolCallMessage
+from deepagents_cli.widgets.transcript import (
+    TranscriptRecord,
+    TranscriptWindow,
+    VirtualTranscript,
+    records_from_messages,
+)
+
+
+def test_records_from_messages_folds_tool_results():
+    records = records_from_messages(
+        [
+            HumanMessage(content="[SYSTEM] injected"),
+            HumanMessage(content="list files"),
+            AIMessage(
+                content="Looking.",
+                tool_calls=[
+                    {"id": "a", "name": "ls", "args": {"path": "."}},
+                    {"id": "b", "name": "read_file", "args": {"file_path": "x"}},
+                ],
+            ),
+            ToolMessage(content="x.py", tool_call_id="a"),
+        ]
+    )
+    assert [(r.kind, r.tool_name) for r in records] == [
+        ("user", ""),
+        ("assistant", ""),
+        ("tool", "ls"),
+        ("tool", "read_file"),
+    ]
+    assert records[2].tool_status == "success"
+    assert records[2].content == "x.py"
+    assert records[3].tool_status == "rejected"
+
+
+def test_window_pages_and_evicts():
+    window = TranscriptWindow(100, page_size=10, max_materialized=25)
+    assert window.page_older() == (range(90, 100), range(100, 100))
+    window.page_older()
+    added, evicted = window.page_older()
+    assert added == range(70, 80)
+    assert evicted == range(95, 100)
+    assert (window.start, window.end) == (70, 95)
+
+    added, evicted = window.page_newer()
+    assert added == range(95, 100)
+    assert evicted == range(70, 75)
+    assert not window.has_newer
+
+
+class _TranscriptProbeApp(App[None]):
+    CSS_PATH = "src/deepagents_cli/app.tcss"
+
+    def __init__(self, records: list[TranscriptRecord]) -> None:
+        super().__init__()
+        self.transcript = VirtualTranscript(records, page_size=10, max_materialized=30)
+
+    def compose(self) -> ComposeResult:
+        with VerticalScroll(id="chat"):
+            yield Container(id="messages")
+
+    async def on_mount(self) -> None:
+        await self.query_one("#messages").mount(self.transcript)
+        await self.transcript.load_older()
+        self.transcript.follow_scroll(self.query_one("#chat"))
+        self.query_one("#chat").scroll_end(animate=False)
+
+
+async def test_transcript_materializes_only_a_window():
+    records = [TranscriptRecord("user", f"message {i}") for i in range(1000)]
+    records[-1] = TranscriptRecord("tool", "ok", tool_name="ls", tool_status="success")
+    app = _TranscriptProbeApp(records)
+
+    async with app.run_test(size=(80, 24)) as pilot:
+        await pilot.pause()
+        transcript = app.transcript
+        # The newest page, plus pages to fill a screen of margin above it.
+        assert 10 <= transcript.materialized <= 30
+        assert transcript.window.end == 1000
+        initial_start = transcript.window.start
+        assert len(app.query(ToolCallMessage)) == 1
+
+        chat = app.query_one("#chat", VerticalScroll)
+        for _ in range(20):
+            if transcript.window.start < initial_start - 20:
+                break
+            chat.scroll_home(animate=False)
+            await pilot.pause(0.05)
+        assert transcript.window.start < initial_start - 20
+        assert transcript.materialized <= 30
+        assert transcript.window.end < 1000
+
+        for _ in range(40):
+            if not transcript.window.has_newer:
+                break
+            chat.scroll_end(animate=False)
+            await pilot.pause(0.05)
+        assert transcript.window.end == 1000
+        assert transcript.materialized <= 30
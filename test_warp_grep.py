@@ -0,0 +1,98 @@
+"""Test warp_grep's parallel local tool calls, file cache and warp_grep_many."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+from deepagents_cli import tools
+
+
+def _script(monkeypatch, responses: list[str]) -> list[list[dict[str, str]]]:
+    """Make _call_morph return ``responses`` in turn, recording each request."""
+    monkeypatch.setenv("MORPH_API_KEY", "test")
+    requests: list[list[dict[str, str]]] = []
+    replies = iter(responses)
+
+    def _fake_call(messages: list[dict[str, str]]) -> str:
+        requests.append(list(messages))
+        return next(replies)
+
+    monkeypatch.setattr(tools, "_call_morph", _fake_call)
+    return requests
+
+
+def test_turn_tool_calls_run_in_parallel_and_keep_order(tmp_path, monkeypatch):
+    requests = _script(
+        monkeypatch,
+        [
+            "".join(f"<grep><pattern>p{i}</pattern></grep>" for i in range(8)),
+            "<finish></finish>",
+        ],
+    )
+    threads: set[str] = set()
+
+    def _slow_grep(_root: Path, pattern: str, _sub_dir: str = ".", _glob: str | None = None) -> str:
+        threads.add(threading.current_thread().name)
+        time.sleep(0.2)
+        return f"matched {pattern}"
+
+    monkeypatch.setattr(tools, "_execute_grep", _slow_grep)
+
+    start = time.monotonic()
+    result = tools.warp_grep("find things", repo_root=str(tmp_path))
+    assert time.monotonic() - start < 1.0
+    assert result["results"] == []
+    assert len(threads) > 1
+
+    turn_results = requests[1][-1]["content"]
+    positions = [turn_results.index(f"matched p{i}") for i in range(8)]
+    assert positions == sorted(positions)
+
+
+def test_files_are_read_once_per_invocation(tmp_path, monkeypatch):
+    (tmp_path / "app.py").write_text("import os\n\ndef main():\n    pass\n")
+    _script(
+        monkeypatch,
+        [
+            "<read><path>app.py</path><lines>1-2</lines></read>"
+            "<read><path>app.py</path><lines>3-4</lines></read>",
+            "<read><path>app.py</path></read>",
+            "<finish><file><path>app.py</path><lines>3-4</lines></file>"
+            "<file><path>missing.py</path></file></finish>",
+        ],
+    )
+    reads: list[Path] = []
+    real_read_text = Path.read_text
+
+    def _counting_read_text(self: Path, *args, **kwargs) -> str:
+        reads.append(self)
+        return real_read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", _counting_read_text)
+
+    result = tools.warp_grep("where is main", repo_root=str(tmp_path))
+    assert result["results"] == [
+        {"path": "app.py", "content": "3|def main():\n4|    pass"},
+        {"path": "missing.py", "content": "Error: file not found: missing.py"},
+    ]
+    assert reads == [(tmp_path / "app.py").resolve()]
+
+
+def test_warp_grep_many_runs_searches_concurrently(monkeypatch):
+    def _slow_search(query: str, repo_root: str | None = None) -> dict[str, object]:
+        time.sleep(0.2)
+        if query == "bad":
+            return {"error": "WarpGrep returned no tool calls."}
+        return {"query": query, "repo_root": repo_root, "results": []}
+
+    monkeypatch.setattr(tools, "warp_grep", _slow_search)
+
+    start = time.monotonic()
+    result = asyncio.run(tools.warp_grep_many(["a", "bad", "c", "d"], repo_root="/repo"))
+    assert time.monotonic() - start < 0.6
+    assert [search["query"] for search in result["searches"]] == ["a", "bad", "c", "d"]
+    assert result["searches"][1] == {"query": "bad", "error": "WarpGrep returned no tool calls."}
+    assert result["searches"][0]["repo_root"] == "/repo"
@@ -0,0 +1,176 @@
+"""Test main-content extraction, paging and the streaming fetch_url tool."""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from deepagents_cli import http_client, web_content
+from deepagents_cli.tools import fetch_url
+from deepagents_cli.web_content import content_kind, html_to_markdown, page
+
+DOC_PAGE = """<!doctype html>
+<html><head><title>Widgets guide</title>
+<style>body { color: red }</style>
+<script>window.analytics = {"track": true};</script>
+</head><body>
+<header class="site-header"><a href="/">Home</a> <a href="/docs">Docs</a></header>
+<nav><ul><li><a href="/a">Getting started</a></li><li><a href="/b">API</a></li></ul></nav>
+<main>
+  <h1>Configuring widgets</h1>
+  <p>Widgets are configured with a <code>widget.toml</code> file in the project root.</p>
+  <div class="share-buttons">Share on social media</div>
+  <pre><code>size = 3</code></pre>
+</main>
+<aside class="sidebar">Related articles</aside>
+<footer>Copyright 2024</footer>
+</body></html>
+"""
+
+NO_MAIN_PAGE = """<html><body>
+<div id="menu"><a href="/x">Link one</a><a href="/y">Link two</a></div>
+<div class="content">
+  <p>The first paragraph explains what the tool does in enough words to count.</p>
+  <p>The second paragraph explains how to install it, again in plenty of words.</p>
+</div>
+<div class="footer"><p>Cookie policy and a long legal notice nobody wants to read here.</p></div>
+</body></html>
+"""
+
+
+def test_extraction_keeps_main_content_only():
+    title, markdown = html_to_markdown(DOC_PAGE)
+
+    assert title == "Widgets guide"
+    assert markdown.startswith("# Configuring widgets")
+    assert "`widget.toml`" in markdown
+    assert "size = 3" in markdown
+    chrome = ("analytics", "color: red", "Getting started", "Share on", "Related", "Copyright")
+    for text in chrome:
+        assert text not in markdown
+
+
+def test_extraction_falls_back_to_the_densest_block():
+    _, markdown = html_to_markdown(NO_MAIN_PAGE)
+
+    assert "first paragraph" in markdown
+    assert "second paragraph" in markdown
+    assert "Link one" not in markdown
+    assert "Cookie policy" not in markdown
+
+
+def test_content_kind():
+    assert content_kind("text/html; charset=utf-8") == "html"
+    assert content_kind("application/vnd.api+json") == "text"
+    assert content_kind("application/pdf") == "binary"
+    assert content_kind("", b"  <!DOCTYPE html><html>") == "html"
+    assert content_kind("", b"\x89PNG\r\n\x1a\n\0\0") == "binary"
+
+
+def test_pages_split_at_paragraphs_and_cover_the_text():
+    text = "\n\n".join(f"Paragraph {i} " + "word " * 30 for i in range(100))
+    chunks = []
+    cursor: int | None = 0
+    while cursor is not None:
+        chunk, cursor = page(text, cursor, size=1000)
+        assert len(chunk) <= 1000
+        chunks.append(chunk)
+
+    assert "".join(chunks) == text
+    assert all(chunk.endswith("\n\n") for chunk in chunks[:-1])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Serve ``routes`` (path -> response factory) through the shared client."""
+    routes = {}
+    hits: list[str] = []
+
+    async def _handle(request: httpx.Request) -> httpx.Response:
+        hits.append(request.url.path)
+        return routes[request.url.path]()
+
+    options = http_client._client_options
+    monkeypatch.setattr(
+        http_client,
+        "_client_options",
+        lambda: {**options(), "transport": httpx.MockTransport(_handle)},
+    )
+    monkeypatch.setattr(web_content, "_recent", type(web_content._recent)())
+    monkeypatch.setenv("DEEPAGENTS_HTTP_CACHE_MB", "0")
+    return routes, hits
+
+
+def _run(coro):
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await http_client.aclose()
+
+    return asyncio.run(_main())
+
+
+def test_fetch_url_pages_through_a_long_document(server, monkeypatch):
+    routes, hits = server
+    monkeypatch.setattr(web_content, "PAGE_CHARS", 2000)
+    paragraphs = "".join(f"<p>Section {i}: {'detail ' * 40}</p>" for i in range(40))
+    html = f"<html><head><title>Long</title></head><body><main>{paragraphs}</main></body></html>"
+    routes["/long"] = lambda: httpx.Response(200, html=html)
+
+    first = _run(fetch_url("https://docs.test/long"))
+    assert first["title"] == "Long"
+    assert first["content_length"] <= 2000
+    assert first["markdown_content"].startswith("Section 0:")
+    assert first["truncated"] is False
+
+    chunks = [first["markdown_content"]]
+    cursor = first["next_cursor"]
+    while cursor is not None:
+        result = _run(fetch_url("https://docs.test/long", cursor=cursor))
+        chunks.append(result["markdown_content"])
+        cursor = result["next_cursor"]
+    assert "".join(chunks) == html_to_markdown(html)[1]
+    assert len(chunks) > 5
+    # Continuations read the parsed page from memory
+    assert hits == ["/long"]
+
+
+def test_fetch_url_stops_at_the_byte_limit(server, monkeypatch):
+    routes, _ = server
+    monkeypatch.setenv("DEEPAGENTS_FETCH_MAX_BYTES", "4096")
+    sent = []
+
+    async def _body():
+        for i in range(1000):
+            sent.append(i)
+            yield f"line {i:04}\n".encode() * 10
+
+    routes["/huge.txt"] = lambda: httpx.Response(
+        200, headers={"Content-Type": "text/plain"}, content=_body()
+    )
+
+    result = _run(fetch_url("https://docs.test/huge.txt"))
+    assert result["truncated"] is True
+    assert result["content_length"] == 4096
+    assert result["markdown_content"].startswith("line 0000\n")
+    assert len(sent) < 50
+
+
+def test_fetch_url_skips_binary_bodies(server):
+    routes, _ = server
+    read = []
+
+    async def _body():
+        read.append(True)
+        yield b"%PDF-1.7"
+
+    routes["/paper.pdf"] = lambda: httpx.Response(
+        200, headers={"Content-Type": "application/pdf"}, content=_body()
+    )
+
+    result = _run(fetch_url("https://docs.test/paper.pdf"))
+    assert "application/pdf" in result["error"]
+    assert read == []